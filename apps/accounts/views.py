@@ -7,9 +7,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect
 from .forms import CustomUserCreationForm
 from .models import User
-from products.models import Product
 from orders.models import Comanda, Pedido
-from django.db.models import Prefetch
+from django.db.models import F, Prefetch
 from django.utils import timezone
 from django.views import View
 from django.http import JsonResponse
@@ -211,6 +210,87 @@ class ManageBanksDashboardView(LoginRequiredMixin, TemplateView):
         return context
 
 
+def _comandas_abertas():
+    """
+    Comandas em uso/aguardando caixa com o estado de exibição dos cards
+    (is_delayed, has_pending, em_atendimento, display_label/badge) e
+    revisao_card, a chave do fragmento em cache de cada card: muda só quando
+    algo que o card mostra muda.
+    """
+    _prefetch_pedidos = Prefetch(
+        'pedidos',
+        queryset=Pedido.objects.filter(status__in=['aguardando', 'preparando', 'pronta']),
+        to_attr='pedidos_ativos',
+    )
+    comandas_abertas = list(
+        Comanda.objects.filter(
+            status__in=['em_uso', 'aguardando_caixa']
+        ).prefetch_related(_prefetch_pedidos).order_by(F('numero_int').asc(nulls_first=True), '-created_at')
+    )
+
+    # ---> LÓGICA DE TEMPO DA CONFIGURAÇÃO <---
+    config = SystemConfig.get_settings()
+    limit_minutes = config.max_order_time_minutes
+    agora = timezone.now()
+
+    # Analisaremos todas as comandas abertas para saber se estão atrasadas
+    for comanda in comandas_abertas:
+        comanda.is_delayed = False # Padrão: não está atrasada
+        comanda.has_pending = False # Padrão: tudo entregue ou vazia
+
+        # Pega TODOS os pedidos que não estão finalizados/entregues (avaliado como lista p/ eficiência)
+        pedidos_pendentes = comanda.pedidos_ativos
+
+        # Se encontrou algum pedido não entregue, fica amarela!
+        if pedidos_pendentes:
+            comanda.has_pending = True
+            # Azul (em_atendimento) somente se TODOS os pedidos pendentes já têm atendente registrado
+            # Caso contrário (pedido novo sem atendente), volta ao amarelo automaticamente
+            comanda.em_atendimento = all(
+                p.atendente_numero is not None for p in pedidos_pendentes
+            )
+        else:
+            # Sem pendentes: limpa o estado de atendimento no DB
+            if comanda.em_atendimento:
+                comanda.em_atendimento = False
+                comanda.atendente_numero = None
+                comanda.atendimento_em = None
+                Comanda.objects.filter(pk=comanda.pk).update(
+                    em_atendimento=False, atendente_numero=None, atendimento_em=None,
+                    updated_at=timezone.now(),
+                )
+
+        # Pedidos não impressos ainda
+        comanda.tem_nao_impressos = any(not p.impresso for p in pedidos_pendentes)
+
+        # Das pendentes, a gente checa se tem atraso (apenas as que tão aguardando/preparando entram no tempo crítico)
+        for pedido in pedidos_pendentes:
+            if pedido.status in ['aguardando', 'preparando']:
+                espera_minutos = (agora - pedido.created_at).total_seconds() / 60
+                if espera_minutos > limit_minutes:
+                    comanda.is_delayed = True
+                    break # Já achou um atrasado na comanda, vira vermelho e escapa do loop
+
+        # Label de exibição: mesa (kiosk) ou comanda normal
+        # display_badge sempre vem do numero (campo autoritativo), não do cliente_nome,
+        # para evitar inconsistência após transferência de mesa.
+        if comanda.cliente_nome and comanda.cliente_nome.upper().startswith('MESA'):
+            comanda.display_label = comanda.cliente_nome
+            comanda.display_badge = comanda.numero_exibicao
+        else:
+            comanda.display_label = f"Comanda {comanda.numero}"
+            comanda.display_badge = comanda.numero
+
+        # Tudo que home/_card_comanda.html lê da comanda
+        comanda.revisao_card = '|'.join(str(v) for v in (
+            comanda.numero, comanda.status, comanda.cliente_nome, comanda.display_label,
+            comanda.display_badge, comanda.created_at.timestamp(), comanda.em_atendimento,
+            comanda.atendente_numero, comanda.is_delayed, comanda.has_pending,
+        ))
+
+    return comandas_abertas
+
+
 class HomeView(LoginRequiredMixin, TemplateView):
     """
     Dashboard principal da cafeteria
@@ -220,80 +300,7 @@ class HomeView(LoginRequiredMixin, TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-
-        # Buscar produtos ativos que estão no cardápio
-        products = Product.objects.filter(
-            is_active=True, 
-            show_in_menu=True
-        ).order_by('category', 'name')
-        
-        # Buscar comandas abertas (não finalizadas) ordenadas por prioridade
-        hoje = timezone.now().date()
-        
-        # TESTE: Remover filtro de data
-        _prefetch_pedidos = Prefetch(
-            'pedidos',
-            queryset=Pedido.objects.filter(status__in=['aguardando', 'preparando', 'pronta']),
-            to_attr='pedidos_ativos',
-        )
-        comandas_abertas = sorted(
-            Comanda.objects.filter(
-                status__in=['em_uso', 'aguardando_caixa']
-            ).prefetch_related(_prefetch_pedidos),
-            key=lambda c: int(c.numero) if c.numero and str(c.numero).strip().isdigit() else 0
-        )
-
-                # ---> LÓGICA DE TEMPO DA CONFIGURAÇÃO <---
-        config = SystemConfig.get_settings()
-        limit_minutes = config.max_order_time_minutes
-        agora = timezone.now()
-        
-                # Analisaremos todas as comandas abertas para saber se estão atrasadas
-        for comanda in comandas_abertas:
-            comanda.is_delayed = False # Padrão: não está atrasada
-            comanda.has_pending = False # Padrão: tudo entregue ou vazia
-            
-            # Pega TODOS os pedidos que não estão finalizados/entregues (avaliado como lista p/ eficiência)
-            pedidos_pendentes = comanda.pedidos_ativos
-            
-            # Se encontrou algum pedido não entregue, fica amarela!
-            if pedidos_pendentes:
-                comanda.has_pending = True
-                # Azul (em_atendimento) somente se TODOS os pedidos pendentes já têm atendente registrado
-                # Caso contrário (pedido novo sem atendente), volta ao amarelo automaticamente
-                comanda.em_atendimento = all(
-                    p.atendente_numero is not None for p in pedidos_pendentes
-                )
-            else:
-                # Sem pendentes: limpa o estado de atendimento no DB
-                if comanda.em_atendimento:
-                    comanda.em_atendimento = False
-                    comanda.atendente_numero = None
-                    comanda.atendimento_em = None
-                    Comanda.objects.filter(pk=comanda.pk).update(
-                        em_atendimento=False, atendente_numero=None, atendimento_em=None
-                    )
-            
-            # Pedidos não impressos ainda
-            comanda.tem_nao_impressos = any(not p.impresso for p in pedidos_pendentes)
-            
-            # Das pendentes, a gente checa se tem atraso (apenas as que tão aguardando/preparando entram no tempo crítico)
-            for pedido in pedidos_pendentes:
-                if pedido.status in ['aguardando', 'preparando']:
-                    espera_minutos = (agora - pedido.created_at).total_seconds() / 60
-                    if espera_minutos > limit_minutes:
-                        comanda.is_delayed = True
-                        break # Já achou um atrasado na comanda, vira vermelho e escapa do loop
-
-            # Label de exibição: mesa (kiosk) ou comanda normal
-            # display_badge sempre vem do numero (campo autoritativo), não do cliente_nome,
-            # para evitar inconsistência após transferência de mesa.
-            if comanda.cliente_nome and comanda.cliente_nome.upper().startswith('MESA'):
-                comanda.display_label = comanda.cliente_nome
-                comanda.display_badge = str(int(comanda.numero)) if comanda.numero and comanda.numero.isdigit() else comanda.numero
-            else:
-                comanda.display_label = f"Comanda {comanda.numero}"
-                comanda.display_badge = comanda.numero
+        comandas_abertas = _comandas_abertas()
 
         # Estatísticas das comandas
         stats_comandas = {
@@ -302,7 +309,6 @@ class HomeView(LoginRequiredMixin, TemplateView):
         }
         
         context.update({
-            'products': products,
             'comandas_abertas': comandas_abertas,
             'stats_comandas': stats_comandas,
         })
@@ -664,53 +670,7 @@ class HomeCardsView(LoginRequiredMixin, View):
 
     def get(self, request):
         from django.shortcuts import render as _render
-        config = SystemConfig.get_settings()
-        limit_minutes = config.max_order_time_minutes
-        agora = timezone.now()
-
-        _prefetch_pedidos = Prefetch(
-            'pedidos',
-            queryset=Pedido.objects.filter(status__in=['aguardando', 'preparando', 'pronta']),
-            to_attr='pedidos_ativos',
-        )
-        comandas_abertas = sorted(
-            Comanda.objects.filter(
-                status__in=['em_uso', 'aguardando_caixa']
-            ).prefetch_related(_prefetch_pedidos),
-            key=lambda c: int(c.numero) if c.numero and str(c.numero).strip().isdigit() else 0
-        )
-
-        for comanda in comandas_abertas:
-            comanda.is_delayed = False
-            comanda.has_pending = False
-            pedidos_pendentes = comanda.pedidos_ativos
-            if pedidos_pendentes:
-                comanda.has_pending = True
-                # Azul (em_atendimento) somente se TODOS os pedidos pendentes já têm atendente registrado
-                comanda.em_atendimento = all(
-                    p.atendente_numero is not None for p in pedidos_pendentes
-                )
-            else:
-                if comanda.em_atendimento:
-                    comanda.em_atendimento = False
-                    comanda.atendente_numero = None
-                    comanda.atendimento_em = None
-                    Comanda.objects.filter(pk=comanda.pk).update(
-                        em_atendimento=False, atendente_numero=None, atendimento_em=None
-                    )
-            comanda.tem_nao_impressos = any(not p.impresso for p in pedidos_pendentes)
-            for pedido in pedidos_pendentes:
-                if pedido.status in ['aguardando', 'preparando']:
-                    espera_minutos = (agora - pedido.created_at).total_seconds() / 60
-                    if espera_minutos > limit_minutes:
-                        comanda.is_delayed = True
-                        break
-            if comanda.cliente_nome and comanda.cliente_nome.upper().startswith('MESA'):
-                comanda.display_label = comanda.cliente_nome
-                comanda.display_badge = str(int(comanda.numero)) if comanda.numero and comanda.numero.isdigit() else comanda.numero
-            else:
-                comanda.display_label = f"Comanda {comanda.numero}"
-                comanda.display_badge = comanda.numero
+        comandas_abertas = _comandas_abertas()
 
         return _render(request, 'home/_cards_fragment.html', {
             'comandas_abertas': comandas_abertas,
@@ -0,0 +1,63 @@
+"""
+Matriz de acesso aos bancos (UserBankAccess) de cada usuário.
+
+Todas as linhas do usuário são lidas numa query só e guardadas no próprio
+objeto user (como o _perm_cache do Django), valendo para a requisição inteira,
+e num cache do processo por BANK_ACCESS_CACHE_SECONDS. Alterações em
+UserBankAccess limpam o cache do processo na hora (banks.signals); os outros
+workers enxergam a mudança ao fim do intervalo.
+"""
+import time
+
+from django.conf import settings
+
+from .models import UserBankAccess
+
+CAMPOS = (
+    'can_view',
+    'can_change',
+    'can_add_transaction',
+    'can_pay_transaction',
+    'can_transfer_transaction',
+    'can_delete_transaction',
+)
+
+_por_usuario = {}
+
+
+def matriz_acessos(user):
+    """{bank_id: {campo: bool}} dos acessos específicos do usuário."""
+    matriz = getattr(user, '_bank_access_cache', None)
+    if matriz is not None:
+        return matriz
+
+    agora = time.monotonic()
+    guardado = _por_usuario.get(user.pk)
+    if guardado and guardado[0] > agora:
+        matriz = guardado[1]
+    else:
+        matriz = {
+            row.pop('bank_id'): row
+            for row in UserBankAccess.objects.filter(user_id=user.pk).values('bank_id', *CAMPOS)
+        }
+        _por_usuario[user.pk] = (agora + settings.BANK_ACCESS_CACHE_SECONDS, matriz)
+    user._bank_access_cache = matriz
+    return matriz
+
+
+def pode(user, bank, campo):
+    """True se o UserBankAccess do usuário no banco tem `campo` marcado."""
+    bank_id = getattr(bank, 'pk', bank)
+    return matriz_acessos(user).get(bank_id, {}).get(campo, False)
+
+
+def bancos_visiveis(user):
+    """Ids dos bancos com can_view no UserBankAccess do usuário."""
+    return [bank_id for bank_id, acesso in matriz_acessos(user).items() if acesso['can_view']]
+
+
+def invalidar(user_id=None):
+    if user_id is None:
+        _por_usuario.clear()
+    else:
+        _por_usuario.pop(user_id, None)
@@ -1,20 +1,23 @@
+from django.utils.functional import SimpleLazyObject
+
+
 def bank_access(request):
     """
     Adiciona `user_has_bank_access` ao contexto global.
     True quando o usuário tem permissão global view_bank OU acesso
     a pelo menos um banco via UserBankAccess.can_view.
+
+    Avaliado só quando o template lê a variável: páginas sem o menu de
+    bancos não fazem a consulta.
     """
     if not request.user.is_authenticated:
         return {'user_has_bank_access': False}
 
-    if request.user.is_superuser or request.user.has_perm('banks.view_bank'):
-        return {'user_has_bank_access': True}
-
-    # Usa a relação inversa do User — não importa o modelo diretamente,
-    # evitando problemas de AppRegistry durante a inicialização do Django.
-    try:
-        has_access = request.user.bank_accesses.filter(can_view=True).exists()
-    except Exception:
-        has_access = False
+    def _tem_acesso():
+        if request.user.is_superuser or request.user.has_perm('banks.view_bank'):
+            return True
+        # Import tardio: evita problemas de AppRegistry durante a inicialização do Django.
+        from banks.acessos import bancos_visiveis
+        return bool(bancos_visiveis(request.user))
 
-    return {'user_has_bank_access': has_access}
+    return {'user_has_bank_access': SimpleLazyObject(_tem_acesso)}
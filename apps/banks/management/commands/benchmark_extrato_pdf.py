@@ -0,0 +1,76 @@
+import resource
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from banks.views import _linhas_extrato_pdf
+from utils.pdf_export import LazyStory, chunked_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede tempo e pico de memória (RSS) para gerar o PDF do extrato com N "
+        "lançamentos sintéticos. Rode uma vez por modo: o pico de RSS é do processo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--linhas", type=int, default=100000, help="Quantidade de lançamentos.")
+        parser.add_argument(
+            "--materializar",
+            action="store_true",
+            help="Modo antigo: story em lista e uma única Table com todas as linhas.",
+        )
+
+    def handle(self, *args, **options):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import mm
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+        n = options["linhas"]
+        base = timezone.now()
+
+        def transacoes():
+            for i in range(n):
+                yield SimpleNamespace(
+                    data=base - timedelta(minutes=i),
+                    descricao=f"Lançamento {i}",
+                    tipo="deposito" if i % 3 else "pagamento",
+                    valor=Decimal(i % 997) + Decimal("0.50"),
+                    is_entrada=bool(i % 3),
+                    metodo_pagamento="credito" if i % 5 == 0 else "pix",
+                    bandeira="visa",
+                    taxa_tx=Decimal("0"),
+                )
+
+        rates = {"visa": {"credito": Decimal("3.10"), "debito": Decimal("1.20")}}
+        header = ["Data / Hora", "Descrição", "Tipo", "Valor"]
+        col_w = [32 * mm, 80 * mm, 28 * mm, 30 * mm]
+        style = TableStyle([("VALIGN", (0, 0), (-1, -1), "MIDDLE")])
+
+        rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        inicio = time.perf_counter()
+
+        with tempfile.TemporaryFile() as arquivo:
+            doc = SimpleDocTemplate(arquivo, pagesize=A4)
+            linhas = _linhas_extrato_pdf(transacoes(), rates)
+            if options["materializar"]:
+                table = Table([header] + list(linhas), colWidths=col_w, repeatRows=1)
+                table.setStyle(style)
+                doc.build([table])
+            else:
+                doc.build(LazyStory(chunked_table(linhas, header, col_w, style)))
+            tamanho = arquivo.tell()
+
+        duracao = time.perf_counter() - inicio
+        rss_pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        modo = "materializado" if options["materializar"] else "lazy + chunked"
+        self.stdout.write(self.style.SUCCESS(
+            f"{modo}: {n} linhas, {doc.page} paginas, PDF {tamanho / 1024 / 1024:.1f} MB, "
+            f"{duracao:.1f}s, pico RSS {rss_pico / 1024:.0f} MB (inicio {rss_inicial / 1024:.0f} MB)"
+        ))
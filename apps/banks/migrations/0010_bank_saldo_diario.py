@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banks', '0009_add_taxa_tx_to_banktransaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankSaldoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data')),
+                ('saldo_bruto', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Saldo bruto')),
+                ('total_taxa', models.DecimalField(decimal_places=4, max_digits=16, verbose_name='Taxas acumuladas')),
+                ('saldo_liquido', models.DecimalField(decimal_places=4, max_digits=16, verbose_name='Saldo líquido')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('bank', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_diarios', to='banks.bank')),
+            ],
+            options={
+                'verbose_name': 'Saldo Diário',
+                'verbose_name_plural': 'Saldos Diários',
+                'ordering': ['-data'],
+                'unique_together': {('bank', 'data')},
+            },
+        ),
+    ]
@@ -120,3 +120,29 @@ class UserBankAccess(models.Model):
 
     def __str__(self):
         return f'{self.user.username} → {self.bank.nome}'
+
+
+class BankSaldoDiario(models.Model):
+    """
+    Saldo de fechamento de um banco ao fim de um dia (cache do extrato).
+
+    Gerado sob demanda por banks.saldos e apagado a partir da data afetada
+    sempre que um lançamento, transferência ou taxa de bandeira muda
+    (banks.signals). Pode ser removido a qualquer momento sem perda de dados.
+    """
+    bank = models.ForeignKey(Bank, on_delete=models.CASCADE, related_name='saldos_diarios')
+    data = models.DateField(verbose_name="Data")
+    saldo_bruto = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Saldo bruto")
+    # 4 casas: taxa = valor × pct / 100 é exata assim, sem arredondar dia a dia
+    total_taxa = models.DecimalField(max_digits=16, decimal_places=4, verbose_name="Taxas acumuladas")
+    saldo_liquido = models.DecimalField(max_digits=16, decimal_places=4, verbose_name="Saldo líquido")
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Saldo Diário"
+        verbose_name_plural = "Saldos Diários"
+        ordering = ['-data']
+        unique_together = ('bank', 'data')
+
+    def __str__(self):
+        return f'{self.bank.nome} — {self.data:%d/%m/%Y}: R$ {self.saldo_liquido}'
@@ -0,0 +1,97 @@
+"""
+Saldos de fechamento diário dos bancos.
+
+O extrato mostra o saldo acumulado desde a abertura da conta. Em vez de somar
+todo o histórico a cada acesso, o fechamento de cada dia fica gravado em
+BankSaldoDiario e só o movimento posterior ao último fechamento é agregado.
+Os fechamentos são apagados a partir da data afetada por banks.signals e
+recriados no próximo acesso.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import BankSaldoDiario
+
+
+def calc_taxa_transferencias(transferencias_qs, rates_map):
+    """Calcula o total de taxas de um queryset de CaixaAdmTransferencia."""
+    total = Decimal('0')
+    for t in transferencias_qs.values('valor', 'metodo_pagamento', 'bandeira', 'taxa_aplicada'):
+        pct = t.get('taxa_aplicada') or Decimal('0')
+        if not pct and t['metodo_pagamento'] in ('credito', 'debito'):
+            chave = (t['bandeira'] or '').lower()
+            r = rates_map.get(chave, {})
+            pct = r.get(t['metodo_pagamento'], Decimal('0'))
+        total += t['valor'] * pct / Decimal('100')
+    return total
+
+
+def _movimento(bank, excluir_ids, ate, desde=None):
+    """Entradas - saídas liquidadas no intervalo (desde, ate], numa única query."""
+    qs = bank.transactions.filter(data__date__lte=ate).exclude(id__in=excluir_ids)
+    if desde:
+        qs = qs.filter(data__date__gt=desde)
+    agg = qs.aggregate(
+        entradas=Sum('valor', filter=Q(is_entrada=True)),
+        saidas=Sum('valor', filter=Q(is_entrada=False)),
+    )
+    return (agg['entradas'] or Decimal('0')) - (agg['saidas'] or Decimal('0'))
+
+
+def _taxas(bank, rates, ate, desde=None):
+    """Taxas das transferências conciliadas no intervalo (desde, ate]."""
+    from financials.models import CaixaAdmTransferencia
+
+    qs = CaixaAdmTransferencia.objects.filter(banco_destino=bank, conciliado=True, cancelada=False)
+    if desde:
+        qs = qs.filter(conciliado_em__date__gt=desde, conciliado_em__date__lte=ate)
+    else:
+        qs = qs.filter(Q(conciliado_em__date__lte=ate) | Q(conciliado_em__isnull=True))
+    return calc_taxa_transferencias(qs, rates)
+
+
+def saldo_ate(bank, dia, excluir_ids, rates):
+    """
+    Retorna (saldo_bruto, total_taxa) no fechamento de `dia`.
+
+    `excluir_ids` são as BankTransactions ainda "A Receber" e `rates` o mapa de
+    taxas por bandeira do pinpad ativo. Dias já encerrados têm o fechamento
+    gravado; para hoje, soma-se o delta do dia ao fechamento de ontem.
+    """
+    hoje = timezone.localdate()
+    if dia >= hoje:
+        bruto, taxa = saldo_ate(bank, hoje - timedelta(days=1), excluir_ids, rates)
+        return (
+            bruto + _movimento(bank, excluir_ids, dia, desde=hoje - timedelta(days=1)),
+            taxa + _taxas(bank, rates, dia, desde=hoje - timedelta(days=1)),
+        )
+
+    snap = bank.saldos_diarios.filter(data__lte=dia).order_by('-data').first()
+    if snap and snap.data == dia:
+        return snap.saldo_bruto, snap.total_taxa
+
+    if snap:
+        bruto = snap.saldo_bruto + _movimento(bank, excluir_ids, dia, desde=snap.data)
+        taxa = snap.total_taxa + _taxas(bank, rates, dia, desde=snap.data)
+    else:
+        bruto = (bank.valor_inicial or Decimal('0')) + _movimento(bank, excluir_ids, dia)
+        taxa = _taxas(bank, rates, dia)
+
+    BankSaldoDiario.objects.get_or_create(
+        bank=bank, data=dia,
+        defaults={'saldo_bruto': bruto, 'total_taxa': taxa, 'saldo_liquido': bruto - taxa},
+    )
+    return bruto, taxa
+
+
+def invalidar_saldos(bank_id=None, desde=None):
+    """Apaga os fechamentos a partir de `desde` (todos, se None) de um banco ou de todos."""
+    qs = BankSaldoDiario.objects.all()
+    if bank_id:
+        qs = qs.filter(bank_id=bank_id)
+    if desde:
+        qs = qs.filter(data__gte=desde)
+    qs.delete()
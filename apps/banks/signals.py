@@ -0,0 +1,83 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+
+def _dia(dt):
+    return timezone.localdate(dt) if dt else None
+
+
+def _mais_antiga(*datas):
+    datas = [d for d in datas if d]
+    return min(datas) if datas else None
+
+
+@receiver(pre_save, sender='banks.BankTransaction')
+def guardar_data_anterior(sender, instance, **kwargs):
+    """Guarda banco/data originais para invalidar a partir da menor data numa edição."""
+    instance._saldo_original = None
+    if instance.pk:
+        instance._saldo_original = sender.objects.filter(pk=instance.pk).values('bank_id', 'data').first()
+
+
+@receiver(post_save, sender='banks.BankTransaction')
+def invalidar_saldos_lancamento(sender, instance, **kwargs):
+    from banks.saldos import invalidar_saldos
+
+    original = getattr(instance, '_saldo_original', None)
+    if original and original['bank_id'] != instance.bank_id:
+        invalidar_saldos(original['bank_id'], _dia(original['data']))
+        original = None
+    desde = _mais_antiga(_dia(instance.data), _dia(original['data']) if original else None)
+    invalidar_saldos(instance.bank_id, desde)
+
+
+@receiver(post_delete, sender='banks.BankTransaction')
+def invalidar_saldos_lancamento_removido(sender, instance, **kwargs):
+    from banks.saldos import invalidar_saldos
+
+    invalidar_saldos(instance.bank_id, _dia(instance.data))
+
+
+@receiver(post_save, sender='financials.CaixaAdmTransferencia')
+@receiver(post_delete, sender='financials.CaixaAdmTransferencia')
+def invalidar_saldos_transferencia(sender, instance, **kwargs):
+    """
+    Conciliação/cancelamento mudam o que é "A Receber" e as taxas do banco.
+    A BankTransaction vinculada nunca é anterior à data do caixa; registros
+    antigos sem data_caixa invalidam o banco inteiro.
+    """
+    from banks.saldos import invalidar_saldos
+
+    if not instance.banco_destino_id:
+        return
+    desde = None
+    if instance.data_caixa:
+        desde = _mais_antiga(instance.data_caixa, _dia(instance.conciliado_em))
+    invalidar_saldos(instance.banco_destino_id, desde)
+
+
+@receiver(post_save, sender='banks.Bank')
+def invalidar_saldos_banco(sender, instance, created, **kwargs):
+    """valor_inicial entra em todos os fechamentos."""
+    from banks.saldos import invalidar_saldos
+
+    if not created:
+        invalidar_saldos(instance.pk)
+
+
+@receiver(post_save, sender='pinpads.BandeiraPinpad')
+@receiver(post_delete, sender='pinpads.BandeiraPinpad')
+def invalidar_saldos_bandeira(sender, instance, **kwargs):
+    """Transferências antigas sem taxa_aplicada usam a taxa atual da bandeira."""
+    from banks.saldos import invalidar_saldos
+
+    invalidar_saldos()
+
+
+@receiver(post_save, sender='banks.UserBankAccess')
+@receiver(post_delete, sender='banks.UserBankAccess')
+def invalidar_acessos_usuario(sender, instance, **kwargs):
+    from banks.acessos import invalidar
+
+    invalidar(instance.user_id)
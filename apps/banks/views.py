@@ -10,9 +10,12 @@ from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
 
-from .models import Bank, BankTransaction, BankTransactionAnexo, UserBankAccess
+from .models import Bank, BankTransaction, BankTransactionAnexo
+from .acessos import bancos_visiveis, pode
 from .forms import BankForm, BankEditForm
+from .saldos import calc_taxa_transferencias as _calc_taxa_transferencias, saldo_ate
 from financials.models import CaixaAdmTransferencia
+from utils.pdf_export import LazyStory, cached_style, chunked_table, pdf_response
 
 
 # ── Helpers de taxa de bandeira ──────────────────────────────────────────────
@@ -30,46 +33,54 @@ def _build_bandeira_rates(pinpad_obj):
     return rates
 
 
-def _calc_taxa_transferencias(transferencias_qs, rates_map):
-    """Calcula o total de taxas de um queryset de CaixaAdmTransferencia."""
-    total = Decimal('0')
-    for t in transferencias_qs.values('valor', 'metodo_pagamento', 'bandeira', 'taxa_aplicada'):
-        pct = t.get('taxa_aplicada') or Decimal('0')
-        if not pct and t['metodo_pagamento'] in ('credito', 'debito'):
-            chave = (t['bandeira'] or '').lower()
-            r = rates_map.get(chave, {})
-            pct = r.get(t['metodo_pagamento'], Decimal('0'))
-        total += t['valor'] * pct / Decimal('100')
-    return total
-
-
-def _build_excluir_ids(bank, a_receber_qs):
+def _build_excluir_ids(a_receber_qs):
     """
     Retorna o set de IDs de BankTransaction a excluir do saldo (são "A Receber").
 
-    Usa o FK direto (bank_transaction_id) para registros novos — sem ambiguidade.
-    Para registros antigos sem FK, faz fallback por valor+descricao tomando apenas
-    UM resultado por pendência (evita over-exclusão quando existem dois iguais).
+    Todas as transferências têm o FK bank_transaction desde o backfill
+    (financials 0024 / manage.py vincular_transferencias_banco): uma query só.
     """
-    excluir_ids = set()
-    used_ids = set()
-
-    # Registros com FK direto — O(1) por registro, sem ambiguidade
-    for bt_id in a_receber_qs.filter(bank_transaction__isnull=False).values_list('bank_transaction_id', flat=True):
-        excluir_ids.add(bt_id)
-        used_ids.add(bt_id)
+    return set(
+        a_receber_qs.filter(bank_transaction__isnull=False)
+        .values_list('bank_transaction_id', flat=True)
+    )
 
-    # Registros antigos sem FK — fallback por valor+descricao, um BT por pendência
-    for p in a_receber_qs.filter(bank_transaction__isnull=True).values('valor', 'descricao'):
-        qs = bank.transactions.filter(is_entrada=True, valor=p['valor']).exclude(id__in=used_ids)
-        if p['descricao']:
-            qs = qs.filter(descricao=p['descricao'])
-        bt_id = qs.order_by('id').values_list('id', flat=True).first()
-        if bt_id:
-            excluir_ids.add(bt_id)
-            used_ids.add(bt_id)
 
-    return excluir_ids
+def _linhas_extrato_pdf(transacoes, bandeiras_rates):
+    """
+    Gera as linhas da tabela de movimentações do PDF do extrato, uma por vez.
+    Taxa: usa taxa_tx gravada na conciliação; fallback pela bandeira (mesma lógica da tela).
+    """
+    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+    from reportlab.platypus import Paragraph
+
+    fmt = lambda v: f'R$ {v:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+    td         = cached_style(8)
+    td_dt      = cached_style(8, leading=11)
+    td_c       = cached_style(8, align=TA_CENTER)
+    tv_entrada = cached_style(8, bold=True, color='#34C759', align=TA_RIGHT)
+    tv_saida   = cached_style(8, bold=True, color='#FF3B30', align=TA_RIGHT)
+    tipo_labels = {'deposito': 'Depósito', 'pagamento': 'Pagamento', 'transferencia': 'Transf.'}
+
+    for tx in transacoes:
+        taxa = tx.taxa_tx or Decimal('0')
+        if not taxa and tx.is_entrada and tx.metodo_pagamento in ('credito', 'debito'):
+            r = bandeiras_rates.get((tx.bandeira or '').lower(), {})
+            pct = r.get(tx.metodo_pagamento, Decimal('0'))
+            taxa = (tx.valor * pct / Decimal('100')).quantize(Decimal('0.01')) if pct else Decimal('0')
+
+        sinal = '+' if tx.is_entrada else '\u2212'
+        # Usa valor líquido quando há taxa (igual à tela)
+        valor_exibido = tx.valor - taxa if taxa else tx.valor
+        desc_extra = ''
+        if taxa:
+            desc_extra = f'<br/><font size="7" color="#FF9500">bruto {fmt(tx.valor)} \u00b7 taxa -{fmt(taxa)}</font>'
+        yield [
+            Paragraph(timezone.localtime(tx.data).strftime('%d/%m/%Y\n%H:%M'), td_dt),
+            Paragraph((tx.descricao or '\u2014') + desc_extra, td),
+            Paragraph(tipo_labels.get(tx.tipo, tx.tipo), td_c),
+            Paragraph(f'{sinal}{fmt(valor_exibido)}', tv_entrada if tx.is_entrada else tv_saida),
+        ]
 
 
 # ── Helpers de acesso ────────────────────────────────────────────────────────
@@ -103,18 +114,14 @@ def _check_bank(user, bank, action):
         'transfer_tx': 'can_transfer_transaction',
         'del_tx':      'can_delete_transaction',
     }
-    try:
-        access = UserBankAccess.objects.get(user=user, bank=bank)
-        return getattr(access, field_map[action], False)
-    except UserBankAccess.DoesNotExist:
-        return False
+    return pode(user, bank, field_map[action])
 
 
 def _accessible_banks(user):
     """Queryset de bancos que o usuário pode visualizar."""
     if _has_global(user, 'view_bank'):
         return Bank.objects.all()
-    return Bank.objects.filter(user_accesses__user=user, user_accesses__can_view=True)
+    return Bank.objects.filter(pk__in=bancos_visiveis(user))
 
 
 # ── Views ─────────────────────────────────────────────────────────────────────
@@ -143,18 +150,11 @@ class BankListView(LoginRequiredMixin, ListView):
                 conciliado=False,
                 cancelada=False,
             )
-            excluir_ids = _build_excluir_ids(bank, a_receber_qs)
-            settled  = bank.transactions.filter(data__date__lte=hoje).exclude(id__in=excluir_ids)
-            vi       = bank.valor_inicial or Decimal('0')
-            entradas = settled.filter(is_entrada=True).aggregate(t=Sum('valor'))['t'] or Decimal('0')
-            saidas   = settled.filter(is_entrada=False).aggregate(t=Sum('valor'))['t'] or Decimal('0')
-            saldo_bruto = vi + entradas - saidas
-
-            # Deduz taxas (mesmo cálculo do card "Saldo disponível" do extrato)
-            all_conciliadas = CaixaAdmTransferencia.objects.filter(
-                banco_destino=bank, conciliado=True, cancelada=False
-            )
-            total_taxa = _calc_taxa_transferencias(all_conciliadas, rates)
+            excluir_ids = _build_excluir_ids(a_receber_qs)
+
+            # Fechamento de ontem + movimento de hoje, já descontadas as taxas
+            # (mesmo cálculo do card "Saldo disponível" do extrato)
+            saldo_bruto, total_taxa = saldo_ate(bank, hoje, excluir_ids, rates)
 
             bank.saldo_atual = saldo_bruto - total_taxa
             total_geral += bank.saldo_atual
@@ -281,8 +281,6 @@ class BankStatementView(LoginRequiredMixin, BaseView):
             except ValueError:
                 pass
 
-        valor_inicial = bank.valor_inicial or Decimal('0.00')
-
         def calc_saldo(qs):
             entradas = qs.filter(is_entrada=True).aggregate(t=Sum('valor'))['t'] or Decimal('0')
             saidas = qs.filter(is_entrada=False).aggregate(t=Sum('valor'))['t'] or Decimal('0')
@@ -313,10 +311,13 @@ class BankStatementView(LoginRequiredMixin, BaseView):
 
         # Mesmo que o prazo já tenha chegado, a entrada só conta no saldo
         # quando o usuário conciliar manualmente.
-        pendente_tx_ids = _build_excluir_ids(bank, a_receber_qs)
+        pendente_tx_ids = _build_excluir_ids(a_receber_qs)
 
         settled_txs = bank.transactions.filter(data__date__lte=hoje).exclude(id__in=pendente_tx_ids)
-        saldo_atual = valor_inicial + calc_saldo(settled_txs)
+        bandeiras_rates = _build_bandeira_rates(pinpad)
+
+        # Saldo a partir do fechamento diário gravado (BankSaldoDiario) + delta de hoje
+        saldo_atual, total_taxa = saldo_ate(bank, hoje, pendente_tx_ids, bandeiras_rates)
 
         saldo_anterior = None
         total_periodo = None
@@ -344,12 +345,11 @@ class BankStatementView(LoginRequiredMixin, BaseView):
         # 3 cards só aparecem quando o range abrange mais de um dia
         filtrado = bool(data_inicio and data_fim and data_inicio != data_fim)
         if filtrado:
-            before_qs = settled_txs.filter(data__date__lt=data_inicio)
-            saldo_anterior = valor_inicial + calc_saldo(before_qs)
+            saldo_anterior, _ = saldo_ate(
+                bank, data_inicio - timedelta(days=1), pendente_tx_ids, bandeiras_rates
+            )
             total_periodo = calc_saldo(period_qs)
 
-        bandeiras_rates = _build_bandeira_rates(pinpad)
-
         # Anotar cada transação com taxa individual e valor líquido
         # Usa taxa_tx gravada no DB (set na conciliação); fallback dinâmico para registros antigos
         transacoes = list(transacoes)
@@ -365,11 +365,10 @@ class BankStatementView(LoginRequiredMixin, BaseView):
             tx.taxa_tx = stored_taxa
             tx.valor_liquido = tx.valor - tx.taxa_tx
 
-        # Totais sobre TODAS as transferências já conciliadas do banco
+        # total_taxa (vindo de saldo_ate) cobre TODAS as transferências já conciliadas do banco
         all_conciliadas = CaixaAdmTransferencia.objects.filter(
             banco_destino=bank, conciliado=True, cancelada=False
         )
-        total_taxa    = _calc_taxa_transferencias(all_conciliadas, bandeiras_rates)
         # saldo_atual já inclui pagamentos feitos no banco (is_entrada=False)
         # bruto_geral = saldo real antes de descontar taxas de bandeira
         bruto_geral   = saldo_atual
@@ -595,14 +594,12 @@ class BankTransactionDeleteView(LoginRequiredMixin, BaseView):
 
 class BankStatementPDFView(LoginRequiredMixin, BaseView):
     def get(self, request, pk):
-        import io
         from reportlab.lib import colors
         from reportlab.lib.pagesizes import A4
         from reportlab.lib.units import mm
         from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
         from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
         from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-        from django.http import HttpResponse
         from decimal import Decimal
 
         bank = get_object_or_404(Bank, pk=pk)
@@ -640,17 +637,18 @@ class BankStatementPDFView(LoginRequiredMixin, BaseView):
         a_receber_pdf = CaixaAdmTransferencia.objects.filter(
             banco_destino=bank, conciliado=False, cancelada=False
         )
-        pendente_ids = _build_excluir_ids(bank, a_receber_pdf)
+        pendente_ids = _build_excluir_ids(a_receber_pdf)
 
         settled_txs = bank.transactions.filter(data__date__lte=hoje).exclude(id__in=pendente_ids)
-        saldo_atual = valor_inicial + calc_saldo(settled_txs)
 
         period_qs = settled_txs
         if data_inicio:
             period_qs = period_qs.filter(data__date__gte=data_inicio)
         if data_fim:
             period_qs = period_qs.filter(data__date__lte=data_fim)
-        transacoes = list(period_qs.order_by('-data', '-id'))
+        transacoes = period_qs.order_by('-data', '-id').only(
+            'data', 'descricao', 'tipo', 'valor', 'is_entrada', 'metodo_pagamento', 'bandeira', 'taxa_tx',
+        )
 
         # ── Cálculo de taxas das bandeiras ───────────────────────────────────
         from pinpads.models import Pinpad, BandeiraPinpad
@@ -665,17 +663,6 @@ class BankStatementPDFView(LoginRequiredMixin, BaseView):
                     'debito':  b.taxa_debito,
                 }
 
-        # Anota cada transação com taxa individual — mesma lógica da tela
-        for tx in transacoes:
-            stored = tx.taxa_tx or Decimal('0')
-            if not stored and tx.is_entrada and tx.metodo_pagamento in ('credito', 'debito'):
-                chave = (tx.bandeira or '').lower()
-                r = bandeiras_rates.get(chave, {})
-                pct = r.get(tx.metodo_pagamento, Decimal('0'))
-                stored = (tx.valor * pct / Decimal('100')).quantize(Decimal('0.01')) if pct else Decimal('0')
-            tx.taxa_tx = stored
-            tx.valor_liquido = tx.valor - stored
-
         def _calc_taxa_pdf(transferencias_qs):
             total = Decimal('0')
             for t in transferencias_qs.values('valor', 'metodo_pagamento', 'bandeira', 'taxa_aplicada'):
@@ -690,9 +677,9 @@ class BankStatementPDFView(LoginRequiredMixin, BaseView):
         all_conciliadas = CaixaAdmTransferencia.objects.filter(
             banco_destino=bank, conciliado=True, cancelada=False
         )
-        # Mesmo cálculo da tela: valor_inicial + entradas_settled - saidas_settled
+        # Mesmo cálculo da tela: fechamento diário gravado + delta de hoje
+        saldo_atual, total_taxa = saldo_ate(bank, hoje, pendente_ids, bandeiras_rates)
         bruto_geral   = saldo_atual
-        total_taxa    = _calc_taxa_pdf(all_conciliadas)
         liquido_geral = saldo_atual - total_taxa
 
         # Fees específicas do período
@@ -710,10 +697,8 @@ class BankStatementPDFView(LoginRequiredMixin, BaseView):
 
         saldo_anterior_pdf = None
         if filtrado_pdf and data_inicio:
-            before_qs = settled_txs.filter(data__date__lt=data_inicio)
-            bruto_anterior_pdf = valor_inicial + calc_saldo(before_qs)
-            taxa_anterior_pdf  = _calc_taxa_pdf(
-                all_conciliadas.filter(conciliado_em__date__lt=data_inicio)
+            bruto_anterior_pdf, taxa_anterior_pdf = saldo_ate(
+                bank, data_inicio - timedelta(days=1), pendente_ids, bandeiras_rates
             )
             saldo_anterior_pdf = bruto_anterior_pdf - taxa_anterior_pdf
 
@@ -740,14 +725,8 @@ class BankStatementPDFView(LoginRequiredMixin, BaseView):
 
 
         # ── Monta o PDF (estilo Apple) ───────────────────────────────────────
-        buffer = io.BytesIO()
         page_w, page_h = A4
         margin = 18 * mm
-        doc = SimpleDocTemplate(
-            buffer, pagesize=A4,
-            leftMargin=margin, rightMargin=margin,
-            topMargin=16*mm, bottomMargin=16*mm,
-        )
         content_w = page_w - 2 * margin
 
         # ── Paleta ───────────────────────────────────────────────────────────
@@ -819,8 +798,12 @@ class BankStatementPDFView(LoginRequiredMixin, BaseView):
 
 
         # ── CARDS DE MÉTRICAS ────────────────────────────────────────────────
-        entradas_p = sum(tx.valor for tx in transacoes if tx.is_entrada)
-        saidas_p   = sum(tx.valor for tx in transacoes if not tx.is_entrada)
+        totais_p   = period_qs.aggregate(
+            entradas=Sum('valor', filter=Q(is_entrada=True)),
+            saidas=Sum('valor', filter=Q(is_entrada=False)),
+        )
+        entradas_p = totais_p['entradas'] or Decimal('0')
+        saidas_p   = totais_p['saidas'] or Decimal('0')
 
         azul_light = colors.HexColor('#A8D8FF')
         azul_bg2   = colors.HexColor('#EAF3FF')
@@ -912,10 +895,8 @@ class BankStatementPDFView(LoginRequiredMixin, BaseView):
         else:
             # ── 4 cards: Saldo Anterior | Entradas | Saídas | Saldo Atual ────
             if data_inicio:
-                before_4    = settled_txs.filter(data__date__lt=data_inicio)
-                bruto_ant_4 = valor_inicial + calc_saldo(before_4)
-                taxa_ant_4  = _calc_taxa_pdf(
-                    all_conciliadas.filter(conciliado_em__date__lt=data_inicio)
+                bruto_ant_4, taxa_ant_4 = saldo_ate(
+                    bank, data_inicio - timedelta(days=1), pendente_ids, bandeiras_rates
                 )
                 saldo_ant_4 = bruto_ant_4 - taxa_ant_4
                 label_ant_4 = f'Antes de {data_inicio.strftime("%d/%m/%y")}'
@@ -1057,47 +1038,15 @@ class BankStatementPDFView(LoginRequiredMixin, BaseView):
             Spacer(1, 2*mm),
         ]
 
-        th    = ps('th',  8, bold=True, color=cinza, align=TA_CENTER)
-        td    = ps('td',  8, color=escuro)
-        td_c  = ps('tdc', 8, color=escuro, align=TA_CENTER)
-
-        tipo_labels = {'deposito': 'Depósito', 'pagamento': 'Pagamento', 'transferencia': 'Transf.'}
-
-        rows = [[
+        th = cached_style(8, bold=True, color='#8E8E93', align=TA_CENTER)
+        header = [
             Paragraph('Data / Hora', th),
             Paragraph('Descrição',   th),
             Paragraph('Tipo',        th),
-            Paragraph('Valor',       ps('thv', 8, bold=True, color=cinza, align=TA_RIGHT)),
-        ]]
-
-        for tx in transacoes:
-            data_local = timezone.localtime(tx.data)
-            sinal  = '+' if tx.is_entrada else '\u2212'
-            cor_v  = verde if tx.is_entrada else verm
-            # Usa valor_liquido quando h\u00e1 taxa (igual \u00e0 tela)
-            valor_exibido = tx.valor_liquido if tx.taxa_tx else tx.valor
-            desc_extra = ''
-            if tx.taxa_tx:
-                desc_extra = f'<br/><font size="7" color="#FF9500">bruto {fmt(tx.valor)} \u00b7 taxa -{fmt(tx.taxa_tx)}</font>'
-            rows.append([
-                Paragraph(data_local.strftime('%d/%m/%Y\n%H:%M'),
-                          ps(f'td_dt{tx.pk}', 8, color=escuro, leading=11)),
-                Paragraph((tx.descricao or '\u2014') + desc_extra, td),
-                Paragraph(tipo_labels.get(tx.tipo, tx.tipo), td_c),
-                Paragraph(f'{sinal}{fmt(valor_exibido)}',
-                          ps(f'tv{tx.pk}', 8, bold=True, color=cor_v, align=TA_RIGHT)),
-            ])
-
-        if not transacoes:
-            rows.append([
-                Paragraph('Nenhuma transação no período selecionado.',
-                          ps('emp', 9, color=cinza)),
-                '', '', '',
-            ])
-
+            Paragraph('Valor',       cached_style(8, bold=True, color='#8E8E93', align=TA_RIGHT)),
+        ]
         col_w = [32*mm, content_w - 32*mm - 28*mm - 30*mm, 28*mm, 30*mm]
-        tx_table = Table(rows, colWidths=col_w, repeatRows=1)
-        tx_table.setStyle(TableStyle([
+        tx_style = TableStyle([
             ('BACKGROUND',    (0, 0), (-1,  0), claro),
             ('LINEBELOW',     (0, 0), (-1,  0), 0.8, borda),
             ('ROWBACKGROUNDS',(0, 1), (-1, -1), [branco, colors.HexColor('#FAFAFA')]),
@@ -1108,13 +1057,30 @@ class BankStatementPDFView(LoginRequiredMixin, BaseView):
             ('RIGHTPADDING',  (0, 0), (-1, -1), 8),
             ('VALIGN',        (0, 0), (-1, -1), 'MIDDLE'),
             ('BOX',           (0, 0), (-1, -1), 0.5, borda),
-        ]))
-        story += [tx_table, Spacer(1, 5*mm)]
+        ])
 
-        doc.build(story)
-        buffer.seek(0)
+        def _movimentacoes():
+            # Linhas geradas sob demanda (iterator) em Tables de até 100 linhas
+            yield from story
+            if transacoes.exists():
+                linhas = _linhas_extrato_pdf(transacoes.iterator(chunk_size=2000), bandeiras_rates)
+                yield from chunked_table(linhas, header, col_w, tx_style)
+            else:
+                vazio = Table([header, [
+                    Paragraph('Nenhuma transação no período selecionado.', cached_style(9, color='#8E8E93')),
+                    '', '', '',
+                ]], colWidths=col_w)
+                vazio.setStyle(tx_style)
+                yield vazio
+            yield Spacer(1, 5*mm)
+
+        def _build(arquivo):
+            doc = SimpleDocTemplate(
+                arquivo, pagesize=A4,
+                leftMargin=margin, rightMargin=margin,
+                topMargin=16*mm, bottomMargin=16*mm,
+            )
+            doc.build(LazyStory(_movimentacoes()))
 
         nome_arquivo = f'extrato_{bank.nome.lower().replace(" ", "_")}_{label_di.replace("/", "-")}_{label_df.replace("/", "-")}.pdf'
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
-        return response
+        return pdf_response(nome_arquivo, _build)
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checkouts', '0005_add_checkoutpayment_parcial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='checkout',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AlterField(
+            model_name='checkoutpayment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+    ]
@@ -131,6 +131,8 @@ class CheckoutFinalizeView(LoginRequiredMixin, UserPassesTestMixin, View):
         return self.request.user.is_caixa or self.request.user.has_perm('checkouts.change_checkout')
     
     def post(self, request, code):
+        from products.custos import registrar_consumo
+
         try:
             FINALIZAVEIS = ('em_uso', 'aguardando_caixa', 'cortesia')
 
@@ -143,15 +145,10 @@ class CheckoutFinalizeView(LoginRequiredMixin, UserPassesTestMixin, View):
                 except (Comanda.DoesNotExist, ValueError):
                     comanda = None
             else:
-                comanda = (
-                    Comanda.objects
-                    .filter(numero=code, status__in=FINALIZAVEIS)
-                    .order_by('-id')
-                    .first()
-                )
+                comanda = Comanda.objects.open_for(code, status=FINALIZAVEIS)
             if comanda is None:
                 # Verifica se existe mas está em status não finalizável
-                outra = Comanda.objects.filter(numero=code).order_by('-id').first()
+                outra = Comanda.objects.com_numero(code).order_by('-created_at').first()
                 if outra:
                     return JsonResponse({
                         'success': False,
@@ -205,10 +202,17 @@ class CheckoutFinalizeView(LoginRequiredMixin, UserPassesTestMixin, View):
                 if cpf_cnpj:
                     comanda.nfce_cpf_cliente = cpf_cnpj
                 comanda.save()
-                comanda.pedidos.filter(status__in=['preparando', 'pronta', 'aguardando']).update(
-                    status='entregue',
-                    delivered_at=timezone.now()
-                )
+                # update() não dispara o signal de entrega: o consumo das receitas é gravado aqui
+                entregues = list(comanda.pedidos.filter(
+                    status__in=['preparando', 'pronta', 'aguardando'],
+                ).values_list('pk', flat=True))
+                if entregues:
+                    Pedido.objects.filter(pk__in=entregues).update(
+                        status='entregue',
+                        delivered_at=timezone.now(),
+                        updated_at=timezone.now(),
+                    )
+                    registrar_consumo(entregues)
 
             # Criar/atualizar Checkout e CheckoutPayment fora do atomic
             if Checkout:
@@ -314,6 +318,7 @@ class AlterarMetodoPagamentoView(LoginRequiredMixin, UserPassesTestMixin, View):
                     Checkout.objects.filter(pk=checkout.pk).update(
                         payment_method='parcial',
                         notes=nova_nota,
+                        updated_at=timezone.now(),
                     )
                     CheckoutPayment.objects.filter(checkout=checkout).delete()
                     for p in payments:
@@ -326,6 +331,7 @@ class AlterarMetodoPagamentoView(LoginRequiredMixin, UserPassesTestMixin, View):
                     rows = Checkout.objects.filter(pk=checkout.pk).update(
                         payment_method=novo_metodo,
                         notes=nova_nota,
+                        updated_at=timezone.now(),
                     )
                     if rows == 0:
                         return JsonResponse({'success': False, 'message': 'Checkout não encontrado no banco.'}, status=404)
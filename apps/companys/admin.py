@@ -2,7 +2,7 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
-from .models import Company, CertificadoDigital
+from .models import Company, CertificadoDigital, NumeracaoNFCe
 
 class CertificadoDigitalInline(admin.StackedInline):
     """Inline para certificado digital dentro da empresa"""
@@ -10,6 +10,12 @@ class CertificadoDigitalInline(admin.StackedInline):
     extra = 0
     fields = ('arquivo_pfx', 'senha_pfx', 'numero_serie', 'valido_ate')
 
+class NumeracaoNFCeInline(admin.TabularInline):
+    """Série e contador de NFC-e de cada servidor de loja"""
+    model = NumeracaoNFCe
+    extra = 0
+    fields = ('no', 'serie', 'proximo_numero')
+
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
     """Admin para empresa com certificado inline"""
@@ -32,7 +38,7 @@ class CompanyAdmin(admin.ModelAdmin):
         })
     )
     
-    inlines = [CertificadoDigitalInline]
+    inlines = [CertificadoDigitalInline, NumeracaoNFCeInline]
     
     def tem_certificado(self, obj):
         """Mostra se tem certificado configurado"""
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companys', '0005_alter_certificadodigital_updated_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumeracaoNFCe',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('no', models.PositiveSmallIntegerField(help_text='SYNC_NODE_ID do servidor da loja', verbose_name='Nó')),
+                ('serie', models.PositiveIntegerField(verbose_name='Série NFCe')),
+                ('proximo_numero', models.PositiveIntegerField(default=1, verbose_name='Próximo Número NFCe')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='numeracoes_nfce', to='companys.company', verbose_name='Empresa')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL, verbose_name='Atualizado por')),
+            ],
+            options={
+                'verbose_name': 'Numeração NFCe por Nó',
+                'verbose_name_plural': 'Numerações NFCe por Nó',
+                'ordering': ['empresa', 'no'],
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'no'), name='companys_numeracaonfce_no_uniq')],
+            },
+        ),
+    ]
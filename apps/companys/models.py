@@ -150,14 +150,37 @@ class Company(TimeStampedModel):
     def __str__(self):
         return f"{self.razao_social} ({self.cnpj})"
     
+    @property
+    def serie_nfce_atual(self):
+        """Série usada neste servidor: a da empresa no Railway, a do nó nas lojas."""
+        numeracao = self.numeracao_do_no()
+        return numeracao.serie if numeracao else self.serie_nfce
+
+    def numeracao_do_no(self):
+        """NumeracaoNFCe deste servidor de loja (None no Railway)."""
+        from django.conf import settings
+        no = getattr(settings, 'SYNC_NODE_ID', 0)
+        if not no:
+            return None
+        numeracao, _ = NumeracaoNFCe.objects.get_or_create(
+            empresa=self,
+            no=no,
+            defaults={'serie': getattr(settings, 'SYNC_NFCE_SERIE', 0) or self.serie_nfce + no},
+        )
+        return numeracao
+
     def get_proximo_numero_nfce(self):
         """Retorna e incrementa o próximo número da NFCe (atomic para evitar duplicatas)"""
         from django.db import transaction
         from django.db.models import F
+        from django.utils import timezone
+        numeracao = self.numeracao_do_no()
+        if numeracao:
+            return numeracao.reservar_numero()
         with transaction.atomic():
             updated = Company.objects.filter(pk=self.pk).select_for_update().values_list('proximo_numero_nfce', flat=True).first()
             numero_atual = updated
-            Company.objects.filter(pk=self.pk).update(proximo_numero_nfce=F('proximo_numero_nfce') + 1)
+            Company.objects.filter(pk=self.pk).update(proximo_numero_nfce=F('proximo_numero_nfce') + 1, updated_at=timezone.now())
             self.proximo_numero_nfce = numero_atual + 1
         return numero_atual
     
@@ -171,6 +194,58 @@ class Company(TimeStampedModel):
         return endereco
 
 
+class NumeracaoNFCe(TimeStampedModel):
+    """
+    Série e contador de NFC-e de um servidor de loja (SYNC_NODE_ID).
+
+    Cada nó emite numa série própria: notas emitidas offline em lojas
+    diferentes (ou no Railway, que usa Company.serie_nfce) nunca repetem
+    série + número, e o contador sincroniza sem conflito.
+    """
+    empresa = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name='numeracoes_nfce',
+        verbose_name="Empresa"
+    )
+
+    no = models.PositiveSmallIntegerField(
+        verbose_name="Nó",
+        help_text="SYNC_NODE_ID do servidor da loja"
+    )
+
+    serie = models.PositiveIntegerField(
+        verbose_name="Série NFCe"
+    )
+
+    proximo_numero = models.PositiveIntegerField(
+        default=1,
+        verbose_name="Próximo Número NFCe"
+    )
+
+    class Meta:
+        verbose_name = "Numeração NFCe por Nó"
+        verbose_name_plural = "Numerações NFCe por Nó"
+        ordering = ['empresa', 'no']
+        constraints = [
+            models.UniqueConstraint(fields=['empresa', 'no'], name='companys_numeracaonfce_no_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Nó {self.no} — série {self.serie} (próximo {self.proximo_numero})"
+
+    def reservar_numero(self):
+        """Retorna e incrementa o próximo número desta série."""
+        from django.db import transaction
+        from django.db.models import F
+        from django.utils import timezone
+        with transaction.atomic():
+            numero_atual = NumeracaoNFCe.objects.filter(pk=self.pk).select_for_update().values_list('proximo_numero', flat=True).first()
+            NumeracaoNFCe.objects.filter(pk=self.pk).update(proximo_numero=F('proximo_numero') + 1, updated_at=timezone.now())
+            self.proximo_numero = numero_atual + 1
+        return numero_atual
+
+
 class CertificadoDigital(TimeStampedModel):
     """Modelo para armazenar dados do certificado digital"""
     
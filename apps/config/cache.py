@@ -0,0 +1,57 @@
+"""
+Cache por processo das configurações de instância única (pk=1).
+
+get_settings() é chamado a cada poll do dashboard, no PIN do kiosk e no
+fechamento de caixa. Em vez de um get_or_create por chamada, cada processo
+guarda as instâncias e só confere a ConfigVersao no banco a cada
+CONFIG_CACHE_SECONDS. Salvar ou excluir uma configuração incrementa a versão:
+o próprio processo descarta o cache na hora e os outros workers no próximo
+intervalo.
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.db.models import F
+
+_instancias = {}
+_versao = None
+_conferido_em = 0.0
+
+
+def _versao_atual():
+    from .models import ConfigVersao
+
+    return ConfigVersao.objects.filter(pk=1).values_list('versao', flat=True).first() or 0
+
+
+def obter(cls, **defaults):
+    """Instância pk=1 de cls, criada com defaults se ainda não existir."""
+    global _versao, _conferido_em
+
+    agora = time.monotonic()
+    if agora - _conferido_em >= settings.CONFIG_CACHE_SECONDS:
+        versao = _versao_atual()
+        if versao != _versao:
+            _instancias.clear()
+            _versao = versao
+        _conferido_em = agora
+
+    obj = _instancias.get(cls)
+    if obj is None:
+        obj, _ = cls.objects.get_or_create(pk=1, defaults=defaults)
+        _instancias[cls] = obj
+    # Cópia: os formulários de configuração alteram a instância antes de validar
+    return copy.copy(obj)
+
+
+def invalidar(using='default'):
+    """Incrementa a versão no banco e esvazia o cache deste processo."""
+    global _conferido_em
+    from .models import ConfigVersao
+
+    versoes = ConfigVersao.objects.using(using)
+    if not versoes.filter(pk=1).update(versao=F('versao') + 1):
+        versoes.get_or_create(pk=1, defaults={'versao': 1})
+    _instancias.clear()
+    _conferido_em = 0.0
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('config', '0012_alter_configcomissao_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConfigVersao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('versao', models.PositiveBigIntegerField(default=0, verbose_name='Versão')),
+            ],
+            options={
+                'verbose_name': 'Versão das Configurações',
+                'verbose_name_plural': 'Versão das Configurações',
+            },
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from decimal import Decimal
 from utils.models import TimeStampedModel
 from django.conf import settings
+from .cache import obter
 
 
 class _SingletonMixin(models.Model):
@@ -16,8 +17,7 @@ class _SingletonMixin(models.Model):
 
     @classmethod
     def get_settings(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
-        return obj
+        return obter(cls)
 
 
 class ConfigTempoEspera(TimeStampedModel):
@@ -40,8 +40,7 @@ class ConfigTempoEspera(TimeStampedModel):
 
     @classmethod
     def get_settings(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
-        return obj
+        return obter(cls)
 
 
 class ConfigTrocoInicial(TimeStampedModel):
@@ -66,8 +65,7 @@ class ConfigTrocoInicial(TimeStampedModel):
 
     @classmethod
     def get_settings(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
-        return obj
+        return obter(cls)
 
 
 class ConfigQuebraCaixa(TimeStampedModel):
@@ -99,8 +97,7 @@ class ConfigQuebraCaixa(TimeStampedModel):
 
     @classmethod
     def get_settings(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
-        return obj
+        return obter(cls)
 
 
 class ConfigComissao(TimeStampedModel):
@@ -125,8 +122,7 @@ class ConfigComissao(TimeStampedModel):
 
     @classmethod
     def get_settings(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
-        return obj
+        return obter(cls)
 
 
 # Mantido para não quebrar migrações antigas; novos códigos devem usar os modelos acima.
@@ -147,8 +143,7 @@ class SystemConfig(models.Model):
 
     @classmethod
     def get_settings(cls):
-        obj, _ = cls.objects.get_or_create(pk=1)
-        return obj
+        return obter(cls)
 
 
 class Garcom(models.Model):
@@ -197,5 +192,16 @@ class ConfigKioskPin(TimeStampedModel):
 
     @classmethod
     def get_settings(cls):
-        obj, _ = cls.objects.get_or_create(pk=1, defaults={'pin': '0000'})
-        return obj
+        return obter(cls, pin='0000')
+
+
+class ConfigVersao(models.Model):
+    """Versão das configurações; incrementada a cada alteração para invalidar o cache dos workers."""
+    versao = models.PositiveBigIntegerField(default=0, verbose_name="Versão")
+
+    class Meta:
+        verbose_name = "Versão das Configurações"
+        verbose_name_plural = "Versão das Configurações"
+
+    def __str__(self):
+        return f"Versão {self.versao}"
@@ -0,0 +1,27 @@
+"""
+Invalidação do cache de configurações (config.cache) ao salvar ou excluir
+qualquer um dos modelos de instância única.
+"""
+from django.db.models.signals import post_delete, post_save
+
+from .cache import invalidar
+
+
+def invalidar_cache(sender, using, **kwargs):
+    invalidar(using)
+
+
+def conectar():
+    from .models import (
+        ConfigComissao,
+        ConfigKioskPin,
+        ConfigQuebraCaixa,
+        ConfigTempoEspera,
+        ConfigTrocoInicial,
+        SystemConfig,
+    )
+
+    for model in (ConfigTempoEspera, ConfigTrocoInicial, ConfigQuebraCaixa,
+                  ConfigComissao, ConfigKioskPin, SystemConfig):
+        post_save.connect(invalidar_cache, sender=model, dispatch_uid=f'config_cache_{model._meta.model_name}')
+        post_delete.connect(invalidar_cache, sender=model, dispatch_uid=f'config_cache_del_{model._meta.model_name}')
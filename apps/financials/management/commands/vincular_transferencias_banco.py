@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from banks.models import BankTransaction
+from banks.saldos import invalidar_saldos
+from financials.models import CaixaAdmTransferencia
+from financials.vinculos import vincular_transferencias
+
+
+class Command(BaseCommand):
+    help = (
+        "Vincula transferências do Caixa ADM antigas (sem bank_transaction) ao "
+        "lançamento do banco correspondente, por banco+valor+descrição."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas mostra o relatório, sem gravar.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        with transaction.atomic():
+            resultado = vincular_transferencias(CaixaAdmTransferencia, BankTransaction, dry_run=dry_run)
+            if resultado["vinculadas"] and not dry_run:
+                invalidar_saldos()
+
+        for grupo in resultado["ambiguos"]:
+            self.stdout.write(self.style.WARNING(
+                f"  AMBIGUO banco={grupo['banco_id']} valor={grupo['valor']} "
+                f"descricao={grupo['descricao']!r}: transferencias={grupo['transferencias']} "
+                f"lancamentos={grupo['lancamentos']} (ligados por ordem)"
+            ))
+        for transferencia_id in resultado["sem_par"]:
+            self.stdout.write(self.style.WARNING(
+                f"  SEM PAR: transferencia {transferencia_id} sem lancamento correspondente"
+            ))
+
+        prefixo = "[dry-run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixo}Concluido: {resultado['vinculadas']} vinculadas, "
+            f"{len(resultado['ambiguos'])} grupos ambiguos, {len(resultado['sem_par'])} sem par"
+        ))
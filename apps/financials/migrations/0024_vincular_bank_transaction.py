@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def vincular(apps, schema_editor):
+    from financials.vinculos import vincular_transferencias
+
+    CaixaAdmTransferencia = apps.get_model("financials", "CaixaAdmTransferencia")
+    BankTransaction = apps.get_model("banks", "BankTransaction")
+    BankSaldoDiario = apps.get_model("banks", "BankSaldoDiario")
+
+    resultado = vincular_transferencias(CaixaAdmTransferencia, BankTransaction)
+    if resultado["vinculadas"]:
+        BankSaldoDiario.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+    """
+    Backfill do FK bank_transaction para transferências antigas, permitindo
+    remover o fallback por valor+descrição de banks.views._build_excluir_ids.
+    O mesmo casamento, com relatório de ambiguidades, está disponível em
+    manage.py vincular_transferencias_banco (ex.: bases restauradas de dumps antigos).
+    """
+
+    dependencies = [
+        ("banks", "0010_bank_saldo_diario"),
+        ("financials", "0023_link_banktransaction"),
+    ]
+
+    operations = [
+        migrations.RunPython(vincular, migrations.RunPython.noop),
+    ]
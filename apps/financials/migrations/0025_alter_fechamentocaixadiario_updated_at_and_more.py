@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('financials', '0024_vincular_bank_transaction'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fechamentocaixadiario',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AlterField(
+            model_name='sangria',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+    ]
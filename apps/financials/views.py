@@ -1702,6 +1702,35 @@ class ConferenciaCaixaView(LoginRequiredMixin, PermissionRequiredMixin, Template
 # Contas a Pagar
 # ──────────────────────────────────────────────
 
+def _contas_pagas_queryset(data_inicio_str, data_fim_str, fornecedor_id='', banco_id=''):
+    """Contas pagas no período; datas inválidas caem no mês corrente até hoje."""
+    from datetime import date
+
+    today = date.today()
+    try:
+        data_inicio = date.fromisoformat(data_inicio_str)
+    except (ValueError, TypeError):
+        data_inicio = today.replace(day=1)
+    try:
+        data_fim = date.fromisoformat(data_fim_str)
+    except (ValueError, TypeError):
+        data_fim = today
+
+    qs = ContaPagar.objects.filter(
+        status='pago',
+        data_pagamento__gte=data_inicio,
+        data_pagamento__lte=data_fim,
+    ).select_related(
+        'fornecedor', 'banco_pagamento', 'pago_por'
+    ).prefetch_related('itens').order_by('data_pagamento', 'fornecedor__nome')
+
+    if fornecedor_id:
+        qs = qs.filter(fornecedor_id=fornecedor_id)
+    if banco_id:
+        qs = qs.filter(banco_pagamento_id=banco_id)
+    return qs
+
+
 class ContasPagasReportView(LoginRequiredMixin, TemplateView):
     template_name = 'financials/relatorio_contas_pagas.html'
     login_url = reverse_lazy('accounts:login')
@@ -1718,27 +1747,7 @@ class ContasPagasReportView(LoginRequiredMixin, TemplateView):
         fornecedor_id   = self.request.GET.get('fornecedor', '')
         banco_id        = self.request.GET.get('banco', '')
 
-        try:
-            data_inicio = date.fromisoformat(data_inicio_str)
-        except (ValueError, TypeError):
-            data_inicio = today.replace(day=1)
-        try:
-            data_fim = date.fromisoformat(data_fim_str)
-        except (ValueError, TypeError):
-            data_fim = today
-
-        qs = ContaPagar.objects.filter(
-            status='pago',
-            data_pagamento__gte=data_inicio,
-            data_pagamento__lte=data_fim,
-        ).select_related(
-            'fornecedor', 'banco_pagamento', 'pago_por'
-        ).prefetch_related('itens').order_by('data_pagamento', 'fornecedor__nome')
-
-        if fornecedor_id:
-            qs = qs.filter(fornecedor_id=fornecedor_id)
-        if banco_id:
-            qs = qs.filter(banco_pagamento_id=banco_id)
+        qs = _contas_pagas_queryset(data_inicio_str, data_fim_str, fornecedor_id, banco_id)
 
         total_valor = qs.aggregate(s=Sum('valor'))['s'] or Decimal('0')
 
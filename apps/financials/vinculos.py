@@ -0,0 +1,91 @@
+"""
+Vínculo CaixaAdmTransferencia → BankTransaction para registros antigos.
+
+Transferências criadas antes do campo bank_transaction só eram associadas ao
+lançamento do banco por valor+descrição, em tempo de execução e com uma query
+por pendência. Aqui o casamento é feito uma única vez: transferências e
+lançamentos candidatos são ordenados pela mesma chave (banco, valor,
+descrição) e percorridos juntos, ligando o mais antigo de cada lado.
+
+Recebe as classes de modelo como parâmetro para poder rodar também dentro de
+uma migração (modelos históricos).
+"""
+from itertools import groupby
+
+
+def vincular_transferencias(Transferencia, BankTransaction, dry_run=False):
+    """
+    Grava bank_transaction nas transferências sem vínculo.
+
+    Retorna um dict com contagens e as listas `ambiguos` (grupos com mais de
+    uma transferência ou candidato — ligados por ordem, como o fallback antigo)
+    e `sem_par` (transferências sem lançamento correspondente).
+    """
+    pendentes = list(
+        Transferencia.objects
+        .filter(bank_transaction__isnull=True, cancelada=False, banco_destino__isnull=False)
+        .only('id', 'banco_destino_id', 'valor', 'descricao', 'criado_em')
+    )
+    if not pendentes:
+        return {'vinculadas': 0, 'ambiguos': [], 'sem_par': []}
+
+    ja_vinculados = Transferencia.objects.filter(
+        bank_transaction__isnull=False
+    ).values_list('bank_transaction_id', flat=True)
+    candidatos = list(
+        BankTransaction.objects
+        .filter(is_entrada=True, bank_id__in={t.banco_destino_id for t in pendentes})
+        .exclude(id__in=ja_vinculados)
+        .values_list('bank_id', 'valor', 'descricao', 'id')
+    )
+
+    def chave_t(t):
+        return (t.banco_destino_id, t.valor, t.descricao)
+
+    pendentes.sort(key=lambda t: (chave_t(t), t.criado_em, t.id))
+    candidatos.sort()
+
+    usados = set()
+    vinculadas = []
+    ambiguos = []
+    sem_par = []
+    sem_descricao = []
+
+    # Passo único sobre as duas listas ordenadas pela chave
+    grupos_bt = {k: [c[3] for c in g] for k, g in groupby(candidatos, key=lambda c: c[:3])}
+    for chave, grupo in groupby(pendentes, key=chave_t):
+        grupo = list(grupo)
+        if not chave[2]:
+            sem_descricao.extend(grupo)
+            continue
+        ids = grupos_bt.get(chave, [])
+        if len(grupo) > 1 or len(ids) > 1:
+            ambiguos.append({
+                'banco_id': chave[0], 'valor': chave[1], 'descricao': chave[2],
+                'transferencias': [t.id for t in grupo], 'lancamentos': ids,
+            })
+        for t, bt_id in zip(grupo, ids):
+            t.bank_transaction_id = bt_id
+            usados.add(bt_id)
+            vinculadas.append(t)
+        sem_par.extend(t.id for t in grupo[len(ids):])
+
+    # Sem descrição: o fallback antigo casava só por valor, com o menor id livre
+    if sem_descricao:
+        por_valor = {}
+        for bank_id, valor, _, bt_id in candidatos:
+            if bt_id not in usados:
+                por_valor.setdefault((bank_id, valor), []).append(bt_id)
+        for t in sem_descricao:
+            livres = por_valor.get((t.banco_destino_id, t.valor), [])
+            livres.sort()
+            if not livres:
+                sem_par.append(t.id)
+                continue
+            t.bank_transaction_id = livres.pop(0)
+            vinculadas.append(t)
+
+    if not dry_run and vinculadas:
+        Transferencia.objects.bulk_update(vinculadas, ['bank_transaction'], batch_size=500)
+
+    return {'vinculadas': len(vinculadas), 'ambiguos': ambiguos, 'sem_par': sem_par}
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+
+from kiosk.models import KioskSlide
+from products.models import Product
+from utils.image_optimizer import variantes_validas
+
+
+def _tamanho(storage, nome):
+    try:
+        return storage.size(nome)
+    except Exception:
+        return 0
+
+
+def _escolha_navegador(arquivos, formato, largura_px):
+    """Como o navegador resolve o srcset: menor variante com largura ≥ a necessária."""
+    por_largura = sorted((int(w), nome) for w, nome in (arquivos.get(formato) or {}).items())
+    if not por_largura:
+        return None
+    return next((n for w, n in por_largura if w >= largura_px), por_largura[-1][1])
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark das imagens de uma carga do cardápio do kiosk: bytes servidos "
+        "com a imagem original versus com as variantes responsivas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dpr', type=float, default=2, help='Densidade de pixels do tablet.')
+        parser.add_argument('--card', type=int, default=116, help='Largura CSS do card de produto (px).')
+        parser.add_argument('--tela', type=int, default=1280, help='Largura CSS da tela (slides).')
+        parser.add_argument('--formato', default='webp', help='Formato servido ao tablet.')
+
+    def handle(self, *args, **options):
+        dpr, formato = options['dpr'], options['formato']
+        linhas = []
+        produtos = Product.objects.filter(show_in_menu=True, is_active=True, visivel_kiosk=True).exclude(image='')
+        slides = KioskSlide.objects.filter(is_active=True).exclude(image='')
+        for objs, largura_css in ((produtos, options['card']), (slides, options['tela'])):
+            for obj in objs.only('image', 'image_variants'):
+                storage = obj.image.storage
+                original = _tamanho(storage, obj.image.name)
+                arquivos = variantes_validas(obj.image, obj.image_variants)
+                nome = _escolha_navegador(arquivos, formato, int(largura_css * dpr))
+                linhas.append((original, _tamanho(storage, nome) if nome else original, bool(nome)))
+
+        antes = sum(l[0] for l in linhas)
+        depois = sum(l[1] for l in linhas)
+        sem_variante = sum(1 for l in linhas if not l[2])
+        self.stdout.write(
+            f"{len(linhas)} imagens por carga ({produtos.count()} produtos, {slides.count()} slides), "
+            f"dpr {dpr:g}, card {options['card']}px, tela {options['tela']}px, formato {formato}"
+        )
+        self.stdout.write(f"  original:  {antes / 1024:.1f} KB")
+        self.stdout.write(f"  variantes: {depois / 1024:.1f} KB")
+        if antes:
+            self.stdout.write(self.style.SUCCESS(f"  economia:  {(1 - depois / antes) * 100:.0f}%"))
+        if sem_variante:
+            self.stdout.write(self.style.WARNING(
+                f"  {sem_variante} imagem(ns) sem variantes — rode manage.py compress_images"
+            ))
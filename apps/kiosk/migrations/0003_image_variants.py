@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kiosk', '0002_alter_kioskslide_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kioskslide',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variantes da imagem'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
-from utils.image_optimizer import compress_image_field, validate_image_file_size
+from utils.image_optimizer import agendar_processamento, validate_image_file_size
+from utils.models import preservar_campos
 from core.storages import image_media_storage
 
 
@@ -7,6 +8,7 @@ class KioskSlide(models.Model):
     """Imagens do carrossel na tela inicial do kiosk."""
 
     image = models.ImageField(storage=image_media_storage, upload_to='kiosk/slides/', validators=[validate_image_file_size], verbose_name='Imagem')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Variantes da imagem')
     title = models.CharField(max_length=120, blank=True, verbose_name='Título (opcional)')
     order = models.PositiveSmallIntegerField(default=0, verbose_name='Ordem')
     is_active = models.BooleanField(default=True, verbose_name='Ativo')
@@ -29,7 +31,10 @@ class KioskSlide(models.Model):
                 KioskSlide.objects.filter(pk=self.pk).values_list("image", flat=True).first()
             )
 
+        preservar_campos(self, kwargs, 'image_variants')
+
         super().save(*args, **kwargs)
 
-        if self.image and (is_new or self.image.name != previous_image_name):
-            compress_image_field(self.image)
+        # Compressão e variantes rodam após o commit, fora da requisição
+        if (self.image or previous_image_name) and self.image.name != previous_image_name:
+            agendar_processamento(self)
@@ -1,6 +1,6 @@
 import json
 import hashlib
-from django.db.models import Max
+from django.db.models import Max, Prefetch
 from decimal import Decimal
 
 from django.contrib import messages
@@ -10,19 +10,21 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
-from products.models import Product, OpcionalObrigatorio, StockEntry, StockExit
+from products.models import Adicional, Product, OpcionalObrigatorio
+from products.estoque import disponibilidade
 from orders.models import Comanda, Pedido, PedidoItem
 from django.core.exceptions import ValidationError
-from utils.image_optimizer import validate_image_file_size
+from utils.idempotencia import idempotente
+from utils.image_optimizer import srcset, url_variante, validate_image_file_size
 from .models import KioskSlide
 from config.models import ConfigKioskPin
 from django.db import transaction
 
 
-def _normalizar_numero(numero):
-    """Remove zeros à esquerda para evitar duplicatas (ex: '07' e '7' → '7')."""
-    s = str(numero).strip()
-    return str(int(s)) if s.isdigit() else s
+def _mesa_label(numero):
+    """'MESA 07' para o número digitado no kiosk (com ou sem zeros à esquerda)."""
+    chave = Comanda.chave_numero(numero)
+    return f"MESA {chave:02d}" if chave is not None else f"MESA {numero}"
 
 
 def _slides_fingerprint():
@@ -35,32 +37,53 @@ def _slides_fingerprint():
     return h.hexdigest()
 
 
+def _esgotados_fingerprint():
+    """Muda só quando algum item entra ou sai da lista de esgotados."""
+    h = hashlib.sha1()
+    for pid, oid in disponibilidade().esgotados():
+        h.update(f'{pid}:{oid or ""};'.encode('utf-8'))
+    return h.hexdigest()
+
+
 def _catalog_version_value():
     from django.utils import timezone
 
     ts_product = Product.objects.aggregate(v=Max('updated_at'))['v']
     ts_opcional = OpcionalObrigatorio.objects.aggregate(v=Max('updated_at'))['v']
-    ts_stock_entry = StockEntry.objects.aggregate(v=Max('created_at'))['v']
-    ts_stock_exit = StockExit.objects.aggregate(v=Max('created_at'))['v']
 
-    candidates = [
-        t for t in (ts_product, ts_opcional, ts_stock_entry, ts_stock_exit)
-        if t is not None
-    ]
+    candidates = [t for t in (ts_product, ts_opcional) if t is not None]
     base = max(candidates).isoformat() if candidates else timezone.now().isoformat()
-    return f"{base}:{_slides_fingerprint()}"
+    return f"{base}:{_esgotados_fingerprint()}:{_slides_fingerprint()}"
+
+
+def _disponiveis(produtos):
+    """
+    Tira do cardápio produtos e sabores esgotados (products.estoque) e anota
+    em cada produto os sabores/adicionais ativos (opcionais_ativos, adicionais_ativos).
+    """
+    disp = disponibilidade()
+    visiveis = []
+    for p in produtos:
+        if disp.esgotado(p.pk):
+            continue
+        opcionais = [o for o in p.opcionais_ativos if not disp.esgotado(p.pk, o.pk)]
+        if p.opcionais_ativos and not opcionais:
+            continue  # todos os sabores esgotados
+        p.opcionais_ativos = opcionais
+        visiveis.append(p)
+    return visiveis
 
 
 def entrada(request):
     """Tela inicial do kiosk — teclado numérico para digitar o número da mesa."""
     # AJAX: verifica status da mesa antes de abrir
     if request.method == 'GET' and request.GET.get('check'):
-        numero = _normalizar_numero(request.GET.get('check', ''))
-        aberta = Comanda.objects.filter(numero=numero, status='em_uso').exists()
+        numero = request.GET.get('check', '').strip()
+        aberta = Comanda.objects.com_numero(numero).filter(status='em_uso').exists()
         return JsonResponse({'aberta': aberta})
 
     if request.method == 'POST':
-        numero = _normalizar_numero(request.POST.get('numero', ''))
+        numero = request.POST.get('numero', '').strip()
         if numero:
             pin_enviado = request.POST.get('pin', '').strip()
             config_pin = ConfigKioskPin.get_settings()
@@ -71,16 +94,9 @@ def entrada(request):
                     'pin_incorreto': True,
                     'numero_anterior': numero,
                 })
-            mesa_numero = numero.zfill(2) if numero.isdigit() else numero
-            mesa_label = f"MESA {mesa_numero}"
-            comanda = Comanda.objects.filter(
-                numero=numero, status='em_uso'
-            ).order_by('-created_at').first()
-            if comanda is None:
-                Comanda.objects.create(
-                    numero=numero, status='em_uso', cliente_nome=mesa_label
-                )
-            elif not comanda.cliente_nome:
+            mesa_label = _mesa_label(numero)
+            comanda, criada = Comanda.objects.abrir(numero, cliente_nome=mesa_label)
+            if not criada and not comanda.cliente_nome:
                 comanda.cliente_nome = mesa_label
                 comanda.save(update_fields=['cliente_nome'])
             return redirect('kiosk:cardapio', numero=numero)
@@ -91,15 +107,11 @@ def entrada(request):
 def cardapio(request, numero):
     """Tela principal de pedido — categorias, produtos e carrinho."""
     # Abre (ou recupera) a comanda da mesa assim que o cardápio é acessado
-    numero = _normalizar_numero(numero)
-    mesa_numero = numero.zfill(2) if numero.isdigit() else numero
-    mesa_label = f"MESA {mesa_numero}"
+    mesa_label = _mesa_label(numero)
     # Busca apenas comanda em_uso. Se o tablet acordar com a URL do cardápio
     # e a mesa já estiver aguardando_caixa, redireciona para a entrada
     # em vez de mostrar o cardápio (evita flash de cardápio antes do redirect).
-    comanda_mesa = Comanda.objects.filter(
-        numero=numero, status='em_uso'
-    ).order_by('-created_at').first()
+    comanda_mesa = Comanda.objects.open_for(numero, status=['em_uso'])
     if comanda_mesa is None:
         # Mesa fechada, aguardando caixa ou inexistente — vai para entrada
         return redirect('kiosk:entrada')
@@ -107,7 +119,15 @@ def cardapio(request, numero):
         comanda_mesa.cliente_nome = mesa_label
         comanda_mesa.save(update_fields=['cliente_nome'])
 
-    produtos = Product.objects.filter(show_in_menu=True, is_active=True, visivel_kiosk=True).order_by('name')
+    produtos = _disponiveis(
+        Product.objects.filter(show_in_menu=True, is_active=True, visivel_kiosk=True)
+        .prefetch_related(
+            Prefetch('opcionais_obrigatorios', queryset=OpcionalObrigatorio.objects.filter(is_active=True),
+                     to_attr='opcionais_ativos'),
+            Prefetch('adicionais', queryset=Adicional.objects.filter(is_active=True), to_attr='adicionais_ativos'),
+        )
+        .order_by('name')
+    )
 
     # Agrupar por categoria
     categorias = {}
@@ -132,7 +152,11 @@ def cardapio(request, numero):
                     'nome': p.name,
                     'desc': (p.description or '')[:60],
                     'preco': float(p.price),
-                    'img': p.image.url if p.image else '',
+                    # Variantes responsivas: 'img' no formato original (≥ 400 px,
+                    # 2× o card), WebP via srcset e uma maior para o lightbox
+                    'img': url_variante(p.image, p.image_variants, 400),
+                    'img_webp': srcset(p.image, p.image_variants, 'webp') if p.image else '',
+                    'img_grande': url_variante(p.image, p.image_variants, 1600, 'webp'),
                     'opcionais_obrigatorios': [
                         {
                             'id': o.pk,
@@ -140,7 +164,7 @@ def cardapio(request, numero):
                             'desc': o.description or '',
                             'preco': float(o.price),
                         }
-                        for o in p.opcionais_obrigatorios.filter(is_active=True)
+                        for o in p.opcionais_ativos
                     ],
                     'adicionais': [
                         {
@@ -149,7 +173,7 @@ def cardapio(request, numero):
                             'desc': a.description or '',
                             'preco': float(a.price),
                         }
-                        for a in p.adicionais.filter(is_active=True)
+                        for a in p.adicionais_ativos
                     ],
                 }
                 for p in dados['produtos']
@@ -157,6 +181,9 @@ def cardapio(request, numero):
         }
 
     slides = list(KioskSlide.objects.filter(is_active=True).order_by('order', 'id'))
+    for slide in slides:
+        slide.src = url_variante(slide.image, slide.image_variants, 1600)
+        slide.srcset_webp = srcset(slide.image, slide.image_variants, 'webp')
 
     # Versão atual do catálogo para polling de atualizações
     catalog_version_initial = _catalog_version_value()
@@ -172,6 +199,7 @@ def cardapio(request, numero):
 
 
 @require_http_methods(['POST'])
+@idempotente
 def enviar_pedido(request, numero):
     try:
         body = json.loads(request.body)
@@ -181,9 +209,7 @@ def enviar_pedido(request, numero):
         if not itens:
             return JsonResponse({'erro': 'Carrinho vazio'}, status=400)
 
-        numero = _normalizar_numero(numero)
-        mesa_numero = numero.zfill(2) if numero.isdigit() else numero
-        mesa_label = f"MESA {mesa_numero}"
+        mesa_label = _mesa_label(numero)
 
         # Valida e prepara todos os itens ANTES da transação
         itens_processados = []
@@ -227,15 +253,8 @@ def enviar_pedido(request, numero):
 
         # Só grava no banco quando tudo já está validado
         with transaction.atomic():
-            comanda = Comanda.objects.select_for_update().filter(
-                numero=numero, status='em_uso'
-            ).order_by('-created_at').first()
-
-            if comanda is None:
-                comanda = Comanda.objects.create(
-                    numero=numero, status='em_uso', cliente_nome=mesa_label
-                )
-            elif not comanda.cliente_nome:
+            comanda, criada = Comanda.objects.select_for_update().abrir(numero, cliente_nome=mesa_label)
+            if not criada and not comanda.cliente_nome:
                 comanda.cliente_nome = mesa_label
                 comanda.save(update_fields=['cliente_nome'])
 
@@ -271,12 +290,10 @@ def status_mesa(request, numero):
     """
     import re as _re
 
-    numero = _normalizar_numero(numero)
-    comanda_em_uso = Comanda.objects.filter(numero=numero, status='em_uso').order_by('-created_at').first()
-    if comanda_em_uso:
+    if Comanda.objects.com_numero(numero).filter(status='em_uso').exists():
         return JsonResponse({'status': 'em_uso'})
 
-    comanda = Comanda.objects.filter(numero=numero).order_by('-created_at').first()
+    comanda = Comanda.objects.com_numero(numero).order_by('-created_at').first()
     if not comanda:
         return JsonResponse({'status': 'livre'})
 
@@ -289,9 +306,9 @@ def status_mesa(request, numero):
     return JsonResponse({'status': comanda.status})
 
 
+@idempotente
 def fechar_mesa(request, numero):
     """Marca a comanda da mesa como aguardando_caixa (cliente indo pagar)."""
-    numero = _normalizar_numero(numero)
 
     cpf_cnpj = ''
     forma_pagamento = ''
@@ -305,7 +322,7 @@ def fechar_mesa(request, numero):
     FORMAS_VALIDAS = {'dinheiro', 'cartao_debito', 'cartao_credito', 'pix', 'voucher'}
 
     with transaction.atomic():
-        comanda = Comanda.objects.select_for_update().filter(numero=numero, status='em_uso').first()
+        comanda = Comanda.objects.select_for_update().open_for(numero, status=['em_uso'])
         if not comanda:
             # Já foi fechada (double-tap) — responde ok para não bloquear o kiosk
             return JsonResponse({'ok': True})
@@ -323,10 +340,7 @@ def fechar_mesa(request, numero):
 
 def ver_conta(request, numero):
     """Retorna JSON com todos os itens pedidos da mesa e o total."""
-    numero = _normalizar_numero(numero)
-    comanda = Comanda.objects.filter(
-        numero=numero, status__in=('em_uso', 'aguardando_caixa')
-    ).order_by('-created_at').first()
+    comanda = Comanda.objects.open_for(numero)
     if not comanda:
         return JsonResponse({'itens': [], 'total': '0,00'})
 
@@ -107,6 +107,9 @@ class ComandaAdmin(admin.ModelAdmin):
                 # Reverte para o status original sem salvar a mudança
                 obj.status = original['status']
 
+        if 'numero' in form.changed_data:
+            obj.numero_int = Comanda.chave_numero(obj.numero)
+
         super().save_model(request, obj, form, change)
         updates = {}
         field_map = {
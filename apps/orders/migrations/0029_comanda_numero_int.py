@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+def preencher_numero_int(apps, schema_editor):
+    """
+    numero_int de todas as comandas. Se já houver mais de uma em uso para o
+    mesmo pager ('07' e '7', ou corrida no kiosk), só a mais recente recebe a
+    chave, a mesma que as buscas por número já retornavam.
+    """
+    Comanda = apps.get_model('orders', 'Comanda')
+
+    def chave(numero):
+        s = str(numero or '').strip()
+        return int(s) if s.isascii() and s.isdigit() and len(s) <= 9 else None
+
+    em_uso = set()
+    lote = []
+    for comanda in Comanda.objects.only('id', 'numero', 'status').order_by('-created_at', '-id').iterator(chunk_size=2000):
+        comanda.numero_int = chave(comanda.numero)
+        if comanda.numero_int is None:
+            continue
+        if comanda.status == 'em_uso':
+            if comanda.numero_int in em_uso:
+                continue
+            em_uso.add(comanda.numero_int)
+        lote.append(comanda)
+        if len(lote) >= 2000:
+            Comanda.objects.bulk_update(lote, ['numero_int'])
+            lote = []
+    if lote:
+        Comanda.objects.bulk_update(lote, ['numero_int'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0028_alter_comanda_updated_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comanda',
+            name='numero_int',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Número (inteiro)'),
+        ),
+        migrations.RunPython(preencher_numero_int, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comanda',
+            index=models.Index(fields=['numero_int', 'status', 'created_at'], name='orders_comanda_numero_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='comanda',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'em_uso')), fields=('numero_int',), name='orders_comanda_em_uso_uniq'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:50
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+
+
+def preencher_contador(apps, schema_editor):
+    """
+    Renumera pedidos com pedido_seq repetido na mesma comanda (o mais antigo
+    mantém o número, os demais vão para o fim) e inicializa o contador com o
+    maior pedido_seq de cada comanda.
+    """
+    Comanda = apps.get_model('orders', 'Comanda')
+    Pedido = apps.get_model('orders', 'Pedido')
+
+    repetidos = (
+        Pedido.objects.values('comanda_id', 'pedido_seq')
+        .annotate(n=Count('id')).filter(n__gt=1)
+        .values_list('comanda_id', flat=True).distinct()
+    )
+    for comanda_id in list(repetidos):
+        pedidos = list(Pedido.objects.filter(comanda_id=comanda_id).order_by('created_at', 'id'))
+        proximo = max(p.pedido_seq for p in pedidos)
+        vistos = set()
+        for pedido in pedidos:
+            if pedido.pedido_seq in vistos:
+                proximo += 1
+                pedido.pedido_seq = proximo
+                pedido.save(update_fields=['pedido_seq'])
+            vistos.add(pedido.pedido_seq)
+
+    ultimo = (
+        Pedido.objects.filter(comanda_id=OuterRef('pk'))
+        .values('comanda_id').annotate(m=Max('pedido_seq')).values('m')
+    )
+    Comanda.objects.filter(pk__in=Pedido.objects.values('comanda_id')).update(ultimo_pedido_seq=Subquery(ultimo))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0029_comanda_numero_int'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comanda',
+            name='ultimo_pedido_seq',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Último Sequencial de Pedido'),
+        ),
+        migrations.RunPython(preencher_contador, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pedido',
+            constraint=models.UniqueConstraint(fields=('comanda', 'pedido_seq'), name='orders_pedido_comanda_seq_uniq'),
+        ),
+    ]
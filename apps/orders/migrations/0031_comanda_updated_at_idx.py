@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0030_comanda_ultimo_pedido_seq'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comanda',
+            index=models.Index(fields=['updated_at', 'id'], name='orders_comanda_upd_id_idx'),
+        ),
+    ]
@@ -1,10 +1,51 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError, connections
 from django.conf import settings
 from utils.models import TimeStampedModel
 from products.models import Product
-from django.db.models import Sum
+from django.db.models import Sum, Q
 from decimal import Decimal
 
+
+class ComandaQuerySet(models.QuerySet):
+    """Busca de comandas pelo número do pager (coluna numero_int indexada)."""
+
+    def com_numero(self, numero):
+        """Comandas do pager, ignorando zeros à esquerda ('007', '07' e '7' são a mesma)."""
+        chave = Comanda.chave_numero(numero)
+        if chave is None:
+            return self.filter(numero=str(numero or '').strip())
+        return self.filter(numero_int=chave)
+
+    def open_for(self, numero, status=None):
+        """
+        Comanda mais recente do pager num dos status dados (padrão: em uso ou
+        aguardando caixa), ou None. Usa o índice (numero_int, status, created_at).
+        """
+        return (
+            self.com_numero(numero)
+            .filter(status__in=status or Comanda.STATUS_ABERTOS)
+            .order_by('-created_at')
+            .first()
+        )
+
+    def abrir(self, numero, **campos):
+        """
+        Retorna (comanda em_uso do pager, criada?). O índice único parcial
+        garante uma só por número: quem perde a corrida recebe a do outro.
+        """
+        comanda = self.open_for(numero, status=['em_uso'])
+        if comanda is not None:
+            return comanda, False
+        try:
+            with transaction.atomic():
+                return self.create(numero=numero, status='em_uso', **campos), True
+        except IntegrityError:
+            comanda = self.open_for(numero, status=['em_uso'])
+            if comanda is None:
+                raise
+            return comanda, False
+
+
 class Comanda(TimeStampedModel):
     """
     Modelo para a Comanda Eletrônica (o pager físico).
@@ -20,11 +61,21 @@ class Comanda(TimeStampedModel):
         ('migrada', 'Migrada'),
     ]
 
+    STATUS_ABERTOS = ('em_uso', 'aguardando_caixa')
+
     numero = models.CharField(
         max_length=50,
         verbose_name="Número da Comanda",
         help_text="Número identificado pelo código de barras do pager."
     )
+
+    # Chave de busca: numero como inteiro ('007' e '7' → 7); None se não numérico
+    numero_int = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Número (inteiro)"
+    )
     
     status = models.CharField(
         max_length=20,
@@ -81,6 +132,15 @@ class Comanda(TimeStampedModel):
         verbose_name="Iniciado Atendimento em"
     )
 
+    # Último pedido_seq alocado; só é alterado por proximo_pedido_seq()
+    ultimo_pedido_seq = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Último Sequencial de Pedido"
+    )
+
+    objects = ComandaQuerySet.as_manager()
+
     @property
     def tem_nfce(self):
         return bool(self.nfce_numero)
@@ -96,10 +156,76 @@ class Comanda(TimeStampedModel):
             ('delete_order', 'Pode excluir comandas'),
             ('cancel_closed_comanda', 'Pode cancelar comanda finalizada'),
         ]
+        indexes = [
+            models.Index(fields=['numero_int', 'status', 'created_at'], name='orders_comanda_numero_idx'),
+            # Cursor da lista de finalizadas (ClosedOrdersListView)
+            models.Index(fields=['updated_at', 'id'], name='orders_comanda_upd_id_idx'),
+        ]
+        constraints = [
+            # Um pager só pode estar em uso por uma comanda de cada vez
+            models.UniqueConstraint(
+                fields=['numero_int'],
+                condition=Q(status='em_uso'),
+                name='orders_comanda_em_uso_uniq',
+            ),
+        ]
 
     def __str__(self):
         return f"Comanda #{self.numero}"
 
+    @staticmethod
+    def chave_numero(numero):
+        """Número do pager como inteiro ('007', '07' e '7' → 7); None se não for numérico."""
+        s = str(numero or '').strip()
+        if s.isascii() and s.isdigit() and len(s) <= 9:
+            return int(s)
+        return None
+
+    def save(self, *args, **kwargs):
+        # Só na criação (ou quando o número é gravado explicitamente): comandas
+        # antigas duplicadas ficam com numero_int vazio (migração 0029)
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding or (update_fields is not None and 'numero' in update_fields):
+            self.numero_int = self.chave_numero(self.numero)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'numero_int'}
+        # Um save() completo de uma instância antiga não pode regravar o
+        # contador com valor desatualizado (geraria pedido_seq repetido)
+        if update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'ultimo_pedido_seq'
+            ]
+        super().save(*args, **kwargs)
+
+    def proximo_pedido_seq(self, using=None):
+        """
+        Aloca o próximo pedido_seq da comanda com um único UPDATE ... RETURNING.
+        O lock da linha serializa kiosk e garçom lançando na mesma comanda.
+        Grava updated_at junto: sem ele o contador novo não é enviado pela
+        sincronização (utils.sync_envio.CONTADORES).
+        """
+        from django.utils import timezone
+
+        connection = connections[using or self._state.db or 'default']
+        qn = connection.ops.quote_name
+        agora = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {qn(self._meta.db_table)} '
+                f'SET {qn("ultimo_pedido_seq")} = {qn("ultimo_pedido_seq")} + 1, {qn("updated_at")} = %s '
+                f'WHERE {qn("id")} = %s RETURNING {qn("ultimo_pedido_seq")}',
+                [agora, self.pk],
+            )
+            self.ultimo_pedido_seq = cursor.fetchone()[0]
+        self.updated_at = agora
+        return self.ultimo_pedido_seq
+
+    @property
+    def numero_exibicao(self):
+        """Número sem zeros à esquerda para os cards ('007' → '7')."""
+        return str(self.numero_int) if self.numero_int is not None else self.numero
+
     def update_total(self):
         """Atualiza o valor total da comanda somando os totais de seus pedidos.
         Comandas já finalizadas (fechada/cancelada/cortesia) são imutáveis — o valor
@@ -231,14 +357,24 @@ class Pedido(TimeStampedModel):
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['comanda', 'pedido_seq'],
+                name='orders_pedido_comanda_seq_uniq',
+            ),
+        ]
 
     def __str__(self):
         return f"Pedido #{self.id} da Comanda #{self.comanda.numero}"
     
     def save(self, *args, **kwargs):
         if not self.pk: # Se é um novo pedido
-            last_seq = Pedido.objects.filter(comanda=self.comanda).aggregate(models.Max('pedido_seq'))['pedido_seq__max'] or 0
-            self.pedido_seq = last_seq + 1
+            using = kwargs.get('using') or self._state.db or 'default'
+            # Contador e INSERT na mesma transação: se o INSERT falhar o número volta
+            with transaction.atomic(using=using):
+                self.pedido_seq = self.comanda.proximo_pedido_seq(using=using)
+                super().save(*args, **kwargs)
+            return
         super().save(*args, **kwargs)
 
     def update_total(self):
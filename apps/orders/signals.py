@@ -6,10 +6,12 @@ from django.dispatch import receiver
 def criar_saida_estoque_ao_entregar(sender, instance, **kwargs):
     """
     Quando um Pedido muda de status para 'entregue', cria registros de
-    StockExit para cada item do pedido que tem controle de estoque.
+    StockExit para cada item do pedido que tem controle de estoque e o
+    consumo de matéria prima das receitas (products.custos).
     Evita duplicar saídas verificando se o pedido já estava 'entregue' antes.
     """
     from products.models import StockExit, StockEntry
+    from products.custos import registrar_consumo
 
     if instance.pk is None:
         return  # pedido novo, sem itens ainda
@@ -38,3 +40,5 @@ def criar_saida_estoque_ao_entregar(sender, instance, **kwargs):
                 quantity=item.quantity,
                 pedido=instance,
             )
+
+    registrar_consumo([instance.pk], using=kwargs.get('using'))
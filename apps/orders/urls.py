@@ -43,6 +43,7 @@ urlpatterns = [
 
     # Comandas finalizadas
     path('finalizadas/', views.ClosedOrdersListView.as_view(), name='closed_orders'),
+    path('finalizadas/<int:pk>/itens/', views.ClosedOrderItemsView.as_view(), name='closed_order_items'),
     path('comanda-id/<int:pk>/cancelar-finalizada/', views.CancelarComandaFinalizadaView.as_view(), name='cancelar_comanda_finalizada'),
     path('comanda/<str:code>/emitir-nfce/', views.EmitirNFCeView.as_view(), name='emitir_nfce'),
     path('comanda/<str:code>/cupom-nfce/', views.CupomFiscalPrintView.as_view(), name='cupom_nfce'),
@@ -12,8 +12,9 @@ from django.urls import reverse_lazy, reverse
 from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
 from django.db.models import Q, Sum, Case, When, IntegerField
-from django.db import transaction
+from django.db import IntegrityError, transaction
 import json
+from utils.idempotencia import idempotente
 from .models import Comanda, Pedido, PedidoItem, ComandaPartialPayment, ItemRemovidoLog
 from .forms import PedidoForm, PedidoItemFormSet, ScannerForm, OrderStatusForm
 from products.models import Product, Adicional, OpcionalObrigatorio
@@ -720,14 +721,25 @@ class OrderFinalizeAPIView(LoginRequiredMixin, View):
 # COMANDAS FINALIZADAS
 class ClosedOrdersListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     """
-    Lista de comandas finalizadas
+    Lista de comandas finalizadas, paginada por cursor (updated_at, id): cada
+    página custa o mesmo para um dia ou uma semana de histórico. Os itens de
+    cada comanda são carregados sob demanda (ClosedOrderItemsView).
     """
     permission_required = 'orders.view_order'
     model = Comanda
     template_name = 'orders/closed_orders_list.html'
     context_object_name = 'orders'
+    page_size = 50
+
+    def _periodo(self):
+        """Limites [início, fim) do período em datetimes, para usar o índice de updated_at."""
+        tz = timezone.get_current_timezone()
+        inicio = timezone.make_aware(datetime.combine(self._date_from, datetime.min.time()), tz)
+        fim = timezone.make_aware(datetime.combine(self._date_to + timedelta(days=1), datetime.min.time()), tz)
+        return inicio, fim
+
     def get_queryset(self):
-        """Retorna comandas finalizadas e canceladas, filtradas por data (default hoje)"""
+        """Comandas finalizadas e canceladas do período (default hoje), uma página por vez."""
         today = timezone.localtime().date()
         raw_from = self.request.GET.get('date_from', '')
         raw_to   = self.request.GET.get('date_to', '')
@@ -742,18 +754,17 @@ class ClosedOrdersListView(LoginRequiredMixin, PermissionRequiredMixin, ListView
         self._date_from = date_from
         self._date_to   = date_to
         self._metodo    = self.request.GET.get('metodo', '')
+        self._busca     = self.request.GET.get('q', '').strip()
 
         VALID_METHODS = ['dinheiro', 'cartao_debito', 'cartao_credito', 'pix', 'parcial', 'cancelada', 'cortesia']
         metodo = self._metodo if self._metodo in VALID_METHODS else ''
 
+        inicio, fim = self._periodo()
         qs = Comanda.objects.filter(
             status__in=['fechada', 'cancelada', 'cortesia'],
-            updated_at__date__gte=date_from,
-            updated_at__date__lte=date_to,
-        ).select_related('checkout', 'created_by').prefetch_related(
-            'pedidos__items__product',
-            'checkout__payments',
-        ).order_by('-updated_at')
+            updated_at__gte=inicio,
+            updated_at__lt=fim,
+        )
 
         if metodo == 'cancelada':
             qs = qs.filter(status='cancelada')
@@ -762,7 +773,30 @@ class ClosedOrdersListView(LoginRequiredMixin, PermissionRequiredMixin, ListView
         elif metodo in ['dinheiro', 'cartao_debito', 'cartao_credito', 'pix', 'parcial']:
             qs = qs.filter(checkout__payment_method=metodo, status='fechada')
 
-        return qs
+        if self._busca:
+            filtro = Q(cliente_nome__icontains=self._busca)
+            chave = Comanda.chave_numero(self._busca)
+            if chave is not None:
+                filtro |= Q(numero_int=chave) | Q(pk=chave)
+            qs = qs.filter(filtro)
+
+        # Cursor "depois de": updated_at|id do último item da página anterior
+        self._cursor = self.request.GET.get('depois', '')
+        if self._cursor:
+            try:
+                ts, pk = self._cursor.rsplit('|', 1)
+                ts = datetime.fromisoformat(ts)
+                qs = qs.filter(Q(updated_at__lt=ts) | Q(updated_at=ts, pk__lt=int(pk)))
+            except ValueError:
+                self._cursor = ''
+
+        pagina = list(
+            qs.select_related('checkout', 'created_by')
+            .prefetch_related('checkout__payments')
+            .order_by('-updated_at', '-id')[:self.page_size + 1]
+        )
+        self._tem_proxima = len(pagina) > self.page_size
+        return pagina[:self.page_size]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -771,59 +805,68 @@ class ClosedOrdersListView(LoginRequiredMixin, PermissionRequiredMixin, ListView
         from checkouts.models import Checkout, CheckoutPayment
         from decimal import Decimal
 
-        date_from = getattr(self, '_date_from', timezone.localtime().date())
-        date_to   = getattr(self, '_date_to',   timezone.localtime().date())
+        date_from = self._date_from
+        date_to   = self._date_to
+        inicio, fim = self._periodo()
 
         # Estatísticas filtradas pelo mesmo período
         total_finalizadas = Comanda.objects.filter(
             status__in=['fechada', 'cancelada', 'cortesia'],
-            updated_at__date__gte=date_from,
-            updated_at__date__lte=date_to,
+            updated_at__gte=inicio,
+            updated_at__lt=fim,
         ).count()
 
-        total_receita = (
-            Checkout.objects.filter(
-                status='aprovado',
-                processed_at__date__gte=date_from,
-                processed_at__date__lte=date_to,
-            ).exclude(comanda__status__in=['cancelada', 'cortesia'])
-             .aggregate(total=Sum('total'))['total'] or 0
-        )
-
         # Troco inicial (SystemConfig)
         from config.models import ConfigTrocoInicial
         troco_inicial = ConfigTrocoInicial.get_settings().troco_inicial
 
-        # Totais por método de pagamento (para impressão do relatório)
+        # Totais por método de pagamento (para impressão do relatório): uma só
+        # query agrupada — checkouts simples por método UNION pagamentos dos parciais
         approved_qs = Checkout.objects.filter(
             status='aprovado',
-            processed_at__date__gte=date_from,
-            processed_at__date__lte=date_to,
+            processed_at__gte=inicio,
+            processed_at__lt=fim,
         ).exclude(comanda__status__in=['cancelada', 'cortesia'])
-        parcial_qs = approved_qs.filter(payment_method='parcial')
-
-        def _soma_metodo(method):
-            simples  = (approved_qs.filter(payment_method=method)
-                        .aggregate(t=Sum('total'))['t'] or Decimal('0'))
-            parciais = (CheckoutPayment.objects.filter(
-                            checkout__in=parcial_qs, payment_method=method)
-                        .aggregate(t=Sum('amount'))['t'] or Decimal('0'))
-            return simples + parciais
-
-        total_dinheiro_print = _soma_metodo('dinheiro')
-        total_debito_print   = _soma_metodo('cartao_debito')
-        total_credito_print  = _soma_metodo('cartao_credito')
-        total_pix_print      = _soma_metodo('pix')
+        simples = (
+            approved_qs.exclude(payment_method='parcial')
+            .values('payment_method').annotate(t=Sum('total')).values_list('payment_method', 't')
+            .order_by()
+        )
+        parciais = (
+            CheckoutPayment.objects.filter(checkout__in=approved_qs.filter(payment_method='parcial'))
+            .values('payment_method').annotate(t=Sum('amount')).values_list('payment_method', 't')
+            .order_by()
+        )
+        por_metodo = {}
+        for metodo, total in simples.union(parciais, all=True):
+            por_metodo[metodo] = por_metodo.get(metodo, Decimal('0')) + (total or Decimal('0'))
+
+        total_dinheiro_print = por_metodo.get('dinheiro', Decimal('0'))
+        total_debito_print   = por_metodo.get('cartao_debito', Decimal('0'))
+        total_credito_print  = por_metodo.get('cartao_credito', Decimal('0'))
+        total_pix_print      = por_metodo.get('pix', Decimal('0'))
         total_geral_print    = total_dinheiro_print + total_debito_print + total_credito_print + total_pix_print
 
+        # Paginação por cursor
+        pagina = context['orders']
+        proxima = ''
+        if self._tem_proxima and pagina:
+            ultimo = pagina[-1]
+            proxima = f'{ultimo.updated_at.isoformat()}|{ultimo.pk}'
+        params = self.request.GET.copy()
+        params.pop('depois', None)
+
         context.update({
             'total_finalizadas': total_finalizadas,
-            'total_receita': total_receita,
             'date_from': date_from.strftime('%Y-%m-%d'),
             'date_to':   date_to.strftime('%Y-%m-%d'),
             'date_from_fmt': date_from.strftime('%d/%m/%Y'),
             'date_to_fmt':   date_to.strftime('%d/%m/%Y'),
             'metodo_filter': getattr(self, '_metodo', ''),
+            'busca': self._busca,
+            'cursor_atual': self._cursor,
+            'cursor_proximo': proxima,
+            'query_sem_cursor': params.urlencode(),
             # print totals
             'print_troco':    troco_inicial,
             'print_dinheiro': total_dinheiro_print,
@@ -837,6 +880,37 @@ class ClosedOrdersListView(LoginRequiredMixin, PermissionRequiredMixin, ListView
         return context
 
 
+class ClosedOrderItemsView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Itens de uma comanda finalizada (JSON), carregados ao expandir a linha da lista."""
+    permission_required = 'orders.view_order'
+
+    def get(self, request, pk):
+        itens = (
+            PedidoItem.objects
+            .filter(pedido__comanda_id=pk)
+            .select_related('pedido', 'product')
+            .only(
+                'quantity', 'unit_price', 'observations', 'product_name',
+                'pedido__pedido_seq', 'pedido__status', 'product__name',
+            )
+            .order_by('pedido__pedido_seq', 'id')
+        )
+        return JsonResponse({
+            'success': True,
+            'itens': [
+                {
+                    'pedido': item.pedido.pedido_seq,
+                    'cancelado': item.pedido.status == 'cancelado',
+                    'produto': item.product_name or item.product.name,
+                    'quantidade': item.quantity,
+                    'total': f'{item.unit_price * item.quantity:.2f}',
+                    'observacoes': item.observations or '',
+                }
+                for item in itens
+            ],
+        })
+
+
 class ClosedOrderDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
     """
     Detalhes de uma comanda finalizada específica (fechada, cancelada ou cortesia).
@@ -863,7 +937,7 @@ class ClosedOrderDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailV
             except Comanda.DoesNotExist:
                 pass
         # Fallback: busca pelo numero (o mais recente)
-        obj = qs.filter(numero=lookup).order_by('-created_at').first()
+        obj = qs.com_numero(lookup).order_by('-created_at').first()
         if obj is None:
             raise Http404("Comanda não encontrada.")
         return obj
@@ -927,6 +1001,7 @@ class CancelarComandaFinalizadaView(LoginRequiredMixin, View):
                 comanda.pedidos.exclude(status='cancelado').update(
                     status='cancelado',
                     motivo_cancelamento=f'Comanda cancelada pós-fechamento. Motivo: {motivo}',
+                    updated_at=timezone.now(),
                 )
         except Exception as e:
             return JsonResponse({'success': False, 'error': f'Erro ao cancelar comanda: {str(e)}'})
@@ -967,7 +1042,7 @@ class CancelarComandaFinalizadaView(LoginRequiredMixin, View):
         # Feito fora do atomic principal para não reverter o cancelamento da comanda.
         try:
             from checkouts.models import Checkout as _Checkout
-            _Checkout.objects.filter(comanda=comanda, status='aprovado').update(status='cancelado')
+            _Checkout.objects.filter(comanda=comanda, status='aprovado').update(status='cancelado', updated_at=timezone.now())
         except Exception:
             pass
 
@@ -1001,13 +1076,12 @@ class EmitirNFCeView(LoginRequiredMixin, View):
                 ).first()
             else:
                 # Fallback pelo numero (não-único — mantido para compatibilidade)
-                comanda = Comanda.objects.filter(
-                    numero=code,
+                comanda = Comanda.objects.com_numero(code).filter(
                     status='fechada'
                 ).order_by('-created_at').first()
             if not comanda:
                 # Debug: mostra o status real da comanda para diagnóstico
-                todas = list(Comanda.objects.filter(numero=code).values('id', 'status', 'nfce_numero', 'created_at').order_by('-created_at')) if code else []
+                todas = list(Comanda.objects.com_numero(code).values('id', 'status', 'nfce_numero', 'created_at').order_by('-created_at')) if code else []
                 detalhe = f'pk={pk} code={repr(code)} | comandas encontradas: {todas}'
                 import logging
                 logging.getLogger(__name__).error(f'[NFCE] Comanda não encontrada para emissão. {detalhe}')
@@ -1185,7 +1259,7 @@ class EmitirNFCeView(LoginRequiredMixin, View):
             },
             'nfce': {
                 'numero': numero,
-                'serie': empresa.serie_nfce,
+                'serie': empresa.serie_nfce_atual,
                 'data_emissao': timezone.now(),
                 'ambiente': empresa.ambiente_nfce,
             },
@@ -1757,9 +1831,7 @@ from django.http import JsonResponse
 class ApiCheckComandaView(View):
     def get(self, request, numero):
         # Retorna a comanda ativa (em_uso ou livre); ignora fechadas/canceladas
-        comanda = Comanda.objects.filter(
-            numero=numero, status__in=['em_uso', 'livre']
-        ).order_by('-created_at').first()
+        comanda = Comanda.objects.open_for(numero, status=['em_uso', 'livre'])
         if comanda:
             return JsonResponse({'exists': True, 'status': comanda.status})
         return JsonResponse({'exists': False, 'status': None})
@@ -1784,22 +1856,23 @@ class NovaComandaView(LoginRequiredMixin, View):
             return render(request, self.template_name, {'error': 'Número inválido.'})
         numero = str(num_int).zfill(3)
 
-        # Busca comanda ativa (em_uso ou livre) com esse número
-        comanda = Comanda.objects.filter(
-            numero=numero, status__in=['em_uso', 'livre']
-        ).order_by('-created_at').first()
-
-        if comanda and comanda.status == 'livre':
-            comanda.status = 'em_uso'
-            comanda.cliente_nome = cliente_nome
-            comanda.save()
-        elif not comanda:
+        # Comanda em uso com esse número; senão reaproveita uma livre. Uma livre só
+        # vira em_uso se não houver outra em uso (índice único orders_comanda_em_uso_uniq)
+        comanda = Comanda.objects.open_for(numero, status=['em_uso'])
+        if comanda is None:
+            livre = Comanda.objects.open_for(numero, status=['livre'])
+            if livre is not None:
+                try:
+                    with transaction.atomic():
+                        livre.status = 'em_uso'
+                        livre.cliente_nome = cliente_nome
+                        livre.save(update_fields=['status', 'cliente_nome'])
+                    comanda = livre
+                except IntegrityError:
+                    pass  # outro terminal abriu o pager agora: abrir() devolve a dele
+        if comanda is None:
             # Não há comanda ativa com esse número — cria nova (histórico anterior preservado)
-            comanda = Comanda.objects.create(
-                numero=numero,
-                cliente_nome=cliente_nome,
-                status='em_uso',
-            )
+            comanda, _ = Comanda.objects.abrir(numero, cliente_nome=cliente_nome)
 
         # Redireciona para a página de detalhes da comanda
         auto_open = request.POST.get('auto_open_modal')
@@ -1826,12 +1899,10 @@ class ComandaDetailView(LoginRequiredMixin, DetailView):
 
         numero = self.kwargs.get('numero')
         # Pega a comanda ativa (em uso ou aguardando caixa) com esse número
-        comanda = Comanda.objects.filter(
-            numero=numero, status__in=['em_uso', 'aguardando_caixa']
-        ).order_by('-created_at').first()
+        comanda = Comanda.objects.open_for(numero)
         if comanda is None:
             # Fallback: comanda mais recente com esse número
-            comanda = Comanda.objects.filter(numero=numero).order_by('-created_at').first()
+            comanda = Comanda.objects.com_numero(numero).order_by('-created_at').first()
             if comanda is None:
                 from django.http import Http404
                 raise Http404("Comanda não encontrada")
@@ -1844,11 +1915,15 @@ class ComandaDetailView(LoginRequiredMixin, DetailView):
         categories = [{'id': k, 'name': v} for k, v in Product.CATEGORY_CHOICES]
 
         # Buscar Todos os Produtos ativos e visíveis no cardápio
+        # (queryset preguiçoso: só é avaliado se o fragmento da grade não estiver em cache)
         products = Product.objects.filter(is_active=True, show_in_menu=True)
 
+        from products.catalogo import revisao_catalogo
+
         adicionais = Adicional.objects.filter(is_active=True)
         context['categories'] = categories
         context['products'] = products
+        context['revisao_catalogo'] = revisao_catalogo()
         context['adicionais'] = adicionais
 
         can_view_partial_financial = (
@@ -1953,6 +2028,7 @@ class ApiUpdatePedidoView(LoginRequiredMixin, View):
             return JsonResponse({'success': False, 'message': str(e)})
 
 
+@method_decorator(idempotente, name='post')
 class ApiCreatePedidoView(LoginRequiredMixin, View):
     def post(self, request, numero=None, pk=None):
         try:
@@ -1969,9 +2045,7 @@ class ApiCreatePedidoView(LoginRequiredMixin, View):
                     pk=pk, status__in=['em_uso', 'aguardando_caixa']
                 ).first()
             else:
-                comanda = Comanda.objects.filter(
-                    numero=numero, status__in=['em_uso', 'aguardando_caixa']
-                ).order_by('-created_at').first()
+                comanda = Comanda.objects.open_for(numero)
             if comanda is None:
                 return JsonResponse({'success': False, 'message': 'Comanda não encontrada ou já fechada.'})
 
@@ -2049,6 +2123,7 @@ class NovoPedidoView(LoginRequiredMixin, View):
 
 
 
+@method_decorator(idempotente, name='post')
 class RegistrarPagamentoParcialView(LoginRequiredMixin, View):
     """
     Registra pagamentos parciais mantendo a comanda em aberto.
@@ -2065,9 +2140,7 @@ class RegistrarPagamentoParcialView(LoginRequiredMixin, View):
                 pk=pk, status__in=['em_uso', 'aguardando_caixa']
             ).first()
         else:
-            comanda = Comanda.objects.filter(
-                numero=numero, status__in=['em_uso', 'aguardando_caixa']
-            ).order_by('-created_at').first()
+            comanda = Comanda.objects.open_for(numero)
 
         if not comanda:
             return JsonResponse({'ok': False, 'erro': 'Comanda não encontrada'}, status=404)
@@ -2119,8 +2192,16 @@ class RegistrarPagamentoParcialView(LoginRequiredMixin, View):
                 for metodo, valor in payments
             ])
             if comanda.status != 'em_uso':
-                comanda.status = 'em_uso'
-                comanda.save(update_fields=['status'])
+                # Volta para em uso só se o pager não tiver sido reaberto numa comanda
+                # nova (índice único orders_comanda_em_uso_uniq); senão fica aguardando caixa
+                if Comanda.objects.open_for(comanda.numero, status=['em_uso']) is None:
+                    status_anterior = comanda.status
+                    try:
+                        with transaction.atomic():
+                            comanda.status = 'em_uso'
+                            comanda.save(update_fields=['status'])
+                    except IntegrityError:
+                        comanda.status = status_anterior
 
         restante = comanda.total_amount - total_pago
         if restante < 0:
@@ -2140,9 +2221,7 @@ class FechaMesaCaixaView(LoginRequiredMixin, View):
         if not (getattr(request.user, 'is_caixa', False) or request.user.has_perm('checkouts.change_checkout')):
             from django.http import JsonResponse
             return JsonResponse({'ok': False, 'erro': 'Sem permissão'}, status=403)
-        comanda = Comanda.objects.filter(
-            numero=numero, status__in=['em_uso', 'aguardando_caixa']
-        ).order_by('-created_at').first()
+        comanda = Comanda.objects.open_for(numero)
         if not comanda:
             from django.http import JsonResponse
             return JsonResponse({'ok': False, 'erro': 'Comanda não encontrada'}, status=404)
@@ -2161,9 +2240,7 @@ class CancelarComandaView(LoginRequiredMixin, View):
             messages.error(request, 'Sem permissão para cancelar comandas.')
             return redirect('orders:comanda_detail', numero=numero)
 
-        comanda = Comanda.objects.filter(
-            numero=numero, status__in=['em_uso', 'aguardando_caixa']
-        ).order_by('-created_at').first()
+        comanda = Comanda.objects.open_for(numero)
         if not comanda:
             from django.http import Http404
             raise Http404("Comanda não encontrada ou já cancelada")
@@ -2221,7 +2298,7 @@ class CortesiaComandaView(LoginRequiredMixin, View):
             messages.error(request, 'Sem permissão para registrar cortesia.')
             return redirect('orders:comanda_detail', numero=numero)
 
-        comanda = Comanda.objects.filter(numero=numero, status__in=['em_uso', 'aguardando_caixa']).order_by('-created_at').first()
+        comanda = Comanda.objects.open_for(numero)
         if not comanda:
             messages.error(request, 'Comanda não encontrada ou não está em uso.')
             return redirect('accounts:dashboard')
@@ -2476,7 +2553,7 @@ class ImprimirPedidosNaoImpressosView(LoginRequiredMixin, View):
         if not pedidos:
             return JsonResponse({'type': 'none'})
 
-        Pedido.objects.filter(id__in=[p.id for p in pedidos], started_at__isnull=True).update(started_at=timezone.now())
+        Pedido.objects.filter(id__in=[p.id for p in pedidos], started_at__isnull=True).update(started_at=timezone.now(), updated_at=timezone.now())
 
         mob_all = []
         desk_all = []
@@ -2577,7 +2654,7 @@ class ImprimirComandaView(LoginRequiredMixin, UserPassesTestMixin, View):
             # Chamado da tela da comanda: prioriza em_uso, depois fechada mais recente
             comanda = (
                 Comanda.objects.prefetch_related('pedidos__items__product')
-                .filter(numero=numero)
+                .com_numero(numero)
                 .order_by(
                     Case(
                         When(status='em_uso', then=0),
@@ -2838,14 +2915,13 @@ class CozinhaApiPedidosView(LoginRequiredMixin, View):
                 items__product__destino_producao='cozinha',
             )
             .distinct()
+            # Comandas com numero >= 30 são administrativas (caixa) — não vão para a cozinha
+            .exclude(comanda__numero_int__gte=30)
             .select_related('comanda')
             .prefetch_related('items__product')
             .order_by('-created_at')
         )
 
-        # Comandas com numero >= 30 são administrativas (caixa) — não vão para a cozinha
-        pedidos = [p for p in pedidos if int(p.comanda.numero) < 30]
-
         data = []
         for p in pedidos:
             itens_cozinha = [
@@ -2928,10 +3004,10 @@ class IniciarAtendimentoView(LoginRequiredMixin, View):
             comanda=comanda,
             status__in=['aguardando', 'preparando', 'pronta'],
             atendente_numero__isnull=True,
-        ).update(atendente_numero=numero)
+        ).update(atendente_numero=numero, updated_at=timezone.now())
 
         # Atualiza o atendente atual na comanda (badge no card)
-        Comanda.objects.filter(pk=comanda.pk).update(atendente_numero=numero)
+        Comanda.objects.filter(pk=comanda.pk).update(atendente_numero=numero, updated_at=timezone.now())
 
         # Busca os pedidos capturados para montar o conteúdo de impressão
         pedidos = list(
@@ -2943,7 +3019,7 @@ class IniciarAtendimentoView(LoginRequiredMixin, View):
             return JsonResponse({'success': True, 'type': 'none'})
 
         ids_novos = [p.id for p in pedidos]
-        Pedido.objects.filter(id__in=ids_novos, started_at__isnull=True).update(started_at=timezone.now())
+        Pedido.objects.filter(id__in=ids_novos, started_at__isnull=True).update(started_at=timezone.now(), updated_at=timezone.now())
 
         mob_all = []
         desk_all = []
@@ -3051,10 +3127,10 @@ class TransferirMesaView(LoginRequiredMixin, View):
                     pk=pk, status__in=['em_uso', 'aguardando_caixa']
                 )
 
-                if novo_numero == comanda_origem.numero:
+                if int(novo_numero) == comanda_origem.numero_int:
                     return JsonResponse({'success': False, 'error': 'A nova mesa deve ser diferente da atual.'}, status=400)
 
-                if Comanda.objects.filter(numero=novo_numero, status__in=['em_uso', 'aguardando_caixa']).exists():
+                if Comanda.objects.open_for(novo_numero) is not None:
                     return JsonResponse({'success': False, 'error': f'Já existe uma mesa aberta com o número {novo_numero}.'}, status=400)
 
                 # Atualiza cliente_nome para refletir o novo número (ex: "MESA 05" → "MESA 07")
@@ -3071,13 +3147,15 @@ class TransferirMesaView(LoginRequiredMixin, View):
                     cliente_nome=novo_cliente_nome,
                     status='em_uso',
                     motivo_cancelamento=f'MIGRADA DA MESA > {numero_origem}',
+                    # Os pedidos migrados mantêm o pedido_seq; o contador continua de onde estava
+                    ultimo_pedido_seq=comanda_origem.ultimo_pedido_seq,
                 )
 
                 # Migra pedidos ativos (não cancelados)
-                comanda_origem.pedidos.exclude(status='cancelado').update(comanda=nova_comanda)
+                comanda_origem.pedidos.exclude(status='cancelado').update(comanda=nova_comanda, updated_at=timezone.now())
 
                 # Migra pagamentos parciais
-                comanda_origem.partial_payments.all().update(comanda=nova_comanda)
+                comanda_origem.partial_payments.all().update(comanda=nova_comanda, updated_at=timezone.now())
 
                 # Atualiza total da nova comanda
                 nova_comanda.update_total()
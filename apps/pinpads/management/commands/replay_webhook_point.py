@@ -0,0 +1,59 @@
+import json
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from pinpads.models import PaymentIntent
+from pinpads.webhooks import _id_do_evento, assinatura
+
+REPLAYS = Path(__file__).resolve().parents[2] / 'replays'
+
+
+class Command(BaseCommand):
+    help = (
+        "Reenvia ao webhook local uma sequência gravada de notificações do "
+        "Mercado Pago Point (pinpads/replays/*.json), assinadas com "
+        "MERCADOPAGO_WEBHOOK_SECRET, e mostra o estado final de cada intenção."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', nargs='?', default='point_aprovado.json',
+                            help='Arquivo JSON (lista de payloads); relativo a pinpads/replays/.')
+        parser.add_argument('--sem-assinatura', action='store_true',
+                            help='Envia sem x-signature (o webhook deve recusar fora do DEBUG).')
+
+    def handle(self, *args, **options):
+        caminho = Path(options['arquivo'])
+        if not caminho.is_absolute() and not caminho.exists():
+            caminho = REPLAYS / caminho
+        if not caminho.exists():
+            raise CommandError(f'Arquivo não encontrado: {caminho}')
+        eventos = json.loads(caminho.read_text(encoding='utf-8'))
+
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS and settings.ALLOWED_HOSTS[0] != '*' else 'localhost'
+        client = Client(HTTP_HOST=host)
+        url = reverse('mercadopago_webhook')
+        secret = settings.MERCADOPAGO_WEBHOOK_SECRET
+        ids = []
+        for payload in eventos:
+            headers = {}
+            if secret and not options['sem_assinatura']:
+                ts = str(int(time.time() * 1000))
+                request_id = str(uuid.uuid4())
+                v1 = assinatura(secret, _id_do_evento(payload), request_id, ts)
+                headers = {'HTTP_X_SIGNATURE': f'ts={ts},v1={v1}', 'HTTP_X_REQUEST_ID': request_id}
+            resp = client.post(url, data=json.dumps(payload), content_type='application/json', secure=True, **headers)
+            self.stdout.write(f'{resp.status_code} {resp.content.decode()}')
+            if _id_do_evento(payload) not in ids:
+                ids.append(_id_do_evento(payload))
+
+        for intent in PaymentIntent.objects.filter(intent_id__in=ids):
+            self.stdout.write(self.style.SUCCESS(
+                f'{intent.intent_id}: {intent.state} — {intent.eventos_recebidos} eventos, '
+                f'pagamento {intent.payment_id or "—"}'
+            ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pinpads', '0003_simplify_pinpad_add_bandeira'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pinpad',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Atualizado em'),
+        ),
+    ]
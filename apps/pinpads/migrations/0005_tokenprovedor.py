@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pinpads', '0004_alter_pinpad_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenProvedor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ambiente', models.CharField(max_length=20, verbose_name='Ambiente')),
+                ('access_token', models.TextField(blank=True, default='', verbose_name='Access Token')),
+                ('expira_em', models.DateTimeField(blank=True, null=True, verbose_name='Expira em')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('pinpad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='pinpads.pinpad')),
+            ],
+            options={
+                'verbose_name': 'Token do Provedor',
+                'verbose_name_plural': 'Tokens dos Provedores',
+                'constraints': [models.UniqueConstraint(fields=('pinpad', 'ambiente'), name='pinpads_token_pinpad_ambiente_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pinpads', '0005_tokenprovedor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentIntent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('intent_id', models.CharField(max_length=100, unique=True, verbose_name='ID da Intenção')),
+                ('device_id', models.CharField(blank=True, default='', max_length=100, verbose_name='Dispositivo')),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Valor')),
+                ('state', models.CharField(choices=[('OPEN', 'Aberta'), ('ON_TERMINAL', 'Na maquininha'), ('PROCESSING', 'Processando'), ('PROCESSED', 'Processada'), ('FINISHED', 'Aprovada'), ('CANCELED', 'Cancelada'), ('ERROR', 'Erro'), ('ABANDONED', 'Abandonada')], default='OPEN', max_length=20, verbose_name='Estado')),
+                ('payment_id', models.CharField(blank=True, default='', max_length=50, verbose_name='ID do Pagamento')),
+                ('payment_type', models.CharField(blank=True, default='', max_length=30, verbose_name='Tipo do Pagamento')),
+                ('ultimo_evento', models.JSONField(blank=True, default=dict, verbose_name='Último Evento')),
+                ('eventos_recebidos', models.PositiveIntegerField(default=0, verbose_name='Eventos Recebidos')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('pinpad', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_intents', to='pinpads.pinpad', verbose_name='Pinpad')),
+            ],
+            options={
+                'verbose_name': 'Intenção de Pagamento',
+                'verbose_name_plural': 'Intenções de Pagamento',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pinpads', '0006_paymentintent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tokenprovedor',
+            name='credencial',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Credencial'),
+        ),
+    ]
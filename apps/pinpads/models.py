@@ -30,7 +30,8 @@ class Pinpad(TimeStampedModel):
 
     def save(self, *args, **kwargs):
         if self.is_active:
-            Pinpad.objects.exclude(pk=self.pk).filter(is_active=True).update(is_active=False)
+            from django.utils import timezone
+            Pinpad.objects.exclude(pk=self.pk).filter(is_active=True).update(is_active=False, updated_at=timezone.now())
         super().save(*args, **kwargs)
 
     @classmethod
@@ -51,3 +52,72 @@ class BandeiraPinpad(models.Model):
 
     def __str__(self):
         return f"{self.nome} — Créd {self.taxa_credito}% / Déb {self.taxa_debito}%"
+
+
+class TokenProvedor(models.Model):
+    """
+    Token OAuth de um provedor de pagamento por pinpad e ambiente, compartilhado
+    entre as requisições e os workers (pinpads.services.tokens).
+    """
+    pinpad = models.ForeignKey(Pinpad, on_delete=models.CASCADE, related_name='tokens')
+    ambiente = models.CharField(max_length=20, verbose_name="Ambiente")
+    access_token = models.TextField(blank=True, default='', verbose_name="Access Token")
+    expira_em = models.DateTimeField(null=True, blank=True, verbose_name="Expira em")
+    # SHA-256 das credenciais do token: trocar a chave do pinpad invalida o token
+    credencial = models.CharField(max_length=64, blank=True, default='', verbose_name="Credencial")
+    atualizado_em = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Token do Provedor"
+        verbose_name_plural = "Tokens dos Provedores"
+        constraints = [
+            models.UniqueConstraint(fields=['pinpad', 'ambiente'], name='pinpads_token_pinpad_ambiente_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.pinpad.name} ({self.ambiente})"
+
+
+class PaymentIntent(models.Model):
+    """
+    Intenção de pagamento do Mercado Pago Point, atualizada pelo webhook
+    (pinpads.webhooks). As telas consultam esta tabela em vez da API.
+    """
+    ESTADOS = [
+        ('OPEN', 'Aberta'),
+        ('ON_TERMINAL', 'Na maquininha'),
+        ('PROCESSING', 'Processando'),
+        ('PROCESSED', 'Processada'),
+        ('FINISHED', 'Aprovada'),
+        ('CANCELED', 'Cancelada'),
+        ('ERROR', 'Erro'),
+        ('ABANDONED', 'Abandonada'),
+    ]
+    ESTADOS_FINAIS = ('FINISHED', 'CANCELED', 'ERROR', 'ABANDONED')
+
+    pinpad = models.ForeignKey(
+        Pinpad, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='payment_intents', verbose_name="Pinpad",
+    )
+    intent_id = models.CharField(max_length=100, unique=True, verbose_name="ID da Intenção")
+    device_id = models.CharField(max_length=100, blank=True, default='', verbose_name="Dispositivo")
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name="Valor")
+    state = models.CharField(max_length=20, choices=ESTADOS, default='OPEN', verbose_name="Estado")
+    payment_id = models.CharField(max_length=50, blank=True, default='', verbose_name="ID do Pagamento")
+    payment_type = models.CharField(max_length=30, blank=True, default='', verbose_name="Tipo do Pagamento")
+    ultimo_evento = models.JSONField(default=dict, blank=True, verbose_name="Último Evento")
+    eventos_recebidos = models.PositiveIntegerField(default=0, verbose_name="Eventos Recebidos")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Intenção de Pagamento"
+        verbose_name_plural = "Intenções de Pagamento"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.intent_id} ({self.state})"
+
+    @property
+    def finalizada(self):
+        return self.state in self.ESTADOS_FINAIS
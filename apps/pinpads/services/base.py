@@ -1,12 +1,55 @@
+import threading
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.limites import UpstreamOcupado, limitar
 from ..models import Pinpad
 
+_sessao = None
+_sessao_lock = threading.Lock()
+
+
+def sessao_http() -> requests.Session:
+    """
+    Session única do processo para Rede e Mercado Pago: reaproveita as conexões
+    TLS (keep-alive) em vez de abrir uma por chamada.
+    """
+    global _sessao
+    if _sessao is None:
+        with _sessao_lock:
+            if _sessao is None:
+                sessao = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10)
+                sessao.mount('https://', adapter)
+                sessao.mount('http://', adapter)
+                _sessao = sessao
+    return _sessao
+
+
 class PaymentProviderService(ABC):
     """Classe base abstrata para todos os provedores de pagamento"""
+
+    # Nome do serviço em settings.UPSTREAM_LIMITES
+    UPSTREAM = None
     
     def __init__(self, pinpad: Pinpad):
         self.pinpad = pinpad
+
+    def _http(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Requisição pela Session compartilhada, com limite de chamadas
+        simultâneas (utils.limites).
+        Sem vaga, levanta ConnectionError: os tratamentos de RequestException
+        das subclasses já devolvem a mensagem de erro para a tela.
+        """
+        try:
+            with limitar(self.UPSTREAM):
+                return sessao_http().request(method, url, **kwargs)
+        except UpstreamOcupado as e:
+            raise requests.ConnectionError(str(e)) from e
         
     @abstractmethod
     def get_devices(self) -> Dict:
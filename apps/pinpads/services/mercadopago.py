@@ -13,6 +13,8 @@ class MercadoPagoPointService(PaymentProviderService):
     """
     Serviço para integração com Mercado Pago Point
     """
+
+    UPSTREAM = 'mercadopago'
     
     def __init__(self, pinpad: Pinpad):
         self.pinpad = pinpad
@@ -62,7 +64,7 @@ class MercadoPagoPointService(PaymentProviderService):
             url = f"{self.base_url}/point/integration-api/devices"
             headers = self._get_headers()
             
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self._http('get', url, headers=headers, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -111,7 +113,7 @@ class MercadoPagoPointService(PaymentProviderService):
             # 1. Verificar informações da conta/usuário
             try:
                 user_url = f"{self.base_url}/users/me"
-                user_response = requests.get(user_url, headers=headers, timeout=30)
+                user_response = self._http('get', user_url, headers=headers, timeout=30)
                 
                 logger.info(f"👤 INFORMAÇÕES DA CONTA:")
                 logger.info(f"   Status: {user_response.status_code}")
@@ -160,7 +162,7 @@ class MercadoPagoPointService(PaymentProviderService):
             # 3. Verificar configurações Point específicas
             try:
                 point_config_url = f"{self.base_url}/point/integration-api/device_dependencies"
-                config_response = requests.get(point_config_url, headers=headers, timeout=30)
+                config_response = self._http('get', point_config_url, headers=headers, timeout=30)
                 
                 logger.info(f"⚙️ CONFIGURAÇÕES POINT:")
                 logger.info(f"   Status: {config_response.status_code}")
@@ -172,7 +174,7 @@ class MercadoPagoPointService(PaymentProviderService):
             # 4. Verificar stores/pos configuradas
             try:
                 stores_url = f"{self.base_url}/users/me/stores"
-                stores_response = requests.get(stores_url, headers=headers, timeout=30)
+                stores_response = self._http('get', stores_url, headers=headers, timeout=30)
                 
                 logger.info(f"🏪 LOJAS CONFIGURADAS:")
                 logger.info(f"   Status: {stores_response.status_code}")
@@ -225,7 +227,7 @@ class MercadoPagoPointService(PaymentProviderService):
             url = f"{self.base_url}/point/integration-api/payment-intents/{payment_intent_id}"
             headers = self._get_headers()
             
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self._http('get', url, headers=headers, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -252,7 +254,7 @@ class MercadoPagoPointService(PaymentProviderService):
             url = f"{self.base_url}/point/integration-api/devices/{device_id}/payment-intents/{payment_intent_id}"
             headers = self._get_headers()
             
-            response = requests.delete(url, headers=headers, timeout=30)
+            response = self._http('delete', url, headers=headers, timeout=30)
             response.raise_for_status()
             
             return {
@@ -284,7 +286,7 @@ class MercadoPagoPointService(PaymentProviderService):
                 }
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = self._http('post', url, headers=headers, json=payload, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -315,7 +317,7 @@ class MercadoPagoPointService(PaymentProviderService):
             
             # Tentar endpoint de status específico
             status_url = f"{self.base_url}/point/integration-api/devices/{device_id}"
-            response = requests.get(status_url, headers=headers, timeout=30)
+            response = self._http('get', status_url, headers=headers, timeout=30)
             
             logger.info(f"🔍 Status device: {response.status_code}")
             logger.info(f"🔍 Response: {response.text}")
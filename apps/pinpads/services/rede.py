@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 from django.utils import timezone as dj_timezone
 from ..models import Pinpad
 from .base import PaymentProviderService
+from .tokens import credencial, invalidar, obter_token
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +20,8 @@ class RedeItauService(PaymentProviderService):
     Serviço para integração com REDE Itaú
     Implementação baseada na documentação oficial e.Rede
     """
+
+    UPSTREAM = 'rede'
     
     def __init__(self, pinpad: Pinpad):
         self.pinpad = pinpad
@@ -33,9 +36,6 @@ class RedeItauService(PaymentProviderService):
         else:
             self.auth_url = "https://api.userede.com.br/redelabs/oauth2/token"
             self.base_url = "https://api.userede.com.br/erede/v2"
-            
-        self._access_token = None
-        self._token_expires_at = None
         
         # Códigos de retorno REDE conforme documentação oficial
         self.return_codes = {
@@ -56,17 +56,42 @@ class RedeItauService(PaymentProviderService):
             '999': {'status': 'pending', 'message': 'Processando'}
         }
     
+    def _ambiente(self) -> str:
+        return 'sandbox' if self.sandbox else 'producao'
+
+    def _credencial(self) -> str:
+        return credencial(self.client_id, self.client_secret, self.auth_url)
+
     def _get_access_token(self) -> str:
         """
-        Obtém ou renova o token de acesso OAuth 2.0
+        Token OAuth 2.0 compartilhado entre requisições e workers
+        (services.tokens); só pede um novo à REDE perto de expirar ou
+        quando as credenciais do pinpad mudam.
+        """
+        return obter_token(self.pinpad, self._ambiente(), self._solicitar_token, self._credencial())
+
+    def _http_autenticado(self, method: str, url: str, **kwargs):
+        """
+        _http com o Bearer do token compartilhado. Um 401 descarta o token
+        (revogado ou de credenciais antigas) e repete a chamada uma vez com um novo.
+        """
+        for tentativa in range(2):
+            token = self._get_access_token()
+            headers = {
+                'Authorization': f'Bearer {token}',
+                'Content-Type': 'application/json'
+            }
+            response = self._http(method, url, headers=headers, **kwargs)
+            if response.status_code != 401 or tentativa:
+                return response
+            logger.warning("Token REDE recusado (401); descartando e obtendo outro")
+            invalidar(self.pinpad, self._ambiente(), token, self._credencial())
+
+    def _solicitar_token(self):
+        """
+        Obtém um token de acesso OAuth 2.0 novo
         Conforme documentação oficial REDE
         """
-        current_time = time.time()
-        
-        # Verifica se o token ainda é válido (com margem de 2 minutos)
-        if self._access_token and self._token_expires_at and current_time < (self._token_expires_at - 120):
-            return self._access_token
-        
         try:
             # Credenciais em base64: Basic Base64(clientId:clientSecret)
             credentials = f"{self.client_id}:{self.client_secret}"
@@ -83,16 +108,14 @@ class RedeItauService(PaymentProviderService):
             
             logger.info(f"Obtendo token OAuth2 REDE - Endpoint: {self.auth_url}")
             
-            response = requests.post(self.auth_url, headers=headers, data=data, timeout=30)
+            response = self._http('post', self.auth_url, headers=headers, data=data, timeout=30)
             response.raise_for_status()
             
             token_data = response.json()
-            self._access_token = token_data['access_token']
             expires_in = token_data.get('expires_in', 1440)  # Default 24 minutos (1440 segundos)
-            self._token_expires_at = current_time + expires_in
             
             logger.info(f"Token REDE obtido com sucesso. Expira em {expires_in} segundos")
-            return self._access_token
+            return token_data['access_token'], expires_in
             
         except requests.RequestException as e:
             logger.error(f"Erro ao obter token REDE: {str(e)}")
@@ -103,14 +126,6 @@ class RedeItauService(PaymentProviderService):
             logger.error(f"Erro inesperado na autenticação REDE: {str(e)}")
             raise
     
-    def _get_headers(self) -> Dict[str, str]:
-        """Headers padrão para requisições autenticadas"""
-        token = self._get_access_token()
-        return {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-    
     def _generate_reference(self, prefix: str = "cp") -> str:
         """Gera referência única para transação"""
         timestamp = int(time.time())
@@ -168,7 +183,6 @@ class RedeItauService(PaymentProviderService):
         """
         try:
             url = f"{self.base_url}/transactions"
-            headers = self._get_headers()
             
             # Converter valor para centavos (formato REDE)
             amount_cents = int(amount * 100)
@@ -217,7 +231,7 @@ class RedeItauService(PaymentProviderService):
             logger.info(f"Enviando transação REDE: {reference} - Valor: R$ {amount:.2f} - Tipo: {payment_type}")
             logger.debug(f"Payload REDE: {json.dumps(payload, indent=2)}")
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = self._http_autenticado('post', url, json=payload, timeout=30)
             
             logger.info(f"Resposta REDE - Status: {response.status_code}")
             
@@ -291,11 +305,10 @@ class RedeItauService(PaymentProviderService):
         """
         try:
             url = f"{self.base_url}/transactions/{payment_intent_id}"
-            headers = self._get_headers()
             
             logger.info(f"Consultando transação REDE: {payment_intent_id}")
             
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self._http_autenticado('get', url, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -354,7 +367,6 @@ class RedeItauService(PaymentProviderService):
         """
         try:
             url = f"{self.base_url}/transactions"
-            headers = self._get_headers()
             
             # Converter valor para centavos
             amount_cents = int(amount * 100)
@@ -376,7 +388,7 @@ class RedeItauService(PaymentProviderService):
             logger.info(f"Criando PIX REDE: {reference} - Valor: R$ {amount:.2f}")
             logger.debug(f"Payload PIX REDE: {json.dumps(payload, indent=2)}")
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = self._http_autenticado('post', url, json=payload, timeout=30)
             
             if response.status_code == 201:
                 data = response.json()
@@ -437,7 +449,6 @@ class RedeItauService(PaymentProviderService):
         """
         try:
             url = f"{self.base_url}/transactions/{payment_intent_id}/refunds"
-            headers = self._get_headers()
             
             payload = {}
             if amount:
@@ -451,7 +462,7 @@ class RedeItauService(PaymentProviderService):
             
             logger.info(f"Cancelando transação REDE: {payment_intent_id} - Tipo: {cancel_type}")
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response = self._http_autenticado('post', url, json=payload, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -483,13 +494,12 @@ class RedeItauService(PaymentProviderService):
         """
         try:
             url = f"{self.base_url}/transactions"
-            headers = self._get_headers()
             
             params = {'reference': reference}
             
             logger.info(f"Consultando transação REDE por reference: {reference}")
             
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = self._http_autenticado('get', url, params=params, timeout=30)
             response.raise_for_status()
             
             data = response.json()
@@ -522,7 +532,6 @@ class RedeItauService(PaymentProviderService):
         """
         try:
             url = f"{self.base_url}/transactions/{payment_intent_id}"
-            headers = self._get_headers()
             
             payload = {}
             if amount:
@@ -530,7 +539,7 @@ class RedeItauService(PaymentProviderService):
             
             logger.info(f"Capturando transação REDE: {payment_intent_id}")
             
-            response = requests.put(url, headers=headers, json=payload, timeout=30)
+            response = self._http_autenticado('put', url, json=payload, timeout=30)
             response.raise_for_status()
             
             data = response.json()
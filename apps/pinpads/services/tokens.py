@@ -0,0 +1,96 @@
+"""
+Cache dos tokens OAuth dos provedores (Rede) por (pinpad, ambiente, credencial).
+
+get_payment_service() cria um serviço novo por requisição, então o token não
+pode morar na instância. Cada processo guarda o token em memória e a linha de
+TokenProvedor o compartilha entre os workers. Quando ele está a menos de
+MARGEM segundos de expirar, uma thread por chave em cada processo (lock
+local) pede um token novo ao provedor — fora de transação, sem lock de linha
+preso durante a chamada HTTP — e o grava numa transação curta. As demais
+threads esperam o lock e reaproveitam o token.
+
+A chave inclui a impressão das credenciais (credencial()): trocar a chave do
+pinpad no cadastro descarta o token antigo em todos os workers. invalidar()
+descarta um token recusado pelo provedor (401).
+"""
+import hashlib
+import threading
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import TokenProvedor
+
+# Renova com esta antecedência (s) para nunca usar um token vencendo no meio da chamada
+MARGEM = 120
+
+_memoria = {}
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def credencial(*partes):
+    """Impressão (SHA-256) das credenciais usadas para obter o token."""
+    return hashlib.sha256('\x00'.join(str(p or '') for p in partes).encode()).hexdigest()
+
+
+def _valido(expira_em_ts):
+    return expira_em_ts is not None and expira_em_ts - MARGEM > time.time()
+
+
+def _linha_valida(row, cred):
+    return (
+        row is not None and bool(row.access_token) and row.credencial == cred
+        and row.expira_em is not None and _valido(row.expira_em.timestamp())
+    )
+
+
+def _lock(chave):
+    with _locks_lock:
+        return _locks.setdefault(chave, threading.Lock())
+
+
+def obter_token(pinpad, ambiente, solicitar, cred=''):
+    """
+    Token válido de (pinpad, ambiente) obtido com as credenciais `cred`.
+    `solicitar()` é chamado só quando é preciso renovar e devolve
+    (access_token, expires_in_segundos).
+    """
+    chave = (pinpad.pk, ambiente, cred)
+    guardado = _memoria.get(chave)
+    if guardado and _valido(guardado[1]):
+        return guardado[0]
+
+    with _lock(chave):
+        guardado = _memoria.get(chave)
+        if guardado and _valido(guardado[1]):
+            return guardado[0]
+
+        row = TokenProvedor.objects.filter(pinpad=pinpad, ambiente=ambiente).first()
+        if not _linha_valida(row, cred):
+            token, expires_in = solicitar()
+            expira_em = timezone.now() + timedelta(seconds=expires_in)
+            with transaction.atomic():
+                row, _ = TokenProvedor.objects.select_for_update().get_or_create(pinpad=pinpad, ambiente=ambiente)
+                # Outro worker pode ter renovado durante a chamada: fica o que expira depois
+                if not (_linha_valida(row, cred) and row.expira_em >= expira_em):
+                    row.access_token = token
+                    row.expira_em = expira_em
+                    row.credencial = cred
+                    row.save(update_fields=['access_token', 'expira_em', 'credencial', 'atualizado_em'])
+
+        _memoria[chave] = (row.access_token, row.expira_em.timestamp())
+        return row.access_token
+
+
+def invalidar(pinpad, ambiente, token, cred=''):
+    """Descarta `token` (recusado pelo provedor) da memória e do banco."""
+    chave = (pinpad.pk, ambiente, cred)
+    guardado = _memoria.get(chave)
+    if guardado and guardado[0] == token:
+        _memoria.pop(chave, None)
+    TokenProvedor.objects.filter(pinpad=pinpad, ambiente=ambiente, access_token=token).update(
+        access_token='', expira_em=None, atualizado_em=timezone.now(),
+    )
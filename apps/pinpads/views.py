@@ -214,10 +214,43 @@ class PointPaymentView(LoginRequiredMixin, PermissionRequiredMixin, View):
 
 
 class PointPaymentStatusView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """
+    Estado da intenção de pagamento lido da tabela PaymentIntent, que o webhook
+    mantém atualizada (nenhuma chamada à API do Mercado Pago). Com ?aguardar=N
+    segura a resposta até o estado mudar, no máximo N segundos
+    (limitado a PAYMENT_STATUS_LONG_POLL_MAX).
+    """
     permission_required = 'pinpads.view_pinpad'
 
     def get(self, request, pinpad_id, payment_intent_id):
-        return JsonResponse({'success': False, 'message': 'Integração Point não disponível.'})
+        import time
+        from django.conf import settings
+        from .models import PaymentIntent
+
+        try:
+            aguardar = max(0, min(int(request.GET.get('aguardar', 0)), settings.PAYMENT_STATUS_LONG_POLL_MAX))
+        except ValueError:
+            aguardar = 0
+        estado_cliente = request.GET.get('estado', '')
+
+        limite = time.monotonic() + aguardar
+        while True:
+            intent = PaymentIntent.objects.filter(intent_id=payment_intent_id).first()
+            mudou = intent is not None and (intent.finalizada or intent.state != estado_cliente)
+            if mudou or time.monotonic() >= limite:
+                break
+            time.sleep(1)
+
+        if intent is None:
+            return JsonResponse({'success': True, 'state': 'OPEN', 'aguardando_webhook': True})
+        return JsonResponse({
+            'success': True,
+            'state': intent.state,
+            'finalizada': intent.finalizada,
+            'payment_id': intent.payment_id,
+            'payment_type': intent.payment_type,
+            'updated_at': intent.updated_at.isoformat(),
+        })
 
 
 from django.views.decorators.csrf import csrf_exempt
@@ -226,11 +259,27 @@ from django.http import JsonResponse as _JR
 
 @csrf_exempt
 def mercadopago_webhook(request):
-    if request.method == 'POST':
-        try:
-            data = json.loads(request.body)
-            logger.info(f"Webhook recebido: {data}")
-            return _JR({'status': 'ok'})
-        except Exception as e:
-            return _JR({'error': str(e)}, status=500)
-    return _JR({'error': 'Method not allowed'}, status=405)
+    """Verifica a assinatura e aplica o evento em PaymentIntent (pinpads.webhooks)."""
+    from .webhooks import WebhookInvalido, aplicar_evento, verificar_assinatura
+
+    if request.method != 'POST':
+        return _JR({'error': 'Method not allowed'}, status=405)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return _JR({'error': 'JSON inválido'}, status=400)
+    try:
+        verificar_assinatura(request.headers, data)
+    except WebhookInvalido as e:
+        logger.warning(f"Webhook Mercado Pago recusado: {e}")
+        return _JR({'error': str(e)}, status=403)
+    try:
+        intent, aplicado = aplicar_evento(data)
+    except WebhookInvalido as e:
+        # Outros tipos de notificação: responde 200 para o Mercado Pago não reenviar
+        logger.info(f"Webhook Mercado Pago ignorado: {e}")
+        return _JR({'status': 'ignored'})
+    except Exception as e:
+        logger.exception("Erro ao aplicar webhook Mercado Pago")
+        return _JR({'error': str(e)}, status=500)
+    return _JR({'status': 'ok', 'state': intent.state, 'aplicado': aplicado})
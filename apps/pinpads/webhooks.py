@@ -0,0 +1,109 @@
+"""
+Webhook do Mercado Pago Point: verificação da assinatura e aplicação das
+transições de estado em PaymentIntent.
+
+O Mercado Pago assina cada notificação com o header x-signature
+("ts=...,v1=...") = HMAC-SHA256 do manifesto
+"id:<data.id>;request-id:<x-request-id>;ts:<ts>;" com a chave secreta do
+webhook (MERCADOPAGO_WEBHOOK_SECRET). Notificações repetidas ou fora de ordem
+são esperadas: o estado só avança (OPEN → ON_TERMINAL → PROCESSING →
+PROCESSED → final) e um estado final nunca é sobrescrito.
+"""
+import hashlib
+import hmac
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import PaymentIntent
+
+logger = logging.getLogger(__name__)
+
+ORDEM = {'OPEN': 0, 'ON_TERMINAL': 1, 'PROCESSING': 2, 'PROCESSED': 3}
+ORDEM.update({estado: 4 for estado in PaymentIntent.ESTADOS_FINAIS})
+
+
+class WebhookInvalido(Exception):
+    pass
+
+
+def _id_do_evento(payload):
+    data = payload.get('data') or {}
+    return str(data.get('id') or payload.get('id') or '')
+
+
+def assinatura(secret, data_id, request_id, ts):
+    """Valor v1 esperado do x-signature."""
+    manifesto = f'id:{data_id};request-id:{request_id};ts:{ts};'
+    return hmac.new(secret.encode(), manifesto.encode(), hashlib.sha256).hexdigest()
+
+
+def verificar_assinatura(headers, payload):
+    """Levanta WebhookInvalido se o x-signature não confere com a chave configurada."""
+    secret = settings.MERCADOPAGO_WEBHOOK_SECRET
+    if not secret:
+        if settings.DEBUG:
+            return
+        raise WebhookInvalido('MERCADOPAGO_WEBHOOK_SECRET não configurada')
+
+    partes = dict(
+        p.strip().split('=', 1) for p in headers.get('x-signature', '').split(',') if '=' in p
+    )
+    ts, v1 = partes.get('ts'), partes.get('v1')
+    if not ts or not v1:
+        raise WebhookInvalido('x-signature ausente')
+    esperado = assinatura(secret, _id_do_evento(payload), headers.get('x-request-id', ''), ts)
+    if not hmac.compare_digest(esperado, v1):
+        raise WebhookInvalido('x-signature não confere')
+
+
+def _estado(payload):
+    estado = payload.get('state') or ''
+    if not estado:
+        # Formato novo: {"action": "state_FINISHED", "data": {"id": ...}}
+        acao = payload.get('action') or ''
+        if acao.startswith('state_'):
+            estado = acao[len('state_'):]
+    return estado.upper()
+
+
+def aplicar_evento(payload):
+    """
+    Cria/atualiza a PaymentIntent do evento. Retorna (intent, aplicado), em que
+    aplicado=False indica evento repetido ou atrasado (ignorado).
+    """
+    intent_id = _id_do_evento(payload)
+    estado = _estado(payload)
+    if not intent_id or estado not in ORDEM:
+        raise WebhookInvalido(f'evento sem id ou com estado desconhecido: {estado!r}')
+
+    with transaction.atomic():
+        intent, _ = PaymentIntent.objects.select_for_update().get_or_create(intent_id=intent_id)
+        intent.eventos_recebidos += 1
+        aplicado = not intent.finalizada and ORDEM[estado] >= ORDEM[intent.state]
+        campos = ['eventos_recebidos', 'updated_at']
+        if aplicado:
+            intent.state = estado
+            intent.ultimo_evento = payload
+            campos += ['state', 'ultimo_evento']
+            pagamento = payload.get('payment') or {}
+            if pagamento.get('id'):
+                intent.payment_id = str(pagamento['id'])
+                intent.payment_type = pagamento.get('type') or ''
+                campos += ['payment_id', 'payment_type']
+            if payload.get('device_id'):
+                intent.device_id = payload['device_id']
+                campos.append('device_id')
+            if payload.get('amount') is not None and intent.amount is None:
+                try:
+                    # O Point informa o valor em centavos
+                    intent.amount = Decimal(str(payload['amount'])) / 100
+                    campos.append('amount')
+                except (InvalidOperation, TypeError):
+                    pass
+        intent.save(update_fields=campos)
+
+    logger.info(f"Webhook Point {intent_id}: {estado} ({'aplicado' if aplicado else 'ignorado'})")
+    return intent, aplicado
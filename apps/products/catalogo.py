@@ -0,0 +1,142 @@
+"""
+Catálogo do PDV e do kiosk.
+
+- revisao_catalogo(): revisão para chaves de cache (fragmento da grade de
+  produtos da comanda). Muda quando qualquer produto é salvo
+  (Product.updated_at) ou quando um produto entra ou sai do cardápio — uma
+  única query agregada, sem carregar os produtos.
+- editar_produtos(): edição em lote (flags, preço, campos fiscais) numa
+  transação, com UPDATEs agrupados e bulk_update. Não passa por
+  Product.save(): nada de imagem, e todas as linhas alteradas recebem o
+  mesmo updated_at — a versão do catálogo do kiosk (Max(updated_at)) muda
+  uma vez só, e a sincronização incremental (utils.sync) continua
+  enxergando as alterações.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .forms import NFCE_FIELDS
+from .models import Product
+
+CAMPOS_FLAGS = ('is_active', 'show_in_menu', 'visivel_kiosk')
+CAMPOS_LOTE = CAMPOS_FLAGS + ('price',) + tuple(NFCE_FIELDS)
+# Obrigatórios no ProductForm para emissão de NFC-e: não podem ficar vazios
+NFCE_OBRIGATORIOS = ('ncm', 'cfop', 'cst_icms', 'cst_pis_cofins')
+
+
+@dataclass
+class ResultadoLote:
+    alterados: list = field(default_factory=list)  # ids, em ordem
+    sem_alteracao: int = 0
+    campos: list = field(default_factory=list)
+    atualizado_em: object = None
+
+
+def revisao_catalogo():
+    r = Product.objects.aggregate(
+        ultima=Max('updated_at'),
+        no_cardapio=Count('id', filter=Q(is_active=True, show_in_menu=True)),
+    )
+    return f"{r['ultima'].timestamp() if r['ultima'] else 0}:{r['no_cardapio']}"
+
+
+def _validar(alteracoes, pode_fiscal):
+    """{id: {campo: valor}} → mesmos valores convertidos pelos campos do model."""
+    limpas, erros = {}, {}
+    for pid, campos in alteracoes.items():
+        try:
+            pid = int(pid)
+        except (TypeError, ValueError):
+            erros[str(pid)] = ['ID de produto inválido.']
+            continue
+        if not isinstance(campos, dict) or not campos:
+            erros[str(pid)] = ['Nenhum campo informado.']
+            continue
+        if not pode_fiscal and any(c in NFCE_FIELDS for c in campos):
+            raise PermissionDenied('Sem permissão para editar campos NFC-e.')
+
+        limpos, msgs = {}, []
+        for campo, valor in campos.items():
+            if campo not in CAMPOS_LOTE:
+                msgs.append(f'{campo}: campo não editável em lote.')
+                continue
+            model_field = Product._meta.get_field(campo)
+            try:
+                valor = model_field.clean(valor, None)
+            except ValidationError as e:
+                msgs.extend(f'{campo}: {m}' for m in e.messages)
+                continue
+            if campo in NFCE_OBRIGATORIOS and not valor:
+                msgs.append(f'{campo}: obrigatório para emissão de NFC-e.')
+                continue
+            limpos[campo] = valor
+        if msgs:
+            erros[str(pid)] = msgs
+        else:
+            limpas.setdefault(pid, {}).update(limpos)
+    if erros:
+        raise ValidationError(erros)
+    return limpas
+
+
+def editar_produtos(alteracoes, usuario=None, pode_fiscal=True, using='default'):
+    """
+    Aplica `alteracoes` ({product_id: {campo: valor}}, campos de CAMPOS_LOTE)
+    numa transação: produtos com as mesmas alterações num só UPDATE, os de
+    valores diferentes (preços por produto) num bulk_update. Tudo ou nada:
+    um valor inválido ou um produto inexistente levanta ValidationError
+    (mensagens por id) sem gravar nada; campo fiscal sem `pode_fiscal` levanta PermissionDenied.
+    Produtos cujos valores já são os pedidos não são regravados.
+    """
+    limpas = _validar(alteracoes, pode_fiscal)
+    resultado = ResultadoLote()
+    if not limpas:
+        return resultado
+
+    campos_pedidos = sorted({c for campos in limpas.values() for c in campos})
+    with transaction.atomic(using=using):
+        produtos = {
+            p.pk: p for p in
+            Product.objects.using(using).select_for_update()
+            .filter(pk__in=limpas).only('pk', *campos_pedidos)
+        }
+        faltando = [pid for pid in limpas if pid not in produtos]
+        if faltando:
+            raise ValidationError({str(pid): ['Produto não encontrado.'] for pid in faltando})
+
+        agora = timezone.now()
+        grupos = defaultdict(list)  # mesmas alterações → mesmo UPDATE
+        for pid in sorted(limpas):
+            produto = produtos[pid]
+            mudou = {c: v for c, v in limpas[pid].items() if getattr(produto, c) != v}
+            if not mudou:
+                resultado.sem_alteracao += 1
+                continue
+            for campo, valor in mudou.items():
+                setattr(produto, campo, valor)
+            grupos[tuple(sorted(mudou.items()))].append(produto)
+            resultado.alterados.append(pid)
+
+        if resultado.alterados:
+            # update()/bulk_update não aplicam auto_now: o mesmo instante para o lote inteiro
+            carimbo = {'updated_at': agora, 'updated_by': usuario}
+            qs = Product.objects.using(using)
+            avulsos, campos_avulsos = [], set()
+            for mudancas, lista in grupos.items():
+                if len(lista) > 1:
+                    qs.filter(pk__in=[p.pk for p in lista]).update(**dict(mudancas), **carimbo)
+                else:
+                    avulsos.extend(lista)
+                    campos_avulsos.update(c for c, _ in mudancas)
+            if avulsos:
+                # Valores diferentes por produto (ex.: preços): um CASE por campo
+                qs.bulk_update(avulsos, sorted(campos_avulsos), batch_size=500)
+                qs.filter(pk__in=[p.pk for p in avulsos]).update(**carimbo)
+            resultado.campos = sorted({c for mudancas in grupos for c, _ in mudancas})
+            resultado.atualizado_em = agora
+    return resultado
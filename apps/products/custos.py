@@ -0,0 +1,108 @@
+"""
+Motor de custo e consumo de matéria prima pelas receitas (ProductIngredient).
+
+- Product.custo_receita é pré-calculado no banco com um único UPDATE por
+  lote de produtos e refeito pelos signals quando a receita ou o
+  RawMaterial.unit_cost mudam.
+- O consumo de matéria prima dos pedidos entregues sai de uma só query
+  agrupada (itens × receita), sem laço por item/ingrediente.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Product, ProductIngredient, RawMaterial, RawMaterialConsumption
+
+_DEC = DecimalField(max_digits=18, decimal_places=8)
+
+
+def _custo_receita_sq():
+    """Subquery: custo da receita do produto da linha externa."""
+    return Subquery(
+        ProductIngredient.objects
+        .filter(product=OuterRef('pk'))
+        .order_by()
+        .values('product')
+        .annotate(c=Sum(F('quantity') * F('raw_material__unit_cost'), output_field=_DEC))
+        .values('c')[:1],
+        output_field=_DEC,
+    )
+
+
+def recalcular_custos(produtos=None, using=None):
+    """
+    Regrava Product.custo_receita de `produtos` (ids ou queryset de ids;
+    None = todos) em um único UPDATE. Retorna o número de produtos afetados.
+    Carimba updated_at (update() não aplica auto_now) para a sincronização
+    incremental e a versão do catálogo enxergarem o custo novo.
+    """
+    qs = Product.objects.using(using) if using else Product.objects.all()
+    if produtos is not None:
+        qs = qs.filter(pk__in=produtos)
+    return qs.update(
+        custo_receita=Coalesce(_custo_receita_sq(), Value(Decimal('0')), output_field=_DEC),
+        updated_at=timezone.now(),
+    )
+
+
+def recalcular_custos_da_materia(raw_material_id, using=None):
+    """Recalcula os produtos cuja receita usa a matéria prima."""
+    ingredientes = ProductIngredient.objects.using(using) if using else ProductIngredient.objects.all()
+    return recalcular_custos(
+        ingredientes.filter(raw_material_id=raw_material_id).values('product_id'),
+        using=using,
+    )
+
+
+def registrar_consumo(pedidos, using=None):
+    """
+    Grava o RawMaterialConsumption dos pedidos (ids ou queryset de ids)
+    com uma query agrupada por (pedido, matéria prima) e um bulk_create.
+    """
+    from orders.models import PedidoItem
+
+    itens = PedidoItem.objects.using(using) if using else PedidoItem.objects.all()
+    linhas = (
+        itens.filter(pedido__in=pedidos, product__ingredients__isnull=False)
+        .order_by()
+        .values(
+            'pedido_id',
+            'product__ingredients__raw_material_id',
+            'product__ingredients__raw_material__unit_cost',
+        )
+        .annotate(q=Sum(F('quantity') * F('product__ingredients__quantity'), output_field=_DEC))
+    )
+    consumos = [
+        RawMaterialConsumption(
+            pedido_id=l['pedido_id'],
+            raw_material_id=l['product__ingredients__raw_material_id'],
+            quantity=l['q'],
+            unit_cost=l['product__ingredients__raw_material__unit_cost'],
+        )
+        for l in linhas
+    ]
+    manager = RawMaterialConsumption.objects.db_manager(using) if using else RawMaterialConsumption.objects
+    return manager.bulk_create(consumos)
+
+
+def materiais_consumidos(inicio, fim):
+    """
+    Matérias primas consumidas por pedidos entregues em [inicio, fim)
+    (datetimes), agregadas em uma query: nome, unidade, quantidade e custo.
+    """
+    linhas = list(
+        RawMaterialConsumption.objects
+        .filter(created_at__gte=inicio, created_at__lt=fim)
+        .order_by()
+        .values('raw_material_id', 'raw_material__name', 'raw_material__unit_measure')
+        .annotate(
+            quantidade=Sum('quantity'),
+            custo=Sum(F('quantity') * F('unit_cost'), output_field=_DEC),
+        )
+        .order_by('-custo', 'raw_material__name')
+    )
+    for l in linhas:
+        l['unidade'] = RawMaterial.UNIT_SHORT.get(l['raw_material__unit_measure'], l['raw_material__unit_measure'])
+    return linhas
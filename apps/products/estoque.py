@@ -0,0 +1,128 @@
+"""
+Mapa de disponibilidade de estoque do catálogo inteiro.
+
+disponibilidade() devolve, para cada (produto, sabor/variação) com controle de
+estoque (ao menos uma StockEntry), entradas, saídas permanentes (StockExit),
+saídas em andamento (itens de pedidos ainda não entregues) e o saldo — tudo em
+uma única query agrupada (UNION ALL das três origens).
+
+O resultado fica em cache no processo, indexado pela EstoqueRevisao: qualquer
+alteração de estoque ou de pedido incrementa a revisão (products.signals) e a
+próxima chamada refaz o mapa. Uma chamada com o cache válido custa só a leitura
+da revisão.
+"""
+from array import array
+from threading import Lock
+
+from django.db import connections, transaction
+from django.db.models import F
+
+# Pedidos cujos itens ainda não viraram StockExit (mesmos de _get_saldo_estoque)
+STATUS_EM_ANDAMENTO = ('aguardando', 'preparando', 'pronta')
+
+_lock = Lock()
+_cache = {}  # alias -> (revisao, Disponibilidade)
+
+
+class Disponibilidade:
+    """
+    Mapa (product_id, opcional_obrigatorio_id) → saldo, guardado em colunas
+    (array) com um índice por chave. Chaves sem controle de estoque não
+    aparecem: saldo() devolve None e esgotado() devolve False para elas.
+    """
+    __slots__ = ('revisao', '_indice', 'chaves', 'entradas', 'saidas', 'em_andamento')
+
+    def __init__(self, revisao, linhas):
+        self.revisao = revisao
+        self.chaves = [(l[0], l[1]) for l in linhas]
+        self.entradas = array('q', (int(l[2] or 0) for l in linhas))
+        self.saidas = array('q', (int(l[3] or 0) for l in linhas))
+        self.em_andamento = array('q', (int(l[4] or 0) for l in linhas))
+        self._indice = {chave: i for i, chave in enumerate(self.chaves)}
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def __contains__(self, chave):
+        return chave in self._indice
+
+    def saldo(self, product_id, opcional_id=None):
+        i = self._indice.get((product_id, opcional_id))
+        if i is None:
+            return None
+        return self.entradas[i] - self.saidas[i] - self.em_andamento[i]
+
+    def esgotado(self, product_id, opcional_id=None):
+        saldo = self.saldo(product_id, opcional_id)
+        return saldo is not None and saldo <= 0
+
+    def linhas(self):
+        """(product_id, opcional_id, entradas, saidas, em_andamento, saldo) por chave."""
+        for i, (pid, oid) in enumerate(self.chaves):
+            e, s, a = self.entradas[i], self.saidas[i], self.em_andamento[i]
+            yield pid, oid, e, s, a, e - s - a
+
+    def esgotados(self):
+        """Chaves com saldo ≤ 0 — usado na versão do catálogo do kiosk."""
+        return sorted(
+            (pid, oid) for pid, oid, _, _, _, saldo in self.linhas() if saldo <= 0
+        )
+
+
+def _sql(connection):
+    from orders.models import Pedido, PedidoItem
+    from .models import StockEntry, StockExit
+
+    qn = connection.ops.quote_name
+    entrada, saida = qn(StockEntry._meta.db_table), qn(StockExit._meta.db_table)
+    item, pedido = qn(PedidoItem._meta.db_table), qn(Pedido._meta.db_table)
+    pid, oid, qtd = qn('product_id'), qn('opcional_obrigatorio_id'), qn('quantity')
+    marcadores = ', '.join(['%s'] * len(STATUS_EM_ANDAMENTO))
+    return (
+        f'SELECT m.{pid}, m.{oid}, SUM(m.e), SUM(m.s), SUM(m.a) FROM ('
+        f'SELECT {pid}, {oid}, {qtd} AS e, 0 AS s, 0 AS a FROM {entrada} '
+        f'UNION ALL SELECT {pid}, {oid}, 0, {qtd}, 0 FROM {saida} '
+        f'UNION ALL SELECT i.{pid}, i.{oid}, 0, 0, i.{qtd} FROM {item} i '
+        f'INNER JOIN {pedido} p ON p.{qn("id")} = i.{qn("pedido_id")} '
+        f'WHERE p.{qn("status")} IN ({marcadores})'
+        f') m GROUP BY m.{pid}, m.{oid} HAVING SUM(m.e) > 0'
+    ), list(STATUS_EM_ANDAMENTO)
+
+
+def revisao_atual(using='default'):
+    from .models import EstoqueRevisao
+
+    return EstoqueRevisao.objects.using(using).filter(pk=1).values_list('revisao', flat=True).first() or 0
+
+
+def disponibilidade(using='default'):
+    """Disponibilidade do catálogo inteiro na revisão de estoque atual."""
+    revisao = revisao_atual(using)
+    em_cache = _cache.get(using)
+    if em_cache and em_cache[0] == revisao:
+        return em_cache[1]
+
+    connection = connections[using]
+    sql, params = _sql(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        mapa = Disponibilidade(revisao, cursor.fetchall())
+    with _lock:
+        _cache[using] = (revisao, mapa)
+    return mapa
+
+
+def _incrementar(using):
+    from .models import EstoqueRevisao
+
+    revisoes = EstoqueRevisao.objects.using(using)
+    if not revisoes.filter(pk=1).update(revisao=F('revisao') + 1):
+        revisoes.get_or_create(pk=1, defaults={'revisao': 1})
+
+
+def nova_revisao(using='default'):
+    """
+    Incrementa a revisão de estoque após o commit da transação corrente:
+    o UPDATE da linha única não fica travado durante o lançamento do pedido.
+    """
+    transaction.on_commit(lambda: _incrementar(using), using=using)
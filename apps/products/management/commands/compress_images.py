@@ -1,12 +1,35 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
 
 from kiosk.models import KioskSlide
 from products.models import Combo, Product
-from utils.image_optimizer import compress_image_field
+from utils.image_optimizer import processar_imagem
+
+MODELS = {
+    "products.Product": Product,
+    "products.Combo": Combo,
+    "kiosk.KioskSlide": KioskSlide,
+}
+
+
+def _processar(tarefa):
+    """Runs in a pool process: compress + responsive variants for one record."""
+    label, pk, forcar = tarefa
+    try:
+        return processar_imagem(MODELS[label], pk, forcar=forcar)
+    finally:
+        close_old_connections()
 
 
 class Command(BaseCommand):
-    help = "Compress image files for Product, Combo and KioskSlide models."
+    help = (
+        "Compress images and generate responsive variants (WebP + original format) "
+        "for Product, Combo and KioskSlide, using a process pool."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -15,43 +38,48 @@ class Command(BaseCommand):
             default=None,
             help="Optional limit of records to process per model.",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Pool processes (default: CPU count).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate variants even when they are up to date.",
+        )
 
     def handle(self, *args, **options):
         limit = options.get("limit")
-        total_processed = 0
-        total_compressed = 0
-
-        model_configs = [
-            (Product, "image"),
-            (Combo, "image"),
-            (KioskSlide, "image"),
-        ]
-
-        for model, image_attr in model_configs:
-            queryset = model.objects.exclude(**{f"{image_attr}": ""}).exclude(**{f"{image_attr}__isnull": True})
+        tarefas = []
+        for label, model in MODELS.items():
+            queryset = (
+                model.objects.exclude(image="").exclude(image__isnull=True)
+                .order_by("pk").values_list("pk", flat=True)
+            )
             if limit:
                 queryset = queryset[:limit]
+            tarefas += [(label, pk, options["force"]) for pk in queryset]
 
-            processed = 0
-            compressed = 0
-
-            for obj in queryset.iterator():
-                processed += 1
-                image_field = getattr(obj, image_attr, None)
-                if compress_image_field(image_field):
-                    compressed += 1
-
-            total_processed += processed
-            total_compressed += compressed
+        # Os processos filhos abrem as próprias conexões
+        connections.close_all()
+        contexto = multiprocessing.get_context("fork")
+        processed = {label: 0 for label in MODELS}
+        compressed = {label: 0 for label in MODELS}
+        with ProcessPoolExecutor(max_workers=max(options["workers"], 1), mp_context=contexto) as pool:
+            for (label, _, _), ok in zip(tarefas, pool.map(_processar, tarefas, chunksize=4)):
+                processed[label] += 1
+                compressed[label] += bool(ok)
 
+        for label, model in MODELS.items():
             self.stdout.write(
                 self.style.SUCCESS(
-                    f"{model.__name__}: processed={processed}, compressed={compressed}"
+                    f"{model.__name__}: processed={processed[label]}, compressed={compressed[label]}"
                 )
             )
-
         self.stdout.write(
             self.style.SUCCESS(
-                f"Done. Total processed={total_processed}, compressed={total_compressed}"
+                f"Done. Total processed={sum(processed.values())}, compressed={sum(compressed.values())}"
             )
         )
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:04
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def calcular_custos(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductIngredient = apps.get_model('products', 'ProductIngredient')
+    dec = DecimalField(max_digits=18, decimal_places=8)
+    custo = Subquery(
+        ProductIngredient.objects.filter(product=OuterRef('pk')).order_by()
+        .values('product')
+        .annotate(c=Sum(F('quantity') * F('raw_material__unit_cost'), output_field=dec))
+        .values('c')[:1],
+        output_field=dec,
+    )
+    Product.objects.using(schema_editor.connection.alias).update(
+        custo_receita=Coalesce(custo, Value(Decimal('0')), output_field=dec)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0031_comanda_updated_at_idx'),
+        ('products', '0026_alter_adicional_updated_at_alter_combo_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='custo_receita',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.0000'), editable=False, max_digits=12, verbose_name='Custo da Receita (R$)'),
+        ),
+        migrations.CreateModel(
+            name='RawMaterialConsumption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='Quantidade')),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=10, verbose_name='Custo Unitário (R$)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('pedido', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='raw_material_consumptions', to='orders.pedido', verbose_name='Pedido')),
+                ('raw_material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumptions', to='products.rawmaterial', verbose_name='Matéria Prima')),
+            ],
+            options={
+                'verbose_name': 'Consumo de Matéria Prima',
+                'verbose_name_plural': 'Consumos de Matéria Prima',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(calcular_custos, migrations.RunPython.noop),
+    ]
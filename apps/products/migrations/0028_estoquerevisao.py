@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0027_recipe_cost_and_consumption'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstoqueRevisao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revisao', models.PositiveBigIntegerField(default=0, verbose_name='Revisão')),
+            ],
+            options={
+                'verbose_name': 'Revisão do Estoque',
+                'verbose_name_plural': 'Revisão do Estoque',
+            },
+        ),
+    ]
@@ -1,9 +1,9 @@
 from django.db import models
-from utils.models import TimeStampedModel
+from utils.models import TimeStampedModel, preservar_campos
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from django.conf import settings
-from utils.image_optimizer import compress_image_field, validate_image_file_size
+from utils.image_optimizer import agendar_processamento, validate_image_file_size
 from core.storages import image_media_storage
 
 
@@ -77,6 +77,12 @@ class Product(TimeStampedModel):
         validators=[validate_image_file_size],
         verbose_name="Imagem do Produto"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes da Imagem"
+    )
 
     # --- Campos NFC-e ---
     ncm = models.CharField(
@@ -169,6 +175,16 @@ class Product(TimeStampedModel):
         verbose_name="Alíquota CBS (%)"
     )
 
+    # Custo da receita (soma de ProductIngredient × RawMaterial.unit_cost);
+    # mantido por products.custos.recalcular_custos()
+    custo_receita = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        default=Decimal('0.0000'),
+        editable=False,
+        verbose_name="Custo da Receita (R$)"
+    )
+
     class Meta:
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
@@ -183,16 +199,22 @@ class Product(TimeStampedModel):
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         previous_image_name = None
+        # update_fields sem 'image': a imagem não muda, dispensa a consulta e o processamento
+        imagem_em_jogo = kwargs.get('update_fields') is None or 'image' in kwargs['update_fields']
 
-        if not is_new:
+        if not is_new and imagem_em_jogo:
             previous_image_name = (
                 Product.objects.filter(pk=self.pk).values_list("image", flat=True).first()
             )
 
+        # custo_receita é gravado pelo recálculo da receita (products.custos)
+        preservar_campos(self, kwargs, 'custo_receita', 'image_variants')
+
         super().save(*args, **kwargs)
 
-        if self.image and (is_new or self.image.name != previous_image_name):
-            compress_image_field(self.image)
+        # Compressão e variantes rodam após o commit, fora da requisição
+        if imagem_em_jogo and (self.image or previous_image_name) and self.image.name != previous_image_name:
+            agendar_processamento(self)
 
 
 class Combo(TimeStampedModel):
@@ -223,6 +245,12 @@ class Combo(TimeStampedModel):
         validators=[validate_image_file_size],
         verbose_name="Imagem do Combo"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Variantes da Imagem"
+    )
 
     class Meta:
         verbose_name = "Combo"
@@ -241,10 +269,13 @@ class Combo(TimeStampedModel):
                 Combo.objects.filter(pk=self.pk).values_list("image", flat=True).first()
             )
 
+        preservar_campos(self, kwargs, 'image_variants')
+
         super().save(*args, **kwargs)
 
-        if self.image and (is_new or self.image.name != previous_image_name):
-            compress_image_field(self.image)
+        # Compressão e variantes rodam após o commit, fora da requisição
+        if (self.image or previous_image_name) and self.image.name != previous_image_name:
+            agendar_processamento(self)
 
     @property
     def total_price(self):
@@ -487,6 +518,18 @@ class StockExit(models.Model):
         return f"{self.product.name}{sufixo} — -{self.quantity} un."
 
 
+class EstoqueRevisao(models.Model):
+    """Revisão do estoque; incrementada a cada movimento para invalidar products.estoque."""
+    revisao = models.PositiveBigIntegerField(default=0, verbose_name="Revisão")
+
+    class Meta:
+        verbose_name = "Revisão do Estoque"
+        verbose_name_plural = "Revisão do Estoque"
+
+    def __str__(self):
+        return f"Revisão {self.revisao}"
+
+
 class RawMaterial(TimeStampedModel):
     """Matéria Prima — ingrediente ou insumo cadastrado no sistema"""
 
@@ -571,3 +614,46 @@ class ProductIngredient(models.Model):
     @property
     def ingredient_cost(self):
         return self.quantity * self.raw_material.unit_cost
+
+
+class RawMaterialConsumption(models.Model):
+    """
+    Consumo de matéria prima gerado quando um Pedido é entregue:
+    uma linha por (pedido, matéria prima), com o custo unitário da época.
+    """
+    raw_material = models.ForeignKey(
+        RawMaterial,
+        on_delete=models.CASCADE,
+        related_name='consumptions',
+        verbose_name='Matéria Prima'
+    )
+    pedido = models.ForeignKey(
+        'orders.Pedido',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='raw_material_consumptions',
+        verbose_name='Pedido'
+    )
+    quantity = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        verbose_name='Quantidade'
+    )
+    unit_cost = models.DecimalField(
+        max_digits=10,
+        decimal_places=4,
+        verbose_name='Custo Unitário (R$)'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'Consumo de Matéria Prima'
+        verbose_name_plural = 'Consumos de Matéria Prima'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.raw_material.name} — -{self.quantity} {self.raw_material.unit_short}'
+
+    @property
+    def total_cost(self):
+        return self.quantity * self.unit_cost
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender='products.ProductIngredient')
+@receiver(post_delete, sender='products.ProductIngredient')
+def recalcular_custo_ao_alterar_receita(sender, instance, using, **kwargs):
+    """Receita mudou: refaz o custo_receita do produto."""
+    from products.custos import recalcular_custos
+
+    recalcular_custos([instance.product_id], using=using)
+
+
+@receiver(post_save, sender='products.RawMaterial')
+def recalcular_custo_ao_alterar_materia(sender, instance, created, using, update_fields=None, **kwargs):
+    """Custo da matéria prima pode ter mudado: refaz os produtos que a usam."""
+    from products.custos import recalcular_custos_da_materia
+
+    if created:
+        return  # ainda não está em nenhuma receita
+    if update_fields is not None and 'unit_cost' not in update_fields:
+        return
+    recalcular_custos_da_materia(instance.pk, using=using)
+
+
+@receiver(post_save, sender='products.StockEntry')
+@receiver(post_delete, sender='products.StockEntry')
+@receiver(post_save, sender='products.StockExit')
+@receiver(post_delete, sender='products.StockExit')
+@receiver(post_save, sender='orders.PedidoItem')
+@receiver(post_delete, sender='orders.PedidoItem')
+@receiver(post_delete, sender='orders.Pedido')
+def nova_revisao_estoque(sender, using, **kwargs):
+    """Movimento de estoque ou item de pedido: invalida o mapa de disponibilidade."""
+    from products.estoque import nova_revisao
+
+    nova_revisao(using)
+
+
+@receiver(post_save, sender='orders.Pedido')
+def nova_revisao_estoque_pedido(sender, using, update_fields=None, **kwargs):
+    """Status do pedido define se os itens contam como saída em andamento."""
+    from products.estoque import nova_revisao
+
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    nova_revisao(using)
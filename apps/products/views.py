@@ -6,6 +6,7 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.views import View
 from django.http import JsonResponse
 from django.db import transaction
+from functools import lru_cache
 from .models import Product, Combo, ComboItem, RawMaterial, OpcionalObrigatorio, ProductIngredient
 from .forms import ProductForm, ComboForm, ComboItemFormSet, ProductSearchForm, ComboSearchForm, RawMaterialForm
 from .models import StockEntry
@@ -937,8 +938,7 @@ class NoStockListView(LoginRequiredMixin, TemplateView):
     login_url = reverse_lazy('accounts:login')
 
     def get_context_data(self, **kwargs):
-        from .models import StockExit
-        from orders.models import PedidoItem
+        from .estoque import disponibilidade
 
         context = super().get_context_data(**kwargs)
 
@@ -947,51 +947,35 @@ class NoStockListView(LoginRequiredMixin, TemplateView):
         except (ValueError, TypeError):
             minimo = 0
 
-        # Entradas
-        entries = (
-            StockEntry.objects
-            .select_related('product', 'opcional_obrigatorio')
-            .values('product_id', 'product__name', 'product__category', 'opcional_obrigatorio_id', 'opcional_obrigatorio__name')
-            .annotate(total=Sum('quantity'))
-        )
+        # Saldo de todo o catálogo (uma query agrupada, em cache por revisão)
+        abaixo = [linha for linha in disponibilidade().linhas() if linha[5] <= minimo]
 
-        # Saídas permanentes
-        exits = (
-            StockExit.objects
-            .values('product_id', 'opcional_obrigatorio_id')
-            .annotate(total=Sum('quantity'))
-        )
-        exits_map = {(e['product_id'], e['opcional_obrigatorio_id']): (e['total'] or 0) for e in exits}
-
-        # Saídas em andamento
-        active = (
-            PedidoItem.objects
-            .filter(pedido__status__in=['aguardando', 'preparando', 'pronta'])
-            .values('product_id', 'opcional_obrigatorio_id')
-            .annotate(total=Sum('quantity'))
+        # Nomes só dos itens listados
+        produtos = {
+            p['pk']: p for p in
+            Product.objects.filter(pk__in={l[0] for l in abaixo}).values('pk', 'name', 'category')
+        }
+        opcionais = dict(
+            OpcionalObrigatorio.objects.filter(pk__in={l[1] for l in abaixo if l[1]}).values_list('pk', 'name')
         )
-        active_map = {(a['product_id'], a['opcional_obrigatorio_id']): (a['total'] or 0) for a in active}
 
         category_map = dict(Product.CATEGORY_CHOICES)
         itens_estoque = []
-        for e in entries:
-            key = (e['product_id'], e['opcional_obrigatorio_id'])
-            entradas = e['total'] or 0
-            saidas_perm = exits_map.get(key, 0)
-            saidas_ativas = active_map.get(key, 0)
-            saldo = entradas - saidas_perm - saidas_ativas
-            if saldo <= minimo:
-                itens_estoque.append({
-                    'pk': e['product_id'],
-                    'name': e['product__name'],
-                    'get_category_display': category_map.get(e['product__category'], e['product__category']),
-                    'opcional_name': e.get('opcional_obrigatorio__name') or 'Sem sabor/variação',
-                    'opcional_id': e.get('opcional_obrigatorio_id'),
-                    'entradas': entradas,
-                    'saidas_perm': saidas_perm,
-                    'saidas_ativas': saidas_ativas,
-                    'saldo': saldo,
-                })
+        for product_id, opcional_id, entradas, saidas_perm, saidas_ativas, saldo in abaixo:
+            produto = produtos.get(product_id)
+            if produto is None:
+                continue
+            itens_estoque.append({
+                'pk': product_id,
+                'name': produto['name'],
+                'get_category_display': category_map.get(produto['category'], produto['category']),
+                'opcional_name': opcionais.get(opcional_id) or 'Sem sabor/variação',
+                'opcional_id': opcional_id,
+                'entradas': entradas,
+                'saidas_perm': saidas_perm,
+                'saidas_ativas': saidas_ativas,
+                'saldo': saldo,
+            })
 
         itens_estoque.sort(key=lambda x: (x['get_category_display'], x['name'], x['opcional_name']))
 
@@ -1070,87 +1054,132 @@ class RawMaterialDeleteView(LoginRequiredMixin, PermissionRequiredMixin, DeleteV
         messages.success(self.request, f'Matéria prima "{self.object.name}" removida com sucesso!')
         return super().form_valid(form)
 
+@lru_cache(maxsize=1)
+def _lista_pdf_styles():
+    """Estilos do PDF de lista de produtos (criados uma vez por processo)."""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'Title',
+        parent=styles['Title'],
+        fontSize=18,
+        textColor=colors.HexColor('#ea580c'),
+        spaceAfter=8,
+    )
+    subtitle_style = ParagraphStyle(
+        'Subtitle',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.HexColor('#6b7280'),
+        spaceAfter=20,
+    )
+    item_style = ParagraphStyle(
+        'Item',
+        parent=styles['Normal'],
+        fontSize=11,
+        textColor=colors.HexColor('#111827'),
+        leading=16,
+    )
+    cat_style = ParagraphStyle(
+        'Category',
+        parent=styles['Normal'],
+        fontSize=12,
+        fontName='Helvetica-Bold',
+        textColor=colors.HexColor('#374151'),
+        spaceBefore=14,
+        spaceAfter=6,
+    )
+    return title_style, subtitle_style, item_style, cat_style
+
+
 class ProdutoListaPDFView(LoginRequiredMixin, View):
     """Gera PDF com lista de produtos (somente nomes, sem preço)."""
     login_url = reverse_lazy('accounts:login')
 
     def get(self, request, *args, **kwargs):
-        from django.http import HttpResponse
         from reportlab.lib.pagesizes import A4
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
         from reportlab.lib.units import cm
-        from reportlab.lib import colors
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        import io
-
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm,
-        )
-
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'Title',
-            parent=styles['Title'],
-            fontSize=18,
-            textColor=colors.HexColor('#ea580c'),
-            spaceAfter=8,
-        )
-        subtitle_style = ParagraphStyle(
-            'Subtitle',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#6b7280'),
-            spaceAfter=20,
-        )
-        item_style = ParagraphStyle(
-            'Item',
-            parent=styles['Normal'],
-            fontSize=11,
-            textColor=colors.HexColor('#111827'),
-            leading=16,
-        )
-        cat_style = ParagraphStyle(
-            'Category',
-            parent=styles['Normal'],
-            fontSize=12,
-            fontName='Helvetica-Bold',
-            textColor=colors.HexColor('#374151'),
-            spaceBefore=14,
-            spaceAfter=6,
-        )
+        from reportlab.platypus import SimpleDocTemplate, Paragraph
+        from utils.pdf_export import LazyStory, pdf_response
 
         from django.utils.timezone import localdate
         today = localdate().strftime('%d/%m/%Y')
 
-        story = []
-        story.append(Paragraph('Lista de Produtos', title_style))
-        story.append(Paragraph(f'Emitido em: {today}', subtitle_style))
-
-        products = Product.objects.all().order_by('category', 'name')
-
-        # Agrupar por categoria
-        current_cat = None
-        for p in products:
-            cat_name = p.get_category_display() if p.category else 'Sem Categoria'
-            if cat_name != current_cat:
-                current_cat = cat_name
-                story.append(Paragraph(cat_name, cat_style))
-            story.append(Paragraph(f'• {p.name}', item_style))
-
-        if not products.exists():
-            story.append(Paragraph('Nenhum produto encontrado.', item_style))
-
-        doc.build(story)
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="lista_produtos.pdf"'
-        return response
+        title_style, subtitle_style, item_style, cat_style = _lista_pdf_styles()
+
+        def _story():
+            yield Paragraph('Lista de Produtos', title_style)
+            yield Paragraph(f'Emitido em: {today}', subtitle_style)
+
+            # Agrupar por categoria (já ordenado); iterator() não guarda os produtos
+            produtos = Product.objects.order_by('category', 'name').only('name', 'category')
+            current_cat = None
+            vazio = True
+            for p in produtos.iterator(chunk_size=1000):
+                vazio = False
+                cat_name = p.get_category_display() if p.category else 'Sem Categoria'
+                if cat_name != current_cat:
+                    current_cat = cat_name
+                    yield Paragraph(cat_name, cat_style)
+                yield Paragraph(f'• {p.name}', item_style)
+
+            if vazio:
+                yield Paragraph('Nenhum produto encontrado.', item_style)
+
+        def _build(arquivo):
+            doc = SimpleDocTemplate(
+                arquivo,
+                pagesize=A4,
+                rightMargin=2*cm,
+                leftMargin=2*cm,
+                topMargin=2*cm,
+                bottomMargin=2*cm,
+            )
+            doc.build(LazyStory(_story()))
+
+        return pdf_response('lista_produtos.pdf', _build)
+
+
+PRODUTO_NFCE_CABECALHO = [
+    'Produto',
+    'Categoria',
+    'Preço de Venda',
+    'NCM',
+    'CFOP',
+    'CST ICMS',
+    '% Base Cálculo ICMS',
+    'Alíq ICMS (%)',
+    'Código CBENEF',
+    'CST PIS e COFINS',
+    'Alíq PIS (%)',
+    'Alíq COFINS (%)',
+    'CST IBS CBS',
+    'CCLASS',
+    'Dados Adicionais NF-e',
+]
+
+
+def _produto_nfce_linha(p):
+    """Linha do CSV fiscal de um produto (decimais com vírgula, como o Excel pt-BR espera)."""
+    return [
+        p.name,
+        p.get_category_display(),
+        str(p.price).replace('.', ','),
+        p.ncm,
+        p.cfop,
+        p.cst_icms,
+        str(p.base_calculo_icms).replace('.', ','),
+        str(p.aliq_icms).replace('.', ','),
+        p.codigo_cbenef,
+        p.cst_pis_cofins,
+        str(p.aliq_pis).replace('.', ','),
+        str(p.aliq_cofins).replace('.', ','),
+        p.cst_ibs_cbs,
+        p.cclass,
+        p.dados_adicionais_nfe,
+    ]
 
 
 class ProdutoNFCeCSVView(LoginRequiredMixin, PermissionRequiredMixin, View):
@@ -1169,43 +1198,9 @@ class ProdutoNFCeCSVView(LoginRequiredMixin, PermissionRequiredMixin, View):
         output = io.StringIO()
         writer = csv.writer(output, delimiter=';')
 
-        # Cabeçalho
-        writer.writerow([
-            'Produto',
-            'Categoria',
-            'Preço de Venda',
-            'NCM',
-            'CFOP',
-            'CST ICMS',
-            '% Base Cálculo ICMS',
-            'Alíq ICMS (%)',
-            'Código CBENEF',
-            'CST PIS e COFINS',
-            'Alíq PIS (%)',
-            'Alíq COFINS (%)',
-            'CST IBS CBS',
-            'CCLASS',
-            'Dados Adicionais NF-e',
-        ])
-
+        writer.writerow(PRODUTO_NFCE_CABECALHO)
         for p in produtos:
-            writer.writerow([
-                p.name,
-                p.get_category_display(),
-                str(p.price).replace('.', ','),
-                p.ncm,
-                p.cfop,
-                p.cst_icms,
-                str(p.base_calculo_icms).replace('.', ','),
-                str(p.aliq_icms).replace('.', ','),
-                p.codigo_cbenef,
-                p.cst_pis_cofins,
-                str(p.aliq_pis).replace('.', ','),
-                str(p.aliq_cofins).replace('.', ','),
-                p.cst_ibs_cbs,
-                p.cclass,
-                p.dados_adicionais_nfe,
-            ])
+            writer.writerow(_produto_nfce_linha(p))
 
         data = output.getvalue().encode('utf-8-sig')  # BOM para Excel abrir corretamente
         response = HttpResponse(data, content_type='text/csv; charset=utf-8-sig')
@@ -1246,8 +1241,16 @@ class ProdutosAtivosView(LoginRequiredMixin, PermissionRequiredMixin, TemplateVi
         return context
 
     def post(self, request, *args, **kwargs):
-        """Processa ativação/desativação de produtos e opcionais via POST."""
+        """
+        Processa ativação/desativação de produtos e opcionais via POST.
+
+        action 'editar_lote' altera vários produtos de uma vez (products.catalogo.editar_produtos):
+            {"action": "editar_lote", "produtos": [{"id": 1, "price": "9.90", "show_in_menu": true}, ...]}
+            {"action": "editar_lote", "ids": [1, 2, 3], "campos": {"visivel_kiosk": false}}
+        """
         import json
+        from django.core.exceptions import PermissionDenied, ValidationError
+        from .catalogo import editar_produtos
         
         try:
             data = json.loads(request.body)
@@ -1256,13 +1259,35 @@ class ProdutosAtivosView(LoginRequiredMixin, PermissionRequiredMixin, TemplateVi
             if action == 'toggle_product':
                 product_id = data.get('product_id')
                 product = get_object_or_404(Product, id=product_id)
-                product.visivel_kiosk = not product.visivel_kiosk
-                product.updated_by = request.user
-                product.save()
+                visivel = not product.visivel_kiosk
+                editar_produtos({product.pk: {'visivel_kiosk': visivel}}, usuario=request.user)
+                return JsonResponse({
+                    'status': 'success',
+                    'message': f'Produto {product.name} foi {"ativado" if visivel else "desativado"} no Kiosk',
+                    'is_active': visivel,
+                })
+
+            elif action == 'editar_lote':
+                if 'produtos' in data:
+                    alteracoes = {}
+                    for item in data.get('produtos') or []:
+                        campos = dict(item)
+                        alteracoes.setdefault(campos.pop('id', None), {}).update(campos)
+                else:
+                    campos = data.get('campos') or {}
+                    alteracoes = {pid: dict(campos) for pid in data.get('ids') or []}
+                resultado = editar_produtos(
+                    alteracoes,
+                    usuario=request.user,
+                    pode_fiscal=request.user.has_perm('products.manage_nfce_fields'),
+                )
+                total = len(resultado.alterados)
                 return JsonResponse({
                     'status': 'success',
-                    'message': f'Produto {product.name} foi {"ativado" if product.visivel_kiosk else "desativado"} no Kiosk',
-                    'is_active': product.visivel_kiosk,
+                    'message': f'{total} produto{"s" if total != 1 else ""} atualizado{"s" if total != 1 else ""}',
+                    'alterados': resultado.alterados,
+                    'sem_alteracao': resultado.sem_alteracao,
+                    'campos': resultado.campos,
                 })
             
             elif action == 'toggle_opcional':
@@ -1279,6 +1304,11 @@ class ProdutosAtivosView(LoginRequiredMixin, PermissionRequiredMixin, TemplateVi
         
         except json.JSONDecodeError:
             return JsonResponse({'status': 'error', 'message': 'JSON inválido'}, status=400)
+        except ValidationError as e:
+            erros = e.message_dict if hasattr(e, 'error_dict') else {'': e.messages}
+            return JsonResponse({'status': 'error', 'message': 'Dados inválidos', 'erros': erros}, status=400)
+        except PermissionDenied as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=403)
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
@@ -1297,7 +1327,6 @@ class ProductIngredientListView(LoginRequiredMixin, View):
             .select_related('raw_material')
             .order_by('raw_material__name')
         )
-        total_cost = sum(i.ingredient_cost for i in ingredients)
         return JsonResponse({
             'ingredients': [
                 {
@@ -1311,7 +1340,7 @@ class ProductIngredientListView(LoginRequiredMixin, View):
                 }
                 for i in ingredients
             ],
-            'total_cost': str(total_cost),
+            'total_cost': str(product.custo_receita),
         })
 
     def post(self, request, product_pk):
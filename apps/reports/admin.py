@@ -1,3 +1,14 @@
 from django.contrib import admin
+from .models import ExportJob
 
-# Register your models here.
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'relatorio', 'formato', 'status', 'progresso', 'tamanho', 'criado_por', 'criado_em', 'concluido_em')
+    list_filter = ('status', 'relatorio', 'formato')
+    readonly_fields = (
+        'relatorio', 'formato', 'parametros', 'parametros_hash', 'revisao', 'status',
+        'progresso', 'erro', 'arquivo', 'nome_arquivo', 'checksum', 'tamanho',
+        'criado_por', 'criado_em', 'iniciado_em', 'concluido_em',
+    )
+    ordering = ('-criado_em',)
@@ -0,0 +1,569 @@
+"""
+Exportação de relatórios (CSV/XLSX/PDF) em segundo plano.
+
+Cada relatório exportável é uma subclasse de Relatorio registrada com
+@registrar. O pedido de exportação vira um ExportJob pendente, processado
+pelo comando `processar_exportacoes` (processo separado do gunicorn) ou,
+com EXPORT_JOBS_INLINE, por uma thread no próprio worker web.
+
+O arquivo gerado é reaproveitado enquanto relatório, formato, parâmetros e a
+revisão dos dados (contagem + última alteração das linhas envolvidas) forem
+os mesmos.
+"""
+import csv
+import hashlib
+import io
+import json
+import logging
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+RELATORIOS = {}
+
+
+def registrar(cls):
+    RELATORIOS[cls.slug] = cls()
+    return cls
+
+
+class Relatorio:
+    """Base de um relatório exportável."""
+    slug = ''
+    titulo = ''
+    permissao = 'orders.view_order'
+    colunas = []
+
+    def parametros(self, dados):
+        """Normaliza os filtros recebidos (QueryDict/dict) para o cache."""
+        return {}
+
+    def revisao(self, params):
+        """Assinatura barata dos dados do relatório; muda quando eles mudam."""
+        return ''
+
+    def total(self, params):
+        """Quantidade de linhas, para o progresso (None = desconhecida)."""
+        return None
+
+    def linhas(self, params):
+        raise NotImplementedError
+
+
+def _hoje():
+    return timezone.localdate().isoformat()
+
+
+def _assinatura(*valores):
+    return hashlib.sha1(repr(valores).encode()).hexdigest()
+
+
+# ── Relatórios ───────────────────────────────────────────────────────────────
+
+@registrar
+class VendasPorProduto(Relatorio):
+    slug = 'vendas_produtos'
+    titulo = 'Vendas por Produto'
+    colunas = ['Produto', 'Categoria', 'Variação', 'Qtd. Vendida', 'Total Faturado']
+
+    def parametros(self, dados):
+        return {
+            'data_inicio': (dados.get('data_inicio') or '').strip() or _hoje(),
+            'data_fim': (dados.get('data_fim') or '').strip() or _hoje(),
+            'q': (dados.get('q') or '').strip(),
+        }
+
+    def revisao(self, params):
+        from orders.models import Comanda, PedidoItem
+
+        comandas = Comanda.objects.filter(
+            status__in=['fechada', 'cortesia'],
+            updated_at__date__gte=params['data_inicio'],
+            updated_at__date__lte=params['data_fim'],
+        )
+        agg = comandas.aggregate(n=Count('pk'), ult=Max('updated_at'))
+        itens = PedidoItem.objects.filter(pedido__comanda__in=comandas).aggregate(ult=Max('updated_at'))
+        return _assinatura(agg['n'], agg['ult'], itens['ult'])
+
+    def linhas(self, params):
+        from products.models import Product
+        from reports.views import _vendas_por_produto
+
+        categorias = dict(Product._meta.get_field('category').choices)
+        for row in _vendas_por_produto(params['data_inicio'], params['data_fim'], params['q']):
+            yield [
+                row['product__name'],
+                categorias.get(row['product__category'], row['product__category']),
+                row['opcional_obrigatorio__name'] or 'Sem variação',
+                row['qtd_vendida'] or 0,
+                row['total_faturado'] or Decimal('0'),
+            ]
+
+
+@registrar
+class Pedidos(Relatorio):
+    slug = 'pedidos'
+    titulo = 'Pedidos'
+    colunas = ['#', 'Data/Hora', 'Comanda', 'Cliente', 'Atendente', 'Itens', 'Status', 'Valor Total']
+
+    def parametros(self, dados):
+        return {
+            'data_inicio': (dados.get('data_inicio') or '').strip() or _hoje(),
+            'data_fim': (dados.get('data_fim') or '').strip() or _hoje(),
+            'status': (dados.get('status') or '').strip(),
+            'atendente': (dados.get('atendente') or '').strip(),
+            'q': (dados.get('q') or '').strip(),
+        }
+
+    def _qs(self, params):
+        from reports.views import _pedidos_queryset
+
+        return _pedidos_queryset(
+            params['data_inicio'], params['data_fim'],
+            params['status'], params['atendente'], params['q'],
+        )
+
+    def revisao(self, params):
+        agg = self._qs(params).order_by().aggregate(n=Count('pk', distinct=True), ult=Max('updated_at'))
+        return _assinatura(agg['n'], agg['ult'])
+
+    def total(self, params):
+        return self._qs(params).count()
+
+    def linhas(self, params):
+        from config.models import Garcom
+
+        garcons = dict(Garcom.objects.values_list('numero', 'nome'))
+        status_labels = dict(self._qs(params).model.STATUS_CHOICES)
+        for p in self._qs(params).prefetch_related(None).iterator(chunk_size=1000):
+            yield [
+                p.pedido_seq,
+                timezone.localtime(p.created_at),
+                p.comanda.numero,
+                p.comanda.cliente_nome or '',
+                garcons.get(p.atendente_numero, p.atendente_numero or ''),
+                p.qtd_itens or 0,
+                status_labels.get(p.status, p.status),
+                p.total_amount or Decimal('0'),
+            ]
+
+
+@registrar
+class CancelamentosCortesias(Relatorio):
+    slug = 'cancelamentos_cortesias'
+    titulo = 'Cancelamentos e Cortesias'
+    colunas = ['Comanda', 'Tipo', 'Usuário', 'Abertura', 'Cancelamento', 'Observação', 'Valor']
+
+    def parametros(self, dados):
+        return {
+            'data_inicio': (dados.get('data_inicio') or '').strip() or _hoje(),
+            'data_fim': (dados.get('data_fim') or '').strip() or _hoje(),
+            'tipo': (dados.get('tipo') or '').strip(),
+            'numero_comanda': (dados.get('numero_comanda') or '').strip(),
+        }
+
+    def _qs(self, params):
+        from reports.views import _cancelamentos_queryset
+
+        return _cancelamentos_queryset(
+            params['data_inicio'], params['data_fim'], params['tipo'], params['numero_comanda'],
+        )
+
+    def revisao(self, params):
+        agg = self._qs(params).aggregate(n=Count('pk'), ult=Max('updated_at'))
+        return _assinatura(agg['n'], agg['ult'])
+
+    def total(self, params):
+        return self._qs(params).count()
+
+    def linhas(self, params):
+        from reports.views import _registro_cancelamento
+
+        qs = self._qs(params).select_related('updated_by', 'checkout__processed_by')
+        for comanda in qs.iterator(chunk_size=1000):
+            r = _registro_cancelamento(comanda)
+            yield [
+                r['numero'], r['tipo_label'], r['usuario'], r['abertura_em'],
+                r['cancelamento_em'], r['observacao'], r['total_amount'],
+            ]
+
+
+@registrar
+class ContasPagas(Relatorio):
+    slug = 'contas_pagas'
+    titulo = 'Contas Pagas'
+    permissao = None
+    colunas = ['Fornecedor', 'Descrição', 'Itens', 'Valor', 'Vencimento', 'Pagamento', 'Pago por', 'Banco']
+
+    def parametros(self, dados):
+        hoje = timezone.localdate()
+        return {
+            'data_inicio': (dados.get('data_inicio') or '').strip() or hoje.replace(day=1).isoformat(),
+            'data_fim': (dados.get('data_fim') or '').strip() or hoje.isoformat(),
+            'fornecedor': (dados.get('fornecedor') or '').strip(),
+            'banco': (dados.get('banco') or '').strip(),
+        }
+
+    def _qs(self, params):
+        from financials.views import _contas_pagas_queryset
+
+        return _contas_pagas_queryset(
+            params['data_inicio'], params['data_fim'], params['fornecedor'], params['banco'],
+        )
+
+    def revisao(self, params):
+        # ContaPagar não tem updated_at: soma e maior id cobrem inclusões e edições de valor
+        agg = self._qs(params).aggregate(
+            n=Count('pk'), ult=Max('id'), soma=Sum('valor'), pag=Max('data_pagamento'),
+        )
+        return _assinatura(agg['n'], agg['ult'], agg['soma'], agg['pag'])
+
+    def total(self, params):
+        return self._qs(params).count()
+
+    def linhas(self, params):
+        qs = self._qs(params).prefetch_related(None).annotate(qtd_itens=Count('itens'))
+        for conta in qs.iterator(chunk_size=1000):
+            pago_por = ''
+            if conta.pago_por:
+                pago_por = conta.pago_por.get_full_name() or conta.pago_por.username
+            yield [
+                conta.fornecedor.nome,
+                conta.descricao,
+                conta.qtd_itens,
+                conta.valor,
+                conta.data_vencimento,
+                conta.data_pagamento,
+                pago_por,
+                conta.banco_pagamento.nome if conta.banco_pagamento else '',
+            ]
+
+
+@registrar
+class ProdutosNFCe(Relatorio):
+    slug = 'produtos_nfce'
+    titulo = 'Produtos — Dados Fiscais NFC-e'
+    permissao = 'products.view_product'
+
+    @property
+    def colunas(self):
+        from products.views import PRODUTO_NFCE_CABECALHO
+
+        return PRODUTO_NFCE_CABECALHO
+
+    def _qs(self):
+        from products.models import Product
+
+        return Product.objects.filter(is_active=True).order_by('category', 'name')
+
+    def revisao(self, params):
+        agg = self._qs().aggregate(n=Count('pk'), ult=Max('updated_at'))
+        return _assinatura(agg['n'], agg['ult'])
+
+    def total(self, params):
+        return self._qs().count()
+
+    def linhas(self, params):
+        from products.views import _produto_nfce_linha
+
+        for p in self._qs().iterator(chunk_size=1000):
+            yield _produto_nfce_linha(p)
+
+
+# ── Escrita dos arquivos ─────────────────────────────────────────────────────
+
+def _texto(valor):
+    """Valor formatado como no restante do sistema (pt-BR)."""
+    if valor is None:
+        return ''
+    if isinstance(valor, Decimal):
+        return f'{valor:.2f}'.replace('.', ',')
+    if isinstance(valor, datetime):
+        return valor.strftime('%d/%m/%Y %H:%M')
+    if isinstance(valor, date):
+        return valor.strftime('%d/%m/%Y')
+    return str(valor)
+
+
+def _escrever_csv(arquivo, relatorio, linhas):
+    texto = io.TextIOWrapper(arquivo, encoding='utf-8-sig', newline='')
+    writer = csv.writer(texto, delimiter=';')
+    writer.writerow(relatorio.colunas)
+    for linha in linhas:
+        writer.writerow([_texto(v) for v in linha])
+    texto.flush()
+    texto.detach()
+
+
+def _coluna_xlsx(indice):
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _escrever_xlsx(arquivo, relatorio, linhas):
+    """
+    Planilha XLSX mínima (uma aba, strings inline) escrita linha a linha
+    direto no zip, sem montar a planilha em memória.
+    """
+    ns = 'http://schemas.openxmlformats.org/'
+    with zipfile.ZipFile(arquivo, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Types xmlns="{ns}package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '</Types>'
+        ))
+        z.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Relationships xmlns="{ns}package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{ns}officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        z.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<workbook xmlns="{ns}spreadsheetml/2006/main" xmlns:r="{ns}officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(relatorio.titulo[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        z.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<Relationships xmlns="{ns}package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{ns}officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+            '</Relationships>'
+        ))
+
+        with z.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            def _linha(n, valores):
+                celulas = []
+                for i, v in enumerate(valores):
+                    ref = f'{_coluna_xlsx(i)}{n}'
+                    if isinstance(v, (int, float, Decimal)) and not isinstance(v, bool):
+                        celulas.append(f'<c r="{ref}"><v>{v}</v></c>')
+                    else:
+                        celulas.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(_texto(v))}</t></is></c>')
+                sheet.write(f'<row r="{n}">{"".join(celulas)}</row>'.encode())
+
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<worksheet xmlns="{ns}spreadsheetml/2006/main"><sheetData>'
+            ).encode())
+            _linha(1, relatorio.colunas)
+            for n, linha in enumerate(linhas, start=2):
+                _linha(n, linha)
+            sheet.write(b'</sheetData></worksheet>')
+
+
+def _escrever_pdf(arquivo, relatorio, linhas, params):
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, TableStyle
+
+    from utils.pdf_export import LazyStory, cached_style, chunked_table
+
+    page_w, _ = landscape(A4)
+    margin = 14 * mm
+    n_cols = len(relatorio.colunas)
+    col_w = [(page_w - 2 * margin) / n_cols] * n_cols
+
+    th = cached_style(8, bold=True, color='#8E8E93', align=TA_CENTER)
+    td = cached_style(8)
+    header = [Paragraph(escape(c), th) for c in relatorio.colunas]
+    style = TableStyle([
+        ('BACKGROUND',     (0, 0), (-1,  0), colors.HexColor('#F5F5F7')),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#FAFAFA')]),
+        ('LINEBELOW',      (0, 0), (-1,  0), 0.8, colors.HexColor('#E5E5EA')),
+        ('BOX',            (0, 0), (-1, -1), 0.5, colors.HexColor('#E5E5EA')),
+        ('VALIGN',         (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING',     (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING',  (0, 0), (-1, -1), 4),
+    ])
+
+    filtros = ' · '.join(f'{k}: {v}' for k, v in params.items() if v)
+
+    def _story():
+        yield Paragraph(escape(relatorio.titulo), cached_style(16, bold=True))
+        if filtros:
+            yield Paragraph(escape(filtros), cached_style(9, color='#8E8E93'))
+        yield Spacer(1, 5 * mm)
+        celulas = ([Paragraph(escape(_texto(v)), td) for v in linha] for linha in linhas)
+        yield from chunked_table(celulas, header, col_w, style)
+
+    doc = SimpleDocTemplate(
+        arquivo, pagesize=landscape(A4),
+        leftMargin=margin, rightMargin=margin, topMargin=12 * mm, bottomMargin=12 * mm,
+    )
+    doc.build(LazyStory(_story()))
+
+
+# ── Fila ─────────────────────────────────────────────────────────────────────
+
+def chave_parametros(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def _arquivo_existe(job):
+    try:
+        return bool(job.arquivo) and job.arquivo.storage.exists(job.arquivo.name)
+    except Exception:
+        return False
+
+
+def enfileirar(relatorio, formato, dados, user=None):
+    """
+    Retorna (job, reaproveitado). Reaproveita um job concluído (ou em
+    andamento) com a mesma chave; senão cria um pendente e dispara a execução.
+    """
+    params = relatorio.parametros(dados)
+    chave = {
+        'relatorio': relatorio.slug,
+        'formato': formato,
+        'parametros_hash': chave_parametros(params),
+        'revisao': relatorio.revisao(params),
+    }
+
+    existentes = ExportJob.objects.filter(
+        status__in=['pendente', 'processando', 'concluido'], **chave,
+    ).order_by('-criado_em')
+    for job in existentes[:3]:
+        if job.status != 'concluido' or _arquivo_existe(job):
+            return job, True
+
+    job = ExportJob.objects.create(parametros=params, criado_por=user, **chave)
+    transaction.on_commit(disparar)
+    return job, False
+
+
+def disparar():
+    """Com EXPORT_JOBS_INLINE, processa a fila numa thread do próprio worker web."""
+    if getattr(settings, 'EXPORT_JOBS_INLINE', False):
+        threading.Thread(target=processar_pendentes, daemon=True).start()
+
+
+def _reservar_proximo():
+    with transaction.atomic():
+        job = (
+            ExportJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pendente')
+            .order_by('criado_em')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'processando'
+        job.iniciado_em = timezone.now()
+        job.save(update_fields=['status', 'iniciado_em'])
+        return job
+
+
+def processar_pendentes():
+    """Executa os jobs pendentes até esvaziar a fila. Retorna quantos processou."""
+    processados = 0
+    try:
+        while True:
+            job = _reservar_proximo()
+            if job is None:
+                return processados
+            executar(job)
+            processados += 1
+    finally:
+        close_old_connections()
+
+
+def executar(job):
+    """Gera o arquivo do job, grava checksum e tamanho, atualizando o progresso."""
+    relatorio = RELATORIOS.get(job.relatorio)
+    if relatorio is None:
+        ExportJob.objects.filter(pk=job.pk).update(status='erro', erro='Relatório desconhecido.')
+        return
+
+    params = job.parametros
+    total = relatorio.total(params)
+    ultimo_update = [time.monotonic()]
+
+    def _com_progresso(linhas):
+        for n, linha in enumerate(linhas, start=1):
+            if total and time.monotonic() - ultimo_update[0] >= 1:
+                ultimo_update[0] = time.monotonic()
+                ExportJob.objects.filter(pk=job.pk).update(progresso=min(99, n * 100 // total))
+            yield linha
+
+    max_size = getattr(settings, 'PDF_SPOOL_MAX_BYTES', 4 * 1024 * 1024)
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=max_size) as tmp:
+            linhas = _com_progresso(relatorio.linhas(params))
+            if job.formato == 'csv':
+                _escrever_csv(tmp, relatorio, linhas)
+            elif job.formato == 'xlsx':
+                _escrever_xlsx(tmp, relatorio, linhas)
+            else:
+                _escrever_pdf(tmp, relatorio, linhas, params)
+
+            tmp.seek(0)
+            sha = hashlib.sha256()
+            for bloco in iter(lambda: tmp.read(64 * 1024), b''):
+                sha.update(bloco)
+            tamanho = tmp.tell()
+            tmp.seek(0)
+
+            carimbo = timezone.localtime().strftime('%Y%m%d_%H%M')
+            job.nome_arquivo = f'{relatorio.slug}_{carimbo}.{job.formato}'
+            job.arquivo.save(f'{job.pk}_{sha.hexdigest()[:12]}.{job.formato}', File(tmp), save=False)
+
+        job.checksum = sha.hexdigest()
+        job.tamanho = tamanho
+        job.status = 'concluido'
+        job.progresso = 100
+        job.concluido_em = timezone.now()
+        job.save(update_fields=[
+            'arquivo', 'nome_arquivo', 'checksum', 'tamanho', 'status', 'progresso', 'concluido_em',
+        ])
+    except Exception as e:
+        logger.exception("[exports] falha no job %s", job.pk)
+        job.status = 'erro'
+        job.erro = str(e) or repr(e)
+        job.concluido_em = timezone.now()
+        job.save(update_fields=['status', 'erro', 'concluido_em'])
+
+
+def recuperar_travados():
+    """Devolve à fila jobs 'processando' cujo worker morreu (timeout excedido)."""
+    limite = timezone.now() - timedelta(minutes=getattr(settings, 'EXPORT_JOBS_TIMEOUT_MINUTES', 30))
+    return ExportJob.objects.filter(status='processando', iniciado_em__lt=limite).update(
+        status='pendente', iniciado_em=None, progresso=0,
+    )
+
+
+def limpar_antigos():
+    """Apaga jobs (e arquivos) mais antigos que EXPORT_JOBS_RETENTION_DAYS."""
+    limite = timezone.now() - timedelta(days=getattr(settings, 'EXPORT_JOBS_RETENTION_DAYS', 7))
+    antigos = ExportJob.objects.filter(criado_em__lt=limite)
+    for job in antigos.exclude(arquivo=''):
+        try:
+            job.arquivo.delete(save=False)
+        except Exception as e:
+            logger.warning("[exports] não foi possível apagar %s: %s", job.arquivo.name, e)
+    return antigos.delete()[0]
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reports.exports import limpar_antigos, processar_pendentes, recuperar_travados
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker das exportações de relatórios: processa os ExportJob pendentes "
+        "fora dos workers do gunicorn."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Processa a fila atual e sai.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=2.0,
+            help="Segundos entre verificações da fila (padrão: 2).",
+        )
+
+    def handle(self, *args, **options):
+        ultima_limpeza = 0.0
+        while True:
+            if time.monotonic() - ultima_limpeza >= 3600:
+                ultima_limpeza = time.monotonic()
+                travados = recuperar_travados()
+                apagados = limpar_antigos()
+                if travados or apagados:
+                    self.stdout.write(f"Jobs reenfileirados: {travados} | apagados: {apagados}")
+
+            processados = processar_pendentes()
+            if processados:
+                self.stdout.write(self.style.SUCCESS(f"{processados} exportação(ões) processada(s)."))
+
+            if options["once"]:
+                return
+            time.sleep(options["intervalo"])
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('relatorio', models.CharField(max_length=50, verbose_name='Relatório')),
+                ('formato', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel (XLSX)'), ('pdf', 'PDF')], max_length=4, verbose_name='Formato')),
+                ('parametros', models.JSONField(blank=True, default=dict, verbose_name='Parâmetros')),
+                ('parametros_hash', models.CharField(max_length=64, verbose_name='Hash dos parâmetros')),
+                ('revisao', models.CharField(max_length=64, verbose_name='Revisão dos dados')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('erro', 'Erro')], default='pendente', max_length=12, verbose_name='Status')),
+                ('progresso', models.PositiveSmallIntegerField(default=0, verbose_name='Progresso (%)')),
+                ('erro', models.TextField(blank=True, verbose_name='Erro')),
+                ('arquivo', models.FileField(blank=True, upload_to='exports/', verbose_name='Arquivo')),
+                ('nome_arquivo', models.CharField(blank=True, max_length=150, verbose_name='Nome do arquivo')),
+                ('checksum', models.CharField(blank=True, max_length=64, verbose_name='SHA-256')),
+                ('tamanho', models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('concluido_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluído em')),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+            ],
+            options={
+                'verbose_name': 'Exportação de Relatório',
+                'verbose_name_plural': 'Exportações de Relatórios',
+                'ordering': ['-criado_em'],
+                'indexes': [models.Index(fields=['relatorio', 'formato', 'parametros_hash', 'revisao'], name='reports_export_cache_idx'), models.Index(fields=['status', 'criado_em'], name='reports_export_fila_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:38
+
+import core.storages
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_export_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='arquivo',
+            field=models.FileField(blank=True, storage=core.storages.exports_storage, upload_to='exports/', verbose_name='Arquivo'),
+        ),
+    ]
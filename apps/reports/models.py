@@ -1,3 +1,66 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+from core.storages import exports_storage
+
+
+class ExportJob(models.Model):
+    """
+    Exportação de relatório (CSV/XLSX/PDF) gerada fora da requisição.
+
+    O resultado fica em `arquivo` e é reaproveitado por pedidos com o mesmo
+    relatório, formato, parâmetros e revisão dos dados (ver reports.exports).
+    """
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processando', 'Processando'),
+        ('concluido', 'Concluído'),
+        ('erro', 'Erro'),
+    ]
+    FORMATO_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+        ('pdf', 'PDF'),
+    ]
+
+    relatorio = models.CharField(max_length=50, verbose_name="Relatório")
+    formato = models.CharField(max_length=4, choices=FORMATO_CHOICES, verbose_name="Formato")
+    parametros = models.JSONField(default=dict, blank=True, verbose_name="Parâmetros")
+    parametros_hash = models.CharField(max_length=64, verbose_name="Hash dos parâmetros")
+    revisao = models.CharField(max_length=64, verbose_name="Revisão dos dados")
+
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pendente', verbose_name="Status")
+    progresso = models.PositiveSmallIntegerField(default=0, verbose_name="Progresso (%)")
+    erro = models.TextField(blank=True, verbose_name="Erro")
+
+    # Storage compartilhado: o arquivo é gerado no serviço worker e entregue pelo web
+    arquivo = models.FileField(upload_to='exports/', storage=exports_storage, blank=True, verbose_name="Arquivo")
+    nome_arquivo = models.CharField(max_length=150, blank=True, verbose_name="Nome do arquivo")
+    checksum = models.CharField(max_length=64, blank=True, verbose_name="SHA-256")
+    tamanho = models.PositiveBigIntegerField(default=0, verbose_name="Tamanho (bytes)")
+
+    criado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='export_jobs',
+        verbose_name="Criado por",
+    )
+    criado_em = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    iniciado_em = models.DateTimeField(null=True, blank=True, verbose_name="Iniciado em")
+    concluido_em = models.DateTimeField(null=True, blank=True, verbose_name="Concluído em")
+
+    class Meta:
+        verbose_name = "Exportação de Relatório"
+        verbose_name_plural = "Exportações de Relatórios"
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(
+                fields=['relatorio', 'formato', 'parametros_hash', 'revisao'],
+                name='reports_export_cache_idx',
+            ),
+            models.Index(fields=['status', 'criado_em'], name='reports_export_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.relatorio}.{self.formato} #{self.pk} ({self.get_status_display()})"
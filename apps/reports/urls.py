@@ -13,4 +13,7 @@ urlpatterns = [
     path('cancelamentos-cortesias/', views.CanceledCortesiaReportView.as_view(), name='canceled_cortesia_report'),
     path('cozinha/', views.CozinhaReportView.as_view(), name='cozinha_report'),
     path('pedidos/', views.PedidosReportView.as_view(), name='pedidos_report'),
+    path('exportar/<slug:relatorio>/<str:formato>/', views.ExportarRelatorioView.as_view(), name='exportar'),
+    path('exportacoes/<int:pk>/', views.ExportacaoStatusView.as_view(), name='exportacao_status'),
+    path('exportacoes/<int:pk>/download/', views.ExportacaoDownloadView.as_view(), name='exportacao_download'),
 ]
\ No newline at end of file
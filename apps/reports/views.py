@@ -160,65 +160,80 @@ class SalesReportView(BaseReportView):
         return context
 
 
+def _vendas_por_produto(data_inicio, data_fim, q=''):
+    """
+    Linhas produto/variação com quantidade vendida, faturamento e custo
+    (Product.custo_receita pré-calculado pela receita) no período.
+    """
+    from django.db.models import F, DecimalField, ExpressionWrapper, Case, When, Value
+    from decimal import Decimal as _Dec
+
+    # Quantidade: considera fechadas + cortesias (produto realmente saiu)
+    # Valor financeiro: apenas fechadas (alinhado com o Extrato)
+    items_qs = PedidoItem.objects.filter(
+        pedido__comanda__status__in=['fechada', 'cortesia'],
+        pedido__comanda__updated_at__date__gte=data_inicio,
+        pedido__comanda__updated_at__date__lte=data_fim,
+        pedido__status__in=['aguardando', 'preparando', 'pronta', 'entregue'],
+    )
+    if q:
+        items_qs = items_qs.filter(
+            Q(product__name__icontains=q) |
+            Q(opcional_obrigatorio__name__icontains=q)
+        )
+
+    return list(
+        items_qs
+        .values(
+            'product__id',
+            'product__name',
+            'product__category',
+            'opcional_obrigatorio__id',
+            'opcional_obrigatorio__name',
+        )
+        .annotate(
+            qtd_vendida=Sum('quantity'),
+            total_faturado=Sum(
+                Case(
+                    When(
+                        pedido__comanda__status='fechada',
+                        then=ExpressionWrapper(
+                            F('quantity') * F('unit_price'),
+                            output_field=DecimalField()
+                        ),
+                    ),
+                    default=Value(_Dec('0.00')),
+                    output_field=DecimalField(),
+                )
+            ),
+            custo_total=Sum(
+                ExpressionWrapper(
+                    F('quantity') * F('product__custo_receita'),
+                    output_field=DecimalField()
+                )
+            ),
+        )
+        .order_by('-qtd_vendida', 'product__name', 'opcional_obrigatorio__name')
+    )
+
+
 class SellsReportView(BaseReportView):
     """Relatório de Vendas por Produto — lista produto + quantidade vendida no período"""
     template_name = 'reports/sells_reports.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        from django.db.models import F, DecimalField, ExpressionWrapper, Case, When, Value
-        from decimal import Decimal as _Dec
 
         today = timezone.localtime().date()
         data_inicio = self.request.GET.get('data_inicio', '').strip() or today.strftime('%Y-%m-%d')
         data_fim = self.request.GET.get('data_fim', '').strip() or today.strftime('%Y-%m-%d')
         q = self.request.GET.get('q', '').strip()
 
-        # Quantidade: considera fechadas + cortesias (produto realmente saiu)
-        # Valor financeiro: apenas fechadas (alinhado com o Extrato)
-        items_qs = PedidoItem.objects.filter(
-            pedido__comanda__status__in=['fechada', 'cortesia'],
-            pedido__comanda__updated_at__date__gte=data_inicio,
-            pedido__comanda__updated_at__date__lte=data_fim,
-            pedido__status__in=['aguardando', 'preparando', 'pronta', 'entregue'],
-        )
-        if q:
-            items_qs = items_qs.filter(
-                Q(product__name__icontains=q) |
-                Q(opcional_obrigatorio__name__icontains=q)
-            )
+        produtos = _vendas_por_produto(data_inicio, data_fim, q)
 
-        produtos = (
-            items_qs
-            .values(
-                'product__id',
-                'product__name',
-                'product__category',
-                'opcional_obrigatorio__id',
-                'opcional_obrigatorio__name',
-            )
-            .annotate(
-                qtd_vendida=Sum('quantity'),
-                total_faturado=Sum(
-                    Case(
-                        When(
-                            pedido__comanda__status='fechada',
-                            then=ExpressionWrapper(
-                                F('quantity') * F('unit_price'),
-                                output_field=DecimalField()
-                            ),
-                        ),
-                        default=Value(_Dec('0.00')),
-                        output_field=DecimalField(),
-                    )
-                ),
-            )
-            .order_by('-qtd_vendida', 'product__name', 'opcional_obrigatorio__name')
-        )
-
-        produtos = list(produtos)
         total_itens = sum(p['qtd_vendida'] or 0 for p in produtos)
         total_faturado = sum(p['total_faturado'] or 0 for p in produtos)
+        total_custo = sum(p['custo_total'] or 0 for p in produtos)
 
         groups_map = {}
         for row in produtos:
@@ -232,31 +247,91 @@ class SellsReportView(BaseReportView):
                     'product__category': row.get('product__category'),
                     'qtd_vendida': 0,
                     'total_faturado': 0,
+                    'custo_total': 0,
                     'variacoes': [],
                 }
                 groups_map[product_id] = group
 
             group['qtd_vendida'] += row.get('qtd_vendida') or 0
             group['total_faturado'] += row.get('total_faturado') or 0
+            group['custo_total'] += row.get('custo_total') or 0
             group['variacoes'].append({
                 'name': row.get('opcional_obrigatorio__name') or 'Sem variação',
                 'qtd_vendida': row.get('qtd_vendida') or 0,
                 'total_faturado': row.get('total_faturado') or 0,
+                'custo_total': row.get('custo_total') or 0,
             })
 
         grouped_products = sorted(groups_map.values(), key=lambda x: x['qtd_vendida'], reverse=True)
+        for group in grouped_products:
+            group['margem'] = group['total_faturado'] - group['custo_total']
+
+        # Matérias primas consumidas pelos pedidos entregues no período
+        from products.custos import materiais_consumidos
+        try:
+            inicio_dt = timezone.make_aware(datetime.strptime(data_inicio, '%Y-%m-%d'))
+            fim_dt = timezone.make_aware(datetime.strptime(data_fim, '%Y-%m-%d')) + timedelta(days=1)
+            materiais = materiais_consumidos(inicio_dt, fim_dt)
+        except ValueError:
+            materiais = []
 
         context.update({
             'produtos': produtos,
             'grouped_products': grouped_products,
             'total_itens': total_itens,
             'total_faturado': total_faturado,
+            'total_custo': total_custo,
+            'total_margem': total_faturado - total_custo,
+            'materiais': materiais,
             'data_inicio': data_inicio,
             'data_fim': data_fim,
             'q': q,
         })
         return context
 
+def _cancelamentos_queryset(data_inicio, data_fim, tipo='', numero_comanda=''):
+    queryset = Comanda.objects.filter(
+        status__in=['cancelada', 'cortesia'],
+        updated_at__date__gte=data_inicio,
+        updated_at__date__lte=data_fim,
+    ).order_by('-updated_at', '-created_at')
+
+    if tipo in ['cancelada', 'cortesia']:
+        queryset = queryset.filter(status=tipo)
+    if numero_comanda:
+        queryset = queryset.filter(numero__icontains=numero_comanda)
+    return queryset
+
+
+def _registro_cancelamento(comanda):
+    """Linha do relatório de cancelamentos/cortesias para uma comanda."""
+    usuario_obj = comanda.updated_by
+    if not usuario_obj and comanda.status == 'cancelada':
+        try:
+            checkout = comanda.checkout
+        except Exception:
+            checkout = None
+        if checkout and checkout.processed_by:
+            usuario_obj = checkout.processed_by
+
+    if usuario_obj:
+        usuario = usuario_obj.get_full_name().strip() or usuario_obj.get_username()
+    else:
+        usuario = '—'
+
+    return {
+        'id': comanda.id,
+        'numero': comanda.numero,
+        'usuario': usuario,
+        'tipo': comanda.status,
+        'tipo_label': 'Cancelamento' if comanda.status == 'cancelada' else 'Cortesia',
+        'abertura_em': timezone.localtime(comanda.created_at).strftime('%d/%m/%Y %H:%M') if comanda.created_at else '—',
+        'cancelamento_em': timezone.localtime(comanda.updated_at).strftime('%d/%m/%Y %H:%M') if comanda.updated_at else '—',
+        'observacao': comanda.motivo_cancelamento or '—',
+        'total_amount': comanda.total_amount or 0,
+    }
+
+
 class CanceledCortesiaReportView(BaseReportView):
     """Relatório de cancelamentos e cortesias de comandas."""
     template_name = 'reports/canceledcortesia_report.html'
@@ -270,44 +345,8 @@ class CanceledCortesiaReportView(BaseReportView):
         tipo = self.request.GET.get('tipo', '').strip()
         numero_comanda = self.request.GET.get('numero_comanda', '').strip()
 
-        queryset = Comanda.objects.filter(
-            status__in=['cancelada', 'cortesia'],
-            updated_at__date__gte=data_inicio,
-            updated_at__date__lte=data_fim,
-        ).order_by('-updated_at', '-created_at')
-
-        if tipo in ['cancelada', 'cortesia']:
-            queryset = queryset.filter(status=tipo)
-        if numero_comanda:
-            queryset = queryset.filter(numero__icontains=numero_comanda)
-
-        registros = []
-        for comanda in queryset:
-            usuario_obj = comanda.updated_by
-            if not usuario_obj and comanda.status == 'cancelada':
-                try:
-                    checkout = comanda.checkout
-                except Exception:
-                    checkout = None
-                if checkout and checkout.processed_by:
-                    usuario_obj = checkout.processed_by
-
-            if usuario_obj:
-                usuario = usuario_obj.get_full_name().strip() or usuario_obj.get_username()
-            else:
-                usuario = '—'
-
-            registros.append({
-                'id': comanda.id,
-                'numero': comanda.numero,
-                'usuario': usuario,
-                'tipo': comanda.status,
-                'tipo_label': 'Cancelamento' if comanda.status == 'cancelada' else 'Cortesia',
-                'abertura_em': timezone.localtime(comanda.created_at).strftime('%d/%m/%Y %H:%M') if comanda.created_at else '—',
-                'cancelamento_em': timezone.localtime(comanda.updated_at).strftime('%d/%m/%Y %H:%M') if comanda.updated_at else '—',
-                'observacao': comanda.motivo_cancelamento or '—',
-                'total_amount': comanda.total_amount or 0,
-            })
+        queryset = _cancelamentos_queryset(data_inicio, data_fim, tipo, numero_comanda)
+        registros = [_registro_cancelamento(comanda) for comanda in queryset]
 
         total_registros = len(registros)
         total_cancelamentos = queryset.filter(status='cancelada').count()
@@ -624,6 +663,31 @@ class CozinhaReportView(LoginRequiredMixin, PermissionRequiredMixin, View):
         })
 
 
+def _pedidos_queryset(data_inicio, data_fim, status_filtro='', atendente_filtro='', q=''):
+    qs = (
+        Pedido.objects
+        .select_related('comanda')
+        .prefetch_related('items')
+        .annotate(qtd_itens=Sum('items__quantity'))
+        .filter(created_at__date__gte=data_inicio, created_at__date__lte=data_fim)
+    )
+
+    if status_filtro:
+        qs = qs.filter(status=status_filtro)
+
+    if atendente_filtro.isdigit():
+        qs = qs.filter(atendente_numero=int(atendente_filtro))
+
+    if q:
+        qs = qs.filter(
+            Q(comanda__numero__icontains=q) |
+            Q(comanda__cliente_nome__icontains=q) |
+            Q(atendente_numero__icontains=q)
+        )
+
+    return qs.order_by('-created_at')
+
+
 class PedidosReportView(BaseReportView):
     """Relatório de todos os pedidos realizados"""
     template_name = 'reports/pedidos_report.html'
@@ -638,28 +702,7 @@ class PedidosReportView(BaseReportView):
         atendente_filtro = self.request.GET.get('atendente', '').strip()
         q = self.request.GET.get('q', '').strip()
 
-        qs = (
-            Pedido.objects
-            .select_related('comanda')
-            .prefetch_related('items')
-            .annotate(qtd_itens=Sum('items__quantity'))
-            .filter(created_at__date__gte=data_inicio, created_at__date__lte=data_fim)
-        )
-
-        if status_filtro:
-            qs = qs.filter(status=status_filtro)
-
-        if atendente_filtro.isdigit():
-            qs = qs.filter(atendente_numero=int(atendente_filtro))
-
-        if q:
-            qs = qs.filter(
-                Q(comanda__numero__icontains=q) |
-                Q(comanda__cliente_nome__icontains=q) |
-                Q(atendente_numero__icontains=q)
-            )
-
-        qs = qs.order_by('-created_at')
+        qs = _pedidos_queryset(data_inicio, data_fim, status_filtro, atendente_filtro, q)
 
         total_pedidos = qs.count()
         total_valor = qs.aggregate(t=Sum('total_amount'))['t'] or 0
@@ -686,3 +729,80 @@ class PedidosReportView(BaseReportView):
             'garcons': garcons,
         })
         return context
+
+
+# ─── Exportações em segundo plano ────────────────────────────────────────────
+
+def _pode_exportar(user, relatorio):
+    return not relatorio.permissao or user.has_perm(relatorio.permissao)
+
+
+def _job_json(job):
+    from django.urls import reverse
+
+    data = {
+        'ok': True,
+        'id': job.pk,
+        'status': job.status,
+        'progresso': job.progresso,
+        'erro': job.erro,
+        'status_url': reverse('reports:exportacao_status', args=[job.pk]),
+    }
+    if job.status == 'concluido':
+        data['download_url'] = reverse('reports:exportacao_download', args=[job.pk])
+        data['checksum'] = job.checksum
+        data['tamanho'] = job.tamanho
+    return data
+
+
+class ExportarRelatorioView(LoginRequiredMixin, View):
+    """Enfileira a exportação de um relatório com os filtros enviados no POST."""
+
+    def post(self, request, relatorio, formato, *args, **kwargs):
+        from .exports import RELATORIOS, enfileirar
+
+        rel = RELATORIOS.get(relatorio)
+        if rel is None or formato not in ('csv', 'xlsx', 'pdf'):
+            return JsonResponse({'ok': False, 'message': 'Exportação inválida.'}, status=404)
+        if not _pode_exportar(request.user, rel):
+            return JsonResponse({'ok': False, 'message': 'Sem permissão.'}, status=403)
+
+        job, reaproveitado = enfileirar(rel, formato, request.POST, user=request.user)
+        data = _job_json(job)
+        data['cache'] = reaproveitado
+        return JsonResponse(data)
+
+
+class ExportacaoStatusView(LoginRequiredMixin, View):
+    """Progresso de uma exportação (polling)."""
+
+    def get(self, request, pk, *args, **kwargs):
+        from .exports import RELATORIOS
+        from .models import ExportJob
+
+        job = ExportJob.objects.filter(pk=pk).first()
+        rel = RELATORIOS.get(job.relatorio) if job else None
+        if rel is None or not _pode_exportar(request.user, rel):
+            return JsonResponse({'ok': False, 'message': 'Exportação não encontrada.'}, status=404)
+        return JsonResponse(_job_json(job))
+
+
+class ExportacaoDownloadView(LoginRequiredMixin, View):
+    """Entrega o arquivo de uma exportação concluída."""
+
+    def get(self, request, pk, *args, **kwargs):
+        from django.http import FileResponse, Http404
+        from .exports import RELATORIOS
+        from .models import ExportJob
+
+        job = ExportJob.objects.filter(pk=pk, status='concluido').first()
+        rel = RELATORIOS.get(job.relatorio) if job else None
+        if rel is None or not _pode_exportar(request.user, rel) or not job.arquivo:
+            raise Http404
+
+        if request.headers.get('If-None-Match') == f'"{job.checksum}"':
+            return HttpResponse(status=304)
+
+        response = FileResponse(job.arquivo.open('rb'), as_attachment=True, filename=job.nome_arquivo)
+        response['ETag'] = f'"{job.checksum}"'
+        return response
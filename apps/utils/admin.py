@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SyncLog
+from .models import RequestMetric, RespostaIdempotente, SyncConflito, SyncLog, SyncOutbox, SyncWatermark
 
 
 @admin.register(SyncLog)
@@ -67,3 +67,79 @@ class SyncLogAdmin(admin.ModelAdmin):
 
     def has_view_permission(self, request, obj=None):
         return request.user.is_superuser
+
+
+@admin.register(RequestMetric)
+class RequestMetricAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at',
+        'url_name',
+        'method',
+        'status_code',
+        'duration_ms',
+        'db_queries',
+        'db_ms',
+        'template_ms',
+        'duplicate_queries',
+    )
+    list_filter = ('method', 'status_code')
+    search_fields = ('url_name',)
+    ordering = ('-created_at',)
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_module_perms(self, request):
+        return request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+
+@admin.register(SyncWatermark)
+class SyncWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('tabela', 'updated_at', 'ultimo_id', 'checksum', 'lido_em', 'atualizado_em')
+    search_fields = ('tabela',)
+    readonly_fields = ('tabela', 'updated_at', 'ultimo_id', 'checksum', 'lido_em', 'atualizado_em')
+    ordering = ('tabela',)
+
+
+@admin.register(SyncOutbox)
+class SyncOutboxAdmin(admin.ModelAdmin):
+    list_display = ('tabela', 'object_id', 'operacao', 'alterado_em')
+    list_filter = ('tabela', 'operacao')
+    search_fields = ('tabela', 'object_id')
+    readonly_fields = ('tabela', 'object_id', 'operacao', 'alterado_em')
+    ordering = ('id',)
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(SyncConflito)
+class SyncConflitoAdmin(admin.ModelAdmin):
+    list_display = ('criado_em', 'tabela', 'object_id', 'operacao', 'alterado_em')
+    list_filter = ('tabela', 'operacao')
+    search_fields = ('tabela', 'object_id', 'erro')
+    readonly_fields = ('tabela', 'object_id', 'operacao', 'alterado_em', 'erro', 'criado_em')
+    ordering = ('-criado_em',)
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(RespostaIdempotente)
+class RespostaIdempotenteAdmin(admin.ModelAdmin):
+    list_display = ('chave', 'status_code', 'content_type', 'criado_em')
+    list_filter = ('status_code',)
+    search_fields = ('chave',)
+    readonly_fields = ('chave', 'impressao', 'status_code', 'content_type', 'criado_em')
+    exclude = ('corpo',)
+    ordering = ('-criado_em',)
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class UtilsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'utils'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import conexoes, signals  # noqa: F401  (conexoes registra o check)
+        signals.conectar()
+        post_migrate.connect(signals.preparar_no, sender=self)
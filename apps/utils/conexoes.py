@@ -0,0 +1,88 @@
+"""
+Estado das conexões com o banco (DB_CONN_MAX_AGE / DB_POOL em core.settings).
+
+O check de inicialização roda com o `migrate` do deploy e avisa quando a
+configuração pedida não é a que está valendo (pool sem psycopg 3, conexões
+por requisição no Postgres). diagnostico() alimenta o quadro de conexões do
+painel de métricas: conexões abertas por este worker desde que subiu, idade
+da conexão atual, latência de um SELECT 1 e as estatísticas do pool.
+"""
+import time
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+_abertas = {}
+_aberta_em = {}
+_inicio = time.monotonic()
+
+
+def _registrar_abertura(sender, connection, **kwargs):
+    _abertas[connection.alias] = _abertas.get(connection.alias, 0) + 1
+    _aberta_em[connection.alias] = time.monotonic()
+
+
+connection_created.connect(_registrar_abertura, dispatch_uid='utils_conexoes_abertura')
+
+
+@register(Tags.database)
+def verificar_conexoes(app_configs, **kwargs):
+    avisos = []
+    db = settings.DATABASES['default']
+    if db['ENGINE'] != 'django.db.backends.postgresql':
+        return avisos
+    if settings.DB_POOL and not settings.DB_POOL_DISPONIVEL:
+        avisos.append(Warning(
+            'DB_POOL=True, mas psycopg 3 / psycopg_pool não estão instalados.',
+            hint='Instale psycopg[binary,pool]; até lá valem as conexões persistentes (DB_CONN_MAX_AGE).',
+            id='utils.W001',
+        ))
+    if not db.get('OPTIONS', {}).get('pool') and db.get('CONN_MAX_AGE') == 0:
+        avisos.append(Warning(
+            'DB_CONN_MAX_AGE=0: cada requisição abre uma conexão nova com o Postgres.',
+            id='utils.W002',
+        ))
+    return avisos
+
+
+def diagnostico():
+    """Lista de dicts com o estado de cada conexão configurada neste worker."""
+    resultado = []
+    agora = time.monotonic()
+    for alias in connections:
+        conn = connections[alias]
+        item = {
+            'alias': alias,
+            'vendor': conn.vendor,
+            'conn_max_age': conn.settings_dict.get('CONN_MAX_AGE'),
+            'health_checks': conn.settings_dict.get('CONN_HEALTH_CHECKS'),
+            'abertas': _abertas.get(alias, 0),
+            'idade_s': None,
+            'latencia_ms': None,
+            'pool': None,
+            'erro': '',
+        }
+        if alias != 'default' and conn.connection is None:
+            # Não abre a conexão do sync (Railway) só para o painel
+            resultado.append(item)
+            continue
+        try:
+            inicio = time.perf_counter()
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            item['latencia_ms'] = (time.perf_counter() - inicio) * 1000
+        except Exception as e:
+            item['erro'] = str(e)
+        if alias in _aberta_em and conn.connection is not None:
+            item['idade_s'] = agora - _aberta_em[alias]
+        pool = getattr(conn, 'pool', None)
+        if pool is not None:
+            item['pool'] = pool.get_stats()
+        resultado.append(item)
+    return resultado
+
+
+def uptime_worker():
+    return time.monotonic() - _inicio
@@ -425,12 +425,14 @@ class EpsonTMT20XService:
     def _enviar_rede(self, conteudo, ip="192.168.1.100", porta=9100):
         """Envio via rede (Ethernet/WiFi)"""
         import socket
+        from .limites import limitar
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5)
-            sock.connect((ip, porta))
-            sock.send(conteudo.encode('utf-8'))
-            sock.close()
+            with limitar('impressora'):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.settimeout(5)
+                sock.connect((ip, porta))
+                sock.send(conteudo.encode('utf-8'))
+                sock.close()
             return True
             
         except Exception as e:
@@ -0,0 +1,149 @@
+"""
+Idempotência das views que gravam (POST JSON) por Idempotency-Key.
+
+O cliente gera uma chave por operação (UUID) e a repete em toda nova
+tentativa. @idempotente grava a chave, executa a view e guarda a resposta na
+mesma transação:
+
+- reenvio depois da resposta → devolve a resposta guardada, sem executar a
+  view (cabeçalho Idempotency-Replayed: true);
+- reenvio concorrente → o INSERT da mesma chave espera o commit da primeira
+  requisição (índice único) e então devolve a resposta dela;
+- só sucesso é guardado: exceção, status fora de 2xx ou JSON com ok/success
+  falso (várias views respondem 200 com success: false ao capturar erros) →
+  nada fica guardado e a próxima tentativa executa de novo;
+- mesma chave com outro conteúdo (método, caminho, usuário ou corpo) → 422.
+
+Sem o cabeçalho a view roda como sempre. Respostas ficam guardadas por
+IDEMPOTENCY_TTL_HOURS.
+"""
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+CABECALHO = 'Idempotency-Key'
+TAMANHO_MAXIMO = 64
+CORPO_MAXIMO = 64 * 1024  # respostas maiores não são guardadas
+LIMPEZA_SEGUNDOS = 300
+
+_lock = threading.Lock()
+_ultima_limpeza = 0.0
+
+
+def _validade():
+    return timezone.now() - timedelta(hours=getattr(settings, 'IDEMPOTENCY_TTL_HOURS', 24))
+
+
+def _impressao(request):
+    h = hashlib.sha256()
+    for parte in (request.method, request.path, str(getattr(request.user, 'pk', '') or '')):
+        h.update(parte.encode())
+        h.update(b'\0')
+    h.update(request.body)
+    return h.hexdigest()
+
+
+def _expurgar():
+    """Apaga as respostas vencidas, no máximo uma vez a cada LIMPEZA_SEGUNDOS por processo."""
+    global _ultima_limpeza
+    from .models import RespostaIdempotente
+
+    with _lock:
+        if time.monotonic() - _ultima_limpeza < LIMPEZA_SEGUNDOS:
+            return
+        _ultima_limpeza = time.monotonic()
+    RespostaIdempotente.objects.filter(criado_em__lt=_validade()).delete()
+
+
+def _buscar(chave):
+    from .models import RespostaIdempotente
+
+    registro = RespostaIdempotente.objects.filter(chave=chave).first()
+    if registro and registro.criado_em < _validade():
+        registro.delete()
+        return None
+    return registro
+
+
+def _repetir(registro, impressao):
+    if registro.impressao != impressao:
+        return JsonResponse(
+            {'ok': False, 'success': False, 'erro': 'Idempotency-Key já usada em outra requisição.'},
+            status=422,
+        )
+    response = HttpResponse(bytes(registro.corpo), status=registro.status_code, content_type=registro.content_type)
+    response['Idempotency-Replayed'] = 'true'
+    return response
+
+
+def _sucesso(response):
+    if not 200 <= response.status_code < 300:
+        return False
+    if 'json' not in response.get('Content-Type', ''):
+        return True
+    try:
+        dados = json.loads(response.content)
+    except ValueError:
+        return False
+    return not isinstance(dados, dict) or (
+        dados.get('ok', True) is not False and dados.get('success', True) is not False
+    )
+
+
+def _guardavel(response):
+    return (
+        not response.streaming
+        and len(response.content) <= CORPO_MAXIMO
+        and _sucesso(response)
+    )
+
+
+def idempotente(view):
+    """Decorator de view (função ou método, via method_decorator) — ver o módulo."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        from .models import RespostaIdempotente
+
+        chave = (request.headers.get(CABECALHO) or '').strip()
+        if not chave:
+            return view(request, *args, **kwargs)
+        if len(chave) > TAMANHO_MAXIMO:
+            return JsonResponse({'ok': False, 'success': False, 'erro': 'Idempotency-Key inválida.'}, status=400)
+
+        _expurgar()
+        impressao = _impressao(request)
+        registro = _buscar(chave)
+        if registro:
+            return _repetir(registro, impressao)
+
+        try:
+            with transaction.atomic():
+                registro = RespostaIdempotente.objects.create(
+                    chave=chave, impressao=impressao, criado_em=timezone.now(),
+                )
+                response = view(request, *args, **kwargs)
+                if _guardavel(response):
+                    registro.status_code = response.status_code
+                    registro.content_type = response.get('Content-Type', '')
+                    registro.corpo = response.content
+                    registro.save(update_fields=['status_code', 'content_type', 'corpo'])
+                else:
+                    registro.delete()
+        except IntegrityError:
+            # A mesma chave foi gravada por uma requisição concorrente
+            registro = _buscar(chave)
+            if registro is None:
+                raise
+            return _repetir(registro, impressao)
+        return response
+
+    return wrapper
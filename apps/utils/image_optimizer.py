@@ -1,9 +1,14 @@
 import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from threading import Lock
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
 
 try:
     from PIL import Image
@@ -106,3 +111,208 @@ def compress_image_field(image_field, max_size=(1600, 1600), quality=82):
     except Exception as e:
         logger.warning("[compress] %s: falhou — %s", getattr(image_field, 'name', '?'), e)
         return False
+
+
+# ── Variantes responsivas ────────────────────────────────────────────────────
+#
+# Cada imagem gera cópias limitadas em largura (IMAGE_VARIANT_WIDTHS) nos
+# formatos de IMAGE_VARIANT_FORMATS e no formato original. Os nomes ficam num
+# JSONField do modelo:
+#   {"origem": "products/x.jpg", "largura": 1200,
+#    "arquivos": {"webp": {"200": "products/variantes/x__w200.webp", ...},
+#                 "jpeg": {"200": ...}}}
+# "origem" é o nome da imagem da qual as variantes saíram: se a imagem mudar,
+# as variantes antigas deixam de valer até o reprocessamento.
+
+FORMATOS_VARIANTE = {
+    # formato: (extensão, MIME, opções do Pillow)
+    "avif": ("avif", "image/avif", {"quality": 55}),
+    "webp": ("webp", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+    "png": ("png", "image/png", {"optimize": True, "compress_level": 9}),
+}
+
+
+def _suportado(formato):
+    if formato not in FORMATOS_VARIANTE:
+        return False
+    if formato == "avif":
+        from PIL import features
+
+        return bool(features.check("avif"))
+    return True
+
+
+def _formato_original(img):
+    fmt = (img.format or "JPEG").upper()
+    return "png" if fmt == "PNG" else "webp" if fmt == "WEBP" else "jpeg"
+
+
+def _nome_variante(nome, largura, ext):
+    pasta, arquivo = posixpath.split(nome)
+    raiz = posixpath.splitext(arquivo)[0]
+    return posixpath.join(pasta, "variantes", f"{raiz}__w{largura}.{ext}")
+
+
+def gerar_variantes(image_field, larguras=None, formatos=None):
+    """
+    Gera as variantes de um ImageField e retorna o dict descrito acima
+    (vazio se não houver imagem ou se o Pillow falhar).
+    """
+    if not image_field or not getattr(image_field, "name", None) or Image is None:
+        return {}
+
+    larguras = sorted(larguras or settings.IMAGE_VARIANT_WIDTHS)
+    formatos = [f for f in (formatos or settings.IMAGE_VARIANT_FORMATS) if _suportado(f)]
+    storage = image_field.storage
+    try:
+        image_field.open("rb")
+        dados = image_field.read()
+        image_field.close()
+
+        with Image.open(BytesIO(dados)) as img:
+            img.load()
+            original = _formato_original(img)
+            if original not in formatos:
+                formatos.append(original)
+            largura_origem = img.width
+            # Nunca amplia: larguras acima da original viram uma só, na largura original
+            alvos = [w for w in larguras if w < largura_origem]
+            alvos.append(min(largura_origem, larguras[-1]))
+
+            arquivos = {}
+            for largura in sorted(set(alvos)):
+                copia = img.copy()
+                copia.thumbnail((largura, largura * 4), _resampling_filter())
+                for formato in formatos:
+                    ext, _, opcoes = FORMATOS_VARIANTE[formato]
+                    quadro = copia
+                    if formato == "jpeg" and quadro.mode not in ("RGB", "L"):
+                        quadro = quadro.convert("RGB")
+                    saida = BytesIO()
+                    quadro.save(saida, format=formato.upper(), **opcoes)
+                    nome = _nome_variante(image_field.name, largura, ext)
+                    if storage.exists(nome):
+                        storage.delete(nome)
+                    nome = storage.save(nome, ContentFile(saida.getvalue()))
+                    arquivos.setdefault(formato, {})[str(largura)] = nome
+        return {"origem": image_field.name, "largura": largura_origem, "arquivos": arquivos}
+    except Exception as e:
+        logger.warning("[variantes] %s: falhou — %s", image_field.name, e)
+        return {}
+
+
+def remover_variantes(variantes, storage):
+    """Apaga do storage os arquivos de um dict de variantes."""
+    for por_largura in (variantes or {}).get("arquivos", {}).values():
+        for nome in por_largura.values():
+            try:
+                storage.delete(nome)
+            except Exception as e:
+                logger.warning("[variantes] não apagou %s — %s", nome, e)
+
+
+def variantes_validas(image_field, variantes):
+    """Variantes só valem se saíram da imagem atual do campo."""
+    if image_field and variantes and variantes.get("origem") == image_field.name:
+        return variantes.get("arquivos") or {}
+    return {}
+
+
+def srcset(image_field, variantes, formato):
+    """'url 200w, url 400w, ...' de um formato, ou '' sem variantes."""
+    por_largura = variantes_validas(image_field, variantes).get(formato) or {}
+    url = image_field.storage.url
+    return ", ".join(
+        f"{url(nome)} {largura}w"
+        for largura, nome in sorted(por_largura.items(), key=lambda kv: int(kv[0]))
+    )
+
+
+def url_variante(image_field, variantes, largura, formato=None):
+    """
+    URL da menor variante com largura ≥ `largura` (ou a maior disponível) no
+    formato pedido — por padrão o formato original. Sem variantes, a URL da
+    própria imagem.
+    """
+    if not image_field:
+        return ""
+    arquivos = variantes_validas(image_field, variantes)
+    if formato is None:
+        formato = next((f for f in ("jpeg", "png") if f in arquivos), "webp")
+    por_largura = sorted(
+        ((int(w), nome) for w, nome in (arquivos.get(formato) or {}).items())
+    )
+    if not por_largura:
+        return image_field.url
+    nome = next((n for w, n in por_largura if w >= largura), por_largura[-1][1])
+    return image_field.storage.url(nome)
+
+
+def processar_imagem(model, pk, campo="image", campo_variantes="image_variants", forcar=False):
+    """
+    Comprime a imagem original e regenera as variantes de um registro.
+    Grava o JSON com update() (sem disparar save/signals de novo) e, nos
+    models com updated_at, carimba a data: update() não aplica auto_now e a
+    sincronização incremental só leva linhas com updated_at novo.
+    """
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None:
+        return False
+    image_field = getattr(obj, campo)
+    anteriores = getattr(obj, campo_variantes) or {}
+
+    if not image_field:
+        novas = {}
+    elif not forcar and anteriores.get("origem") == image_field.name and anteriores.get("arquivos"):
+        return False  # já processada
+    else:
+        compress_image_field(image_field)
+        novas = gerar_variantes(image_field)
+
+    valores = {campo_variantes: novas}
+    if any(f.name == "updated_at" for f in model._meta.concrete_fields):
+        valores["updated_at"] = timezone.now()
+    # A imagem pode ter sido trocada enquanto processava: só grava se ainda é a mesma
+    atualizados = model.objects.filter(pk=pk, **{campo: image_field.name or ""}).update(**valores)
+    if atualizados:
+        remover_variantes(anteriores, getattr(model, campo).field.storage)
+    else:
+        remover_variantes(novas, getattr(model, campo).field.storage)
+    return bool(atualizados)
+
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _executar(model, pk, campo, campo_variantes):
+    try:
+        processar_imagem(model, pk, campo, campo_variantes)
+    except Exception:
+        logger.exception("[variantes] falha em %s #%s", model.__name__, pk)
+    finally:
+        close_old_connections()
+
+
+def agendar_processamento(instance, campo="image", campo_variantes="image_variants"):
+    """
+    Após o commit, processa a imagem do registro fora da requisição (pool de
+    threads do worker; o Pillow libera o GIL ao redimensionar e codificar).
+    Com IMAGE_PIPELINE_ASYNC=False roda na hora, ainda após o commit.
+    """
+    model, pk = type(instance), instance.pk
+
+    def disparar():
+        global _executor
+        if not settings.IMAGE_PIPELINE_ASYNC:
+            processar_imagem(model, pk, campo, campo_variantes)
+            return
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_PIPELINE_WORKERS, thread_name_prefix="imagens",
+                )
+        _executor.submit(_executar, model, pk, campo, campo_variantes)
+
+    transaction.on_commit(disparar)
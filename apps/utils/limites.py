@@ -0,0 +1,51 @@
+"""
+Limite de chamadas simultâneas por serviço externo (SEFAZ, Rede, Mercado Pago,
+impressora de rede).
+
+Cada worker do gunicorn atende várias requisições em threads (perfil gthread,
+ver gunicorn.conf.py). Sem limite, um serviço travado prende todas elas até o
+timeout e o PDV inteiro para. Com limitar('sefaz'), no máximo
+UPSTREAM_LIMITES['sefaz'] threads por worker ficam esperando a SEFAZ; as
+demais recebem UpstreamOcupado depois de UPSTREAM_FILA_SECONDS e seguem
+atendendo o resto do sistema.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_semaforos = {}
+_lock = threading.Lock()
+
+
+class UpstreamOcupado(Exception):
+    """O serviço externo já está com o máximo de chamadas em andamento neste worker."""
+
+
+def _semaforo(nome):
+    with _lock:
+        sem = _semaforos.get(nome)
+        if sem is None:
+            limite = settings.UPSTREAM_LIMITES.get(nome, settings.UPSTREAM_LIMITE_PADRAO)
+            sem = _semaforos[nome] = threading.BoundedSemaphore(limite)
+        return sem
+
+
+@contextmanager
+def limitar(nome):
+    sem = _semaforo(nome)
+    if not sem.acquire(timeout=settings.UPSTREAM_FILA_SECONDS):
+        raise UpstreamOcupado(f'{nome}: serviço lento ou indisponível, tente novamente em instantes.')
+    try:
+        yield
+    finally:
+        sem.release()
+
+
+def em_uso():
+    """{nome: chamadas em andamento} neste worker, para diagnóstico."""
+    with _lock:
+        return {
+            nome: settings.UPSTREAM_LIMITES.get(nome, settings.UPSTREAM_LIMITE_PADRAO) - sem._value
+            for nome, sem in _semaforos.items()
+        }
@@ -1,59 +1,113 @@
-import boto3
+import tempfile
+import time
 from pathlib import Path
-from botocore.exceptions import ClientError
-from django.core.management.base import BaseCommand
+
 from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import midia_r2
+
+
+def _mb(n):
+    return n / (1024 * 1024)
 
 
 class Command(BaseCommand):
-    help = 'Migra todos os arquivos de media do volume local para o Cloudflare R2'
+    help = (
+        'Sincroniza os arquivos de media do volume local com o Cloudflare R2: lista o bucket '
+        'uma vez, compara com o manifesto local e envia só o que falta, em paralelo e '
+        'retomável. Para testar sem o R2: --endpoint-url de um S3 local (moto_server, MinIO).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Envios simultâneos (padrão: 8).')
+        parser.add_argument('--dry-run', action='store_true', help='Só lista e compara; não envia nada.')
+        parser.add_argument('--benchmark', action='store_true',
+                            help='Envia tudo com 1 e com --workers threads num prefixo temporário, '
+                                 'mede a vazão e apaga os objetos. Use com um S3 de teste.')
+        parser.add_argument('--manifesto', default=None,
+                            help=f'Manifesto dos envios (padrão: MEDIA_ROOT/{midia_r2.MANIFESTO_NOME}).')
+        parser.add_argument('--prefixo', default='', help='Prefixo das chaves no bucket.')
+        parser.add_argument('--endpoint-url', default=None)
+        parser.add_argument('--bucket', default=None)
+        parser.add_argument('--access-key', default=None)
+        parser.add_argument('--secret-key', default=None)
 
     def handle(self, *args, **options):
         media_root = Path(settings.MEDIA_ROOT)
         if not media_root.exists():
-            self.stdout.write(self.style.ERROR(f'MEDIA_ROOT nao encontrada: {media_root}'))
+            raise CommandError(f'MEDIA_ROOT nao encontrada: {media_root}')
+
+        endpoint = options['endpoint_url'] or getattr(settings, 'AWS_S3_ENDPOINT_URL', None)
+        bucket = options['bucket'] or getattr(settings, 'AWS_STORAGE_BUCKET_NAME', None)
+        if not endpoint or not bucket:
+            raise CommandError('R2 nao configurado (AWS_S3_ENDPOINT_URL / bucket ausentes)')
+
+        workers = max(options['workers'], 1)
+        s3 = midia_r2.cliente_s3(
+            endpoint,
+            options['access_key'] or getattr(settings, 'AWS_ACCESS_KEY_ID', None),
+            options['secret_key'] or getattr(settings, 'AWS_SECRET_ACCESS_KEY', None),
+            max_conexoes=workers * 4 + 2,
+        )
+
+        if options['benchmark']:
+            return self._benchmark(s3, bucket, media_root, workers)
+
+        manifesto = midia_r2.Manifesto(options['manifesto'] or media_root / midia_r2.MANIFESTO_NOME)
+        plano = midia_r2.planejar(s3, bucket, media_root, manifesto, options['prefixo'])
+        self._resumo_plano(plano, media_root)
+        if options['dry_run'] or not (plano.enviar or plano.ja_no_bucket):
             return
 
-        if not getattr(settings, 'AWS_S3_ENDPOINT_URL', None):
-            self.stdout.write(self.style.ERROR('R2 nao configurado (AWS_S3_ENDPOINT_URL ausente)'))
+        def progresso(arq, erro):
+            if erro:
+                self.stdout.write(self.style.ERROR(f'  ERRO ao enviar {arq.chave}: {erro}'))
+            elif options['verbosity'] >= 2:
+                self.stdout.write(self.style.SUCCESS(f'  OK: {arq.chave}'))
+
+        try:
+            r = midia_r2.executar(s3, bucket, plano, manifesto, workers=workers, ao_enviar=progresso)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nInterrompido — progresso salvo no manifesto; rode de novo para continuar.'))
             return
 
-        s3 = boto3.client(
-            's3',
-            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name='auto',
+        self.stdout.write(
+            f'\nConcluido: {r.enviados} enviados ({_mb(r.bytes_enviados):.1f} MB em {r.segundos:.1f}s, '
+            f'{r.enviados / r.segundos if r.segundos else 0:.1f} arq/s, '
+            f'{_mb(r.bytes_enviados) / r.segundos if r.segundos else 0:.2f} MB/s), '
+            f'{plano.no_manifesto + len(plano.ja_no_bucket)} ja existiam, {len(r.erros)} erros'
         )
-        bucket = settings.AWS_STORAGE_BUCKET_NAME
-        uploaded = 0
-        skipped = 0
-        errors = 0
-
-        files = [f for f in media_root.rglob('*') if f.is_file()]
-        self.stdout.write(f'Encontrados {len(files)} arquivos em {media_root}')
-
-        for filepath in files:
-            relative = filepath.relative_to(media_root)
-            key = str(relative).replace('\\', '/')
-
-            try:
-                s3.head_object(Bucket=bucket, Key=key)
-                skipped += 1
-                self.stdout.write(f'  SKIP (ja existe): {key}')
-                continue
-            except ClientError as e:
-                if e.response['Error']['Code'] != '404':
-                    self.stdout.write(self.style.ERROR(f'  ERRO ao verificar {key}: {e}'))
-                    errors += 1
-                    continue
-
-            try:
-                s3.upload_file(str(filepath), bucket, key)
-                uploaded += 1
-                self.stdout.write(self.style.SUCCESS(f'  OK: {key}'))
-            except Exception as e:
-                errors += 1
-                self.stdout.write(self.style.ERROR(f'  ERRO ao enviar {key}: {e}'))
-
-        self.stdout.write(f'\nConcluido: {uploaded} enviados, {skipped} ja existiam, {errors} erros')
+
+    def _resumo_plano(self, plano, media_root):
+        self.stdout.write(
+            f'Encontrados {plano.total} arquivos em {media_root} '
+            f'(listagem do bucket {plano.listagem_s:.2f}s, comparacao {plano.diff_s:.2f}s)\n'
+            f'  {plano.no_manifesto} ja enviados (manifesto)\n'
+            f'  {len(plano.ja_no_bucket)} ja no bucket (conferidos por hash)\n'
+            f'  {len(plano.enviar)} a enviar ({_mb(plano.bytes_enviar):.1f} MB)'
+        )
+
+    def _benchmark(self, s3, bucket, media_root, workers):
+        base = f'_benchmark/{int(time.time())}'
+        rodadas = [1] if workers == 1 else [1, workers]
+        try:
+            for n in rodadas:
+                with tempfile.TemporaryDirectory() as tmp:
+                    manifesto = midia_r2.Manifesto(Path(tmp) / 'manifesto.json')
+                    plano = midia_r2.planejar(s3, bucket, media_root, manifesto, f'{base}/w{n}/')
+                    r = midia_r2.executar(s3, bucket, plano, manifesto, workers=n)
+                    # Segunda passada: tudo no manifesto, nada a enviar
+                    t = time.monotonic()
+                    replano = midia_r2.planejar(s3, bucket, media_root, manifesto, f'{base}/w{n}/')
+                    retomada = time.monotonic() - t
+                self.stdout.write(
+                    f'[{n} thread(s)] {r.enviados} arquivos, {_mb(r.bytes_enviados):.1f} MB em {r.segundos:.2f}s '
+                    f'({r.enviados / r.segundos if r.segundos else 0:.1f} arq/s, '
+                    f'{_mb(r.bytes_enviados) / r.segundos if r.segundos else 0:.2f} MB/s), {len(r.erros)} erros; '
+                    f'nova passada: {len(replano.enviar)} a enviar em {retomada:.2f}s'
+                )
+        finally:
+            chaves = [k for k in midia_r2.listar_bucket(s3, bucket, base + '/')]
+            for i in range(0, len(chaves), 1000):
+                s3.delete_objects(Bucket=bucket, Delete={'Objects': [{'Key': k} for k in chaves[i:i + 1000]]})
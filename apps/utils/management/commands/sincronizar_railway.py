@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.sync import REMOTE, limpar_tombstones, sincronizar
+
+
+class Command(BaseCommand):
+    help = (
+        "Sincronização incremental Railway → servidor local (substitui o "
+        "pg_dump completo do sync_local.py). Com SYNC_NODE_ID > 0 também envia "
+        "ao Railway as vendas feitas na loja. Requer SYNC_REMOTE_DATABASE_URL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Executa uma rodada e sai (registrada como manual).",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=int,
+            default=None,
+            help="Segundos entre rodadas (padrão: SYNC_INTERVAL_SECONDS).",
+        )
+
+    def handle(self, *args, **options):
+        if REMOTE not in settings.DATABASES:
+            self.stdout.write(self.style.ERROR("SYNC_REMOTE_DATABASE_URL não configurada."))
+            return
+
+        intervalo = options["intervalo"] or settings.SYNC_INTERVAL_SECONDS
+        ultima_limpeza = 0.0
+        while True:
+            log = sincronizar(triggered_by="manual" if options["once"] else "automatic")
+            if log.status == "error":
+                self.stdout.write(self.style.ERROR(f"Erro: {log.error_message}"))
+            elif log.pk:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{log.duration_seconds:.2f}s | +{log.records_created} ~{log.records_updated} "
+                    f"-{log.records_deleted} ↑{log.records_uploaded} | {log.tables_synced}"
+                ))
+            else:
+                self.stdout.write(f"Sem alterações ({log.duration_seconds:.2f}s).")
+
+            if options["once"]:
+                return
+
+            if time.monotonic() - ultima_limpeza >= 86400:
+                ultima_limpeza = time.monotonic()
+                try:
+                    limpar_tombstones()
+                except Exception as e:
+                    self.stdout.write(self.style.WARNING(f"Limpeza de lápides falhou: {e}"))
+            time.sleep(intervalo)
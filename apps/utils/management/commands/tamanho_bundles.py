@@ -0,0 +1,100 @@
+import gzip
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _kb(n):
+    return f'{n / 1024:.1f}' if n is not None else '-'
+
+
+def _brotli(dados):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return len(brotli.compress(dados))
+
+
+def _medir(nome):
+    """
+    (arquivo servido, bytes, gzip, brotli) de um estático. Depois do
+    collectstatic com CompressedManifestStaticFilesStorage mede o arquivo com
+    hash e os .gz/.br gerados; sem manifest comprime em memória o original.
+    """
+    caminho = None
+    try:
+        caminho = Path(staticfiles_storage.path(staticfiles_storage.stored_name(nome)))
+    except (ValueError, NotImplementedError, AttributeError):
+        pass
+    if caminho is None or not caminho.exists():
+        encontrado = finders.find(nome)
+        if not encontrado:
+            raise CommandError(f'Estático não encontrado: {nome}')
+        caminho = Path(encontrado)
+
+    dados = caminho.read_bytes()
+    gz, br = caminho.with_name(caminho.name + '.gz'), caminho.with_name(caminho.name + '.br')
+    return (
+        caminho.name,
+        len(dados),
+        gz.stat().st_size if gz.exists() else len(gzip.compress(dados, 9)),
+        br.stat().st_size if br.exists() else _brotli(dados),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Tamanho dos bundles estáticos das telas (STATIC_BUNDLES): bytes, gzip e brotli, '
+        'comparados com a referência salva e com o orçamento de cada um. Rode depois do '
+        'collectstatic para medir os arquivos com hash e os pré-comprimidos que serão servidos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--referencia', default=None,
+                            help='Arquivo JSON de referência (padrão: STATIC_BUNDLES_REFERENCIA).')
+        parser.add_argument('--salvar', action='store_true', help='Grava as medidas atuais como referência.')
+        parser.add_argument('--estrito', action='store_true',
+                            help='Falha se algum bundle passar do orçamento (para CI).')
+
+    def handle(self, *args, **options):
+        bundles = getattr(settings, 'STATIC_BUNDLES', {})
+        referencia_path = Path(options['referencia'] or settings.STATIC_BUNDLES_REFERENCIA)
+        try:
+            referencia = json.loads(referencia_path.read_text())
+        except (FileNotFoundError, ValueError):
+            referencia = {}
+
+        medidas, estourados = {}, []
+        self.stdout.write(f'{"bundle":<34} {"arquivo servido":<36} {"KB":>7} {"gzip":>7} {"br":>7} {"Δ br":>8} {"limite":>7}')
+        for nome, limite_kb in bundles.items():
+            servido, bruto, gz, br = _medir(nome)
+            medidas[nome] = {'bytes': bruto, 'gzip': gz, 'br': br}
+            comprimido = br if br is not None else gz
+
+            anterior = (referencia.get(nome) or {}).get('br' if br is not None else 'gzip')
+            delta = f'{(comprimido - anterior) / 1024:+.1f}' if anterior is not None else 'novo'
+            linha = (f'{nome:<34} {servido:<36} {_kb(bruto):>7} {_kb(gz):>7} {_kb(br):>7} '
+                     f'{delta:>8} {limite_kb:>7}')
+            if comprimido > limite_kb * 1024:
+                estourados.append(nome)
+                self.stdout.write(self.style.ERROR(linha))
+            else:
+                self.stdout.write(linha)
+
+        total = sum((m['br'] if m['br'] is not None else m['gzip']) for m in medidas.values())
+        self.stdout.write(f'Total comprimido: {_kb(total)} KB em {len(medidas)} bundles')
+
+        if options['salvar']:
+            referencia_path.write_text(json.dumps(medidas, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Referência gravada em {referencia_path}'))
+
+        if estourados:
+            msg = f'Acima do orçamento: {", ".join(estourados)}'
+            if options['estrito']:
+                raise CommandError(msg)
+            self.stdout.write(self.style.WARNING(msg))
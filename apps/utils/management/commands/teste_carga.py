@@ -0,0 +1,126 @@
+import random
+import socket
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+
+from utils import limites
+from utils.limites import UpstreamOcupado, limitar
+
+
+def _upstream_travado():
+    """Servidor TCP local que aceita conexões e nunca responde (SEFAZ fora do ar)."""
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.bind(('127.0.0.1', 0))
+    srv.listen(128)
+    abertas = []
+
+    def aceitar():
+        while True:
+            try:
+                conn, _ = srv.accept()
+            except OSError:
+                return
+            abertas.append(conn)
+
+    threading.Thread(target=aceitar, daemon=True).start()
+    return srv
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga de um worker gthread com um serviço externo travado: "
+        "mede a vazão das requisições comuns com e sem utils.limites."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/accounts/login/', help='Rota rápida a medir.')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Threads do worker simulado (padrão: 8, o do gunicorn.conf.py).')
+        parser.add_argument('--segundos', type=float, default=30, help='Duração de cada cenário.')
+        parser.add_argument('--fracao-lenta', type=float, default=0.2,
+                            help='Fração das requisições que chamam o serviço travado.')
+        parser.add_argument('--timeout-upstream', type=float, default=30,
+                            help='Timeout da chamada ao serviço travado (produção: 30 a 60 s).')
+
+    def handle(self, *args, **options):
+        srv = _upstream_travado()
+        endereco = srv.getsockname()
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        if host == '*':
+            host = 'localhost'
+
+        self.stdout.write(
+            f"{options['threads']} threads, {options['segundos']:.0f}s por cenário, "
+            f"{options['fracao_lenta']:.0%} das requisições chamam um serviço que não responde "
+            f"(timeout {options['timeout_upstream']:.0f}s); limite sefaz={settings.UPSTREAM_LIMITES['sefaz']}, "
+            f"fila {settings.UPSTREAM_FILA_SECONDS:.0f}s"
+        )
+        try:
+            for nome, com_limite in (('sem limite', False), ('com utils.limites', True)):
+                r = self._cenario(options, endereco, host, com_limite)
+                self.stdout.write(
+                    f"\n[{nome}]\n"
+                    f"  rápidas: {r['rapidas']} ({r['rapidas'] / options['segundos']:.1f} req/s), "
+                    f"p50 {r['p50']:.0f} ms, p95 {r['p95']:.0f} ms\n"
+                    f"  serviço travado: {r['lentas']} chamadas esgotaram o timeout, "
+                    f"{r['recusadas']} recusadas sem esperar pelo timeout"
+                )
+        finally:
+            srv.close()
+
+    def _cenario(self, options, endereco, host, com_limite):
+        fim = time.monotonic() + options['segundos']
+        lock = threading.Lock()
+        r = {'rapidas': 0, 'lentas': 0, 'recusadas': 0, 'tempos': []}
+
+        def chamar_upstream():
+            sock = socket.create_connection(endereco, timeout=options['timeout_upstream'])
+            try:
+                sock.sendall(b'POST / HTTP/1.1\r\nHost: sefaz\r\n\r\n')
+                sock.recv(1)
+            except socket.timeout:
+                pass
+            finally:
+                sock.close()
+
+        def thread():
+            client = Client(HTTP_HOST=host)
+            while time.monotonic() < fim:
+                if random.random() < options['fracao_lenta']:
+                    try:
+                        if com_limite:
+                            with limitar('sefaz'):
+                                chamar_upstream()
+                        else:
+                            chamar_upstream()
+                        chave = 'lentas'
+                    except UpstreamOcupado:
+                        chave = 'recusadas'
+                    with lock:
+                        r[chave] += 1
+                    continue
+                inicio = time.perf_counter()
+                client.get(options['url'])
+                ms = (time.perf_counter() - inicio) * 1000
+                with lock:
+                    r['rapidas'] += 1
+                    r['tempos'].append(ms)
+            connections.close_all()
+
+        limites._semaforos.clear()
+        threads = [threading.Thread(target=thread) for _ in range(options['threads'])]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        tempos = r.pop('tempos') or [0]
+        r['p50'] = statistics.median(tempos)
+        r['p95'] = statistics.quantiles(tempos, n=20)[-1] if len(tempos) >= 20 else max(tempos)
+        return r
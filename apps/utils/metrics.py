@@ -0,0 +1,117 @@
+"""
+Buffer em memória das métricas de requisição.
+
+O RequestMetricsMiddleware empilha uma amostra por requisição num ring buffer
+(deque com tamanho máximo) e, a cada REQUEST_METRICS_FLUSH_SECONDS, o
+conteúdo é gravado em lote na tabela RequestMetric. Cada worker do gunicorn
+tem o seu próprio buffer.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_buffer = deque(maxlen=getattr(settings, 'REQUEST_METRICS_BUFFER_SIZE', 2000))
+_last_flush = time.monotonic()
+
+
+def record(sample):
+    """Adiciona uma amostra (dict com os campos de RequestMetric) ao buffer."""
+    global _last_flush
+    interval = getattr(settings, 'REQUEST_METRICS_FLUSH_SECONDS', 60)
+    # Mesmo lock do flush: uma amostra empilhada entre a cópia e o clear() se perderia
+    with _lock:
+        _buffer.append(sample)
+        vencido = time.monotonic() - _last_flush >= interval or len(_buffer) == _buffer.maxlen
+        if vencido:
+            _last_flush = time.monotonic()
+    if vencido:
+        flush()
+
+
+def flush():
+    """Grava o conteúdo do buffer em RequestMetric e descarta amostras antigas."""
+    from .models import RequestMetric
+
+    with _lock:
+        samples = list(_buffer)
+        _buffer.clear()
+
+    if not samples:
+        return 0
+
+    try:
+        RequestMetric.objects.bulk_create(
+            [RequestMetric(**s) for s in samples],
+            batch_size=500,
+        )
+        retention = getattr(settings, 'REQUEST_METRICS_RETENTION_DAYS', 7)
+        RequestMetric.objects.filter(
+            created_at__lt=timezone.now() - timedelta(days=retention)
+        ).delete()
+    except Exception as e:
+        logger.warning("[metrics] falha ao gravar %d amostras: %s", len(samples), e)
+        return 0
+
+    return len(samples)
+
+
+def percentile(sorted_values, pct):
+    """Percentil por interpolação linear sobre uma lista já ordenada."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(rows, n_plus_one_threshold=None):
+    """
+    Agrupa linhas (url_name, duration_ms, db_queries, db_ms, template_ms,
+    duplicate_queries) por URL e calcula p50/p95/p99 e suspeitas de N+1.
+
+    Uma URL é suspeita de N+1 quando a mediana da maior repetição de uma mesma
+    SQL por requisição atinge o limite configurado.
+    """
+    if n_plus_one_threshold is None:
+        n_plus_one_threshold = getattr(settings, 'REQUEST_METRICS_N_PLUS_ONE_THRESHOLD', 5)
+
+    grouped = {}
+    for url_name, duration, queries, db_ms, template_ms, duplicates in rows:
+        g = grouped.setdefault(url_name, ([], [], [], [], []))
+        g[0].append(duration)
+        g[1].append(queries)
+        g[2].append(db_ms)
+        g[3].append(template_ms)
+        g[4].append(duplicates)
+
+    summary = []
+    for url_name, (durations, queries, db_times, tpl_times, duplicates) in grouped.items():
+        durations.sort()
+        queries.sort()
+        duplicates.sort()
+        n = len(durations)
+        summary.append({
+            'url_name': url_name,
+            'count': n,
+            'p50': percentile(durations, 50),
+            'p95': percentile(durations, 95),
+            'p99': percentile(durations, 99),
+            'queries_p50': percentile(queries, 50),
+            'queries_max': queries[-1],
+            'db_ms_avg': sum(db_times) / n,
+            'template_ms_avg': sum(tpl_times) / n,
+            'duplicates_p50': percentile(duplicates, 50),
+            'n_plus_one': percentile(duplicates, 50) >= n_plus_one_threshold,
+        })
+
+    summary.sort(key=lambda s: s['p95'], reverse=True)
+    return summary
@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+
+from . import metrics
+
+_local = threading.local()
+_template_patched = False
+
+
+def _patch_template_render():
+    """
+    Envolve django.template.backends.django.Template.render para medir o tempo
+    de renderização. Só acumula quando a requisição atual está sendo amostrada,
+    e renders aninhados (render_to_string dentro de um template) contam uma vez.
+    """
+    global _template_patched
+    if _template_patched:
+        return
+
+    from django.template.backends.django import Template
+
+    original_render = Template.render
+
+    def render(self, *args, **kwargs):
+        state = getattr(_local, 'state', None)
+        if state is None or state['template_depth']:
+            return original_render(self, *args, **kwargs)
+        state['template_depth'] += 1
+        start = time.perf_counter()
+        try:
+            return original_render(self, *args, **kwargs)
+        finally:
+            state['template_ms'] += (time.perf_counter() - start) * 1000
+            state['template_depth'] -= 1
+
+    Template.render = render
+    _template_patched = True
+
+
+class _QueryCounter:
+    """execute_wrapper que conta queries, tempo de banco e SQLs repetidas."""
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    @property
+    def max_duplicates(self):
+        return max(self.statements.values(), default=0)
+
+
+class RequestMetricsMiddleware:
+    """
+    Mede tempo total, queries, tempo de banco e tempo de template por view.
+
+    Ativado por REQUEST_METRICS_SAMPLE_RATE (0.0 a 1.0). Com 0 o middleware
+    se remove da cadeia na inicialização e não há custo algum por requisição.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        _patch_template_render()
+
+    def __call__(self, request):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        counter = _QueryCounter()
+        _local.state = {'template_ms': 0.0, 'template_depth': 0}
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(counter):
+                response = self.get_response(request)
+        finally:
+            state = _local.state
+            _local.state = None
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return response
+
+        metrics.record({
+            'url_name': (match.view_name or match._func_path)[:120],
+            'method': request.method[:8],
+            'status_code': response.status_code,
+            'duration_ms': duration_ms,
+            'db_queries': counter.count,
+            'db_ms': counter.elapsed * 1000,
+            'template_ms': state['template_ms'],
+            'duplicate_queries': counter.max_duplicates,
+            'created_at': timezone.now(),
+        })
+        return response
@@ -0,0 +1,224 @@
+"""
+Envio concorrente e retomável do MEDIA_ROOT para o R2 (ou outro S3 compatível).
+
+1. Lista o bucket uma vez (ListObjectsV2 paginado) → {chave: (tamanho, etag)}.
+2. Varre o MEDIA_ROOT e compara com o manifesto local: arquivo com o mesmo
+   tamanho e mtime de um envio já registrado é pulado sem ler o conteúdo.
+   Os demais têm o MD5 calculado; se o bucket já tem a chave com o mesmo
+   tamanho e ETag, só entram no manifesto.
+3. O que sobra sobe num pool de threads limitado (upload_file do boto3, com
+   multipart acima de MULTIPART_BYTES). Cada envio concluído vai para o
+   manifesto, gravado em disco periodicamente e no final — uma execução
+   interrompida recomeça de onde parou.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MANIFESTO_NOME = '.r2-manifesto.json'
+MULTIPART_BYTES = 8 * 1024 * 1024
+CHECKPOINT_SEGUNDOS = 5
+
+
+@dataclass
+class Arquivo:
+    chave: str
+    caminho: Path
+    tamanho: int
+    mtime_ns: int
+    md5: str = ''
+
+
+@dataclass
+class Plano:
+    enviar: list = field(default_factory=list)
+    ja_no_bucket: list = field(default_factory=list)  # conferidos por hash, só entram no manifesto
+    no_manifesto: int = 0
+    total: int = 0
+    listagem_s: float = 0.0
+    diff_s: float = 0.0
+
+    @property
+    def bytes_enviar(self):
+        return sum(a.tamanho for a in self.enviar)
+
+
+@dataclass
+class Resultado:
+    enviados: int = 0
+    bytes_enviados: int = 0
+    erros: list = field(default_factory=list)
+    segundos: float = 0.0
+
+
+def cliente_s3(endpoint_url, access_key, secret_key, max_conexoes=10):
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        region_name='auto',
+        config=Config(max_pool_connections=max_conexoes, retries={'max_attempts': 5, 'mode': 'standard'}),
+    )
+
+
+def listar_bucket(s3, bucket, prefixo=''):
+    """{chave: (tamanho, etag)} de todo o bucket, páginas de 1000 objetos."""
+    objetos = {}
+    for pagina in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefixo):
+        for obj in pagina.get('Contents', ()):
+            objetos[obj['Key']] = (obj['Size'], obj['ETag'].strip('"'))
+    return objetos
+
+
+def varrer(media_root):
+    """Arquivos do MEDIA_ROOT (menos o manifesto) com tamanho e mtime."""
+    raiz = Path(media_root)
+    pilha = [raiz]
+    while pilha:
+        with os.scandir(pilha.pop()) as it:
+            for entrada in it:
+                if entrada.is_dir(follow_symlinks=False):
+                    pilha.append(Path(entrada.path))
+                elif entrada.is_file(follow_symlinks=False) and entrada.name != MANIFESTO_NOME:
+                    st = entrada.stat()
+                    caminho = Path(entrada.path)
+                    yield Arquivo(
+                        chave=caminho.relative_to(raiz).as_posix(),
+                        caminho=caminho,
+                        tamanho=st.st_size,
+                        mtime_ns=st.st_mtime_ns,
+                    )
+
+
+def md5_arquivo(caminho):
+    h = hashlib.md5(usedforsecurity=False)
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class Manifesto:
+    """chave → {tamanho, mtime_ns, md5} dos arquivos já enviados."""
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+        self._gravado_em = time.monotonic()
+        self._sujo = False
+        try:
+            self.entradas = json.loads(self.caminho.read_text())
+        except (FileNotFoundError, ValueError):
+            self.entradas = {}
+
+    def atual(self, arq):
+        e = self.entradas.get(arq.chave)
+        return bool(e) and e['tamanho'] == arq.tamanho and e['mtime_ns'] == arq.mtime_ns
+
+    def registrar(self, arq):
+        with self._lock:
+            self.entradas[arq.chave] = {'tamanho': arq.tamanho, 'mtime_ns': arq.mtime_ns, 'md5': arq.md5}
+            self._sujo = True
+            if time.monotonic() - self._gravado_em >= CHECKPOINT_SEGUNDOS:
+                self._gravar()
+
+    def gravar(self):
+        with self._lock:
+            if self._sujo:
+                self._gravar()
+
+    def _gravar(self):
+        # Grava num temporário e troca: um kill no meio não corrompe o manifesto
+        tmp = self.caminho.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.entradas, separators=(',', ':')))
+        os.replace(tmp, self.caminho)
+        self._gravado_em = time.monotonic()
+        self._sujo = False
+
+
+def planejar(s3, bucket, media_root, manifesto, prefixo=''):
+    """Compara bucket, manifesto e disco; não envia nada."""
+    plano = Plano()
+    t = time.monotonic()
+    remotos = listar_bucket(s3, bucket, prefixo)
+    plano.listagem_s = time.monotonic() - t
+
+    t = time.monotonic()
+    for arq in varrer(media_root):
+        arq.chave = prefixo + arq.chave
+        plano.total += 1
+        if manifesto.atual(arq) and arq.chave in remotos:
+            plano.no_manifesto += 1
+            continue
+        remoto = remotos.get(arq.chave)
+        if remoto and remoto[0] == arq.tamanho:
+            arq.md5 = md5_arquivo(arq.caminho)
+            # ETag de objeto multipart não é MD5 ("<hash>-<partes>"): vale o tamanho
+            if remoto[1] == arq.md5 or '-' in remoto[1]:
+                plano.ja_no_bucket.append(arq)
+                continue
+        plano.enviar.append(arq)
+    plano.diff_s = time.monotonic() - t
+    return plano
+
+
+def executar(s3, bucket, plano, manifesto, workers=8, ao_enviar=None):
+    """Sobe plano.enviar num pool de `workers` threads, registrando no manifesto."""
+    from boto3.s3.transfer import TransferConfig
+
+    transfer = TransferConfig(
+        multipart_threshold=MULTIPART_BYTES,
+        multipart_chunksize=MULTIPART_BYTES,
+        max_concurrency=4,
+        use_threads=True,
+    )
+    for arq in plano.ja_no_bucket:
+        manifesto.registrar(arq)
+
+    resultado = Resultado()
+    inicio = time.monotonic()
+
+    def enviar(arq):
+        if not arq.md5:
+            arq.md5 = md5_arquivo(arq.caminho)
+        s3.upload_file(str(arq.caminho), bucket, arq.chave, Config=transfer)
+        manifesto.registrar(arq)
+        return arq
+
+    pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix='r2')
+    try:
+        futuros = {pool.submit(enviar, arq): arq for arq in plano.enviar}
+        for futuro in as_completed(futuros):
+            arq = futuros[futuro]
+            try:
+                futuro.result()
+                resultado.enviados += 1
+                resultado.bytes_enviados += arq.tamanho
+                if ao_enviar:
+                    ao_enviar(arq, None)
+            except Exception as e:
+                logger.warning("[r2] falha ao enviar %s — %s", arq.chave, e)
+                resultado.erros.append((arq.chave, str(e)))
+                if ao_enviar:
+                    ao_enviar(arq, e)
+    except BaseException:
+        # Ctrl+C / SIGTERM: descarta a fila, espera só os envios em curso
+        pool.shutdown(wait=True, cancel_futures=True)
+        raise
+    finally:
+        pool.shutdown(wait=True)
+        manifesto.gravar()
+        resultado.segundos = time.monotonic() - inicio
+    return resultado
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0002_alter_synclog_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_name', models.CharField(max_length=120, verbose_name='URL (nome)')),
+                ('method', models.CharField(max_length=8, verbose_name='Método')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Status HTTP')),
+                ('duration_ms', models.FloatField(verbose_name='Tempo total (ms)')),
+                ('db_queries', models.PositiveIntegerField(default=0, verbose_name='Queries')),
+                ('db_ms', models.FloatField(default=0, verbose_name='Tempo de banco (ms)')),
+                ('template_ms', models.FloatField(default=0, verbose_name='Tempo de template (ms)')),
+                ('duplicate_queries', models.PositiveIntegerField(default=0, verbose_name='Maior repetição de SQL')),
+                ('created_at', models.DateTimeField(verbose_name='Registrado em')),
+            ],
+            options={
+                'verbose_name': 'Métrica de Requisição',
+                'verbose_name_plural': 'Métricas de Requisição',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at', 'url_name'], name='utils_reqmetric_created_idx')],
+            },
+        ),
+    ]
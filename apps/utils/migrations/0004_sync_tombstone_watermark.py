@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0003_requestmetric'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabela', models.CharField(max_length=64, verbose_name='Tabela')),
+                ('object_id', models.BigIntegerField(verbose_name='ID do registro')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Excluído em')),
+            ],
+            options={
+                'verbose_name': 'Lápide de Sync',
+                'verbose_name_plural': 'Lápides de Sync',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabela', models.CharField(max_length=64, unique=True, verbose_name='Tabela')),
+                ('updated_at', models.DateTimeField(blank=True, null=True, verbose_name='Último updated_at')),
+                ('ultimo_id', models.BigIntegerField(default=0, verbose_name='Último ID')),
+                ('checksum', models.CharField(blank=True, max_length=32, verbose_name='Checksum')),
+                ('lido_em', models.DateTimeField(blank=True, null=True, verbose_name='Snapshot remoto de')),
+                ('atualizado_em', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': "Marca d'água de Sync",
+                'verbose_name_plural': "Marcas d'água de Sync",
+                'ordering': ['tabela'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 05:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0004_sync_tombstone_watermark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabela', models.CharField(max_length=64, verbose_name='Tabela')),
+                ('object_id', models.BigIntegerField(verbose_name='ID do registro')),
+                ('operacao', models.CharField(choices=[('upsert', 'Inclusão/Alteração'), ('delete', 'Exclusão')], max_length=6, verbose_name='Operação')),
+                ('alterado_em', models.DateTimeField(verbose_name='Alterado em')),
+            ],
+            options={
+                'verbose_name': 'Pendência de envio',
+                'verbose_name_plural': 'Pendências de envio',
+                'ordering': ['id'],
+                'constraints': [models.UniqueConstraint(fields=('tabela', 'object_id'), name='utils_syncoutbox_registro_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0005_syncoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RespostaIdempotente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=64, unique=True, verbose_name='Chave')),
+                ('impressao', models.CharField(help_text='SHA-256 de método, caminho, usuário e corpo', max_length=64, verbose_name='Impressão da requisição')),
+                ('status_code', models.PositiveSmallIntegerField(default=0, verbose_name='Status HTTP')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='Content-Type')),
+                ('corpo', models.BinaryField(default=b'', verbose_name='Corpo da resposta')),
+                ('criado_em', models.DateTimeField(db_index=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Resposta idempotente',
+                'verbose_name_plural': 'Respostas idempotentes',
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0006_respostaidempotente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncConflito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabela', models.CharField(max_length=64, verbose_name='Tabela')),
+                ('object_id', models.BigIntegerField(verbose_name='ID do registro')),
+                ('operacao', models.CharField(choices=[('upsert', 'Inclusão/Alteração'), ('delete', 'Exclusão')], max_length=6, verbose_name='Operação')),
+                ('alterado_em', models.DateTimeField(blank=True, null=True, verbose_name='Alterado em')),
+                ('erro', models.TextField(verbose_name='Erro')),
+                ('criado_em', models.DateTimeField(auto_now_add=True, verbose_name='Registrado em')),
+            ],
+            options={
+                'verbose_name': 'Conflito de envio',
+                'verbose_name_plural': 'Conflitos de envio',
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
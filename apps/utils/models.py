@@ -19,6 +19,7 @@ class TimeStampedModel(models.Model):
     
     updated_at = models.DateTimeField(
         auto_now=True,
+        db_index=True,  # marca d'água da sincronização incremental (utils.sync)
         verbose_name="Atualizado em"
     )
     
@@ -52,6 +53,31 @@ class TimeStampedModel(models.Model):
     def __str__(self):
         return f"{self.__class__.__name__} - {self.id}"
 
+    def save(self, *args, **kwargs):
+        # auto_now só grava updated_at se ele estiver em update_fields. Sem ele a
+        # alteração não chega à sincronização incremental (utils.sync) e perde o
+        # desempate por updated_at no envio (utils.sync_envio).
+        update_fields = kwargs.get('update_fields')
+        if update_fields and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'updated_at']
+        super().save(*args, **kwargs)
+
+
+def preservar_campos(instance, kwargs, *campos):
+    """
+    Para usar no save() antes do super(): o save completo de um registro
+    existente passa a gravar todos os campos concretos menos `campos`, que
+    são gravados por outro caminho (update() feito em paralelo, como
+    image_variants pelo processamento da imagem) e cujo valor em memória
+    pode estar defasado. Altera `kwargs` no lugar.
+    """
+    if kwargs.get('update_fields') is None and not instance._state.adding and not kwargs.get('force_insert'):
+        kwargs['update_fields'] = [
+            f.name for f in instance._meta.concrete_fields
+            if not f.primary_key and f.name not in campos
+        ]
+
+
 class SyncLog(models.Model):
     """
     Registro de cada sincronização entre Railway (remoto) e servidor local.
@@ -177,3 +203,286 @@ class SyncLog(models.Model):
         direction_display = dict(self.DIRECTION_CHOICES).get(self.direction, self.direction)
         status_display = dict(self.STATUS_CHOICES).get(self.status, self.status)
         return f"[{self.started_at.strftime('%d/%m/%Y %H:%M:%S')}] {direction_display} — {status_display}"
+
+
+class SyncTombstone(models.Model):
+    """
+    Exclusão de um registro de tabela sincronizada de forma incremental.
+    Gravada por utils.signals no banco onde a exclusão aconteceu; o servidor
+    local lê as lápides do Railway e apaga as mesmas linhas.
+    """
+
+    tabela = models.CharField(
+        max_length=64,
+        verbose_name="Tabela"
+    )
+
+    object_id = models.BigIntegerField(
+        verbose_name="ID do registro"
+    )
+
+    deleted_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name="Excluído em"
+    )
+
+    class Meta:
+        verbose_name = "Lápide de Sync"
+        verbose_name_plural = "Lápides de Sync"
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.tabela}#{self.object_id}"
+
+
+class SyncWatermark(models.Model):
+    """
+    Até onde cada tabela já foi sincronizada (só existe no servidor local).
+
+    Tabelas com updated_at guardam o (updated_at, id) da última linha copiada;
+    as demais guardam o checksum da tabela remota na última comparação.
+    """
+
+    tabela = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Tabela"
+    )
+
+    updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Último updated_at"
+    )
+
+    ultimo_id = models.BigIntegerField(
+        default=0,
+        verbose_name="Último ID"
+    )
+
+    checksum = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name="Checksum"
+    )
+
+    lido_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Snapshot remoto de"
+    )
+
+    atualizado_em = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Atualizado em"
+    )
+
+    class Meta:
+        verbose_name = "Marca d'água de Sync"
+        verbose_name_plural = "Marcas d'água de Sync"
+        ordering = ['tabela']
+
+    def __str__(self):
+        return self.tabela
+
+
+class RequestMetric(models.Model):
+    """
+    Amostra compacta de uma requisição instrumentada pelo RequestMetricsMiddleware.
+    Gravada em lote a partir do buffer em memória (utils.metrics).
+    """
+
+    url_name = models.CharField(
+        max_length=120,
+        verbose_name="URL (nome)"
+    )
+
+    method = models.CharField(
+        max_length=8,
+        verbose_name="Método"
+    )
+
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name="Status HTTP"
+    )
+
+    duration_ms = models.FloatField(
+        verbose_name="Tempo total (ms)"
+    )
+
+    db_queries = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Queries"
+    )
+
+    db_ms = models.FloatField(
+        default=0,
+        verbose_name="Tempo de banco (ms)"
+    )
+
+    template_ms = models.FloatField(
+        default=0,
+        verbose_name="Tempo de template (ms)"
+    )
+
+    duplicate_queries = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Maior repetição de SQL"
+    )
+
+    created_at = models.DateTimeField(
+        verbose_name="Registrado em"
+    )
+
+    class Meta:
+        verbose_name = "Métrica de Requisição"
+        verbose_name_plural = "Métricas de Requisição"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'url_name'], name='utils_reqmetric_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.url_name} {self.duration_ms:.0f}ms ({self.db_queries} queries)"
+
+
+class SyncOutbox(models.Model):
+    """
+    Alterações locais ainda não enviadas ao Railway (só nos servidores de loja).
+
+    Preenchida por gatilhos do PostgreSQL instalados por utils.sync_envio nas
+    tabelas de venda: capturam também QuerySet.update() e bulk_create, que não
+    disparam signals. Uma linha por registro; a mais recente operação vence.
+    """
+
+    OPERACAO_CHOICES = [
+        ('upsert', 'Inclusão/Alteração'),
+        ('delete', 'Exclusão'),
+    ]
+
+    tabela = models.CharField(
+        max_length=64,
+        verbose_name="Tabela"
+    )
+
+    object_id = models.BigIntegerField(
+        verbose_name="ID do registro"
+    )
+
+    operacao = models.CharField(
+        max_length=6,
+        choices=OPERACAO_CHOICES,
+        verbose_name="Operação"
+    )
+
+    alterado_em = models.DateTimeField(
+        verbose_name="Alterado em"
+    )
+
+    class Meta:
+        verbose_name = "Pendência de envio"
+        verbose_name_plural = "Pendências de envio"
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['tabela', 'object_id'], name='utils_syncoutbox_registro_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.operacao} {self.tabela}#{self.object_id}"
+
+
+class SyncConflito(models.Model):
+    """
+    Pendência da outbox que o Railway recusou por violar uma restrição
+    (ex.: duas comandas em uso com o mesmo número). Sai da outbox para não
+    travar os envios seguintes e fica aqui para conferência; uma nova
+    alteração local no registro tenta o envio de novo.
+    """
+
+    tabela = models.CharField(
+        max_length=64,
+        verbose_name="Tabela"
+    )
+
+    object_id = models.BigIntegerField(
+        verbose_name="ID do registro"
+    )
+
+    operacao = models.CharField(
+        max_length=6,
+        choices=SyncOutbox.OPERACAO_CHOICES,
+        verbose_name="Operação"
+    )
+
+    alterado_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Alterado em"
+    )
+
+    erro = models.TextField(
+        verbose_name="Erro"
+    )
+
+    criado_em = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Registrado em"
+    )
+
+    class Meta:
+        verbose_name = "Conflito de envio"
+        verbose_name_plural = "Conflitos de envio"
+        ordering = ['-criado_em']
+
+    def __str__(self):
+        return f"{self.operacao} {self.tabela}#{self.object_id}"
+
+
+class RespostaIdempotente(models.Model):
+    """
+    Resposta de uma requisição com Idempotency-Key (utils.idempotencia).
+    Um reenvio com a mesma chave recebe esta resposta sem executar a view de
+    novo. Linhas mais antigas que IDEMPOTENCY_TTL_HOURS são descartadas.
+    """
+
+    chave = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Chave"
+    )
+
+    impressao = models.CharField(
+        max_length=64,
+        verbose_name="Impressão da requisição",
+        help_text="SHA-256 de método, caminho, usuário e corpo"
+    )
+
+    status_code = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Status HTTP"
+    )
+
+    content_type = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Content-Type"
+    )
+
+    corpo = models.BinaryField(
+        default=b'',
+        verbose_name="Corpo da resposta"
+    )
+
+    criado_em = models.DateTimeField(
+        db_index=True,
+        verbose_name="Criado em"
+    )
+
+    class Meta:
+        verbose_name = "Resposta idempotente"
+        verbose_name_plural = "Respostas idempotentes"
+        ordering = ['-criado_em']
+
+    def __str__(self):
+        return f"{self.chave} ({self.status_code})"
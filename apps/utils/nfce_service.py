@@ -20,6 +20,8 @@ import urllib3
 from requests import Session
 from requests.adapters import HTTPAdapter
 
+from utils.limites import limitar
+
 # Desabilita warnings SSL para homologação
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -554,7 +556,7 @@ class NFCeService:
         uf_codigo = self._get_codigo_uf()
         cnpj = re.sub(r'\D', '', self.empresa.cnpj)  # apenas dígitos
         modelo = "65"
-        serie = f"{self.empresa.serie_nfce:03d}"
+        serie = f"{self.empresa.serie_nfce_atual:03d}"
         numero_formatado = f"{numero:09d}"
         # Código numérico: 8 dígitos derivados do CNPJ+número
         codigo_numerico = f"{abs(hash(cnpj + str(numero))) % 100000000:08d}"
@@ -716,7 +718,7 @@ class NFCeService:
         etree.SubElement(ide, 'cNF').text = c_nf
         etree.SubElement(ide, 'natOp').text = 'VENDA'
         etree.SubElement(ide, 'mod').text = '65'
-        etree.SubElement(ide, 'serie').text = str(empresa.serie_nfce)
+        etree.SubElement(ide, 'serie').text = str(empresa.serie_nfce_atual)
         etree.SubElement(ide, 'nNF').text = str(dados['numero'])
         etree.SubElement(ide, 'dhEmi').text = agora
         etree.SubElement(ide, 'tpNF').text = '1'
@@ -1305,18 +1307,19 @@ class NFCeService:
         body_bytes = soap_body.encode('utf-8')
 
         print(f"[SEFAZ] Enviando NFCe para {url} via http.client (TLS1.2)")
-        conn = _http.HTTPSConnection(host, port=port, context=ssl_ctx, timeout=60)
-        conn.request(
-            'POST', path, body=body_bytes,
-            headers={
-                'Content-Type': 'application/soap+xml; charset=utf-8',
-                'Content-Length': str(len(body_bytes)),
-            }
-        )
-        response = conn.getresponse()
-        resp_text = response.read().decode('utf-8')
-        print(f"[SEFAZ] HTTP {response.status}")
-        conn.close()
+        with limitar('sefaz'):
+            conn = _http.HTTPSConnection(host, port=port, context=ssl_ctx, timeout=60)
+            conn.request(
+                'POST', path, body=body_bytes,
+                headers={
+                    'Content-Type': 'application/soap+xml; charset=utf-8',
+                    'Content-Length': str(len(body_bytes)),
+                }
+            )
+            response = conn.getresponse()
+            resp_text = response.read().decode('utf-8')
+            print(f"[SEFAZ] HTTP {response.status}")
+            conn.close()
         return resp_text
 
 
@@ -1612,18 +1615,19 @@ class NFCeService:
             ssl_ctx = _build_ssl_ctx_evento(cert_path, key_path)
             body_bytes = soap_evento.encode('utf-8')
             print(f"[CANCELAMENTO] Enviando evento para {url_evento}")
-            conn = _http.HTTPSConnection(host, port=port, context=ssl_ctx, timeout=60)
-            conn.request(
-                'POST', path_url, body=body_bytes,
-                headers={
-                    'Content-Type': 'application/soap+xml; charset=utf-8',
-                    'Content-Length': str(len(body_bytes)),
-                }
-            )
-            response = conn.getresponse()
-            resp_text = response.read().decode('utf-8')
-            print(f"[CANCELAMENTO] HTTP {response.status}")
-            conn.close()
+            with limitar('sefaz'):
+                conn = _http.HTTPSConnection(host, port=port, context=ssl_ctx, timeout=60)
+                conn.request(
+                    'POST', path_url, body=body_bytes,
+                    headers={
+                        'Content-Type': 'application/soap+xml; charset=utf-8',
+                        'Content-Length': str(len(body_bytes)),
+                    }
+                )
+                response = conn.getresponse()
+                resp_text = response.read().decode('utf-8')
+                print(f"[CANCELAMENTO] HTTP {response.status}")
+                conn.close()
 
             # Parseia resposta do evento
             resp_root = _etree.fromstring(resp_text.encode('utf-8'))
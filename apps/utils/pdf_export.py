@@ -0,0 +1,97 @@
+"""
+Helpers para gerar PDFs grandes (ReportLab) com memória limitada.
+
+- LazyStory: a story do doc.build() é consumida sob demanda de um gerador,
+  então só os flowables da página atual ficam em memória.
+- chunked_table: divide as linhas de uma tabela em várias Tables menores;
+  uma Table única de milhares de linhas é medida e dividida inteira a cada
+  quebra de página.
+- cached_style: ParagraphStyle reaproveitado entre linhas/relatórios.
+- pdf_response: renderiza num arquivo temporário (em disco acima de
+  PDF_SPOOL_MAX_BYTES) e devolve um FileResponse, que envia em blocos.
+
+O ReportLab só escreve a tabela xref ao final, então o envio começa depois
+do build; o que se evita é manter a story inteira e o PDF pronto em RAM.
+"""
+import tempfile
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import FileResponse
+
+
+class LazyStory(list):
+    """Lista de flowables reabastecida de um iterável conforme o doc.build() consome."""
+
+    def __init__(self, source, prefetch=4):
+        super().__init__()
+        self._source = iter(source)
+        self._prefetch = prefetch
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._prefetch:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def chunked_table(rows, header, col_widths, style, chunk_size=100):
+    """
+    Gera Tables de até `chunk_size` linhas a partir de um iterável de linhas.
+    Cada pedaço repete o cabeçalho (repeatRows=1) e reutiliza o mesmo TableStyle.
+    """
+    from reportlab.platypus import Table
+
+    chunk = [header]
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) > chunk_size:
+            table = Table(chunk, colWidths=col_widths, repeatRows=1)
+            table.setStyle(style)
+            yield table
+            chunk = [header]
+    if len(chunk) > 1:
+        table = Table(chunk, colWidths=col_widths, repeatRows=1)
+        table.setStyle(style)
+        yield table
+
+
+@lru_cache(maxsize=256)
+def cached_style(size=9, bold=False, color='#1D1D1F', align=0, leading=None):
+    """ParagraphStyle compartilhado; `color` em hexadecimal, `align` um TA_* do ReportLab."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+
+    return ParagraphStyle(
+        f'cached-{size}-{int(bold)}-{color}-{align}-{leading}',
+        fontSize=size,
+        fontName='Helvetica-Bold' if bold else 'Helvetica',
+        textColor=colors.HexColor(color),
+        alignment=align,
+        leading=leading or (size * 1.35),
+    )
+
+
+def pdf_response(filename, build):
+    """
+    Chama build(arquivo) para escrever o PDF e devolve um FileResponse em streaming.
+    O arquivo temporário é apagado quando a resposta é fechada.
+    """
+    max_size = getattr(settings, 'PDF_SPOOL_MAX_BYTES', 4 * 1024 * 1024)
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    try:
+        build(spool)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type='application/pdf')
@@ -0,0 +1,37 @@
+"""
+Lápides de exclusão para a sincronização incremental (utils.sync).
+
+Só os modelos com updated_at recebem o receiver: as demais tabelas são
+comparadas linha a linha e não precisam de lápide. Ligar o post_delete por
+modelo (e não globalmente) preserva o fast-delete do Django nos outros.
+
+Nos servidores de loja, o post_migrate prepara a outbox do sync
+bidirecional (utils.sync_envio) antes de o sistema voltar a vender.
+"""
+from django.db.models.signals import post_delete
+
+from .models import SyncTombstone
+
+
+def registrar_tombstone(sender, instance, using, **kwargs):
+    SyncTombstone.objects.using(using).create(
+        tabela=sender._meta.db_table,
+        object_id=instance.pk,
+    )
+
+
+def preparar_no(sender, using, **kwargs):
+    from .sync_envio import preparar_no as preparar
+
+    preparar(using)
+
+
+def conectar():
+    from .sync import tabelas_incrementais
+
+    for model in tabelas_incrementais():
+        post_delete.connect(
+            registrar_tombstone,
+            sender=model,
+            dispatch_uid=f'sync_tombstone_{model._meta.label_lower}',
+        )
@@ -0,0 +1,442 @@
+"""
+Sincronização incremental Railway → servidor local.
+
+Substitui o pg_dump completo do sync_local.py. Cada execução abre uma
+transação REPEATABLE READ somente leitura no Railway (alias de banco
+'remote', ver SYNC_REMOTE_DATABASE_URL) e aplica tudo numa única transação
+no banco local:
+
+- Tabelas com updated_at: copia só as linhas com (updated_at, id) acima da
+  marca d'água da tabela, em lotes, via COPY para uma tabela temporária e
+  INSERT ... ON CONFLICT. Exclusões chegam pelas lápides (SyncTombstone).
+- Demais tabelas (sem updated_at): compara o checksum da tabela; se mudou,
+  compara o md5 de cada linha e copia/apaga só as diferentes.
+
+Nos servidores de loja (SYNC_NODE_ID > 0) a rodada começa enviando as
+vendas feitas localmente (utils.sync_envio); linhas com alteração local
+ainda não enviada nunca são sobrescritas pelo recebimento.
+
+Só funciona com PostgreSQL nos dois lados, com psycopg2 ou psycopg 3 (o
+driver que o Django escolher; ver _copiar_saida/_copiar_entrada).
+"""
+import io
+import logging
+import socket
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REMOTE = 'remote'
+
+# Tabelas que não saem do Railway: dados de cada servidor, caches e sessões
+TABELAS_IGNORADAS = {
+    'django_session',
+    'django_admin_log',
+    'utils_synclog',
+    'utils_synctombstone',
+    'utils_syncwatermark',
+    'utils_syncoutbox',
+    'utils_syncconflito',
+    'utils_requestmetric',
+    'utils_respostaidempotente',
+    'reports_exportjob',
+    'banks_banksaldodiario',
+    'products_estoquerevisao',
+    'pinpads_tokenprovedor',
+}
+
+TOMBSTONES = 'utils_synctombstone'
+
+
+def _modelos():
+    ignoradas = TABELAS_IGNORADAS | set(getattr(settings, 'SYNC_EXTRA_IGNORED_TABLES', ()))
+    for model in apps.get_models(include_auto_created=True):
+        opts = model._meta
+        if opts.proxy or not opts.managed or opts.db_table in ignoradas:
+            continue
+        yield model
+
+
+def _incremental(model):
+    return any(f.column == 'updated_at' for f in model._meta.concrete_fields)
+
+
+def tabelas_incrementais():
+    return [m for m in _modelos() if _incremental(m)]
+
+
+def _q(nome):
+    return '"%s"' % nome.replace('"', '""')
+
+
+def _colunas(model):
+    return [f.column for f in model._meta.concrete_fields]
+
+
+# Tamanho dos blocos enviados ao COPY ... FROM STDIN no psycopg 3
+COPY_BLOCO = 1024 * 1024
+
+
+def _copiar_saida(cursor, sql, params, buffer):
+    """
+    COPY (`sql` com `params`) TO STDOUT para `buffer`. O COPY não aceita
+    parâmetros: a consulta é montada no cliente (mogrify do driver em uso).
+    """
+    if is_psycopg3:
+        from psycopg import ClientCursor
+
+        with ClientCursor(cursor.connection) as cliente:
+            select = cliente.mogrify(sql, params)
+        with cursor.copy(f'COPY ({select}) TO STDOUT') as copia:
+            for bloco in copia:
+                buffer.write(bloco)
+    else:
+        select = cursor.mogrify(sql, params).decode()
+        cursor.copy_expert(f'COPY ({select}) TO STDOUT', buffer)
+
+
+def _copiar_entrada(cursor, tabela, lista, buffer):
+    """COPY `tabela` (`lista`) FROM STDIN a partir de `buffer`."""
+    sql = f'COPY {tabela} ({lista}) FROM STDIN'
+    if is_psycopg3:
+        with cursor.copy(sql) as copia:
+            while bloco := buffer.read(COPY_BLOCO):
+                copia.write(bloco)
+    else:
+        cursor.copy_expert(sql, buffer)
+
+
+class _Tabela:
+    """Contadores de uma tabela na execução atual."""
+
+    def __init__(self):
+        self.baixados = 0
+        self.criados = 0
+        self.atualizados = 0
+        self.apagados = 0
+        self.enviados = 0
+
+    @property
+    def mudou(self):
+        """Houve alteração no banco local."""
+        return self.criados or self.atualizados or self.apagados
+
+
+def _copiar(remoto, local, model, where, params, stats):
+    """COPY das linhas remotas que atendem `where` e upsert no banco local."""
+    from .sync_envio import atribuicao, guarda_outbox
+
+    tabela = model._meta.db_table
+    pk = model._meta.pk.column
+    colunas = _colunas(model)
+    lista = ', '.join(_q(c) for c in colunas)
+
+    buffer = io.BytesIO()
+    _copiar_saida(remoto, f'SELECT {lista} FROM {_q(tabela)} WHERE {where}', params, buffer)
+    if not buffer.tell():
+        return
+    # No formato texto do COPY quebras de linha dentro dos valores vêm escapadas
+    stats.baixados += buffer.getvalue().count(b'\n')
+    buffer.seek(0)
+
+    tmp = _q(f'_sync_{tabela}')
+    local.execute(f'CREATE TEMP TABLE IF NOT EXISTS {tmp} (LIKE {_q(tabela)}) ON COMMIT DROP')
+    local.execute(f'TRUNCATE {tmp}')
+    _copiar_entrada(local, tmp, lista, buffer)
+
+    atualizaveis = [c for c in colunas if c != pk]
+    if atualizaveis:
+        set_ = ', '.join(atribuicao(model, c) for c in atualizaveis)
+        atual = ', '.join(f't.{_q(c)}' for c in atualizaveis)
+        novo = ', '.join(f'EXCLUDED.{_q(c)}' for c in atualizaveis)
+        conflito = (
+            f'DO UPDATE SET {set_} WHERE ROW({atual}) IS DISTINCT FROM ROW({novo}){guarda_outbox(model)}'
+        )
+    else:
+        conflito = 'DO NOTHING'
+    local.execute(
+        f'INSERT INTO {_q(tabela)} AS t ({lista}) SELECT {lista} FROM {tmp} '
+        f'ON CONFLICT ({_q(pk)}) {conflito} RETURNING (xmax = 0)'
+    )
+    inseridos = [r[0] for r in local.fetchall()]
+    stats.criados += sum(1 for r in inseridos if r)
+    stats.atualizados += sum(1 for r in inseridos if not r)
+
+
+def _inicio_janela(wm):
+    """
+    Limite inferior de leitura. Transações ainda abertas no snapshot anterior
+    podem ter gravado updated_at menor que a marca; relê os últimos
+    SYNC_OVERLAP_SECONDS antes daquele snapshot (e só eles).
+    """
+    if not wm.updated_at:
+        return None
+    folga = timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 10))
+    if wm.lido_em:
+        return min(wm.updated_at, wm.lido_em - folga)
+    return wm.updated_at - folga
+
+
+def _sync_incremental(remoto, local, model, stats, snapshot):
+    from .models import SyncWatermark
+
+    tabela = model._meta.db_table
+    pk = _q(model._meta.pk.column)
+    lote = getattr(settings, 'SYNC_BATCH_SIZE', 5000)
+    wm, _ = SyncWatermark.objects.get_or_create(tabela=tabela)
+
+    inicio = _inicio_janela(wm)
+    if inicio:
+        inicio = (inicio, 0)
+
+    while True:
+        if inicio:
+            cond, params = f'(updated_at, {pk}) > (%s, %s)', list(inicio)
+        else:
+            cond, params = 'TRUE', []
+        remoto.execute(
+            f'SELECT updated_at, {pk} FROM {_q(tabela)} WHERE {cond} '
+            f'ORDER BY updated_at, {pk} OFFSET %s LIMIT 1',
+            params + [lote - 1],
+        )
+        fim = remoto.fetchone()
+        ultimo_lote = fim is None
+        if ultimo_lote:
+            remoto.execute(
+                f'SELECT updated_at, {pk} FROM {_q(tabela)} WHERE {cond} '
+                f'ORDER BY updated_at DESC, {pk} DESC LIMIT 1',
+                params,
+            )
+            fim = remoto.fetchone()
+            if fim is None:
+                break
+
+        _copiar(remoto, local, model, f'{cond} AND (updated_at, {pk}) <= (%s, %s)', params + list(fim), stats)
+        if not wm.updated_at or tuple(fim) > (wm.updated_at, wm.ultimo_id):
+            wm.updated_at, wm.ultimo_id = fim
+        if ultimo_lote:
+            break
+        inicio = fim
+
+    wm.lido_em = snapshot
+    wm.save()
+
+
+def _hash_linhas(model):
+    colunas = ', '.join(_q(c) for c in _colunas(model))
+    return f'md5(ROW({colunas})::text)'
+
+
+def _sync_por_checksum(remoto, local, model, stats):
+    from .models import SyncWatermark
+    from .sync_envio import guarda_outbox
+
+    tabela = model._meta.db_table
+    pk = _q(model._meta.pk.column)
+    h = _hash_linhas(model)
+    wm, _ = SyncWatermark.objects.get_or_create(tabela=tabela)
+
+    remoto.execute(f"SELECT md5(string_agg({h}, '' ORDER BY {pk})) FROM {_q(tabela)}")
+    checksum = remoto.fetchone()[0] or ''
+    if checksum == wm.checksum:
+        return
+
+    remoto.execute(f'SELECT {pk}, {h} FROM {_q(tabela)}')
+    remotas = dict(remoto.fetchall())
+    local.execute(f'SELECT {pk}, {h} FROM {_q(tabela)}')
+    locais = dict(local.fetchall())
+
+    diferentes = [i for i, v in remotas.items() if locais.get(i) != v]
+    sobrando = [i for i in locais if i not in remotas]
+
+    lote = getattr(settings, 'SYNC_BATCH_SIZE', 5000)
+    for n in range(0, len(diferentes), lote):
+        _copiar(remoto, local, model, f'{pk} = ANY(%s)', [diferentes[n:n + lote]], stats)
+    if sobrando:
+        local.execute(f'DELETE FROM {_q(tabela)} AS t WHERE {pk} = ANY(%s){guarda_outbox(model)}', [sobrando])
+        stats.apagados += local.rowcount
+
+    wm.checksum = checksum
+    wm.save(update_fields=['checksum', 'atualizado_em'])
+
+
+def _aplicar_tombstones(remoto, local, incrementais, por_tabela, snapshot):
+    from .models import SyncWatermark
+    from .sync_envio import guarda_outbox
+
+    wm, _ = SyncWatermark.objects.get_or_create(tabela=TOMBSTONES)
+    # Mesma janela de releitura das tabelas: ids de lápides gravadas em
+    # transações que terminaram fora de ordem. Apagar de novo não tem efeito.
+    janela = _inicio_janela(wm)
+    if janela:
+        remoto.execute(
+            f'SELECT id, tabela, object_id, deleted_at FROM {_q(TOMBSTONES)} '
+            f'WHERE id > %s OR deleted_at > %s ORDER BY id',
+            [wm.ultimo_id, janela],
+        )
+    else:
+        remoto.execute(f'SELECT id, tabela, object_id, deleted_at FROM {_q(TOMBSTONES)} ORDER BY id')
+    linhas = remoto.fetchall()
+    wm.lido_em = snapshot
+    if not linhas:
+        wm.save(update_fields=['lido_em', 'atualizado_em'])
+        return
+
+    ids = {}
+    for _, tabela, object_id, _ in linhas:
+        ids.setdefault(tabela, []).append(object_id)
+    for tabela, object_ids in ids.items():
+        model = incrementais.get(tabela)
+        if model is None:
+            continue
+        local.execute(
+            f'DELETE FROM {_q(tabela)} AS t WHERE {_q(model._meta.pk.column)} = ANY(%s){guarda_outbox(model)}',
+            [object_ids],
+        )
+        por_tabela.setdefault(tabela, _Tabela()).apagados += local.rowcount
+
+    wm.ultimo_id = max(wm.ultimo_id, linhas[-1][0])
+    wm.updated_at = max(l[3] for l in linhas)
+    wm.save(update_fields=['ultimo_id', 'updated_at', 'lido_em', 'atualizado_em'])
+
+
+def _ajustar_sequencia(local, model):
+    from .sync_envio import ajustar_sequencia_no, offline
+
+    if offline(model):
+        ajustar_sequencia_no(local, model)
+        return
+    tabela = model._meta.db_table
+    pk = model._meta.pk.column
+    local.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, %s), "
+        f"GREATEST((SELECT MAX({_q(pk)}) FROM {_q(tabela)}), 1))",
+        [tabela, pk],
+    )
+
+
+def sincronizar(triggered_by='automatic'):
+    """
+    Executa uma rodada de sincronização. Rodadas com alteração ou erro ficam
+    no SyncLog (local e Railway); rodadas vazias não são registradas.
+    Retorna o SyncLog (não salvo quando não houve alteração).
+    """
+    from .models import SyncLog, SyncWatermark
+    from .sync_envio import enviar, no_atual, preparar_no
+
+    inicio = time.monotonic()
+    iniciado_em = timezone.now()
+    bilateral = bool(no_atual())
+    log = SyncLog(direction='bilateral' if bilateral else 'railway_to_local', triggered_by=triggered_by)
+    try:
+        log.local_server_ip = socket.gethostbyname(socket.gethostname())
+    except Exception:
+        pass
+
+    modelos = list(_modelos())
+    incrementais = {m._meta.db_table: m for m in modelos if _incremental(m)}
+    por_tabela = {}
+
+    try:
+        log.sync_from_datetime = (
+            SyncWatermark.objects.filter(tabela__in=incrementais, updated_at__isnull=False)
+            .order_by('updated_at').values_list('updated_at', flat=True).first()
+        )
+        if bilateral:
+            preparar_no()
+            enviar(por_tabela)
+
+        with transaction.atomic(using=REMOTE), transaction.atomic():
+            remoto = connections[REMOTE].cursor()
+            remoto.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+            remoto.execute('SELECT now()')
+            snapshot = remoto.fetchone()[0]
+            local = connections['default'].cursor()
+            local.execute('SET CONSTRAINTS ALL DEFERRED')
+            # O que chega do Railway não volta para a outbox
+            local.execute("SET LOCAL utils.sync_aplicando = 'on'")
+
+            for model in modelos:
+                stats = por_tabela.setdefault(model._meta.db_table, _Tabela())
+                if model._meta.db_table in incrementais:
+                    _sync_incremental(remoto, local, model, stats, snapshot)
+                else:
+                    _sync_por_checksum(remoto, local, model, stats)
+            _aplicar_tombstones(remoto, local, incrementais, por_tabela, snapshot)
+
+            for model in modelos:
+                if por_tabela[model._meta.db_table].mudou:
+                    _ajustar_sequencia(local, model)
+
+        if any(por_tabela.get(t, _Tabela()).mudou for t in (
+            'banks_banktransaction', 'banks_bank', 'financials_caixaadmtransferencia', 'pinpads_bandeirapinpad',
+        )):
+            # Os fechamentos diários são calculados localmente e o sync não dispara signals
+            from banks.saldos import invalidar_saldos
+            invalidar_saldos()
+
+        if any(por_tabela.get(t, _Tabela()).mudou for t in (
+            'products_stockentry', 'products_stockexit', 'orders_pedido', 'orders_pedidoitem',
+        )):
+            # Sem signals no sync: a revisão local de estoque invalida o mapa de disponibilidade
+            from products.estoque import nova_revisao
+            nova_revisao()
+
+        log.status = 'success'
+    except Exception as e:
+        logger.exception("[sync] falha na sincronização incremental")
+        log.status = 'error'
+        log.error_message = str(e)[:2000]
+        # A transação do recebimento foi desfeita; lotes já enviados continuam valendo
+        por_tabela = {t: s for t, s in por_tabela.items() if s.enviados}
+        for s in por_tabela.values():
+            s.baixados = s.criados = s.atualizados = s.apagados = 0
+
+    alteradas = {t: s for t, s in por_tabela.items() if s.mudou or s.enviados}
+    log.records_downloaded = sum(s.baixados for s in por_tabela.values())
+    log.records_created = sum(s.criados for s in por_tabela.values())
+    log.records_updated = sum(s.atualizados for s in por_tabela.values())
+    log.records_deleted = sum(s.apagados for s in por_tabela.values())
+    log.records_uploaded = sum(s.enviados for s in por_tabela.values())
+    log.tables_synced = ', '.join(
+        f'{t} (+{s.criados} ~{s.atualizados} -{s.apagados}'
+        + (f' ↑{s.enviados}' if s.enviados else '') + ')'
+        for t, s in sorted(alteradas.items())
+    ) or 'sem alterações'
+    log.finished_at = timezone.now()
+    log.duration_seconds = round(time.monotonic() - inicio, 3)
+    if log.status == 'success' and not alteradas:
+        return log
+
+    # Histórico nos dois bancos, como o sync_local.py fazia
+    for alias in (REMOTE, 'default'):
+        try:
+            log.pk = None
+            log.save(using=alias)
+            SyncLog.objects.using(alias).filter(pk=log.pk).update(started_at=iniciado_em)
+        except Exception as e:
+            logger.warning("[sync] não foi possível gravar o SyncLog em %s: %s", alias, e)
+    log.started_at = iniciado_em
+    return log
+
+
+def limpar_tombstones():
+    """
+    Apaga as lápides mais antigas que SYNC_TOMBSTONE_RETENTION_DAYS no Railway
+    e no banco local (onde as exclusões feitas na loja também geram lápides).
+    """
+    from .models import SyncTombstone
+
+    dias = getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30)
+    limite = timezone.now() - timedelta(days=dias)
+    return sum(
+        SyncTombstone.objects.using(alias).filter(deleted_at__lt=limite).delete()[0]
+        for alias in (REMOTE, 'default')
+    )
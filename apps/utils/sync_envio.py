@@ -0,0 +1,422 @@
+"""
+Sincronização bidirecional: envio ao Railway das vendas feitas na loja.
+
+Complementa utils.sync (Railway → loja) nos servidores com SYNC_NODE_ID > 0,
+para que a loja continue vendendo durante uma queda de internet e os dois
+lados convirjam quando ela volta:
+
+- Ids globais: nas tabelas de venda (MODELOS_OFFLINE) cada nó grava ids numa
+  faixa própria, acima dos ids do Railway (faixa_ids). Comandas, pedidos,
+  checkouts e sangrias criados offline nunca colidem com os de outro lado e
+  as FKs viajam sem tradução.
+- Outbox: gatilhos nessas tabelas registram em SyncOutbox cada linha
+  alterada ou excluída localmente. O sync desliga os gatilhos na própria
+  sessão (utils.sync_aplicando) para não devolver o que recebeu.
+- Envio em lotes de SYNC_BATCH_SIZE pendências, sempre antes do
+  recebimento; cada lote é uma transação nos dois bancos.
+- Conflitos (linha alterada dos dois lados) têm resultado determinístico:
+  vence o estado mais adiantado em PRECEDENCIA (fechada vence aberta,
+  cancelado vence entregue...); no mesmo estado, o updated_at mais recente;
+  no empate, o Railway. Exclusões valem se o Railway não alterou a linha
+  depois delas. Quando o Railway vence, a versão dele volta para a loja.
+  Contadores (CONTADORES) não entram no desempate: ficam com o maior valor.
+- Restrições únicas do Railway não são adiáveis: cada tabela do lote vai num
+  savepoint e, se uma linha viola alguma, o envio daquela tabela é refeito
+  linha a linha. A linha recusada vai para SyncConflito e o resto segue.
+
+A NFC-e emitida offline usa a série do nó (companys.NumeracaoNFCe).
+"""
+import copy
+import io
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connections, transaction
+
+from .sync import (
+    REMOTE, _colunas, _copiar, _copiar_entrada, _copiar_saida, _incremental, _q, _Tabela,
+)
+
+logger = logging.getLogger('utils.sync')
+
+# Tabelas escritas no balcão, na ordem pai → filho
+MODELOS_OFFLINE = [
+    'companys.NumeracaoNFCe',
+    'orders.Comanda',
+    'orders.Pedido',
+    'orders.PedidoItem',
+    'orders.ComandaPartialPayment',
+    'orders.ItemRemovidoLog',
+    'checkouts.SessaoCaixa',
+    'checkouts.Checkout',
+    'checkouts.CheckoutPayment',
+    'financials.Sangria',
+]
+
+# O nó N usa ids em [ID_BASE + (N-1) * ID_FAIXA, ID_BASE + N * ID_FAIXA).
+# O Railway fica abaixo de ID_BASE; 11 nós cabem num integer do PostgreSQL.
+ID_BASE = 1_000_000_000
+ID_FAIXA = 100_000_000
+MAX_NOS = 11
+
+# Ordem de estados por tabela: o lado com o estado mais adiantado vence.
+# Sem mapa de valores, a própria coluna é comparada (contador só avança).
+PRECEDENCIA = {
+    'orders.Comanda': ('status', {
+        'livre': 0, 'em_uso': 1, 'aguardando_caixa': 2,
+        'fechada': 3, 'cortesia': 3, 'migrada': 3,
+        'cancelada': 4,
+    }),
+    'orders.Pedido': ('status', {
+        'aguardando': 0, 'preparando': 1, 'pronta': 2, 'entregue': 3, 'cancelado': 4,
+    }),
+    'checkouts.Checkout': ('status', {
+        'pendente': 0, 'aprovado': 1, 'cancelado': 2, 'estornado': 3,
+    }),
+    'checkouts.SessaoCaixa': ('status', {'aberta': 0, 'fechada': 1}),
+    'companys.NumeracaoNFCe': ('proximo_numero', None),
+}
+
+# Contadores que só avançam: nos dois sentidos ficam com o maior valor,
+# qualquer que seja o lado vencedor da linha (senão um pedido_seq se repete)
+CONTADORES = {
+    'orders.Comanda': ('ultimo_pedido_seq',),
+}
+
+OUTBOX = 'utils_syncoutbox'
+GATILHO = 'utils_sync_outbox'
+
+FUNCAO_GATILHO = """
+CREATE OR REPLACE FUNCTION utils_sync_outbox() RETURNS trigger AS $$
+DECLARE
+    linha jsonb;
+BEGIN
+    IF current_setting('utils.sync_aplicando', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        linha := to_jsonb(OLD);
+    ELSE
+        linha := to_jsonb(NEW);
+    END IF;
+    INSERT INTO utils_syncoutbox (tabela, object_id, operacao, alterado_em)
+    VALUES (TG_TABLE_NAME, (linha ->> TG_ARGV[0])::bigint,
+            CASE TG_OP WHEN 'DELETE' THEN 'delete' ELSE 'upsert' END, clock_timestamp())
+    ON CONFLICT (tabela, object_id) DO UPDATE
+        SET operacao = EXCLUDED.operacao, alterado_em = EXCLUDED.alterado_em;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def no_atual():
+    return getattr(settings, 'SYNC_NODE_ID', 0)
+
+
+def faixa_ids(no):
+    """(início, fim) dos ids que o nó pode gerar nas tabelas de venda."""
+    if not 1 <= no <= MAX_NOS:
+        raise ImproperlyConfigured(f"SYNC_NODE_ID deve estar entre 1 e {MAX_NOS} (recebido {no}).")
+    inicio = ID_BASE + (no - 1) * ID_FAIXA
+    return inicio, inicio + ID_FAIXA
+
+
+def modelos_offline():
+    return [apps.get_model(label) for label in MODELOS_OFFLINE]
+
+
+def offline(model):
+    return bool(no_atual()) and model._meta.label in MODELOS_OFFLINE
+
+
+def guarda_outbox(model, alias='t'):
+    """
+    Condição SQL que preserva linhas com alteração local ainda não enviada:
+    o recebimento não as sobrescreve; o conflito é resolvido no envio.
+    """
+    if not offline(model):
+        return ''
+    tabela = model._meta.db_table.replace("'", "''")
+    return (
+        f" AND NOT EXISTS (SELECT 1 FROM {OUTBOX} o WHERE o.tabela = '{tabela}' "
+        f"AND o.object_id = {alias}.{_q(model._meta.pk.column)})"
+    )
+
+
+def ajustar_sequencia_no(cursor, model):
+    """
+    Mantém a sequência da tabela na faixa de ids do nó, sem nunca voltar:
+    um id já usado pode ter lápide no Railway mesmo que a linha não exista mais.
+    """
+    inicio, fim = faixa_ids(no_atual())
+    tabela = model._meta.db_table
+    pk = _q(model._meta.pk.column)
+    cursor.execute(
+        "SELECT pg_get_serial_sequence(%s, %s)",
+        [tabela, model._meta.pk.column],
+    )
+    sequencia = cursor.fetchone()[0]
+    cursor.execute(
+        f"SELECT setval(%s, GREATEST("
+        f"(SELECT MAX({pk}) FROM {_q(tabela)} WHERE {pk} >= %s AND {pk} < %s), "
+        f"(SELECT v FROM pg_sequence_last_value(%s::regclass) v WHERE v >= %s AND v < %s), "
+        f"%s))",
+        [sequencia, inicio, fim, sequencia, inicio, fim, inicio - 1],
+    )
+
+
+def preparar_no(using='default'):
+    """
+    Instala os gatilhos da outbox que faltarem e posiciona as sequências das
+    tabelas de venda na faixa do nó. Idempotente; roda após o migrate e antes
+    de cada sincronização. Retorna False fora de um nó PostgreSQL.
+    """
+    conexao = connections[using]
+    if not no_atual() or conexao.vendor != 'postgresql':
+        return False
+
+    existentes = set(conexao.introspection.table_names())
+    if OUTBOX not in existentes:
+        return False  # migrate parcial
+    modelos = [m for m in modelos_offline() if m._meta.db_table in existentes]
+    with transaction.atomic(using=using), conexao.cursor() as cursor:
+        cursor.execute(FUNCAO_GATILHO)
+        cursor.execute(
+            'SELECT c.relname FROM pg_trigger tg JOIN pg_class c ON c.oid = tg.tgrelid '
+            'WHERE tg.tgname = %s',
+            [GATILHO],
+        )
+        instalados = {r[0] for r in cursor.fetchall()}
+        for model in modelos:
+            tabela = model._meta.db_table
+            if tabela not in instalados:
+                cursor.execute(
+                    f'CREATE TRIGGER {GATILHO} AFTER INSERT OR UPDATE OR DELETE ON {_q(tabela)} '
+                    f"FOR EACH ROW EXECUTE FUNCTION {GATILHO}('{model._meta.pk.column}')"
+                )
+            ajustar_sequencia_no(cursor, model)
+    return True
+
+
+def atribuicao(model, coluna):
+    """SET de uma coluna no upsert (ON CONFLICT): contadores ficam com o maior valor."""
+    c = _q(coluna)
+    if coluna in CONTADORES.get(model._meta.label, ()):
+        return f'{c} = GREATEST(t.{c}, EXCLUDED.{c})'
+    return f'{c} = EXCLUDED.{c}'
+
+
+def _precedencia(model, alias):
+    regra = PRECEDENCIA.get(model._meta.label)
+    if not regra:
+        return None
+    coluna, ordem = regra
+    coluna = f'{alias}.{_q(coluna)}'
+    if ordem is None:
+        return coluna
+    casos = ' '.join(f"WHEN '{valor}' THEN {n}" for valor, n in ordem.items())
+    return f'(CASE {coluna} {casos} ELSE -1 END)'
+
+
+def _loja_vence(model):
+    """Condição do ON CONFLICT para a versão da loja (EXCLUDED) substituir a do Railway (t)."""
+    loja, railway = _precedencia(model, 'EXCLUDED'), _precedencia(model, 't')
+    if _incremental(model):
+        recente = 'EXCLUDED.updated_at > t.updated_at'
+        if loja:
+            return f'({loja} > {railway} OR ({loja} = {railway} AND {recente}))'
+        return recente
+    # Sem updated_at só o estado decide; empatado, a alteração da loja é a última conhecida
+    return f'{loja} >= {railway}' if loja else 'TRUE'
+
+
+def _enviar_alteracoes(remoto, local, model, ids, stats):
+    tabela = model._meta.db_table
+    pk = _q(model._meta.pk.column)
+    colunas = _colunas(model)
+    lista = ', '.join(_q(c) for c in colunas)
+
+    buffer = io.BytesIO()
+    _copiar_saida(local, f'SELECT {lista} FROM {_q(tabela)} WHERE {pk} = ANY(%s)', [ids], buffer)
+    if not buffer.tell():
+        return  # excluídas depois de entrarem na outbox
+    buffer.seek(0)
+
+    tmp = _q(f'_envio_{tabela}')
+    remoto.execute(f'CREATE TEMP TABLE IF NOT EXISTS {tmp} (LIKE {_q(tabela)}) ON COMMIT DROP')
+    remoto.execute(f'TRUNCATE {tmp}')
+    _copiar_entrada(remoto, tmp, lista, buffer)
+
+    if _incremental(model):
+        # Excluída no Railway depois da última alteração local: a exclusão vence
+        remoto.execute(
+            f'DELETE FROM {tmp} e USING utils_synctombstone s '
+            f'WHERE s.tabela = %s AND s.object_id = e.{pk} AND s.deleted_at >= e.updated_at '
+            f'RETURNING e.{pk}',
+            [tabela],
+        )
+        excluidas = [r[0] for r in remoto.fetchall()]
+        if excluidas:
+            # Pelo ORM para excluir também as filhas locais (cascata do Django)
+            model._base_manager.filter(pk__in=excluidas).delete()
+            stats.apagados += len(excluidas)
+    else:
+        excluidas = []
+
+    atualizaveis = [c for c in colunas if c != model._meta.pk.column]
+    comparaveis = [c for c in atualizaveis if c != 'updated_at']
+    set_ = ', '.join(atribuicao(model, c) for c in atualizaveis)
+    atual = ', '.join(f't.{_q(c)}' for c in comparaveis)
+    novo = ', '.join(f'EXCLUDED.{_q(c)}' for c in comparaveis)
+    remoto.execute(
+        f'INSERT INTO {_q(tabela)} AS t ({lista}) SELECT {lista} FROM {tmp} '
+        f'ON CONFLICT ({pk}) DO UPDATE SET {set_} '
+        f'WHERE {_loja_vence(model)} AND ROW({atual}) IS DISTINCT FROM ROW({novo}) '
+        f'RETURNING {pk}'
+    )
+    aceitas = [r[0] for r in remoto.fetchall()]
+    stats.enviados += len(aceitas)
+    for c in CONTADORES.get(model._meta.label, ()):
+        # Linha recusada (o Railway venceu) ainda leva o contador maior da loja
+        remoto.execute(
+            f'UPDATE {_q(tabela)} AS t SET {_q(c)} = e.{_q(c)}, updated_at = now() FROM {tmp} e '
+            f'WHERE t.{pk} = e.{pk} AND e.{_q(c)} > t.{_q(c)}'
+        )
+    if aceitas and _incremental(model):
+        # Hora do Railway: as outras lojas leem por updated_at e a linha
+        # enviada depois de horas offline não pode ficar abaixo da marca delas
+        remoto.execute(f'UPDATE {_q(tabela)} SET updated_at = now() WHERE {pk} = ANY(%s)', [aceitas])
+
+    recusadas = set(ids) - set(aceitas) - set(excluidas)
+    if recusadas:
+        _copiar(remoto, local, model, f'{pk} = ANY(%s)', [list(recusadas)], stats)
+
+
+def _enviar_exclusoes(remoto, local, model, exclusoes, stats):
+    tabela = model._meta.db_table
+    pk = _q(model._meta.pk.column)
+    ids = [i for i, _ in exclusoes]
+    recente = ' AND t.updated_at <= d.em' if _incremental(model) else ''
+    remoto.execute(
+        f'DELETE FROM {_q(tabela)} AS t USING unnest(%s::bigint[], %s::timestamptz[]) AS d(id, em) '
+        f'WHERE t.{pk} = d.id{recente} RETURNING t.{pk}',
+        [ids, [em for _, em in exclusoes]],
+    )
+    apagadas = [r[0] for r in remoto.fetchall()]
+    stats.enviados += len(apagadas)
+    if apagadas and _incremental(model):
+        # O delete em SQL não passa pelo signal: lápides para as outras lojas
+        remoto.execute(
+            'INSERT INTO utils_synctombstone (tabela, object_id, deleted_at) '
+            'SELECT %s, unnest(%s::bigint[]), now()',
+            [tabela, apagadas],
+        )
+
+    # Alteradas no Railway depois da exclusão local: voltam para a loja
+    mantidas = set(ids) - set(apagadas)
+    if mantidas:
+        _copiar(remoto, local, model, f'{pk} = ANY(%s)', [list(mantidas)], stats)
+
+
+def _enviar_modelo(remoto, local, model, alteracoes, exclusoes, stats):
+    """Envia alterações e exclusões de uma tabela num savepoint dos dois bancos."""
+    parcial = copy.copy(stats)
+    with transaction.atomic(using=REMOTE), transaction.atomic():
+        if alteracoes:
+            _enviar_alteracoes(remoto, local, model, alteracoes, parcial)
+        if exclusoes:
+            _enviar_exclusoes(remoto, local, model, exclusoes, parcial)
+    stats.__dict__.update(parcial.__dict__)  # só conta o que foi confirmado
+
+
+def _registrar_conflito(tabela, object_id, operacao, alterado_em, erro):
+    from .models import SyncConflito
+
+    logger.error("[sync] %s %s#%s recusado pelo Railway: %s", operacao, tabela, object_id, erro)
+    SyncConflito.objects.create(
+        tabela=tabela, object_id=object_id, operacao=operacao,
+        alterado_em=alterado_em, erro=str(erro)[:2000],
+    )
+
+
+def _enviar_linha_a_linha(remoto, local, model, alteracoes, exclusoes, quando, stats):
+    tabela = model._meta.db_table
+    for object_id in alteracoes:
+        try:
+            _enviar_modelo(remoto, local, model, [object_id], [], stats)
+        except IntegrityError as e:
+            _registrar_conflito(tabela, object_id, 'upsert', quando.get(object_id), e)
+    for object_id, alterado_em in exclusoes:
+        try:
+            _enviar_modelo(remoto, local, model, [], [(object_id, alterado_em)], stats)
+        except IntegrityError as e:
+            _registrar_conflito(tabela, object_id, 'delete', alterado_em, e)
+
+
+def enviar(por_tabela):
+    """
+    Envia a outbox ao Railway em lotes. Os contadores vão para `por_tabela`
+    (tabela → _Tabela), o mesmo dicionário do recebimento.
+    """
+    modelos = {m._meta.db_table: m for m in modelos_offline()}
+    lote = getattr(settings, 'SYNC_BATCH_SIZE', 5000)
+    ultimo = 0
+
+    while True:
+        with transaction.atomic(using=REMOTE), transaction.atomic():
+            remoto = connections[REMOTE].cursor()
+            local = connections['default'].cursor()
+            local.execute("SET LOCAL utils.sync_aplicando = 'on'")
+            local.execute('SET CONSTRAINTS ALL DEFERRED')
+            remoto.execute('SET CONSTRAINTS ALL DEFERRED')
+
+            # Retira da outbox só o que foi lido; uma alteração feita durante o
+            # envio grava a pendência de novo e segue no próximo lote
+            local.execute(
+                f'DELETE FROM {OUTBOX} WHERE id IN ('
+                f'SELECT id FROM {OUTBOX} WHERE id > %s ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED'
+                f') RETURNING id, tabela, object_id, operacao, alterado_em',
+                [ultimo, lote],
+            )
+            pendencias = local.fetchall()
+            if not pendencias:
+                break
+            ultimo = max(p[0] for p in pendencias)
+
+            por_modelo = {}
+            for _, tabela, object_id, operacao, alterado_em in pendencias:
+                if tabela not in modelos:
+                    logger.warning("[sync] pendência de tabela fora do envio ignorada: %s", tabela)
+                    continue
+                alteracoes, exclusoes, quando = por_modelo.setdefault(tabela, ([], [], {}))
+                if operacao == 'delete':
+                    exclusoes.append((object_id, alterado_em))
+                else:
+                    alteracoes.append(object_id)
+                    quando[object_id] = alterado_em
+
+            for tabela, model in modelos.items():
+                if tabela not in por_modelo:
+                    continue
+                alteracoes, exclusoes, quando = por_modelo[tabela]
+                stats = por_tabela.setdefault(tabela, _Tabela())
+                try:
+                    _enviar_modelo(remoto, local, model, alteracoes, exclusoes, stats)
+                except IntegrityError as e:
+                    # Uma linha viola restrição do Railway: isola a culpada sem
+                    # devolver o lote inteiro à outbox (travaria todos os envios)
+                    logger.warning("[sync] envio de %s recusado (%s); reenviando linha a linha", tabela, e)
+                    _enviar_linha_a_linha(remoto, local, model, alteracoes, exclusoes, quando, stats)
+
+        if len(pendencias) < lote:
+            break
+
+
+def pendentes():
+    """Quantidade de alterações locais aguardando envio."""
+    from .models import SyncOutbox
+
+    return SyncOutbox.objects.count()
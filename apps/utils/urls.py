@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'utils'
+
+urlpatterns = [
+    path('metricas/', views.RequestMetricsView.as_view(), name='request_metrics'),
+]
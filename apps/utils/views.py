@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.shortcuts import render
+from django.utils import timezone
+from django.views import View
+
+from . import conexoes, metrics
+from .models import RequestMetric
+
+
+class RequestMetricsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Painel de endpoints lentos (p50/p95/p99) e suspeitas de N+1. Somente superuser."""
+    template_name = 'utils/request_metrics.html'
+    raise_exception = True
+
+    def test_func(self):
+        return self.request.user.is_superuser
+
+    def get(self, request):
+        metrics.flush()
+
+        try:
+            horas = max(1, min(int(request.GET.get('horas', 24)), 24 * 7))
+        except ValueError:
+            horas = 24
+        desde = timezone.now() - timedelta(hours=horas)
+
+        rows = RequestMetric.objects.filter(created_at__gte=desde).values_list(
+            'url_name', 'duration_ms', 'db_queries', 'db_ms', 'template_ms', 'duplicate_queries',
+        )
+        summary = metrics.summarize(rows.iterator())
+
+        return render(request, self.template_name, {
+            'summary': summary,
+            'suspeitas': [s for s in summary if s['n_plus_one']],
+            'horas': horas,
+            'total_amostras': sum(s['count'] for s in summary),
+            'conexoes': conexoes.diagnostico(),
+            'uptime_worker_min': conexoes.uptime_worker() / 60,
+        })
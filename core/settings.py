@@ -2,7 +2,7 @@ import os
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
-from decouple import config
+from decouple import Csv, config
 
 # Carrega as variáveis de ambiente
 load_dotenv()
@@ -82,10 +82,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'utils.middleware.RequestMetricsMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
 
+# Sem 'loaders' explícito o Django usa o cached.Loader (templates compilados
+# uma vez por processo); com DEBUG o autoreload o limpa a cada alteração.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -108,6 +111,27 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Conexões com o Postgres (utils.conexoes mostra o estado no painel de métricas).
+# Cada worker mantém a conexão aberta por DB_CONN_MAX_AGE segundos (0 = uma por
+# requisição, None = sem limite), testando-a antes de reutilizar se
+# DB_CONN_HEALTH_CHECKS. DB_POOL liga o pool do psycopg 3, se instalado.
+# Instalado, o psycopg 3 substitui o psycopg2 em todas as conexões do Django;
+# o COPY da sincronização (utils.sync._copiar_saida/_copiar_entrada) funciona
+# com os dois drivers.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=lambda v: None if str(v).lower() == 'none' else int(v))
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+DB_CONNECT_TIMEOUT = config('DB_CONNECT_TIMEOUT', default=10, cast=int)
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=4, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=int)
+try:
+    import psycopg  # noqa: F401
+    import psycopg_pool  # noqa: F401
+    DB_POOL_DISPONIVEL = True
+except ImportError:
+    DB_POOL_DISPONIVEL = False
+
 # Database
 if DEBUG:
     DATABASES = {
@@ -125,8 +149,45 @@ else:
             'PASSWORD': config('PGPASSWORD'),
             'HOST': config('PGHOST'),
             'PORT': config('PGPORT'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            'OPTIONS': {'connect_timeout': DB_CONNECT_TIMEOUT},
         }
     }
+    # Pool do psycopg 3 (psycopg[pool]): substitui as conexões persistentes
+    if DB_POOL and DB_POOL_DISPONIVEL:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+
+
+# Sync incremental (utils.sync): só no servidor local, aponta para o Postgres do Railway
+SYNC_REMOTE_DATABASE_URL = config('SYNC_REMOTE_DATABASE_URL', default='')
+if SYNC_REMOTE_DATABASE_URL:
+    import dj_database_url
+    DATABASES['remote'] = dj_database_url.parse(SYNC_REMOTE_DATABASE_URL, conn_max_age=0)
+    DATABASES['remote'].setdefault('OPTIONS', {})['connect_timeout'] = 10
+
+SYNC_BATCH_SIZE = config('SYNC_BATCH_SIZE', default=5000, cast=int)
+SYNC_OVERLAP_SECONDS = config('SYNC_OVERLAP_SECONDS', default=10, cast=int)
+SYNC_INTERVAL_SECONDS = config('SYNC_INTERVAL_SECONDS', default=30, cast=int)
+SYNC_TOMBSTONE_RETENTION_DAYS = config('SYNC_TOMBSTONE_RETENTION_DAYS', default=30, cast=int)
+
+# Sync bidirecional (utils.sync_envio): número do servidor da loja (1 a 11).
+# 0 = só recebe do Railway. Cada nó grava ids numa faixa própria e emite NFC-e
+# numa série própria (SYNC_NFCE_SERIE; 0 = série da empresa + SYNC_NODE_ID).
+# Sem padrão no OFFLINE_MODE: duas lojas com o mesmo nó gerariam ids e números
+# de NFC-e repetidos, então o servidor da loja não sobe sem ele.
+SYNC_NODE_ID = config('SYNC_NODE_ID', default=0, cast=int)
+if OFFLINE_MODE and not SYNC_NODE_ID:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured(
+        'OFFLINE_MODE=True exige SYNC_NODE_ID (1 a 11) no .env, único para cada servidor de loja.'
+    )
+SYNC_NFCE_SERIE = config('SYNC_NFCE_SERIE', default=0, cast=int)
 
 
 # Password validation
@@ -174,6 +235,40 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 IMAGE_UPLOAD_MAX_MB = config('IMAGE_UPLOAD_MAX_MB', default=8, cast=int)
 
+# Variantes responsivas das imagens (utils.image_optimizer): larguras máximas
+# em px e formatos extras (o formato original é sempre gerado). "avif" só vale
+# se o Pillow tiver suporte.
+IMAGE_VARIANT_WIDTHS = config('IMAGE_VARIANT_WIDTHS', default='200,400,800,1600', cast=Csv(int))
+IMAGE_VARIANT_FORMATS = config('IMAGE_VARIANT_FORMATS', default='webp', cast=Csv())
+# Processa as imagens num pool de threads do worker após o commit do upload
+IMAGE_PIPELINE_ASYNC = config('IMAGE_PIPELINE_ASYNC', default=True, cast=bool)
+IMAGE_PIPELINE_WORKERS = config('IMAGE_PIPELINE_WORKERS', default=2, cast=int)
+
+# Estáticos pré-carregados pelo service worker (/sw.js) dos PWAs do kiosk e da
+# cozinha — caminhos relativos ao STATIC_URL, resolvidos com o hash do manifest.
+SW_PRECACHE = [
+    'css/dist/styles.css',
+    'js/kiosk/cardapio.js',
+    'js/orders/cozinha_painel.js',
+    'img/logo/logo-coxinhaspremiumcafe.png',
+    'img/logo/logocompleto-coxinhaspremiumcafe.png',
+    'manifest_cozinha.json',
+]
+
+# Bundles das telas do PDV, kiosk e cozinha e o orçamento de cada um (KB após
+# Brotli). Em produção o collectstatic grava nomes com hash + .gz/.br e o
+# WhiteNoise os serve com Cache-Control immutable; `manage.py tamanho_bundles`
+# mede o resultado e compara com a referência versionada.
+STATIC_BUNDLES = {
+    'css/dist/styles.css': 12,
+    'js/kiosk/cardapio.js': 8,
+    'js/orders/cozinha_painel.js': 5,
+    'js/home/dashboard.js': 6,
+    'js/home/home.js': 2,
+    'js/utils.js': 2,
+}
+STATIC_BUNDLES_REFERENCIA = BASE_DIR / 'static-bundles.json'
+
 # Configurações do Tailwind
 TAILWIND_APP_NAME = 'theme'
 
@@ -233,6 +328,56 @@ LOGIN_REDIRECT_URL = 'accounts:dashboard'
 LOGOUT_REDIRECT_URL = 'accounts:login'
 
 
+#====================================================
+# CACHES POR PROCESSO (config.cache, banks.acessos)
+#====================================================
+# Fragmentos de template ({% cache ... using="fragmentos" %}): cards das
+# comandas e grade de produtos do PDV. A chave já carrega a revisão do que o
+# fragmento mostra, então o TIMEOUT só limita o tempo de vida de entradas órfãs.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'fragmentos': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragmentos',
+        'TIMEOUT': 600,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+
+# Intervalo máximo (s) até um worker perceber a alteração de configuração feita em outro
+CONFIG_CACHE_SECONDS = config('CONFIG_CACHE_SECONDS', default=5, cast=int)
+
+# Validade (s) do cache de UserBankAccess por usuário em cada worker (banks.acessos)
+BANK_ACCESS_CACHE_SECONDS = config('BANK_ACCESS_CACHE_SECONDS', default=30, cast=int)
+
+#====================================================
+# SERVIÇOS EXTERNOS (utils.limites)
+#====================================================
+# Máximo de chamadas simultâneas por serviço em cada worker; o resto das
+# threads fica livre para o PDV mesmo com um serviço travado.
+UPSTREAM_LIMITE_PADRAO = config('UPSTREAM_LIMITE_PADRAO', default=2, cast=int)
+UPSTREAM_LIMITES = {
+    'sefaz': config('UPSTREAM_LIMITE_SEFAZ', default=2, cast=int),
+    'rede': config('UPSTREAM_LIMITE_REDE', default=2, cast=int),
+    'mercadopago': config('UPSTREAM_LIMITE_MERCADOPAGO', default=2, cast=int),
+    'impressora': config('UPSTREAM_LIMITE_IMPRESSORA', default=2, cast=int),
+}
+# Espera (s) por uma vaga antes de desistir com UpstreamOcupado
+UPSTREAM_FILA_SECONDS = config('UPSTREAM_FILA_SECONDS', default=2, cast=float)
+
+#====================================================
+# WEBHOOK MERCADO PAGO POINT (pinpads.webhooks)
+#====================================================
+# Chave secreta do webhook (painel do Mercado Pago); sem ela o webhook só é aceito com DEBUG
+MERCADOPAGO_WEBHOOK_SECRET = config('MERCADOPAGO_WEBHOOK_SECRET', default='')
+# Tempo máximo (s) que a consulta de status segura a resposta esperando o webhook.
+# Curto de propósito: cada espera ocupa uma das GUNICORN_THREADS (8 por worker
+# no gthread) e a conexão dela com o banco; algumas consultas longas
+# simultâneas já deixariam o PDV sem threads livres.
+PAYMENT_STATUS_LONG_POLL_MAX = config('PAYMENT_STATUS_LONG_POLL_MAX', default=3, cast=int)
+
 #====================================================
 # CONFIGURAÇOES DO PINPAD - REDE ITAÚ
 #====================================================
@@ -241,6 +386,32 @@ REDE_SANDBOX = config('REDE_SANDBOX', default=True, cast=bool)
 REDE_PV = config('REDE_PV', default='')  # Número de filiação
 REDE_INTEGRATION_KEY = config('REDE_INTEGRATION_KEY', default='')  # Chave de integração
 
+#====================================================
+# MÉTRICAS DE REQUISIÇÃO (utils.middleware.RequestMetricsMiddleware)
+#====================================================
+# Fração das requisições amostradas (0 desliga o middleware por completo)
+REQUEST_METRICS_SAMPLE_RATE = config('REQUEST_METRICS_SAMPLE_RATE', default=0.0, cast=float)
+REQUEST_METRICS_BUFFER_SIZE = config('REQUEST_METRICS_BUFFER_SIZE', default=2000, cast=int)
+REQUEST_METRICS_FLUSH_SECONDS = config('REQUEST_METRICS_FLUSH_SECONDS', default=60, cast=int)
+REQUEST_METRICS_RETENTION_DAYS = config('REQUEST_METRICS_RETENTION_DAYS', default=7, cast=int)
+REQUEST_METRICS_N_PLUS_ONE_THRESHOLD = config('REQUEST_METRICS_N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+
+#====================================================
+# IDEMPOTÊNCIA DAS VIEWS QUE GRAVAM (utils.idempotencia)
+#====================================================
+# Por quanto tempo a resposta de uma Idempotency-Key é devolvida aos reenvios
+IDEMPOTENCY_TTL_HOURS = config('IDEMPOTENCY_TTL_HOURS', default=24, cast=int)
+
+#====================================================
+# EXPORTAÇÃO DE RELATÓRIOS EM SEGUNDO PLANO (reports.exports)
+#====================================================
+# Em produção os jobs rodam no processo `manage.py processar_exportacoes`
+# (serviço próprio, ver railway.worker.toml). Com INLINE=True rodam numa thread
+# do worker web.
+EXPORT_JOBS_INLINE = config('EXPORT_JOBS_INLINE', default=DEBUG, cast=bool)
+EXPORT_JOBS_TIMEOUT_MINUTES = config('EXPORT_JOBS_TIMEOUT_MINUTES', default=30, cast=int)
+EXPORT_JOBS_RETENTION_DAYS = config('EXPORT_JOBS_RETENTION_DAYS', default=7, cast=int)
+
 #====================================================
 # CONFIGURAÇÕES DA IMPRESSORA DE REDE (RawBT / p910nd)
 #====================================================
@@ -278,6 +449,21 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'utils.metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'utils.sync': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'reports.exports': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'pinpads.services': {
             'handlers': ['file', 'console'],
             'level': 'INFO',
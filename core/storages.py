@@ -14,5 +14,16 @@ if settings.USE_R2_STORAGE:
 
 
     image_media_storage = R2ImageStorage()
+    # Arquivos internos (exportações de relatórios): fora do domínio público,
+    # lidos só pelo servidor. Compartilhados entre o web e o worker.
+    private_media_storage = S3Boto3Storage(
+        default_acl=None, file_overwrite=False, querystring_auth=True, custom_domain=None,
+    )
 else:
     image_media_storage = local_media_storage
+    private_media_storage = local_media_storage
+
+
+def exports_storage():
+    # Callable: a migration não depende de USE_R2_STORAGE
+    return private_media_storage
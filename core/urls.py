@@ -11,11 +11,33 @@ from django.views.decorators.http import require_GET
 
 @require_GET
 def service_worker_view(request):
-    """Serve o SW na raiz para que o escopo cubra todas as URLs."""
+    """
+    Serve o SW na raiz para que o escopo cubra todas as URLs, com a lista de
+    estáticos a pré-carregar (nomes com hash em produção) e uma versão derivada
+    do conteúdo: mudou o sw.js ou um estático, o navegador instala o SW novo.
+    """
+    import hashlib
+    import json
     import os
+    from django.templatetags.static import static
+
     sw_path = os.path.join(settings.BASE_DIR, 'templates', 'static', 'sw.js')
     with open(sw_path, 'r', encoding='utf-8') as f:
         content = f.read()
+
+    precache = []
+    for caminho in getattr(settings, 'SW_PRECACHE', []):
+        try:
+            precache.append(static(caminho))
+        except ValueError:
+            # Fora do manifest (collectstatic não rodou): não pré-carrega
+            pass
+    versao = hashlib.sha1((content + '|'.join(precache)).encode()).hexdigest()[:12]
+    content = (
+        content
+        .replace("/*VERSAO*/'dev'", json.dumps(versao), 1)
+        .replace('/*PRECACHE*/[]', json.dumps(precache), 1)
+    )
     response = HttpResponse(content, content_type='application/javascript; charset=utf-8')
     response['Service-Worker-Allowed'] = '/'
     response['Cache-Control'] = 'no-cache'
@@ -41,6 +63,7 @@ urlpatterns = [
     path('config/', include('config.urls', namespace='config')),
     path('kiosk/', include('kiosk.urls', namespace='kiosk')),
     path('banks/', include('banks.urls', namespace='banks')),
+    path('utils/', include('utils.urls', namespace='utils')),
     
     # Service Worker na raiz (escopo cobre todas as URLs)
     path('sw.js', service_worker_view, name='service_worker'),
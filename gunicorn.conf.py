@@ -0,0 +1,43 @@
+"""
+Configuração do gunicorn (railway.toml: `gunicorn -c gunicorn.conf.py`).
+
+GUNICORN_PROFILE escolhe o tipo de worker:
+
+- gthread (padrão): cada worker atende GUNICORN_THREADS requisições ao mesmo
+  tempo. Uma chamada lenta à SEFAZ, Rede, Mercado Pago ou impressora prende
+  uma thread, não o worker; utils.limites impede que um serviço travado
+  ocupe todas as threads.
+- sync: um worker por requisição, como antes (para comparação/rollback).
+- asgi: core.asgi sob uvicorn.workers.UvicornWorker. Exige uvicorn instalado;
+  as views são síncronas e o Django as executa numa única thread por worker,
+  então só compensa para views async. Sem uvicorn, cai para gthread.
+
+Teste de carga com um serviço travado: `python manage.py teste_carga`.
+"""
+import importlib.util
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', '2'))
+threads = int(os.environ.get('GUNICORN_THREADS', '8'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+# Recicla workers aos poucos (vazamentos de memória de libs de PDF/XML)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = 200
+
+perfil = os.environ.get('GUNICORN_PROFILE', 'gthread')
+if perfil == 'asgi' and importlib.util.find_spec('uvicorn') is None:
+    print('[gunicorn] GUNICORN_PROFILE=asgi sem uvicorn instalado; usando gthread')
+    perfil = 'gthread'
+
+if perfil == 'asgi':
+    wsgi_app = 'core.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+elif perfil == 'sync':
+    wsgi_app = 'core.wsgi:application'
+    worker_class = 'sync'
+else:
+    wsgi_app = 'core.wsgi:application'
+    worker_class = 'gthread'
@@ -1,3 +1,16 @@
+"""
+Servico de sync Railway -> Local (Windows).
+
+Padrao: roda `manage.py sincronizar_railway`, que copia so as linhas alteradas
+desde a ultima rodada (utils.sync) e grava o SyncLog com criados/atualizados/
+excluidos por tabela. O banco local usa as variaveis PG* do .env do projeto.
+Com SYNC_NODE_ID no .env (obrigatorio com OFFLINE_MODE=True), a mesma rodada envia antes
+ao Railway as comandas/pedidos/checkouts/sangrias feitos na loja, inclusive
+durante quedas de internet (utils.sync_envio).
+
+    python sync_local.py              # incremental, a cada INTERVAL segundos
+    python sync_local.py --completo   # pg_dump + restore completo (recriar o banco local)
+"""
 import subprocess
 import sys
 import time
@@ -5,6 +18,7 @@ import logging
 import os
 import socket
 from datetime import datetime, timezone
+from urllib.parse import quote
 
 # ── Configurações ──
 REMOTE_HOST     = "switchyard.proxy.rlwy.net"
@@ -23,11 +37,12 @@ PG_BIN          = r"C:\Program Files\PostgreSQL\18\bin"
 DUMP_FILE       = r"C:\coxinhas_sync\dump.sql"
 LOG_FILE        = r"C:\coxinhas_sync\sync.log"
 INTERVAL        = 30
+PROJECT_DIR     = os.path.dirname(os.path.abspath(__file__))
 
 
 COUNT_TABLES = [
     "accounts_user",
-    "orders_order",
+    "orders_comanda",
     "checkouts_checkout",
     "products_product",
     "financials_fechamentocaixadiario",
@@ -281,13 +296,33 @@ def sync():
 
 
 
+def sync_incremental():
+    """Executa o comando Django em loop (ele mesmo controla o intervalo)."""
+    env = {
+        **os.environ,
+        "SYNC_REMOTE_DATABASE_URL": (
+            f"postgres://{REMOTE_USER}:{quote(REMOTE_PASSWORD)}@{REMOTE_HOST}:{REMOTE_PORT}/{REMOTE_DB}"
+        ),
+        "SYNC_INTERVAL_SECONDS": str(INTERVAL),
+    }
+    return subprocess.run(
+        [sys.executable, "manage.py", "sincronizar_railway"],
+        cwd=PROJECT_DIR, env=env,
+    ).returncode
+
+
 if __name__ == "__main__":
-    log("=== Servico de sync Railway -> Local iniciado ===")
+    if "--completo" in sys.argv:
+        log("=== Sync completo Railway -> Local (pg_dump) ===")
+        sys.exit(0 if sync() else 1)
+
+    log("=== Servico de sync incremental Railway -> Local iniciado ===")
     log(f"Intervalo: {INTERVAL} segundos")
 
     while True:
         try:
-            sync()
+            codigo = sync_incremental()
+            log(f"sincronizar_railway terminou (codigo {codigo}) -- reiniciando", "warning")
         except Exception as e:
             log(f"Excecao inesperada: {e}", "error")
         time.sleep(INTERVAL)
@@ -0,0 +1,27 @@
+/**
+ * Usuário balcão: expande a tela automaticamente ao abrir o dashboard.
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Aguardar 500ms para garantir que a página carregou completamente
+    setTimeout(function() {
+        console.log('🖥️ Usuário balcão detectado - Expandindo tela automaticamente...');
+        
+        // Entrar em fullscreen automaticamente
+        if (document.documentElement.requestFullscreen) {
+            document.documentElement.requestFullscreen().then(() => {
+                console.log('✅ Tela expandida automaticamente para usuário balcão');
+                
+                // Atualizar os ícones
+                const expandIcon = document.getElementById('expand-icon');
+                const compressIcon = document.getElementById('compress-icon');
+                if (expandIcon && compressIcon) {
+                    expandIcon.classList.add('hidden');
+                    compressIcon.classList.remove('hidden');
+                }
+            }).catch(err => {
+                console.log('❌ Erro ao expandir automaticamente:', err);
+            });
+        }
+    }, 500);
+});
@@ -0,0 +1,507 @@
+/**
+ * Dashboard (home/home.html): impressão RawBT, atualização automática dos
+ * cards, notificações e fechamento de mesa pelo caixa.
+ */
+
+const FLASK_BRIDGE_URL_HOME = 'https://localhost:5001/print';
+
+// Fila de impressão RawBT — processa 1 intent por vez via visibilitychange
+function _processRawbtQueue() {
+    const queue = JSON.parse(localStorage.getItem('rawbtQueue') || '[]');
+    if (queue.length === 0) {
+        localStorage.removeItem('rawbtQueue');
+        return;
+    }
+    const next = queue.shift();
+    localStorage.setItem('rawbtQueue', JSON.stringify(queue));
+    setTimeout(() => { const _a = document.createElement('a'); _a.href = next; document.body.appendChild(_a); _a.click(); document.body.removeChild(_a); }, 400);
+}
+
+document.addEventListener('visibilitychange', function() {
+    if (document.visibilityState === 'visible') {
+        _processRawbtQueue();
+    }
+});
+
+async function imprimirPedidosNovos(url, btn) {
+    const isMobile = /android|iphone|ipad/i.test(navigator.userAgent) ||
+                 (window.matchMedia('(display-mode: standalone)').matches && navigator.maxTouchPoints > 0);
+    const originalHTML = btn.innerHTML;
+    btn.disabled = true;
+    btn.innerHTML = '<svg class="w-5 h-5 animate-spin" fill="none" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle><path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8v8H4z"></path></svg>';
+
+    try {
+        const resp = await fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } });
+        if (resp.redirected || resp.status === 401 || resp.status === 403) {
+            window.location.reload();
+            return;
+        }
+        const data = await resp.json();
+
+        if (data.type === 'none') {
+            btn.innerHTML = '<svg class="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M13 16h-1v-4h-1m1-4h.01M12 2a10 10 0 100 20A10 10 0 0012 2z"></path></svg>';
+            btn.style.borderColor = '#6b7280';
+            btn.style.color = '#6b7280';
+            btn.title = 'Sem pedidos ativos para imprimir';
+            setTimeout(() => { btn.innerHTML = originalHTML; btn.style = ''; btn.title = 'Imprimir pedidos ativos'; btn.disabled = false; }, 2000);
+            return;
+        }
+
+        if (data.type === 'rawbt_multi') {
+            if (isMobile) {
+                const urls = data.intent_urls;
+                if (urls.length === 0) { btn.innerHTML = originalHTML; btn.disabled = false; return; }
+                if (urls.length === 1) {
+                    const _a = document.createElement('a'); _a.href = urls[0]; document.body.appendChild(_a); _a.click(); document.body.removeChild(_a);
+                } else {
+                    localStorage.setItem('rawbtQueue', JSON.stringify(urls.slice(1)));
+                    const _a = document.createElement('a'); _a.href = urls[0]; document.body.appendChild(_a); _a.click(); document.body.removeChild(_a);
+                }
+                btn.innerHTML = originalHTML;
+                btn.disabled = false;
+            } else {
+                let sucesso = true;
+                for (const conteudo of data.contents) {
+                    try {
+                        const r = await fetch(FLASK_BRIDGE_URL_HOME, {
+                            method: 'POST',
+                            headers: { 'Content-Type': 'application/json' },
+                            body: JSON.stringify({ content: conteudo })
+                        });
+                        const rd = await r.json();
+                        if (!rd.success) { sucesso = false; break; }
+                    } catch (e) { sucesso = false; break; }
+                }
+                if (sucesso) {
+                    btn.innerHTML = '<svg class="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M5 13l4 4L19 7"></path></svg>';
+                    btn.style.background = '#16a34a'; btn.style.borderColor = '#15803d'; btn.style.color = '#fff';
+                    setTimeout(() => { btn.innerHTML = originalHTML; btn.style = ''; btn.disabled = false; }, 2500);
+                } else {
+                    alert('Erro ao conectar com a impressora.');
+                    btn.innerHTML = originalHTML; btn.disabled = false;
+                }
+            }
+            return;
+        }
+    } catch (e) {
+        console.error('Erro ao imprimir:', e);
+        if (isMobile) {
+            alert('Erro de comunicação com o servidor. Verifique a conexão e tente novamente.');
+        } else {
+            alert('Erro ao conectar com a impressora.');
+        }
+        btn.innerHTML = originalHTML;
+        btn.disabled = false;
+    }
+}
+
+// ── Modal IDENTIFIQUE-SE ─────────────────────────────────────────────────────
+let _modalAtendimentoUrl = null;
+let _modalAtendimentoBtn = null;
+
+function abrirModalAtendimento(url, btn) {
+    _modalAtendimentoUrl = url;
+    _modalAtendimentoBtn = btn;
+    const modal = document.getElementById('modalAtendimento');
+    const input = document.getElementById('inputAtendente');
+    input.value = '';
+    modal.classList.remove('hidden');
+    modal.style.display = 'flex';
+    setTimeout(() => input.focus(), 100);
+}
+
+function fecharModalAtendimento() {
+    const modal = document.getElementById('modalAtendimento');
+    modal.classList.add('hidden');
+    modal.style.display = 'none';
+    _modalAtendimentoUrl = null;
+    _modalAtendimentoBtn = null;
+}
+
+async function confirmarAtendimento() {
+    const input = document.getElementById('inputAtendente');
+    const numero = parseInt(input.value, 10);
+    if (!numero || numero < 1 || numero > 99) {
+        input.classList.add('ring-2', 'ring-red-500', 'border-red-400');
+        input.focus();
+        setTimeout(() => input.classList.remove('ring-2', 'ring-red-500', 'border-red-400'), 1500);
+        return;
+    }
+
+    const btn = document.getElementById('btnConfirmarAtendimento');
+    btn.disabled = true;
+    btn.innerHTML = '<svg class="w-5 h-5 animate-spin" fill="none" viewBox="0 0 24 24"><circle class="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle><path class="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8v8H4z"></path></svg>';
+
+    const isMobile = /android|iphone|ipad/i.test(navigator.userAgent) ||
+                 (window.matchMedia('(display-mode: standalone)').matches && navigator.maxTouchPoints > 0);
+
+    try {
+        const resp = await fetch(_modalAtendimentoUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': document.cookie.match(/csrftoken=([^;]+)/)?.[1] || '',
+                'X-Client-Mobile': isMobile ? '1' : '0',
+            },
+            body: JSON.stringify({ numero_atendente: numero }),
+        });
+        const data = await resp.json();
+
+        fecharModalAtendimento();
+
+        if (!data.success) {
+            alert('Erro: ' + (data.error || 'Não foi possível registrar o atendimento.'));
+            btn.disabled = false;
+            btn.innerHTML = 'OK';
+            return;
+        }
+
+        if (data.type === 'none') {
+            atualizarDashboard();
+            btn.disabled = false;
+            btn.innerHTML = 'OK';
+            return;
+        }
+
+        if (data.type === 'rawbt') {
+            const _a = document.createElement('a'); _a.href = data.intent_url; document.body.appendChild(_a); _a.click(); document.body.removeChild(_a);
+            atualizarDashboard();
+            btn.disabled = false;
+            btn.innerHTML = 'OK';
+            return;
+        }
+
+        if (data.type === 'bridge') {
+            try {
+                const bridgeResp = await fetch(FLASK_BRIDGE_URL_HOME, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ content: data.content_text })
+                });
+                const bridgeData = await bridgeResp.json();
+                if (!bridgeData.success) {
+                    alert('Erro ao imprimir: ' + (bridgeData.message || 'desconhecido'));
+                }
+            } catch (e) {
+                alert('Erro ao conectar com a impressora.');
+            }
+            atualizarDashboard();
+        }
+    } catch (e) {
+        console.error('Erro ao confirmar atendimento:', e);
+        fecharModalAtendimento();
+        alert('Erro de comunicação. Tente novamente.');
+    }
+    btn.disabled = false;
+    btn.innerHTML = 'OK';
+}
+
+function openOrderModal() {
+    const modal = document.getElementById('orderModal');
+    if (modal) {
+        // Remover classes que escondem
+        modal.classList.remove('hidden', 'opacity-0');
+        
+        // Forçar propriedades do overlay
+        modal.style.cssText = `
+            display: flex !important;
+            position: fixed !important;
+            top: 0 !important;
+            left: 0 !important;
+            right: 0 !important;
+            bottom: 0 !important;
+            z-index: 9999 !important;
+            background-color: rgba(0, 0, 0, 0.5) !important;
+            opacity: 1 !important;
+            visibility: visible !important;
+            align-items: center !important;
+            justify-content: center !important;
+            padding: 16px !important;
+        `;
+        
+        document.body.style.overflow = 'hidden';
+        
+        // Inicializar funcionalidades do modal
+        initializeOrderModal();
+        
+        // Focar no campo de nome da comanda após o modal ser exibido
+        setTimeout(() => {
+            const orderNameField = document.getElementById('orderName');
+            if (orderNameField) {
+                orderNameField.focus();
+            }
+        }, 100);
+        
+        console.log('Modal centralizado!');
+    }
+}
+function closeOrderModal() {
+    const modal = document.getElementById('orderModal');
+    if (modal) {
+        // Adicionar classes para esconder
+        modal.classList.add('hidden', 'opacity-0');
+        
+        // Resetar o estilo
+        modal.style.display = 'none';
+        
+        // Restaurar scroll do body
+        document.body.style.overflow = '';
+        
+        // Limpar o formulário
+        const form = document.getElementById('orderForm');
+        if (form) {
+            form.reset();
+        }
+        
+        console.log('Modal fechado!');
+    }
+}
+
+// Atualização automática do dashboard a cada 5 segundos
+let _atualizandoCards = false;
+
+async function atualizarDashboard() {
+    if (_atualizandoCards) return;
+    _atualizandoCards = true;
+    const grid = document.getElementById('comandas-grid');
+    if (!grid) { _atualizandoCards = false; return; }
+    try {
+        const resp = await fetch('/accounts/api/cards/');
+        if (resp.ok) {
+            grid.innerHTML = await resp.text();
+            const searchInput = document.getElementById('search-comandas');
+            if (searchInput && searchInput.value.trim()) {
+                searchInput.dispatchEvent(new Event('input'));
+            }
+        }
+    } catch(e) {}
+    _atualizandoCards = false;
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    setInterval(atualizarDashboard, 5000);
+
+    // Foco único no carregamento da página — teclado abre 1 vez só
+    const inputComanda = document.getElementById('search-comandas');
+    if (inputComanda) {
+        inputComanda.focus();
+    }
+});
+
+// visibilitychange focus desabilitado para evitar abertura do teclado no tablet
+
+// click focus desabilitado para evitar abertura do teclado no tablet
+
+// Função para mostrar notificação (padrão dos produtos)
+function mostrarNotificacao(mensagem, tipo = 'success') {
+    // Criar o container se não existir
+    let container = document.getElementById('notifications-container');
+    if (!container) {
+        container = document.createElement('div');
+        container.className = 'fixed top-20 right-4 z-40 space-y-3';
+        container.id = 'notifications-container';
+        document.body.appendChild(container);
+    }
+
+    // Criar elemento da notificação seguindo EXATAMENTE o padrão dos produtos
+    const notification = document.createElement('div');
+    notification.className = `notification-toast transform translate-x-full opacity-0 bg-green-100/10 border border-green-100/10 text-green-800 backdrop-blur-xl backdrop-saturate-150 px-4 py-3 rounded-2xl shadow-2xl min-w-[320px] max-w-md`;
+    notification.setAttribute('data-notification', '');
+    
+    notification.innerHTML = `
+        <div class="flex items-center space-x-3">
+            <!-- Ícone -->
+            <div class="flex-shrink-0">
+                <div class="w-8 h-8 bg-green-500/20 rounded-full flex items-center justify-center">
+                    <svg class="w-5 h-5 text-green-600" fill="currentColor" viewBox="0 0 20 20">
+                        <path fill-rule="evenodd" d="M16.707 5.293a1 1 0 010 1.414l-8 8a1 1 0 01-1.414 0l-4-4a1 1 0 011.414-1.414L8 12.586l7.293-7.293a1 1 0 011.414 0z" clip-rule="evenodd"></path>
+                    </svg>
+                </div>
+            </div>
+            
+            <!-- Mensagem -->
+            <div class="flex-1 text-sm font-semibold">
+                ${mensagem}
+            </div>
+            
+            <!-- Botão fechar -->
+            <button onclick="closeNotification(this)" 
+                    class="flex-shrink-0 text-green-600/70 hover:text-green-700 hover:bg-green-500/20 transition-all duration-200 rounded-full p-1.5">
+                <svg class="w-4 h-4" fill="currentColor" viewBox="0 0 20 20">
+                    <path fill-rule="evenodd" d="M4.293 4.293a1 1 0 011.414 0L10 8.586l4.293-4.293a1 1 0 111.414 1.414L11.414 10l4.293 4.293a1 1 0 01-1.414 1.414L10 11.414l-4.293 4.293a1 1 0 01-1.414-1.414L8.586 10 4.293 5.707a1 1 0 010-1.414z" clip-rule="evenodd"></path>
+                </svg>
+            </button>
+        </div>
+        
+        <!-- Barra de progresso -->
+        <div class="absolute bottom-0 left-0 h-1 bg-green-200/50 rounded-bl-2xl rounded-br-2xl">
+            <div class="h-full bg-green-500 rounded-bl-2xl rounded-br-2xl progress-bar" style="width: 100%;"></div>
+        </div>
+    `;
+    
+    // Adicionar à container
+    container.appendChild(notification);
+    
+    // Animar entrada
+    setTimeout(() => {
+        notification.classList.remove('translate-x-full', 'opacity-0');
+    }, 100);
+    
+    // Remover após 5 segundos
+    setTimeout(() => {
+        if (notification && notification.parentElement) {
+            notification.classList.add('hiding');
+            setTimeout(() => {
+                if (notification.parentElement) {
+                    notification.remove();
+                }
+            }, 300);
+        }
+    }, 5000);
+}
+
+// Função para fechar notificação (necessária para o botão X)
+function closeNotification(button) {
+    const notification = button.closest('[data-notification]');
+    notification.classList.add('hiding');
+    setTimeout(() => {
+        notification.remove();
+    }, 300);
+}
+
+// Verificar se há notificação pendente no localStorage
+document.addEventListener('DOMContentLoaded', function() {
+    const notificacaoPendente = localStorage.getItem('comandaNotificacao');
+    if (notificacaoPendente) {
+        try {
+            const notif = JSON.parse(notificacaoPendente);
+            // Mostrar notificação após um pequeno delay
+            setTimeout(() => {
+                mostrarNotificacao(notif.message, notif.type);
+            }, 500);
+            
+            // Limpar do localStorage
+            localStorage.removeItem('comandaNotificacao');
+        } catch (e) {
+            console.error('Erro ao processar notificação:', e);
+            localStorage.removeItem('comandaNotificacao');
+        }
+    }
+});
+
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+function imprimirComanda(comandaCode) {
+    console.log('🖨️ Iniciando impressão para comanda:', comandaCode);
+    
+    // Buscar o botão através do evento ou do código da comanda
+    const btn = event.target.closest('button');
+    if (!btn) {
+        console.error('❌ Botão não encontrado');
+        mostrarNotificacao('❌ Erro: botão não encontrado', 'error');
+        return;
+    }
+    
+    const originalText = btn.innerHTML;
+    console.log('⏳ Alterando estado do botão...');
+    btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Imprimindo...';
+    btn.disabled = true;
+    
+    // Verificar CSRF token
+    const csrfToken = getCookie('csrftoken');
+    console.log('🔑 CSRF Token:', csrfToken ? 'OK' : 'NÃO ENCONTRADO');
+    
+    if (!csrfToken) {
+        mostrarNotificacao('❌ Erro: token CSRF não encontrado', 'error');
+        btn.innerHTML = originalText;
+        btn.disabled = false;
+        return;
+    }
+    
+    console.log('📡 Fazendo requisição para:', `/comandas/${comandaCode}/imprimir/`);
+    
+    // Fazer requisição de impressão
+    fetch(`/accounts/comandas/${comandaCode}/imprimir/`, {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': csrfToken,
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => {
+        console.log('📥 Resposta recebida:', response.status);
+        return response.json();
+    })
+    .then(data => {
+        console.log('📋 Dados recebidos:', data);
+        if (data.success) {
+            mostrarNotificacao('🖨️ ' + data.message, 'success');
+        } else {
+            mostrarNotificacao('❌ ' + data.message, 'error');
+        }
+    })
+    .catch(error => {
+        console.error('❌ Erro na requisição:', error);
+        mostrarNotificacao('❌ Erro na comunicação', 'error');
+    })
+    .finally(() => {
+        console.log('🔄 Restaurando botão...');
+        btn.innerHTML = originalText;
+        btn.disabled = false;
+    });
+}
+
+let _mesaParaFechar = null;
+
+function abrirModalFecharMesa(numero) {
+    _mesaParaFechar = numero;
+    document.getElementById('modal-fechar-mesa-num').textContent = numero;
+    document.getElementById('modal-fechar-mesa').style.display = 'flex';
+}
+
+function fecharModalFecharMesa() {
+    document.getElementById('modal-fechar-mesa').style.display = 'none';
+    _mesaParaFechar = null;
+}
+
+async function confirmarFecharMesaCaixa() {
+    const numero = _mesaParaFechar;
+    if (!numero) return;
+    const btnConfirm = document.getElementById('btn-confirmar-fechar-mesa');
+    btnConfirm.disabled = true;
+    btnConfirm.textContent = 'Fechando...';
+    try {
+        const csrf = getCookie('csrftoken');
+        const resp = await fetch('/orders/comanda/' + numero + '/fechar-mesa/', {
+            method: 'POST',
+            headers: { 'X-CSRFToken': csrf },
+        });
+        const data = await resp.json();
+        fecharModalFecharMesa();
+        if (data.ok) {
+            mostrarNotificacao('✅ Mesa ' + numero + ' fechada — cliente a caminho do caixa', 'success');
+            setTimeout(() => location.reload(), 1200);
+        } else {
+            mostrarNotificacao('❌ ' + (data.erro || 'Erro ao fechar'), 'error');
+        }
+    } catch(e) {
+        fecharModalFecharMesa();
+        mostrarNotificacao('❌ Erro de conexão', 'error');
+    } finally {
+        btnConfirm.disabled = false;
+        btnConfirm.textContent = 'Sim, fechar';
+    }
+}
@@ -0,0 +1,687 @@
+/**
+ * Cardápio do kiosk (kiosk/cardapio.html): carrinho, envio do pedido,
+ * conta, slideshow e polling de status/catálogo.
+ * Dados da página (produtos, URLs, CSRF) vêm do bloco de configuração inline do template.
+ */
+
+if ('serviceWorker' in navigator) {
+  navigator.serviceWorker.register('/sw.js', { scope: '/kiosk/' }).catch(function() {});
+  // Rede voltou: pede ao SW para reenviar os pedidos guardados offline
+  window.addEventListener('online', function() {
+    if (navigator.serviceWorker.controller) navigator.serviceWorker.controller.postMessage('reenviar-pedidos');
+  });
+  // Pedidos guardados offline por tempo demais não são reenviados pelo SW
+  navigator.serviceWorker.addEventListener('message', function(event) {
+    const data = event.data || {};
+    if (data.tipo !== 'pedidos-descartados' || !data.pedidos.length) return;
+    const n = data.pedidos.length;
+    mostrarToast(n === 1
+      ? '⚠️ Um pedido feito sem conexão não foi enviado. Chame um atendente.'
+      : `⚠️ ${n} pedidos feitos sem conexão não foram enviados. Chame um atendente.`, true);
+  });
+}
+
+// carrinho: { chave: { chave, produto_id, nome, preco_base, adicionais, preco_total, qty } }
+// chave = "produtoId_" ou "produtoId_ad1_ad2_..."
+const carrinho = {};
+
+// ── Slideshow ──
+const slides = document.querySelectorAll('.slide');
+const dotsEl = document.getElementById('slide-dots');
+let slideAtual = 0, slideTimer = null;
+
+slides.forEach((_, i) => {
+  const d = document.createElement('div');
+  d.className = 'dot' + (i === 0 ? ' active' : '');
+  d.onclick = () => irParaSlide(i);
+  dotsEl.appendChild(d);
+});
+
+function irParaSlide(n) {
+  slides[slideAtual].classList.remove('active');
+  dotsEl.children[slideAtual].classList.remove('active');
+  slideAtual = n;
+  slides[slideAtual].classList.add('active');
+  dotsEl.children[slideAtual].classList.add('active');
+}
+function proximoSlide() { irParaSlide((slideAtual + 1) % slides.length); }
+function iniciarSlideshow() { clearInterval(slideTimer); slideTimer = setInterval(proximoSlide, 4000); }
+function pararSlideshow() { clearInterval(slideTimer); }
+iniciarSlideshow();
+
+function mostrarSlides() {
+  document.querySelectorAll('.cat-btn').forEach(b => b.classList.remove('active'));
+  document.querySelector('[data-cat="slides"]').classList.add('active');
+  document.getElementById('view-slides').style.display = '';
+  document.getElementById('view-produtos').style.display = 'none';
+  document.getElementById('topbar-title').textContent = 'Bem-vindo!';
+  document.getElementById('topbar-sub').innerHTML = 'A paixão do brasileiro em versão <strong>Premium</strong>';
+  iniciarSlideshow();
+}
+
+// ── Categorias ──
+function mostrarCategoria(slug, btn) {
+  pararSlideshow();
+  document.querySelectorAll('.cat-btn').forEach(b => b.classList.remove('active'));
+  btn.classList.add('active');
+  const cat = PRODUTOS_POR_CAT[slug];
+  if (!cat) return;
+  document.getElementById('topbar-title').textContent = cat.nome;
+  document.getElementById('topbar-sub').textContent = cat.itens.length + ' produto' + (cat.itens.length !== 1 ? 's' : '') + ' disponível' + (cat.itens.length !== 1 ? 'is' : '');
+  const lista = document.getElementById('produtos-lista');
+  lista.innerHTML = cat.itens.map(p => {
+    const imgHtml = p.img
+      ? `<picture style="display:contents">${p.img_webp ? `<source type="image/webp" srcset="${p.img_webp}" sizes="116px">` : ''}<img src="${p.img}" alt="${p.nome}" class="produto-img" loading="lazy" onclick="event.stopPropagation(); abrirLightbox('${p.img_grande || p.img}', '${p.nome}')"></picture>`
+      : `<div class="produto-img-placeholder"><svg width="40" height="40" fill="none" stroke="#d4600a" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="1.5" d="M20 7l-8-4-8 4m16 0l-8 4m8-4v10l-8 4m0-10L4 7m8 4v10M4 7v10l8 4"/></svg></div>`;
+    const totalQty = totalQtyParaProduto(p.id);
+    return `
+      <div class="produto-item" id="item-${p.id}" onclick="clicouProduto(${p.id})">
+        ${imgHtml}
+        <div class="produto-info">
+          <p class="produto-nome">${p.nome}</p>
+          ${p.desc ? `<p class="produto-desc">${p.desc}</p>` : ''}
+        </div>
+        <div class="produto-right">
+          <span class="produto-preco">R$ ${p.preco.toFixed(2).replace('.',',')}</span>
+          ${stepperHTML(p.id, totalQty)}
+        </div>
+      </div>`;
+  }).join('');
+  document.getElementById('view-slides').style.display = 'none';
+  document.getElementById('view-produtos').style.display = '';
+  document.getElementById('content').scrollTop = 0;
+}
+
+// ── Clique no produto ──
+let produtoAtual = null;
+
+function stepperHTML(pid, qty) {
+  const disabledMinus = qty === 0 ? ' disabled' : '';
+  return '<div class="stepper" id="stepper-' + pid + '" onclick="event.stopPropagation()">'
+    + '<button class="stepper-btn stepper-minus"' + disabledMinus + ' onclick="event.stopPropagation(); decrementarProduto(' + pid + ')">&#8722;</button>'
+    + '<span class="stepper-qty" id="stepper-qty-' + pid + '">' + qty + '</span>'
+    + '<button class="stepper-btn stepper-plus" onclick="event.stopPropagation(); clicouProduto(' + pid + ')">+</button>'
+    + '</div>';
+}
+
+function decrementarProduto(produtoId) {
+  const chaves = Object.keys(carrinho).filter(k => carrinho[k].produto_id === produtoId);
+  if (chaves.length === 0) return;
+  const chave = chaves[0];
+  carrinho[chave].qty--;
+  if (carrinho[chave].qty <= 0) delete carrinho[chave];
+  atualizarUI(produtoId);
+  cancelarTimerInatividade();
+  resetarLembrete();
+  if (Object.keys(carrinho).length > 0) iniciarLembrete();
+}
+
+function clicouProduto(produtoId) {
+  let produto = null;
+  for (const cat of Object.values(PRODUTOS_POR_CAT)) {
+    const found = cat.itens.find(p => p.id === produtoId);
+    if (found) { produto = found; break; }
+  }
+  if (!produto) return;
+  const temOpcionalObrigatorio = produto.opcionais_obrigatorios && produto.opcionais_obrigatorios.length > 0;
+  const temAdicionais = produto.adicionais && produto.adicionais.length > 0;
+  if (temOpcionalObrigatorio || temAdicionais) {
+    abrirModalAdicionais(produto);
+  } else {
+    adicionarAoCarrinho(produto, null, []);
+  }
+}
+
+function totalQtyParaProduto(produtoId) {
+  return Object.values(carrinho).filter(i => i.produto_id === produtoId).reduce((s, i) => s + i.qty, 0);
+}
+
+function adicionarAoCarrinho(produto, opcionalSelecionado, adicionaisSelecionados) {
+  const opcionalId = opcionalSelecionado ? opcionalSelecionado.id : 'sem';
+  const ids = adicionaisSelecionados.map(a => a.id).sort().join('_');
+  const chave = produto.id + '_' + opcionalId + '_' + ids;
+  const precoBase = (opcionalSelecionado && opcionalSelecionado.preco > 0) ? opcionalSelecionado.preco : produto.preco;
+  const precoTotal = precoBase + adicionaisSelecionados.reduce((s, a) => s + a.preco, 0);
+
+  if (carrinho[chave]) {
+    carrinho[chave].qty++;
+  } else {
+    carrinho[chave] = {
+      chave,
+      produto_id: produto.id,
+      nome: produto.nome,
+      preco_base: precoBase,
+      opcional_obrigatorio: opcionalSelecionado,
+      adicionais: adicionaisSelecionados,
+      preco_total: precoTotal,
+      qty: 1,
+    };
+  }
+  atualizarUI(produto.id);
+  cancelarTimerInatividade();
+  resetarLembrete();
+  iniciarLembrete();
+}
+
+// ── Modal Seleções (opcional obrigatório + adicionais) ──
+let opcionalSelecionadoAtual = null;
+let etapaModalAtual = 'adicionais';
+
+function abrirModalAdicionais(produto) {
+  produtoAtual = produto;
+  opcionalSelecionadoAtual = null;
+  document.getElementById('modal-produto-nome').textContent = produto.nome;
+  document.getElementById('modal-produto-preco').textContent = 'R$ ' + produto.preco.toFixed(2).replace('.',',');
+  const imgEl = document.getElementById('modal-produto-img');
+  if (produto.img) {
+    imgEl.innerHTML = `<img src="${produto.img}" style="width:100%;height:100%;object-fit:cover;">`;
+  } else {
+    imgEl.innerHTML = `<svg width="36" height="36" fill="none" stroke="#d4600a" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" stroke-width="1.5" d="M20 7l-8-4-8 4m16 0l-8 4m8-4v10l-8 4m0-10L4 7m8 4v10M4 7v10l8 4"/></svg>`;
+  }
+
+  const listaOpc = document.getElementById('modal-opcional-lista');
+  const opcionais = produto.opcionais_obrigatorios || [];
+  listaOpc.innerHTML = opcionais.map(o => `
+    <label class="adicional-row" onclick="calcularTotalModal()">
+      <input type="radio" name="opcional-obrigatorio" class="adicional-check" value="${o.id}" data-preco="${o.preco}" data-nome="${o.nome.replace(/"/g,'&quot;')}">
+      <div class="adicional-info">
+        <span class="adicional-nome">${o.nome}</span>
+        ${o.desc ? `<span class="adicional-desc">${o.desc}</span>` : ''}
+      </div>
+      <span class="adicional-preco">${o.preco > 0 ? ('+ R$ ' + o.preco.toFixed(2).replace('.',',')) : 'Sem acréscimo'}</span>
+    </label>`).join('');
+
+  const listaAdd = document.getElementById('modal-adicionais-lista');
+  const adicionais = produto.adicionais || [];
+  listaAdd.innerHTML = adicionais.map(a => `
+    <label class="adicional-row" onclick="calcularTotalModal()">
+      <input type="checkbox" class="adicional-check" value="${a.id}" data-preco="${a.preco}" data-nome="${a.nome.replace(/"/g,'&quot;')}">
+      <div class="adicional-info">
+        <span class="adicional-nome">${a.nome}</span>
+        ${a.desc ? `<span class="adicional-desc">${a.desc}</span>` : ''}
+      </div>
+      <span class="adicional-preco">+ R$ ${a.preco.toFixed(2).replace('.',',')}</span>
+    </label>`).join('');
+
+  const temOpcional = opcionais.length > 0;
+  const temAdicional = adicionais.length > 0;
+  if (temOpcional) {
+    mudarEtapaModal('opcional');
+  } else if (temAdicional) {
+    mudarEtapaModal('adicionais');
+  } else {
+    adicionarAoCarrinho(produtoAtual, null, []);
+    return;
+  }
+
+  calcularTotalModal();
+  document.getElementById('modal-adicionais').classList.add('open');
+  document.getElementById('modal-overlay').classList.add('open');
+}
+
+function mudarEtapaModal(etapa) {
+  etapaModalAtual = etapa;
+  const etapaOpc = document.getElementById('modal-opcional-etapa');
+  const etapaAdd = document.getElementById('modal-adicional-etapa');
+  const titulo = document.getElementById('modal-etapa-titulo');
+  const btnSec = document.getElementById('btn-modal-secundario');
+  const btnPri = document.getElementById('btn-modal-principal');
+
+  if (etapa === 'opcional') {
+    etapaOpc.style.display = '';
+    etapaAdd.style.display = 'none';
+    titulo.textContent = 'Escolha 1 opcional obrigatório';
+    btnSec.style.display = 'none';
+    btnPri.textContent = (produtoAtual.adicionais && produtoAtual.adicionais.length > 0) ? 'Próximo' : 'Adicionar ao carrinho';
+  } else {
+    etapaOpc.style.display = 'none';
+    etapaAdd.style.display = '';
+    titulo.textContent = 'Escolha seus adicionais';
+    btnSec.style.display = '';
+    btnSec.textContent = 'Sem adicionais';
+    btnPri.textContent = 'Adicionar ao carrinho';
+  }
+}
+
+function fecharModalAdicionais() {
+  document.getElementById('modal-adicionais').classList.remove('open');
+  document.getElementById('modal-overlay').classList.remove('open');
+  produtoAtual = null;
+  opcionalSelecionadoAtual = null;
+}
+
+function calcularTotalModal() {
+  if (!produtoAtual) return;
+
+  const opcionalChecked = document.querySelector('input[name="opcional-obrigatorio"]:checked');
+  if (opcionalChecked) {
+    opcionalSelecionadoAtual = {
+      id: parseInt(opcionalChecked.value),
+      nome: opcionalChecked.dataset.nome,
+      preco: parseFloat(opcionalChecked.dataset.preco),
+    };
+  }
+
+  let extraAdd = 0;
+  document.querySelectorAll('#modal-adicionais-lista .adicional-check:checked').forEach(c => extraAdd += parseFloat(c.dataset.preco));
+  const precoBaseModal = (opcionalSelecionadoAtual && opcionalSelecionadoAtual.preco > 0) ? opcionalSelecionadoAtual.preco : produtoAtual.preco;
+
+  const total = precoBaseModal + extraAdd;
+  document.getElementById('modal-total').textContent = 'R$ ' + total.toFixed(2).replace('.',',');
+}
+
+function acaoSecundariaModal() {
+  if (!produtoAtual) return;
+  adicionarAoCarrinho(produtoAtual, opcionalSelecionadoAtual, []);
+  fecharModalAdicionais();
+}
+
+function acaoPrincipalModal() {
+  if (!produtoAtual) return;
+
+  if (etapaModalAtual === 'opcional') {
+    const opcionalChecked = document.querySelector('input[name="opcional-obrigatorio"]:checked');
+    if (!opcionalChecked) {
+      mostrarToast('⚠️ Escolha uma opção obrigatória.', true);
+      return;
+    }
+    opcionalSelecionadoAtual = {
+      id: parseInt(opcionalChecked.value),
+      nome: opcionalChecked.dataset.nome,
+      preco: parseFloat(opcionalChecked.dataset.preco),
+    };
+
+    if (produtoAtual.adicionais && produtoAtual.adicionais.length > 0) {
+      mudarEtapaModal('adicionais');
+      calcularTotalModal();
+      return;
+    }
+
+    adicionarAoCarrinho(produtoAtual, opcionalSelecionadoAtual, []);
+    fecharModalAdicionais();
+    return;
+  }
+
+  const selecionados = Array.from(document.querySelectorAll('#modal-adicionais-lista .adicional-check:checked')).map(c => ({
+    id: parseInt(c.value),
+    nome: c.dataset.nome,
+    preco: parseFloat(c.dataset.preco),
+  }));
+  adicionarAoCarrinho(produtoAtual, opcionalSelecionadoAtual, selecionados);
+  fecharModalAdicionais();
+}
+
+// Compatibilidade com handlers antigos
+function pularAdicionais() { acaoSecundariaModal(); }
+function confirmarAdicionais() { acaoPrincipalModal(); }
+
+// ── Atualizar UI ──
+function atualizarUI(produtoId) {
+  if (produtoId !== undefined) {
+    const qty = totalQtyParaProduto(produtoId);
+    const qtyEl = document.getElementById('stepper-qty-' + produtoId);
+    if (qtyEl) {
+      qtyEl.textContent = qty;
+      const minusBtn = qtyEl.previousElementSibling;
+      if (minusBtn) minusBtn.disabled = qty === 0;
+    }
+  }
+  const total = Object.values(carrinho).reduce((s, i) => s + i.qty * i.preco_total, 0);
+  const totalStr = 'R$ ' + total.toFixed(2).replace('.', ',');
+  document.getElementById('sidebar-total').textContent = totalStr;
+  document.getElementById('drawer-total').textContent = totalStr;
+  const qtd = Object.values(carrinho).reduce((s, i) => s + i.qty, 0);
+  document.getElementById('btn-enviar').disabled = qtd === 0;
+}
+
+// ── Drawer ──
+function removerUm(chave) {
+  if (!carrinho[chave]) return;
+  const produtoId = carrinho[chave].produto_id;
+  carrinho[chave].qty--;
+  if (carrinho[chave].qty <= 0) delete carrinho[chave];
+  atualizarUI(produtoId);
+  renderDrawer();
+}
+
+function adicionarUm(chave) {
+  if (!carrinho[chave]) return;
+  carrinho[chave].qty++;
+  atualizarUI(carrinho[chave].produto_id);
+  renderDrawer();
+}
+
+function renderDrawer() {
+  const body = document.getElementById('drawer-body');
+  const chaves = Object.keys(carrinho);
+  if (chaves.length === 0) {
+    body.innerHTML = '<div class="empty-state"><div style="font-size:48px">🛒</div><p>Carrinho vazio</p></div>';
+    return;
+  }
+  body.innerHTML = chaves.map(chave => {
+    const item = carrinho[chave];
+    const linhaOpcional = item.opcional_obrigatorio
+      ? `<div class="drawer-item-sub">Opcional: ${item.opcional_obrigatorio.nome}</div>`
+      : '';
+    const linhasAdicionais = item.adicionais.length > 0
+      ? item.adicionais.map(a =>
+          `<div class="drawer-item-sub">+ ${a.nome} <span style="color:#d4600a;font-weight:700;">R$ ${a.preco.toFixed(2).replace('.',',')}</span></div>`
+        ).join('')
+      : '';
+    const chaveEsc = chave.replace(/'/g, "\\'");
+    return `
+      <div class="drawer-item">
+        <div style="flex:1">
+          <div class="drawer-item-nome">${item.nome} <span style="color:#9a8070;font-size:12px;font-weight:600;">R$ ${item.preco_base.toFixed(2).replace('.',',')}</span></div>
+          ${linhaOpcional}${linhasAdicionais}
+          <div class="drawer-item-preco">Total unitário: R$ ${item.preco_total.toFixed(2).replace('.',',')}</div>
+        </div>
+        <div class="qty-ctrl">
+          <button class="qty-btn" onclick="removerUm('${chaveEsc}')">−</button>
+          <span class="qty-num">${item.qty}</span>
+          <button class="qty-btn" onclick="adicionarUm('${chaveEsc}')">+</button>
+        </div>
+        <div style="min-width:72px;text-align:right;font-weight:700;color:#d4600a;">
+          R$ ${(item.qty * item.preco_total).toFixed(2).replace('.',',')}
+        </div>
+      </div>`;
+  }).join('');
+}
+
+function abrirDrawer() {
+  renderDrawer();
+  document.getElementById('drawer').classList.add('open');
+  document.getElementById('overlay').classList.add('open');
+}
+
+function fecharDrawer() {
+  document.getElementById('drawer').classList.remove('open');
+  document.getElementById('overlay').classList.remove('open');
+  // Reinicia lembrete se ainda houver itens
+  const qtd = Object.values(carrinho).reduce((s, i) => s + i.qty, 0);
+  if (qtd > 0) { resetarLembrete(); iniciarLembrete(); }
+}
+
+// ── Enviar ──
+// Idempotency-Key: repetir o mesmo carrinho após uma falha reaproveita a chave,
+// então um envio que chegou ao servidor (e só a resposta se perdeu) não duplica
+// o pedido. Sem rede, o service worker guarda o envio e reenvia com a mesma chave.
+let envioPendente = null;  // { corpo, chave }
+
+function novaChave() {
+  if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+  return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+}
+
+function limparCarrinhoEnviado() {
+  Object.keys(carrinho).forEach(k => delete carrinho[k]);
+  document.getElementById('observacoes').value = '';
+  atualizarUI();
+  renderDrawer();
+  fecharDrawer();
+  mostrarSlides();
+  ocultarLembrete();
+  iniciarTimerInatividade();
+}
+
+async function enviarPedido() {
+  const btn = document.getElementById('btn-enviar');
+  btn.disabled = true;
+  btn.textContent = 'Enviando...';
+  const itens = Object.values(carrinho).map(item => ({
+    id: item.produto_id,
+    qty: item.qty,
+    opcional_obrigatorio: item.opcional_obrigatorio ? item.opcional_obrigatorio.id : null,
+    adicionais: item.adicionais.map(a => a.id),
+  }));
+  const obs = document.getElementById('observacoes').value.trim();
+  const corpo = JSON.stringify({ itens, observacoes: obs });
+  if (!envioPendente || envioPendente.corpo !== corpo) envioPendente = { corpo, chave: novaChave() };
+  try {
+    const resp = await fetch(URL_ENVIAR, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': CSRF,
+        'Idempotency-Key': envioPendente.chave,
+      },
+      body: corpo,
+    });
+    const data = await resp.json();
+    if (data.ok) {
+      envioPendente = null;
+      limparCarrinhoEnviado();
+      mostrarToast(data.enfileirado
+        ? '📶 Sem conexão — o pedido será enviado quando a rede voltar (em até 5 minutos).'
+        : '✅ Pedido enviado com sucesso!');
+      btn.textContent = 'Enviar pedido para o balcão';
+    } else {
+      mostrarToast('❌ Erro: ' + (data.erro || 'Tente novamente'), true);
+      btn.disabled = false;
+      btn.textContent = 'Enviar pedido para o balcão';
+    }
+  } catch (e) {
+    mostrarToast('❌ Erro de conexão. Tente novamente.', true);
+    btn.disabled = false;
+    btn.textContent = 'Enviar pedido para o balcão';
+  }
+}
+
+function mostrarToast(msg, erro = false) {
+  const t = document.getElementById('toast-pedido');
+  t.textContent = msg;
+  t.style.background = erro ? '#7f1d1d' : '#15803d';
+  t.classList.add('show');
+  setTimeout(() => t.classList.remove('show'), 3500);
+}
+
+// ── Ver Conta ──────────────────────────────────────────────
+async function abrirVerConta() {
+  const lista = document.getElementById('conta-lista');
+  const totalEl = document.getElementById('conta-total');
+  lista.innerHTML = '<div class="empty-state"><p>Carregando...</p></div>';
+  totalEl.textContent = 'R$ 0,00';
+  document.getElementById('drawer-conta').classList.add('open');
+  document.getElementById('overlay-conta').classList.add('open');
+  try {
+    const resp = await fetch(URL_CONTA);
+    const data = await resp.json();
+    if (!data.itens || data.itens.length === 0) {
+      lista.innerHTML = '<div class="empty-state"><p>Nenhum pedido registrado ainda.</p></div>';
+    } else {
+      lista.innerHTML = data.itens.map(item => `
+        <div class="drawer-item">
+          <div style="flex:1;min-width:0;">
+            <div class="drawer-item-nome">${item.qty}× ${item.nome}</div>
+            ${item.obs ? '<div class="drawer-item-sub">+ ' + item.obs + '</div>' : ''}
+            <div class="drawer-item-preco">R$ ${item.unit_price.toFixed(2).replace('.', ',')} cada</div>
+          </div>
+          <div style="font-size:15px;font-weight:800;color:#d4600a;flex-shrink:0;margin-left:12px;">
+            R$ ${item.subtotal.toFixed(2).replace('.', ',')}
+          </div>
+        </div>`).join('');
+      totalEl.textContent = 'R$ ' + data.total;
+    }
+  } catch(e) {
+    lista.innerHTML = '<div class="empty-state"><p>Erro ao carregar conta.</p></div>';
+  }
+}
+
+function fecharVerConta() {
+  document.getElementById('drawer-conta').classList.remove('open');
+  document.getElementById('overlay-conta').classList.remove('open');
+}
+
+// ── Fechar Conta — kiosk: vai direto para confirmação ──────────
+function confirmarFechamento() {
+  const modal = document.getElementById('modal-fechamento');
+  modal.style.display = 'flex';
+}
+
+function cancelarFechamento() {
+  document.getElementById('modal-fechamento').style.display = 'none';
+}
+
+async function executarFechamento() {
+  document.getElementById('modal-fechamento').style.display = 'none';
+  fecharVerConta();
+  try { await fetch(URL_FECHAR, { method: 'POST', headers: { 'X-CSRFToken': CSRF, 'Idempotency-Key': novaChave() } }); } catch(e) {}
+  const tela = document.getElementById('tela-conta-fechada');
+  document.getElementById('tela-mesa-numero').textContent = MESA_NUMERO;
+  tela.style.display = 'flex';
+  setTimeout(() => { window.location.href = URL_ENTRADA; }, 5000);
+}
+
+// ── Polling: detecta fechamento remoto pelo caixa ──────────
+const STATUSS_ENCERRAMENTO = new Set(['aguardando_caixa', 'fechada', 'cancelada', 'cortesia']);
+let _statusFechamentoConsecutivo = 0;
+let _migracaoRedirecionando = false;
+
+setInterval(async () => {
+  // Não interrompe se a tela de conta fechada já está visível
+  if (document.getElementById('tela-conta-fechada').style.display === 'flex') return;
+  if (_migracaoRedirecionando) return;
+  try {
+    const r = await fetch(URL_STATUS, { cache: 'no-store' });
+    const d = await r.json();
+
+    if (d.status === 'em_uso') {
+      _statusFechamentoConsecutivo = 0;
+      return;
+    }
+
+    // Mesa transferida: redireciona kiosk para nova mesa
+    if (d.status === 'migrada' && d.novo_numero) {
+      _migracaoRedirecionando = true;
+      window.location.href = '/kiosk/mesa/' + d.novo_numero + '/';
+      return;
+    }
+
+    // Só encerra kiosk para status finais reais e após 2 leituras consecutivas
+    if (STATUSS_ENCERRAMENTO.has(d.status)) {
+      _statusFechamentoConsecutivo += 1;
+      if (_statusFechamentoConsecutivo >= 2) {
+        const tela = document.getElementById('tela-conta-fechada');
+        document.getElementById('tela-mesa-numero').textContent = MESA_NUMERO;
+        tela.style.display = 'flex';
+        setTimeout(() => { window.location.href = URL_ENTRADA; }, 5000);
+      }
+      return;
+    }
+
+    // Status transitório (ex: livre) não encerra imediatamente.
+    _statusFechamentoConsecutivo = 0;
+  } catch(e) {}
+}, 5000);
+
+// ── Timer de inatividade (30s sem interação → volta ao Início) ──
+let _inativoTimer = null;
+
+function resetarTimerInatividade() {
+  clearTimeout(_inativoTimer);
+  _inativoTimer = setTimeout(() => {
+    // Não volta se algum modal/drawer estiver aberto
+    const drawerAberto = document.getElementById('drawer')?.classList.contains('open');
+    const modalAberto  = document.getElementById('modal-adicionais')?.classList.contains('open');
+    const lightboxAberto = document.getElementById('lightbox-overlay')?.classList.contains('open');
+    const telaFechada  = document.getElementById('tela-conta-fechada')?.style.display === 'flex';
+    if (!drawerAberto && !modalAberto && !lightboxAberto && !telaFechada) {
+      mostrarSlides();
+    }
+  }, 30000);
+}
+
+function iniciarTimerInatividade() { resetarTimerInatividade(); }
+function cancelarTimerInatividade() { clearTimeout(_inativoTimer); }
+
+// Reseta o timer a cada toque/clique/scroll do usuário
+['touchstart', 'click', 'scroll'].forEach(ev => {
+  document.addEventListener(ev, () => resetarTimerInatividade(), { passive: true });
+});
+
+// Inicia imediatamente ao carregar a página
+resetarTimerInatividade();
+
+// ── Lembrete carrinho não enviado ──
+let _lembreteTimer = null;
+let _lembreteOculto = false;
+
+function iniciarLembrete() {
+  clearTimeout(_lembreteTimer);
+  _lembreteTimer = setTimeout(() => {
+    const qtd = Object.values(carrinho).reduce((s, i) => s + i.qty, 0);
+    const drawerEl = document.getElementById('drawer'); const drawerAberto = drawerEl && drawerEl.classList.contains('open');
+    if (qtd > 0 && !drawerAberto && !_lembreteOculto) {
+      const el = document.getElementById('lembrete-carrinho');
+      el.style.display = 'flex';
+      requestAnimationFrame(() => el.classList.add('show'));
+    }
+  }, 10000);
+}
+
+function ocultarLembrete() {
+  const el = document.getElementById('lembrete-carrinho');
+  el.classList.remove('show');
+  _lembreteOculto = true;
+  setTimeout(() => { el.style.display = 'none'; }, 320);
+  clearTimeout(_lembreteTimer);
+}
+
+function resetarLembrete() {
+  clearTimeout(_lembreteTimer);
+  _lembreteOculto = false;
+  const el = document.getElementById('lembrete-carrinho');
+  if (el) { el.classList.remove('show'); setTimeout(() => { el.style.display = 'none'; }, 320); }
+}
+
+function abrirLightbox(src, alt) {
+  const overlay = document.getElementById('lightbox-overlay');
+  const img = document.getElementById('lightbox-img');
+  img.src = src;
+  img.alt = alt || '';
+  overlay.classList.add('open');
+}
+function fecharLightbox() {
+  document.getElementById('lightbox-overlay').classList.remove('open');
+  document.getElementById('lightbox-img').src = '';
+}
+document.addEventListener('keydown', function(e) {
+  if (e.key === 'Escape') fecharLightbox();
+});
+
+// Fix para 100vh no Android — define variável CSS com a altura real do viewport
+function setRealVH() {
+  const vh = window.innerHeight;
+  document.querySelector('.layout').style.height = vh + 'px';
+}
+setRealVH();
+window.addEventListener('resize', setRealVH);
+
+// ── Polling de atualização do catálogo ─────────────────────────────────────
+// Recarrega apenas se o catálogo mudou E o carrinho está vazio.
+(function() {
+  const POLL_INTERVAL = 30000; // 30 segundos
+  let currentVersion = CATALOG_VERSION_INICIAL;
+
+  function carrinhoEstaVazio() {
+    return Object.keys(carrinho).length === 0;
+  }
+
+  function verificarVersao() {
+    fetch(CATALOG_VERSION_URL, { cache: 'no-store' })
+      .then(function(r) { return r.json(); })
+      .then(function(data) {
+        if (data.version && data.version !== currentVersion) {
+          if (carrinhoEstaVazio()) {
+            location.reload();
+          }
+          // Se carrinho não está vazio, armazena a nova versão para
+          // que na próxima verificação (após o pedido ser enviado) recarregue.
+          currentVersion = data.version;
+        }
+      })
+      .catch(function() { /* ignora erros de rede silenciosamente */ });
+  }
+
+  setInterval(verificarVersao, POLL_INTERVAL);
+})();
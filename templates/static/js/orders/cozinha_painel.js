@@ -0,0 +1,347 @@
+/**
+ * Painel da cozinha (orders/cozinha_painel.html): polling dos pedidos,
+ * timers, mudança de status, impressão e registro do service worker.
+ * API_URL e CSRF vêm do bloco de configuração inline do template.
+ */
+
+const FLASK_BRIDGE = 'https://localhost:5001/print';
+
+// ── Timers dos cards ─────────────────────────────────────────────────────
+function atualizarTimers() {
+  const now = Math.floor(Date.now() / 1000);
+  document.querySelectorAll('[data-ts]').forEach(el => {
+    const diff = Math.max(0, now - parseInt(el.dataset.ts));
+    const h   = Math.floor(diff / 3600);
+    const min = Math.floor((diff % 3600) / 60);
+    const sec = diff % 60;
+    el.textContent = h > 0
+      ? `${String(h).padStart(2,'0')}:${String(min).padStart(2,'0')}:${String(sec).padStart(2,'0')}`
+      : `${String(min).padStart(2,'0')}:${String(sec).padStart(2,'0')}`;
+    // Alerta visual: fundo vermelho se > 15 min em produção
+    const wrap = document.getElementById('timer-wrap-' + el.id.replace('timer-', ''));
+    if (wrap) {
+      if (diff > 900 && el.closest('.card.producao')) {
+        wrap.classList.add('alerta');
+      } else {
+        wrap.classList.remove('alerta');
+      }
+    }
+  });
+}
+setInterval(atualizarTimers, 1000);
+atualizarTimers();
+
+// ── Relógio ──────────────────────────────────────────────────────────────
+function atualizarRelogio() {
+  const agora = new Date();
+  document.getElementById('clock').textContent =
+    agora.toLocaleTimeString('pt-BR', {hour:'2-digit', minute:'2-digit', second:'2-digit'});
+}
+setInterval(atualizarRelogio, 1000);
+atualizarRelogio();
+
+// ── Toast ────────────────────────────────────────────────────────────────
+function mostrarToast(msg, cor = '#16a34a') {
+  const t = document.getElementById('toast');
+  t.textContent = msg;
+  t.style.background = cor;
+  t.classList.add('show');
+  setTimeout(() => t.classList.remove('show'), 3000);
+}
+
+// ── Renderizar card (retângulo horizontal) ───────────────────────────────
+function renderCard(p) {
+  const isNovo = !p.impresso;
+  const cls    = isNovo ? 'novo' : 'producao';
+  const statusLabel = isNovo ? 'Novo' : 'Em Produção';
+
+  const itensHtml = p.itens_cozinha.map(i => `
+    <div class="item-row">
+      <div class="item-qty">${i.qty}x</div>
+      <div class="item-info">
+        <div class="item-nome">${i.nome}</div>
+        ${i.obs ? `<div class="item-obs">📝 ${i.obs.replace(/ \(R\$[\d.,]+\)/g, '')}</div>` : ''}
+      </div>
+    </div>
+  `).join('');
+
+  const obsHtml = p.observations
+    ? `<div class="obs-geral">⚠️ ${p.observations}</div>`
+    : '';
+
+  const btnLabel = isNovo ? 'Imprimir' : 'Reimprimir';
+  const btnHtml = `<button class="btn-imprimir" onclick="imprimirPedido(${p.id}, '${p.imprimir_url}', this)">
+         <svg fill="none" stroke="currentColor" stroke-width="2" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" d="M6 9V2h12v7M6 18H4a2 2 0 0 1-2-2v-5a2 2 0 0 1 2-2h16a2 2 0 0 1 2 2v5a2 2 0 0 1-2 2h-2M6 14h12v8H6z"/></svg>
+         ${btnLabel}
+       </button>`;
+
+  return `
+    <div class="card ${cls}" id="card-${p.id}" data-impresso="${p.impresso}" data-status="${p.status}">
+
+      <!-- COL ID -->
+      <div class="col-id">
+        <span class="card-status">${statusLabel}</span>
+        <span class="card-seq">${p.pedido_seq}</span>
+        <div class="card-mesa">
+          <small>Mesa/Comanda</small>
+          ${p.cliente_nome || p.comanda_numero}
+        </div>
+        <div class="card-time">${p.created_at}</div>
+      </div>
+
+      <!-- COL TIMER -->
+      <div class="col-timer">
+        <div class="card-timer-wrap" id="timer-wrap-${p.id}">
+          <div class="card-timer" id="timer-${p.id}" data-ts="${p.created_at_ts}">00:00</div>
+          <div class="card-timer-label">em preparo</div>
+        </div>
+      </div>
+
+      <!-- COL ITENS -->
+      <div class="col-itens">
+        ${itensHtml}
+        ${obsHtml}
+      </div>
+
+      <!-- COL AÇÃO -->
+      <div class="col-acao">
+        ${btnHtml}
+      </div>
+
+    </div>
+  `;
+}
+
+// ── Reordenar cards: novos (vermelho) sempre acima de produção (amarelo) ───
+function reordenarCards() {
+  const lista = document.getElementById('grid-pedidos');
+  const cards = Array.from(lista.querySelectorAll('.card'));
+  if (cards.length < 2) return;
+
+  const novos    = cards.filter(c => c.classList.contains('novo'));
+  const producao = cards.filter(c => c.classList.contains('producao'));
+
+  // Verificar se a ordem já está correta
+  const expected = [...novos, ...producao];
+  const needsSort = cards.some((c, i) => c !== expected[i]);
+  if (!needsSort) return;
+
+  // Animar cards de produção que vão mover (fade out → move → fade in)
+  producao.forEach(card => {
+    card.style.transition = 'opacity 0.25s, transform 0.25s';
+    card.style.opacity = '0.3';
+    card.style.transform = 'translateY(-6px)';
+  });
+
+  setTimeout(() => {
+    expected.forEach(card => lista.appendChild(card));
+    producao.forEach(card => {
+      card.style.opacity = '1';
+      card.style.transform = 'translateY(0)';
+    });
+  }, 250);
+}
+
+// ── Polling ──────────────────────────────────────────────────────────────
+let estadoAtual = {};
+let primeiroLoad = true;
+let bipeInterval = null;
+
+// ── Bipe (Web Audio API) ──────────────────────────────────────────────────
+function tocarBipe() {
+  try {
+    const ctx = new (window.AudioContext || window.webkitAudioContext)();
+    const dur = 1.8;
+    // Campainha de mesa: fundamental + parcial harmônico
+    [[1318, 0.5], [2637, 0.25], [3956, 0.1]].forEach(([freq, vol]) => {
+      const osc  = ctx.createOscillator();
+      const gain = ctx.createGain();
+      osc.connect(gain);
+      gain.connect(ctx.destination);
+      osc.type = 'sine';
+      osc.frequency.setValueAtTime(freq, ctx.currentTime);
+      gain.gain.setValueAtTime(vol, ctx.currentTime);
+      gain.gain.exponentialRampToValueAtTime(0.0001, ctx.currentTime + dur);
+      osc.start(ctx.currentTime);
+      osc.stop(ctx.currentTime + dur);
+    });
+    setTimeout(() => ctx.close(), (dur + 0.1) * 1000);
+  } catch(e) { /* browser bloqueou autoplay */ }
+}
+
+function iniciarBipe() {
+  if (bipeInterval) return;
+  tocarBipe();
+  bipeInterval = setInterval(tocarBipe, 5000);
+}
+
+function pararBipe() {
+  if (bipeInterval) {
+    clearInterval(bipeInterval);
+    bipeInterval = null;
+  }
+}
+
+async function atualizarPainel() {
+  try {
+    const resp = await fetch(API_URL, {headers: {'X-Requested-With': 'XMLHttpRequest'}});
+    const data = await resp.json();
+    const pedidos = data.pedidos;
+    const lista = document.getElementById('grid-pedidos');
+    const idsAtivos = new Set(pedidos.map(p => p.id));
+
+    // Detectar novos
+    if (!primeiroLoad) {
+      for (const p of pedidos) {
+        if (!p.impresso && !estadoAtual[p.id]) {
+          mostrarToast('🔴 Novo pedido chegou!', '#dc2626');
+          break;
+        }
+      }
+    }
+
+    // Badge de novos + bipe
+    const qtdNovos = pedidos.filter(p => !p.impresso).length;
+    const badge = document.getElementById('badge-novos');
+    if (qtdNovos > 0) {
+      badge.textContent = `🔴 ${qtdNovos} novo${qtdNovos > 1 ? 's' : ''}`;
+      badge.classList.add('visible');
+      iniciarBipe();
+    } else {
+      badge.classList.remove('visible');
+      pararBipe();
+    }
+
+    // Remover cards que saíram
+    for (const idStr of Object.keys(estadoAtual)) {
+      const id = parseInt(idStr);
+      if (!idsAtivos.has(id)) {
+        const el = document.getElementById(`card-${id}`);
+        if (el) {
+          el.style.transition = 'opacity 0.4s, transform 0.4s';
+          el.style.opacity = '0';
+          el.style.transform = 'translateX(20px)';
+          setTimeout(() => el.remove(), 400);
+        }
+        delete estadoAtual[id];
+      }
+    }
+
+    // Inserir / atualizar cards
+    for (const p of pedidos) {
+      const prev = estadoAtual[p.id];
+      const changed = !prev || prev.impresso !== p.impresso || prev.status !== p.status;
+
+      if (changed) {
+        const html = renderCard(p);
+        const existing = document.getElementById(`card-${p.id}`);
+        if (existing) {
+          existing.outerHTML = html;
+        } else {
+          const tmp = document.createElement('div');
+          tmp.innerHTML = html;
+          const newCard = tmp.firstElementChild;
+          newCard.style.opacity = '0';
+          newCard.style.transform = 'translateX(-20px)';
+          const empty = lista.querySelector('.empty');
+          if (empty) empty.remove();
+          lista.prepend(newCard);
+          requestAnimationFrame(() => {
+            newCard.style.transition = 'opacity 0.35s, transform 0.35s';
+            newCard.style.opacity = '1';
+            newCard.style.transform = 'translateX(0)';
+          });
+        }
+        estadoAtual[p.id] = {impresso: p.impresso, status: p.status};
+      }
+    }
+
+    // Empty state
+    if (pedidos.length === 0 && !lista.querySelector('.card')) {
+      lista.innerHTML = `
+        <div class="empty">
+          <div class="empty-icon">✅</div>
+          <div class="empty-text">Sem pedidos no momento</div>
+          <div class="empty-sub">Aguardando novos pedidos da cozinha...</div>
+        </div>`;
+      estadoAtual = {};
+    }
+
+    // Garantir que novos (vermelho) aparecem acima de produção (amarelo)
+    reordenarCards();
+
+    primeiroLoad = false;
+  } catch(e) {
+    console.error('Erro ao atualizar painel:', e);
+  }
+}
+
+// ── Imprimir ─────────────────────────────────────────────────────────────
+const SVG_PRINTER = `<svg fill="none" stroke="currentColor" stroke-width="2" viewBox="0 0 24 24"><path stroke-linecap="round" stroke-linejoin="round" d="M6 9V2h12v7M6 18H4a2 2 0 0 1-2-2v-5a2 2 0 0 1 2-2h16a2 2 0 0 1 2 2v5a2 2 0 0 1-2 2h-2M6 14h12v8H6z"/></svg>`;
+
+async function imprimirPedido(id, url, btn) {
+  const labelOriginal = btn.innerHTML;
+  btn.disabled = true;
+  btn.innerHTML = '<svg class="animate-spin" style="width:20px;height:20px;animation:spin 1s linear infinite" fill="none" viewBox="0 0 24 24"><circle style="opacity:.25" cx="12" cy="12" r="10" stroke="currentColor" stroke-width="4"></circle><path style="opacity:.75" fill="currentColor" d="M4 12a8 8 0 018-8v8H4z"></path></svg>';
+
+  try {
+    // 1. Buscar conteúdo de impressão no backend
+    const resp = await fetch(url, {headers: {'X-Requested-With': 'XMLHttpRequest'}});
+    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+    const data = await resp.json();
+
+    if (data.type === 'rawbt') {
+      // Mobile: marca como impresso ANTES de navegar (após o redirect o JS para)
+      await fetch(`/orders/cozinha/pedido/${id}/marcar-impresso/`, {
+        method: 'POST',
+        headers: {'X-CSRFToken': CSRF, 'Content-Type': 'application/json'},
+      });
+      mostrarToast('✅ Pedido enviado para produção!');
+      const _a = document.createElement('a'); _a.href = data.intent_url; document.body.appendChild(_a); _a.click(); document.body.removeChild(_a);
+      btn.innerHTML = labelOriginal;
+      btn.disabled = false;
+      return;
+    }
+
+    if (data.content_text) {
+      // Desktop: Flask bridge local
+      const bridgeResp = await fetch(FLASK_BRIDGE, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({content: data.content_text})
+      });
+      const bridgeData = await bridgeResp.json();
+      if (!bridgeData.success) {
+        throw new Error('Bridge retornou falha: ' + JSON.stringify(bridgeData));
+      }
+    }
+
+    // 2. Só marca como impresso se impressão foi bem-sucedida
+    await fetch(`/orders/cozinha/pedido/${id}/marcar-impresso/`, {
+      method: 'POST',
+      headers: {'X-CSRFToken': CSRF, 'Content-Type': 'application/json'},
+    });
+
+    mostrarToast('✅ Pedido enviado para produção!');
+    await atualizarPainel();
+
+  } catch(e) {
+    console.error('Erro ao imprimir:', e);
+    mostrarToast('❌ Erro ao imprimir — verifique a impressora', '#dc2626');
+    btn.disabled = false;
+    btn.innerHTML = labelOriginal;
+  }
+}
+
+// ── Iniciar ──────────────────────────────────────────────────────────────
+atualizarPainel();
+setInterval(atualizarPainel, 5000);
+
+// ── Registro do Service Worker (PWA) ─────────────────────────────────────
+if ('serviceWorker' in navigator) {
+  window.addEventListener('load', function() {
+    navigator.serviceWorker.register('/sw.js', { scope: '/' })
+      .then(function(reg) { console.log('SW cozinha registrado', reg.scope); })
+      .catch(function(err) { console.error('SW erro:', err); });
+  });
+}
@@ -1,14 +1,261 @@
+// Service Worker dos PWAs do kiosk e da cozinha.
+//
+// Servido por core.urls.service_worker_view, que troca os marcadores abaixo
+// pela versão e pela lista de estáticos (com hash do manifest) — cada deploy
+// gera um SW novo e descarta o cache de estáticos antigo.
+//
+// - /static/: pré-cache na instalação; nomes com hash (imutáveis) são cache-first,
+//   os demais (DEBUG, sem manifest) stale-while-revalidate.
+// - Imagens (/media/ e R2): stale-while-revalidate no cache do catálogo.
+// - Páginas do kiosk e da cozinha, API da cozinha: rede primeiro, cache se cair.
+// - O cache do catálogo é descartado quando /kiosk/api/catalog-version/ muda.
+// - POST de enviar pedido sem rede: fica numa fila (IndexedDB) com a
+//   Idempotency-Key do kiosk e é reenviado quando a conexão volta; o servidor
+//   ignora o reenvio de uma chave já gravada. Envios com mais de
+//   VALIDADE_FILA_MS não são reenviados (a mesa pode já ter sido fechada e
+//   paga): saem da fila e as páginas abertas recebem 'pedidos-descartados'.
+// - Qualquer outra requisição passa direto para a rede.
+
+const VERSAO = /*VERSAO*/'dev';
+const PRECACHE = /*PRECACHE*/[];
+
+const CACHE_ESTATICO = 'estatico-' + VERSAO;
+const CACHE_CATALOGO = 'catalogo';
+const CACHE_PAGINAS = 'paginas';
+const CHAVE_VERSAO_CATALOGO = '/__sw/catalog-version';
+const TIMEOUT_REDE_MS = 4000;
+const VALIDADE_FILA_MS = 5 * 60 * 1000;
 
-// Dummy Service Worker to satisfy PWA requirements
 self.addEventListener('install', function(event) {
-  self.skipWaiting();
+  event.waitUntil(
+    caches.open(CACHE_ESTATICO)
+      .then(function(cache) { return cache.addAll(PRECACHE); })
+      .then(function() { return self.skipWaiting(); })
+  );
 });
 
 self.addEventListener('activate', function(event) {
-  event.waitUntil(clients.claim());
+  event.waitUntil(
+    caches.keys()
+      .then(function(nomes) {
+        return Promise.all(nomes
+          .filter(function(n) { return n.indexOf('estatico-') === 0 && n !== CACHE_ESTATICO; })
+          .map(function(n) { return caches.delete(n); }));
+      })
+      .then(function() { return self.clients.claim(); })
+  );
+});
+
+// ── Estratégias ─────────────────────────────────────────────────────────────
+
+function cacheFirst(request) {
+  return caches.open(CACHE_ESTATICO).then(function(cache) {
+    return cache.match(request).then(function(hit) {
+      if (hit) return hit;
+      return fetch(request).then(function(resp) {
+        if (resp.ok) cache.put(request, resp.clone());
+        return resp;
+      });
+    });
+  });
+}
+
+function staleWhileRevalidate(request, nomeCache) {
+  return caches.open(nomeCache).then(function(cache) {
+    return cache.match(request).then(function(hit) {
+      const rede = fetch(request).then(function(resp) {
+        // Imagens do R2 sem CORS chegam como opaque (status 0) e ainda servem
+        if (resp.ok || resp.type === 'opaque') cache.put(request, resp.clone());
+        return resp;
+      });
+      if (hit) {
+        rede.catch(function() {});
+        return hit;
+      }
+      return rede;
+    });
+  });
+}
+
+function networkFirst(request, nomeCache) {
+  return caches.open(nomeCache).then(function(cache) {
+    const rede = fetch(request).then(function(resp) {
+      if (resp.ok) cache.put(request, resp.clone());
+      return resp;
+    });
+    const limite = new Promise(function(_, rejeitar) {
+      setTimeout(function() { rejeitar(new Error('timeout')); }, TIMEOUT_REDE_MS);
+    });
+    return Promise.race([rede, limite]).catch(function() {
+      return cache.match(request).then(function(hit) { return hit || rede; });
+    });
+  });
+}
+
+// Versão do catálogo: mudou → descarta imagens e páginas do kiosk em cache
+function versaoCatalogo(request) {
+  return fetch(request).then(function(resp) {
+    resp.clone().json().then(function(data) {
+      if (!data || !data.version) return;
+      return caches.open(CACHE_PAGINAS).then(function(paginas) {
+        return paginas.match(CHAVE_VERSAO_CATALOGO).then(function(anterior) {
+          return (anterior ? anterior.text() : Promise.resolve('')).then(function(v) {
+            if (v === data.version) return;
+            return Promise.all([
+              caches.delete(CACHE_CATALOGO),
+              paginas.keys().then(function(reqs) {
+                return Promise.all(reqs
+                  .filter(function(r) { return new URL(r.url).pathname.indexOf('/kiosk/') === 0; })
+                  .map(function(r) { return paginas.delete(r); }));
+              }),
+            ]).then(function() {
+              return paginas.put(CHAVE_VERSAO_CATALOGO, new Response(data.version));
+            });
+          });
+        });
+      });
+    }).catch(function() {});
+    return resp;
+  });
+}
+
+// ── Fila de pedidos offline (IndexedDB) ─────────────────────────────────────
+
+function abrirFila() {
+  return new Promise(function(resolver, rejeitar) {
+    const req = indexedDB.open('kiosk-fila', 1);
+    req.onupgradeneeded = function() { req.result.createObjectStore('pedidos', { keyPath: 'chave' }); };
+    req.onsuccess = function() { resolver(req.result); };
+    req.onerror = function() { rejeitar(req.error); };
+  });
+}
+
+function operarFila(modo, operacao) {
+  return abrirFila().then(function(db) {
+    return new Promise(function(resolver, rejeitar) {
+      const tx = db.transaction('pedidos', modo);
+      const req = operacao(tx.objectStore('pedidos'));
+      tx.oncomplete = function() { resolver(req && req.result); };
+      tx.onerror = function() { rejeitar(tx.error); };
+    });
+  });
+}
+
+function enfileirar(request, corpo) {
+  const headers = {};
+  request.headers.forEach(function(valor, nome) { headers[nome] = valor; });
+  const chave = headers['idempotency-key'];
+  return operarFila('readwrite', function(store) {
+    return store.put({ chave: chave, url: request.url, headers: headers, corpo: corpo, criado: Date.now() });
+  }).then(function() {
+    if (self.registration.sync) self.registration.sync.register('fila-pedidos').catch(function() {});
+    return new Response(JSON.stringify({ ok: true, enfileirado: true, chave: chave }), {
+      status: 202, headers: { 'Content-Type': 'application/json' },
+    });
+  });
+}
+
+function vencido(item) {
+  return !item.criado || Date.now() - item.criado > VALIDADE_FILA_MS;
+}
+
+// Tira os envios da fila sem reenviar e avisa as páginas do kiosk
+function descartar(itens) {
+  if (!itens.length) return Promise.resolve();
+  return operarFila('readwrite', function(store) {
+    itens.forEach(function(item) { store.delete(item.chave); });
+  }).then(function() {
+    return self.clients.matchAll({ type: 'window', includeUncontrolled: true });
+  }).then(function(clientes) {
+    const pedidos = itens.map(function(item) {
+      return { chave: item.chave, url: item.url, criado: item.criado };
+    });
+    clientes.forEach(function(cliente) {
+      cliente.postMessage({ tipo: 'pedidos-descartados', pedidos: pedidos });
+    });
+  });
+}
+
+let reenviando = null;
+
+function reenviarFila() {
+  if (reenviando) return reenviando;
+  reenviando = operarFila('readonly', function(store) { return store.getAll(); })
+    .then(function(itens) {
+      itens.sort(function(a, b) { return a.criado - b.criado; });
+      return descartar(itens.filter(vencido)).then(function() {
+        return itens.filter(function(item) { return !vencido(item); });
+      });
+    })
+    .then(function(itens) {
+      // Em ordem; para no primeiro erro de rede (continua sem conexão)
+      return itens.reduce(function(anterior, item) {
+        return anterior.then(function() {
+          // Venceu enquanto os anteriores eram reenviados
+          if (vencido(item)) return descartar([item]);
+          return fetch(item.url, {
+            method: 'POST', headers: item.headers, body: item.corpo, credentials: 'same-origin',
+          }).then(function(resp) {
+            // 5xx: tenta de novo depois; 2xx/4xx: resolvido (4xx não melhora com reenvio)
+            if (resp.status >= 500) throw new Error('HTTP ' + resp.status);
+            return operarFila('readwrite', function(store) { return store.delete(item.chave); });
+          });
+        });
+      }, Promise.resolve());
+    })
+    .catch(function() {})
+    .then(function() { reenviando = null; });
+  return reenviando;
+}
+
+function enviarPedido(request) {
+  const copia = request.clone();
+  return fetch(request).catch(function() {
+    if (!copia.headers.get('Idempotency-Key')) throw new Error('sem Idempotency-Key');
+    return copia.text().then(function(corpo) { return enfileirar(copia, corpo); });
+  });
+}
+
+self.addEventListener('sync', function(event) {
+  if (event.tag === 'fila-pedidos') event.waitUntil(reenviarFila());
 });
 
+self.addEventListener('message', function(event) {
+  if (event.data === 'reenviar-pedidos') event.waitUntil(reenviarFila());
+});
+
+// ── Roteamento ──────────────────────────────────────────────────────────────
+
+const RE_ENVIAR_PEDIDO = /^\/kiosk\/mesa\/[^/]+\/enviar\/$/;
+// Nome gerado pelo ManifestStaticFilesStorage: arquivo.<12 hex>.ext
+const RE_ESTATICO_HASH = /\.[0-9a-f]{12}\.[^/.]+$/;
+
 self.addEventListener('fetch', function(event) {
-  // Faz o fetch normal (só precisamos do listener pra passar no teste do Chrome)
-  event.respondWith(fetch(event.request));
+  const request = event.request;
+  const url = new URL(request.url);
+  const mesmaOrigem = url.origin === self.location.origin;
+
+  if (request.method === 'POST') {
+    if (mesmaOrigem && RE_ENVIAR_PEDIDO.test(url.pathname)) {
+      event.respondWith(enviarPedido(request));
+    }
+    return;
+  }
+  if (request.method !== 'GET') return;
+
+  if (mesmaOrigem && url.pathname.indexOf('/static/') === 0) {
+    event.respondWith(RE_ESTATICO_HASH.test(url.pathname)
+      ? cacheFirst(request)
+      : staleWhileRevalidate(request, CACHE_ESTATICO));
+  } else if (request.destination === 'image' || (mesmaOrigem && url.pathname.indexOf('/media/') === 0)) {
+    event.respondWith(staleWhileRevalidate(request, CACHE_CATALOGO));
+  } else if (mesmaOrigem && url.pathname === '/kiosk/api/catalog-version/') {
+    event.respondWith(versaoCatalogo(request));
+  } else if (mesmaOrigem && (
+      (request.mode === 'navigate' && (url.pathname.indexOf('/kiosk/') === 0 || url.pathname === '/orders/cozinha/')) ||
+      url.pathname === '/orders/cozinha/api/pedidos/')) {
+    event.respondWith(networkFirst(request, CACHE_PAGINAS));
+    // Aproveita o tráfego do kiosk para esvaziar a fila se a rede voltou
+    if (url.pathname.indexOf('/kiosk/') === 0) event.waitUntil(reenviarFila());
+  }
 });